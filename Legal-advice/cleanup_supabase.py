@@ -1,28 +1,25 @@
-import os
-import re
-
-ROOT_DIRS = ['app', 'components', 'lib']
-
-def fix_file(filepath):
-    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-        content = f.read()
-
-    original = content
+from codemod import main, rule
+from codemod.ruletable import RuleTable, Sub
 
+AUTH_CLEANUP = RuleTable([
     # 1. Remove @supabase/supabase-js imports entirely
-    content = re.sub(r"import\s+.*?from\s+['\"]@supabase/supabase-js['\"];?\n?", "", content)
+    Sub(r"import\s+.*?from\s+['\"]@supabase/supabase-js['\"];?\n?", "",
+        needles=['@supabase/supabase-js']),
 
     # 2. Remove @supabase/ssr imports entirely
-    content = re.sub(r"import\s+.*?from\s+['\"]@supabase/ssr['\"];?\n?", "", content)
+    Sub(r"import\s+.*?from\s+['\"]@supabase/ssr['\"];?\n?", "",
+        needles=['@supabase/ssr']),
 
     # 3. Fix: components that still use supabase .channel (realtime) - remove those blocks
-    content = re.sub(r"channel\s*=\s*supabase\s*\.\s*channel\([^)]+\)[\s\S]*?\.subscribe\(\);?", "", content)
-    content = re.sub(r"supabase\.removeChannel\([^)]+\);?", "", content)
+    Sub(r"channel\s*=\s*supabase\s*\.\s*channel\([^)]+\)[\s\S]*?\.subscribe\(\);?", "",
+        needles=['channel(']),
+    Sub(r"supabase\.removeChannel\([^)]+\);?", "",
+        needles=['supabase.removeChannel(']),
 
     # 4. Fix auth/signup files that still call supabase.auth.signUp, signIn, etc.
     # These will be replaced by fetch('/api/auth/signup') patterns
     # Check for supabase.auth.signUp calls
-    content = re.sub(
+    Sub(
         r"const\s*\{[^}]*\}\s*=\s*await\s+supabase\.auth\.signUp\(([^)]+)\);?",
         r"""const signUpRes = await fetch('/api/auth/signup', {
         method: 'POST',
@@ -31,42 +28,58 @@ def fix_file(filepath):
       });
       const signUpData = await signUpRes.json();
       const { error } = signUpData;""",
-        content
-    )
+        needles=['supabase.auth.signUp(']
+    ),
 
     # 5. Remove any remaining bare references to `supabase.auth.signIn` etc.
     # These are stale calls not yet cleaned by the auth migration script
-    content = re.sub(
+    Sub(
         r"const\s*\{\s*(?:data\s*,\s*)?error\s*\}\s*=\s*await\s+supabase\.auth\.signInWithPassword\([^)]+\);?",
         """const { error } = { error: 'Use NextAuth signIn() instead' }; // TODO: migrate to signIn from next-auth/react""",
-        content
-    )
+        needles=['supabase.auth.signInWithPassword(']
+    ),
 
     # 6. Fix files that use `supabase.auth.signOut()` (should be using NextAuth signOut)  
-    content = re.sub(
+    Sub(
         r"await\s+supabase\.auth\.signOut\(\);?",
         "// supabase.auth.signOut migrated to NextAuth signOut()",
-        content
-    )
+        needles=['supabase.auth.signOut()']
+    ),
 
     # 7. Fix files that use `supabase.auth.resetPasswordForEmail` / other auth methods
-    content = re.sub(
+    Sub(
         r"await\s+supabase\.auth\.[a-zA-Z]+\([^)]*\);?",
         "// supabase.auth call removed - use NextAuth API",
-        content
-    )
+        needles=['supabase.auth.']
+    ),
 
     # 8. Fix remaining `supabase.auth.getUser()` patterns (already handled mostly, but just in case)
-    content = re.sub(
+    Sub(
         r"const\s*\{\s*data:\s*\{\s*user\s*\}\s*,?\s*\}\s*=\s*await\s+supabase\.auth\.getUser\(\);?",
         "const session = await auth();\n  const user = session?.user;",
-        content
-    )
-    content = re.sub(
+        needles=['supabase.auth.getUser()']
+    ),
+    Sub(
         r"\(await supabase\.auth\.getUser\(\)\)\.data\.user",
         "(await auth())?.user",
-        content
-    )
+        needles=['(await supabase.auth.getUser()).data.user']
+    ),
+])
+
+CLIENT_CLEANUP = RuleTable([
+    # 10. Remove createClient calls that are only used for auth (not data fetching)
+    Sub(
+        r"const\s+supabase\s*=\s*(?:await\s+)?createClient\(\);\s*\n(?!\s*(?:const|let|await)\s+(?:\{|supabase\.))",
+        "",
+        needles=['createClient();']
+    ),
+])
+
+
+@rule('cleanup_supabase', needles=AUTH_CLEANUP.needles | CLIENT_CLEANUP.needles | {'@supabase'})
+def fix_file(content, filepath):
+    # 1-8. Remove supabase imports, realtime channels and supabase.auth calls
+    content = AUTH_CLEANUP.apply(content)
 
     # 9. Fix auth callback route (Supabase OAuth callback is no longer used)
     # Remove the entire callback file content if it's just handling Supabase auth
@@ -79,29 +92,11 @@ export async function GET(request: Request) {
 }
 """
 
-    # 10. Remove createClient calls that are only used for auth (not data fetching)
-    content = re.sub(
-        r"const\s+supabase\s*=\s*(?:await\s+)?createClient\(\);\s*\n(?!\s*(?:const|let|await)\s+(?:\{|supabase\.))",
-        "",
-        content
-    )
-
-    if content != original:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
-        return True
-    return False
-
-changed = 0
-for d in ROOT_DIRS:
-    for root, dirs, files in os.walk(d):
-        # Skip node_modules and .next
-        dirs[:] = [x for x in dirs if x not in ('node_modules', '.next', 'generated')]
-        for fname in files:
-            if fname.endswith(('.ts', '.tsx')):
-                fp = os.path.join(root, fname)
-                if fix_file(fp):
-                    print(f"  Fixed: {fp}")
-                    changed += 1
-
-print(f"\nTotal files modified: {changed}")
+    # 10. Drop auth-only createClient calls
+    content = CLIENT_CLEANUP.apply(content)
+
+    return content
+
+
+if __name__ == '__main__':
+    main(['cleanup_supabase'])
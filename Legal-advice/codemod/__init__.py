@@ -0,0 +1,4 @@
+from .engine import RULES, Rule, load_rules, rule, run
+from .cli import main
+
+__all__ = ['RULES', 'Rule', 'load_rules', 'main', 'rule', 'run']
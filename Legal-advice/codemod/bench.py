@@ -0,0 +1,142 @@
+"""
+Benchmark harness: per-rule wall time, peak RSS and files/sec on synthetic trees.
+
+    python -m codemod.bench                          # 1x, 10x, 100x, every rule
+    python -m codemod.bench --scales 1,10 --rules smart_inject,definitive_fix
+    python -m codemod.bench --json now.json --compare before.json
+
+For each scale a corpus is generated with codemod.corpus, then each rule (and
+the whole chain, as "all") runs over it in a fresh interpreter so peak RSS is
+that run's own. Runs are read-only (write=False, no cache), so every rule sees
+the same pristine tree. Wall time covers the walk, reads and the rules, not
+interpreter start-up.
+
+With --compare, rows whose files/sec dropped by more than --threshold against
+an earlier --json run are flagged and the exit status is 1.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from . import corpus, engine
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+CHAIN = 'all'
+
+
+def peak_rss_bytes():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def run_one(name, tree):
+    """Child side: time one rule (or the chain) over `tree` and return the stats."""
+    rules = engine.load_rules(None if name == CHAIN else [name])
+    os.chdir(tree)
+    start = time.perf_counter()
+    report = engine.run(rules, root_dirs=engine.ROOT_DIRS, write=False, verbose=False)
+    seconds = time.perf_counter() - start
+    return {
+        'files': report.scanned,
+        'changed': len(report.changed),
+        'seconds': seconds,
+        'peak_rss': peak_rss_bytes(),
+    }
+
+
+def measure(name, tree):
+    """Run `name` over `tree` in a fresh interpreter."""
+    cmd = [sys.executable, '-m', 'codemod.bench', '--run-one', name, tree]
+    out = subprocess.run(cmd, cwd=engine.PROJECT_ROOT, check=True, capture_output=True, text=True).stdout
+    return json.loads(out)
+
+
+def format_rss(value):
+    return '-' if value is None else f"{value / 1024 / 1024:.1f}"
+
+
+def print_rows(scale, files, size, rows, baseline, threshold):
+    print(f"\nScale {scale:g}x: {files} files, {size / 1024 / 1024:.1f} MiB")
+    width = max(len(name) for name in rows)
+    print(f"{'Rule':<{width}}  {'Wall (s)':>9}  {'Files/s':>9}  {'Peak RSS (MiB)':>14}  {'Changed':>7}  vs baseline")
+    regressions = 0
+    for name, r in rows.items():
+        note = ''
+        old = baseline.get(f"{scale:g}", {}).get(name)
+        if old:
+            change = r['files_per_sec'] / old['files_per_sec'] - 1
+            note = f"{change:+.0%}"
+            if change < -threshold:
+                note += '  REGRESSED'
+                regressions += 1
+        print(f"{name:<{width}}  {r['seconds']:>9.3f}  {r['files_per_sec']:>9.0f}"
+              f"  {format_rss(r['peak_rss']):>14}  {r['changed']:>7}  {note}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='codemod.bench', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', default='1,10,100', help='comma separated corpus sizes (default: %(default)s)')
+    parser.add_argument('--rules', help='comma separated rules (default: every rule, then the whole chain)')
+    parser.add_argument('--seed', type=int, default=1, help='corpus seed (default: %(default)s)')
+    parser.add_argument('--keep', metavar='DIR', help='generate the corpora under DIR and keep them')
+    parser.add_argument('--json', metavar='PATH', help='write the results as JSON')
+    parser.add_argument('--compare', metavar='PATH', help='earlier --json results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='files/sec drop flagged as a regression (default: %(default)s)')
+    parser.add_argument('--run-one', nargs=2, metavar=('RULE', 'TREE'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_one:
+        print(json.dumps(run_one(*args.run_one)))
+        return 0
+
+    names = args.rules.split(',') if args.rules else list(engine.RULE_ORDER) + [CHAIN]
+    scales = [float(s) for s in args.scales.split(',')]
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    work_dir = args.keep or tempfile.mkdtemp(prefix='codemod-bench-')
+    results = {}
+    regressions = 0
+    try:
+        for scale in scales:
+            tree = os.path.join(work_dir, f"x{scale:g}")
+            if os.path.isdir(tree):
+                shutil.rmtree(tree)
+            files, size = corpus.generate(tree, scale, args.seed)
+            rows = {}
+            for name in names:
+                r = measure(name, tree)
+                r['files_per_sec'] = r['files'] / r['seconds'] if r['seconds'] else 0.0
+                rows[name] = r
+            results[f"{scale:g}"] = rows
+            regressions += print_rows(scale, files, size, rows, baseline, args.threshold)
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,72 @@
+"""
+Micro-benchmark: rule tables with the literal prefilter vs. the old raw re.sub passes.
+
+    python -m codemod.bench_ruletable [dirs...] [--repeat N]
+
+Loads every source file once, then times each table's apply() against
+apply_unfiltered() (every pattern over the full text, through re's pattern
+cache, as the scripts used to do). Outputs are compared so a prefilter that
+wrongly skipped a rule shows up as a mismatch.
+"""
+import argparse
+import sys
+import time
+
+from . import engine
+from .ruletable import RuleTable
+
+TABLE_MODULES = ['cleanup_supabase', 'fix_syntax', 'migrate_auth', 'fix_missing_imports']
+
+
+def collect_tables():
+    engine.load_rules(TABLE_MODULES)
+    tables = []
+    for name in TABLE_MODULES:
+        module = sys.modules[name]
+        for attr, value in vars(module).items():
+            if isinstance(value, RuleTable):
+                tables.append((f"{name}.{attr}", value))
+    return tables
+
+
+def time_per_file(func, texts, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            func(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / max(len(texts), 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='codemod.bench_ruletable')
+    parser.add_argument('dirs', nargs='*', default=engine.ROOT_DIRS)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    texts = [engine.read_source(fp) for fp in engine.iter_source_files(args.dirs)]
+    size = sum(len(t) for t in texts)
+    print(f"{len(texts)} files, {size / 1024:.0f} KiB, best of {args.repeat}\n")
+
+    tables = collect_tables()
+    width = max(len(name) for name, _ in tables)
+    print(f"{'Table':<{width}}  {'Subs':>4}  {'Before us/file':>14}  {'After us/file':>13}  {'Speedup':>7}  Output")
+    total_before = total_after = 0.0
+    for name, table in tables:
+        mismatches = sum(table.apply(t) != table.apply_unfiltered(t) for t in texts)
+        before = time_per_file(table.apply_unfiltered, texts, args.repeat)
+        after = time_per_file(table.apply, texts, args.repeat)
+        total_before += before
+        total_after += after
+        status = 'same' if not mismatches else f"{mismatches} DIFFER"
+        print(f"{name:<{width}}  {len(table.subs):>4}  {before * 1e6:>14.1f}  {after * 1e6:>13.1f}"
+              f"  {before / after if after else 0:>6.1f}x  {status}")
+    print(f"\n{'Total':<{width}}  {'':>4}  {total_before * 1e6:>14.1f}  {total_after * 1e6:>13.1f}"
+          f"  {total_before / total_after if total_after else 0:>6.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
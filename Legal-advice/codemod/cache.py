@@ -0,0 +1,140 @@
+"""
+Persistent incremental cache for codemod runs.
+
+A file is skipped when the current rule set has already been run over its
+exact content without changing it. Entries are keyed by the rule-set
+version, a hash of the chain order plus the source of every module that
+registers a rule and of every codemod module those import (tslex, ruletable,
+...), so editing a rule or a helper it calls invalidates the cache
+automatically. Rules that resolve names through the symbol index
+(codemod.symbols) also fold in what the index resolves each name to, so a new
+export makes them revisit files they left alone.
+
+Per path we keep the stat signature (size, mtime) next to the content hash:
+an unchanged stat skips the file without opening it, a changed stat with
+identical content just refreshes the signature.
+"""
+import hashlib
+import json
+import os
+import sys
+import time
+import types
+
+CACHE_FILE = '.codemod-cache.json'
+CACHE_FORMAT = 1
+# Rule sets remembered at once (each script run uses its own chain)
+MAX_VERSIONS = 16
+# mtimes this close to "now" may still change within the same tick
+RACY_WINDOW_NS = 2 * 10**9
+
+
+def content_hash(content):
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+PACKAGE = __name__.rsplit('.', 1)[0]
+
+
+def _module_source_hash(module_name):
+    module = sys.modules.get(module_name)
+    path = getattr(module, '__file__', None)
+    if not path:
+        return ''
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _dependencies(module_name):
+    """(modules, uses the symbol index): `module_name` and every module of this
+    package it imports, transitively, as found in the loaded modules' globals."""
+    symbols = sys.modules.get(PACKAGE + '.symbols')
+    index_refs = (symbols, getattr(symbols, 'get_index', None)) if symbols else ()
+    seen, uses_index = set(), False
+    todo = [module_name]
+    while todo:
+        name = todo.pop()
+        if name in seen or name not in sys.modules:
+            continue
+        seen.add(name)
+        for value in vars(sys.modules[name]).values():
+            if any(value is ref for ref in index_refs):
+                uses_index = True
+            dep = value.__name__ if isinstance(value, types.ModuleType) else getattr(value, '__module__', None)
+            if isinstance(dep, str) and dep.startswith(PACKAGE + '.'):
+                todo.append(dep)
+    return seen, uses_index
+
+
+def ruleset_version(rules):
+    h = hashlib.sha1(f"format={CACHE_FORMAT}".encode())
+    engine_module = PACKAGE + '.engine'
+    h.update(_module_source_hash(engine_module).encode())
+    modules = set()
+    for r in rules:
+        deps, uses_index = _dependencies(r.func.__module__)
+        modules |= deps
+        h.update(f"\0{r.name}\0{_module_source_hash(r.func.__module__)}".encode())
+        if uses_index:
+            # a new export can make the rule import a name it left alone before
+            from .symbols import get_index
+            h.update(f"\0index\0{get_index().digest()}".encode())
+    for name in sorted(modules):
+        h.update(f"\0{name}\0{_module_source_hash(name)}".encode())
+    return h.hexdigest()
+
+
+class Cache:
+    def __init__(self, path, version):
+        self.path = path
+        self.version = version
+        self.versions = {}
+        self.entries = {}
+        self.seen = set()
+        self.dirty = False
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        if data.get('format') == CACHE_FORMAT:
+            self.versions = data.get('versions', {})
+        self.entries = self.versions.pop(self.version, {})
+        return self
+
+    def save(self):
+        if not self.dirty:
+            return
+        # Forget files that disappeared since the last run
+        entries = {p: e for p, e in self.entries.items() if p in self.seen}
+        versions = dict(list(self.versions.items())[-(MAX_VERSIONS - 1):])
+        versions[self.version] = entries
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'format': CACHE_FORMAT, 'versions': versions}, f, separators=(',', ':'))
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+    def is_fresh(self, filepath, st):
+        """True if the file is a known no-op and its stat signature is unchanged."""
+        self.seen.add(filepath)
+        entry = self.entries.get(filepath)
+        return entry is not None and entry[0] == st.st_size and entry[1] == st.st_mtime_ns
+
+    def noop_digest(self, filepath):
+        """Content hash recorded as a no-op for this path, if any."""
+        entry = self.entries.get(filepath)
+        return entry[2] if entry is not None else None
+
+    def record_noop(self, filepath, st, digest):
+        mtime = st.st_mtime_ns
+        if time.time_ns() - mtime < RACY_WINDOW_NS:
+            mtime = None  # force a content check next time
+        self.entries[filepath] = [st.st_size, mtime, digest]
+        self.dirty = True
+
+    def forget(self, filepath):
+        if self.entries.pop(filepath, None) is not None:
+            self.dirty = True
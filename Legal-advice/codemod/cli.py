@@ -0,0 +1,143 @@
+"""
+Command line entry point for the codemod engine.
+
+    python -m codemod                       # full rule chain
+    python -m codemod --rules a,b           # selected rules, in the given order
+    python -m codemod --dry-run > fix.patch # preview as a patch, write nothing
+    python -m codemod --from-log tsc_errors.log   # only files with errors, only their rules
+    python -m codemod --fixed-point         # re-run each file's chain until it stops changing
+    python -m codemod --mmap                # byte-level prefilter, decode only files a rule may change
+    python -m codemod --resume              # finish an interrupted run (or --rollback to undo it)
+    python -m codemod diagnostics [LOG ...] # index tsc/build/lint logs and show the --from-log plan
+    python cleanup_supabase.py              # single rule via the script
+"""
+import argparse
+import os
+import sys
+
+from . import diagnostics, engine, writeback
+from .cache import CACHE_FILE, Cache, ruleset_version
+from .patch import PatchWriter
+
+
+def build_parser(default_dirs=engine.ROOT_DIRS):
+    parser = argparse.ArgumentParser(prog='codemod', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('dirs', nargs='*', default=default_dirs,
+                        help='directories to walk (default: %(default)s)')
+    parser.add_argument('--rules', help='comma separated rule chain (default: all, in historical order)')
+    parser.add_argument('--list', action='store_true', help='list the rule chain and exit')
+    parser.add_argument('--cache', default=CACHE_FILE, metavar='PATH',
+                        help='incremental cache file (default: %(default)s)')
+    parser.add_argument('--no-cache', action='store_true', help='process every file, ignoring the cache')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='worker processes (0 = one per CPU, default: %(default)s)')
+    parser.add_argument('-n', '--dry-run', action='store_true',
+                        help="don't write files; stream a unified diff of the changes instead")
+    parser.add_argument('--patch', default='-', metavar='PATH',
+                        help='with --dry-run, write the diff here instead of stdout')
+    parser.add_argument('--summary', metavar='PATH',
+                        help='with --dry-run, write a JSON summary of bytes changed per file')
+    parser.add_argument('-q', '--quiet', action='store_true', help="don't print each fixed file")
+    parser.add_argument('--from-log', action='append', metavar='PATH', nargs='?', const='',
+                        help='tsc/build/lint log to take the files and rules from (repeatable); '
+                             f"without PATH: whichever of {', '.join(diagnostics.DEFAULT_LOGS)} exist")
+    parser.add_argument('--fixed-point', type=int, metavar='N', nargs='?', const=engine.DEFAULT_MAX_PASSES,
+                        default=1, dest='max_passes',
+                        help='run the chain over each file until it changes nothing, at most N passes '
+                             '(default N: %(const)s); reports oscillating rules and passes per file')
+    parser.add_argument('--mmap', action='store_true',
+                        help="memory-map files and look for the rules' needles in the raw bytes; "
+                             'decode only files some rule may change, skip files over --max-size')
+    parser.add_argument('--max-size', type=int, default=engine.MAX_SCAN_BYTES, metavar='BYTES',
+                        help='with --mmap, skip larger files (default: %(default)s)')
+    parser.add_argument('--allow-large', action='append', default=[], metavar='PATTERN',
+                        help='with --mmap, scan files matching this glob whatever their size (repeatable)')
+    parser.add_argument('--journal', default=writeback.JOURNAL_FILE, metavar='PATH',
+                        help='write-back journal; changed files are committed in batches under it '
+                             '(default: %(default)s)')
+    parser.add_argument('--no-journal', action='store_true', help='write each changed file straight away')
+    parser.add_argument('--batch', type=int, default=writeback.BATCH_SIZE, metavar='N',
+                        help='files per write-back batch (default: %(default)s)')
+    parser.add_argument('--io-jobs', type=int, default=1, metavar='N',
+                        help='threads writing each batch (default: %(default)s)')
+    parser.add_argument('--resume', action='store_true',
+                        help='continue the interrupted run in --journal, skipping the files it wrote')
+    parser.add_argument('--rollback', action='store_true',
+                        help='undo the interrupted run in --journal and exit')
+    return parser
+
+
+# `python -m codemod <name> ...`: modules the package imports itself can't be
+# run with -m without runpy warning about it, so they are reached from here
+SUBCOMMANDS = {'diagnostics': diagnostics.main}
+
+
+def main(default_rules=None, argv=None, default_dirs=engine.ROOT_DIRS):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in SUBCOMMANDS:
+        return SUBCOMMANDS[argv[0]](argv[1:])
+    parser = build_parser(default_dirs)
+    args = parser.parse_args(argv)
+    names = args.rules.split(',') if args.rules else default_rules
+    rules = engine.load_rules(names)
+
+    if args.list:
+        for r in rules:
+            print(r.name)
+        return 0
+
+    if args.rollback:
+        restored, kept = writeback.rollback(args.journal)
+        for fp in kept:
+            print(f"  Changed since the run, left as is: {fp}")
+        print(f"Rolled back {len(restored)} files")
+        return 0
+
+    targets = None
+    if args.from_log is not None:
+        logs = [p for p in args.from_log if p] or diagnostics.default_logs()
+        index = diagnostics.load(logs)
+        targets, unrouted = diagnostics.plan(index, [r.name for r in rules], args.dirs)
+        diagnostics.print_plan(targets, unrouted, out=sys.stderr)
+
+    cache = None
+    if not args.no_cache and targets is None:
+        cache = Cache(args.cache, ruleset_version(rules)).load()
+
+    scan = engine.ByteScan(args.max_size, args.allow_large) if args.mmap else None
+    jobs = args.jobs or os.cpu_count() or 1
+    if not args.dry_run:
+        writer = None
+        if not args.no_journal:
+            names = [r.name for r in rules]
+            if args.resume:
+                try:
+                    writer = writeback.WriteBack.resume(args.journal, args.batch, args.io_jobs, names)
+                except ValueError as e:
+                    parser.error(str(e))
+            elif os.path.exists(args.journal):
+                parser.error(f"{args.journal} is left from an interrupted run: use --resume or --rollback")
+            else:
+                writer = writeback.WriteBack(args.journal, args.batch, args.io_jobs, names)
+        report = engine.run(rules, root_dirs=args.dirs, verbose=not args.quiet, cache=cache, jobs=jobs,
+                            targets=targets, max_passes=args.max_passes, scan=scan, writer=writer)
+        engine.print_report(report)
+        return 0
+
+    to_stdout = args.patch == '-'
+    out = sys.stdout if to_stdout else open(args.patch, 'w', encoding='utf-8', newline='')
+    # Keep stdout clean for the patch; progress and the report go to stderr
+    log = sys.stderr if to_stdout else sys.stdout
+    try:
+        patch = PatchWriter(out)
+        report = engine.run(rules, root_dirs=args.dirs, write=False, verbose=not args.quiet,
+                            cache=cache, jobs=jobs, patch=patch, log=log, targets=targets,
+                            max_passes=args.max_passes, scan=scan)
+    finally:
+        if not to_stdout:
+            out.close()
+    if args.summary:
+        patch.write_summary(args.summary)
+    engine.print_report(report, out=log)
+    return 0
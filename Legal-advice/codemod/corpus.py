@@ -0,0 +1,295 @@
+"""
+Synthetic source tree generator for benchmarking the rules.
+
+    python -m codemod.corpus OUT [--scale 10] [--seed 1]
+
+Builds an app/components/lib tree of .ts/.tsx files at a multiple of the real
+project's size, written in the idioms the fix-up scripts target: 'use client'
+components calling createClient(), 'use server' actions returning
+Promise<{ success: boolean; ... }>, async server pages, route handlers and
+supabase.from(...) query chains. The mix of file kinds and their average sizes
+follow the real tree, and part of the files are still on supabase auth so
+the migration rules have something to do. Output is deterministic for a
+given scale and seed.
+"""
+import argparse
+import os
+import random
+
+# Size of app/components/lib when the generator was written; --scale multiplies it
+BASE_FILES = 333
+
+# (kind, share of files, handler blocks per file) - roughly the real tree's mix
+KINDS = [
+    ('client', 0.56, (8, 28)),
+    ('page', 0.17, (8, 30)),
+    ('component', 0.14, (10, 40)),
+    ('action', 0.05, (10, 30)),
+    ('route', 0.04, (2, 4)),
+    ('lib', 0.04, (10, 40)),
+]
+
+# Share of files that still use supabase auth / createClient
+LEGACY_SHARE = 0.35
+
+ROLES = ['client', 'lawyer', 'firm', 'bank', 'admin', 'platform_admin']
+ENTITIES = ['request', 'opinion', 'case', 'document', 'proposal', 'message',
+            'notification', 'rating', 'department', 'employee', 'clarification', 'audit']
+VERBS = ['approve', 'reject', 'assign', 'archive', 'submit', 'update', 'review', 'close']
+STATUSES = ['pending', 'approved', 'rejected', 'in_review', 'completed', 'archived']
+COLUMNS = ['title', 'status', 'created_at', 'updated_at', 'assigned_to', 'priority',
+           'description', 'client_id', 'lawyer_id', 'firm_id', 'amount', 'due_date']
+
+
+def camel(*words):
+    return words[0] + ''.join(w.title().replace('_', '') for w in words[1:])
+
+
+def pascal(*words):
+    return ''.join(w.title().replace('_', '') for w in words)
+
+
+class Generator:
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+
+    def pick(self, seq):
+        return self.rng.choice(seq)
+
+    def columns(self):
+        return ', '.join(self.rng.sample(COLUMNS, self.rng.randint(2, 5)))
+
+    def select_chain(self, table, key, indent, single=False):
+        pad = ' ' * indent
+        lines = [f"{pad}const {{ data, error }} = await supabase",
+                 f"{pad}  .from('{table}')",
+                 f"{pad}  .select('id, {self.columns()}')",
+                 f"{pad}  .eq('{self.pick(COLUMNS)}', {key})"]
+        if single:
+            lines.append(f"{pad}  .single();")
+        else:
+            lines.append(f"{pad}  .order('created_at', {{ ascending: false }});")
+        return '\n'.join(lines)
+
+    def client(self, entity, blocks, legacy):
+        name = pascal(entity, self.pick(['list', 'panel', 'table', 'card', 'modal']))
+        table = entity + 's'
+        out = ["'use client';", "",
+               "import { useState, useEffect } from 'react';",
+               "import { toast } from 'sonner';",
+               "import { createClient } from '@/lib/supabase/client';",
+               "import { Button } from '@/components/ui/button';", "",
+               f"interface {name}Props {{",
+               f"  {entity}Id: string;",
+               "  onChange?: () => void;",
+               "}", "",
+               f"export default function {name}({{ {entity}Id, onChange }}: {name}Props) {{",
+               "  const [rows, setRows] = useState<any[]>([]);",
+               "  const [loading, setLoading] = useState(true);"]
+        # Components that lost their client are what inject_supabase/smart_inject fix
+        if not legacy or self.rng.random() < 0.5:
+            out.append("  const supabase = createClient();")
+        out += ["", "  useEffect(() => {", "    const load = async () => {",
+                self.select_chain(table, f"{entity}Id", 6),
+                "      if (error) {", "        console.error(error);", "        return;", "      }",
+                "      setRows(data || []);", "      setLoading(false);", "    };",
+                "    load();", f"  }}, [{entity}Id]);", ""]
+        verbs = []
+        for _ in range(blocks):
+            verb = self.pick(VERBS)
+            verbs.append(verb)
+            handler = camel('handle', verb, str(len(verbs)))
+            out += [f"  const {handler} = async (id: string) => {{"]
+            if legacy and self.rng.random() < 0.3:
+                out += ["    const { data: { user } } = await supabase.auth.getUser();",
+                        "    if (!user) return;"]
+            out += [f"    const {{ error }} = await supabase",
+                    f"      .from('{table}')",
+                    f"      .update({{ status: '{self.pick(STATUSES)}', updated_at: new Date().toISOString() }})",
+                    "      .eq('id', id);",
+                    "    if (error) {",
+                    "      toast.error(error.message);",
+                    "      return;",
+                    "    }",
+                    f"    toast.success('{pascal(verb)}d');",
+                    "    onChange?.();",
+                    "  };", ""]
+        out += ["  if (loading) {", '    return <div className="p-4 text-sm">Loading...</div>;', "  }", "",
+                "  return (", '    <div className="space-y-4">', "      {rows.map((row) => (",
+                '        <div key={row.id} className="rounded border p-4 flex items-center gap-2">',
+                f"          <span>{{row.{self.pick(COLUMNS)}}}</span>"]
+        for i, verb in enumerate(verbs, 1):
+            out.append(f"          <Button onClick={{() => {camel('handle', verb, str(i))}(row.id)}}>"
+                       f"{pascal(verb)}</Button>")
+        out += ["        </div>", "      ))}", "    </div>", "  );", "}", ""]
+        return '\n'.join(out)
+
+    def auth_preamble(self, legacy, indent=2):
+        pad = ' ' * indent
+        if legacy:
+            return [f"{pad}const supabase = await createClient();",
+                    f"{pad}const {{ data: {{ user }} }} = await supabase.auth.getUser();"]
+        return [f"{pad}const session = await auth();",
+                f"{pad}const user = session?.user;"]
+
+    def imports(self, legacy, extra=()):
+        lines = list(extra)
+        if legacy:
+            lines.append("import { createClient } from '@/lib/supabase/server';")
+        else:
+            lines += ["import { auth } from '@/auth';", "import prisma from '@/lib/prisma';"]
+        return lines
+
+    def page(self, entity, blocks, legacy):
+        name = pascal(entity, 'page')
+        table = entity + 's'
+        out = self.imports(legacy, ["import { redirect } from 'next/navigation';"])
+        out += ["", f"export default async function {name}({{ params }}: {{ params: Promise<{{ id: string }}> }}) {{",
+                "  const { id } = await params;"]
+        out += self.auth_preamble(legacy)
+        out += ["  if (!user) redirect('/login');", ""]
+        for i in range(blocks):
+            if legacy:
+                out.append(self.select_chain(table, 'id', 2, single=(i == 0)).replace(
+                    'const { data, error }', f'const {{ data: {entity}{i}, error: error{i} }}'))
+            else:
+                out.append(f"  const {entity}{i} = await prisma.{entity}.findMany({{ where: {{ id }} }});")
+        out += ["", "  return (", '    <main className="container mx-auto py-8">',
+                f"      <h1 className=\"text-2xl font-bold\">{pascal(entity)}</h1>"]
+        for i in range(blocks):
+            out.append(f"      <pre>{{JSON.stringify({entity}{i}, null, 2)}}</pre>")
+        out += ["    </main>", "  );", "}", ""]
+        return '\n'.join(out)
+
+    def component(self, entity, blocks, legacy):
+        name = pascal(entity, self.pick(['summary', 'badge', 'header', 'row']))
+        out = ["import { cn } from '@/lib/utils';", "",
+               f"export interface {name}Props {{", f"  {entity}: any;", "  className?: string;", "}", ""]
+        cols = [self.pick(COLUMNS) for _ in range(blocks)]
+        for i, col in enumerate(cols):
+            out += [f"function format{pascal(col)}{i}(value: unknown): string {{",
+                    "  if (value == null) return '-';",
+                    "  return String(value);", "}", ""]
+        out += [f"export function {name}({{ {entity}, className }}: {name}Props) {{",
+                "  return (", "    <div className={cn('flex flex-col gap-1', className)}>"]
+        for i, col in enumerate(cols):
+            out.append(f"      <span>{{format{pascal(col)}{i}({entity}.{col})}}</span>")
+        out += ["    </div>", "  );", "}", ""]
+        return '\n'.join(out)
+
+    def action(self, entity, blocks, legacy):
+        table = entity + 's'
+        out = ["'use server';", ""]
+        out += self.imports(legacy, ["import { revalidatePath } from 'next/cache';"])
+        out.append("")
+        for i in range(blocks):
+            verb = self.pick(VERBS)
+            fn = camel(verb, entity) + (str(i) if i else '')
+            ret = "Promise<{ success: boolean; error?: string; data?: any }>"
+            out.append(f"export async function {fn}({entity}Id: string, payload: Record<string, any> = {{}}): {ret} {{")
+            out.append("  try {")
+            out += self.auth_preamble(legacy, 4)
+            out.append("    if (!user) return { success: false, error: 'Not authenticated' };")
+            if legacy:
+                out += [self.select_chain(table, f"{entity}Id", 4, single=True),
+                        "    if (error) return { success: false, error: error.message };",
+                        f"    const {{ error: updateError }} = await supabase.from('{table}')",
+                        f"      .update({{ ...payload, status: '{self.pick(STATUSES)}' }})",
+                        f"      .eq('id', {entity}Id);",
+                        "    if (updateError) return { success: false, error: updateError.message };"]
+            else:
+                out += [f"    const data = await prisma.{entity}.update({{",
+                        f"      where: {{ id: {entity}Id }},",
+                        f"      data: {{ ...payload, status: '{self.pick(STATUSES)}' }},",
+                        "    });"]
+            out += [f"    revalidatePath('/{self.pick(ROLES)}/{table}');",
+                    "    return { success: true, data };",
+                    "  } catch (err: any) {",
+                    "    return { success: false, error: err.message };",
+                    "  }", "}", ""]
+        return '\n'.join(out)
+
+    def route(self, entity, blocks, legacy):
+        table = entity + 's'
+        out = self.imports(legacy, ["import { NextResponse } from 'next/server';"])
+        out.append("")
+        for method in ['GET', 'POST', 'PATCH', 'DELETE'][:blocks]:
+            out.append(f"export async function {method}(request: Request, "
+                       "{ params }: { params: Promise<{ id: string }> }) {")
+            out.append("  const { id } = await params;")
+            out += self.auth_preamble(legacy)
+            out.append("  if (!user) return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });")
+            if legacy:
+                out += [self.select_chain(table, 'id', 2),
+                        "  if (error) return NextResponse.json({ error: error.message }, { status: 500 });"]
+            else:
+                out.append(f"  const data = await prisma.{entity}.findMany({{ where: {{ id }} }});")
+            out += ["  return NextResponse.json({ data });", "}", ""]
+        return '\n'.join(out)
+
+    def lib(self, entity, blocks, legacy):
+        name = pascal(entity)
+        out = [f"export type {name}Status = " + ' | '.join(f"'{s}'" for s in STATUSES) + ";", "",
+               f"export interface {name} {{", "  id: string;"]
+        out += [f"  {c}: string | null;" for c in self.rng.sample(COLUMNS, 4)]
+        out += [f"  status: {name}Status;", "}", ""]
+        for i in range(blocks):
+            out += [f"export function is{name}Open{i}(item: {name}): boolean {{",
+                    f"  return item.status !== '{self.pick(STATUSES)}';", "}", ""]
+        return '\n'.join(out)
+
+    def path_for(self, kind, entity, n):
+        role = self.pick(ROLES)
+        if kind in ('client', 'page'):
+            base = os.path.join('app', '(dashboard)', role, f"{entity}s-{n}")
+            if kind == 'page':
+                return os.path.join(base, '[id]', 'page.tsx')
+            return os.path.join(base, 'components', f"{pascal(entity)}View{n}.tsx")
+        if kind == 'component':
+            return os.path.join('components', role, f"{pascal(entity)}Part{n}.tsx")
+        if kind == 'action':
+            return os.path.join('app', 'actions', f"{entity}_{n}.ts")
+        if kind == 'route':
+            return os.path.join('app', 'api', role, f"{entity}s-{n}", '[id]', 'route.ts')
+        return os.path.join('lib', f"{entity}_{n}.ts")
+
+    def files(self, count):
+        """Yield (relative path, content) for `count` files."""
+        kinds = [k for k, _, _ in KINDS]
+        weights = [w for _, w, _ in KINDS]
+        blocks = {k: b for k, _, b in KINDS}
+        for n in range(count):
+            kind = self.rng.choices(kinds, weights)[0]
+            entity = self.pick(ENTITIES)
+            legacy = self.rng.random() < LEGACY_SHARE
+            content = getattr(self, kind)(entity, self.rng.randint(*blocks[kind]), legacy)
+            yield self.path_for(kind, entity, n), content
+
+
+def generate(out_dir, scale=1, seed=1):
+    """Write a corpus of BASE_FILES * scale files under out_dir. Returns (files, bytes)."""
+    files = size = 0
+    for rel, content in Generator(seed).files(int(BASE_FILES * scale)):
+        path = os.path.join(out_dir, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        files += 1
+        size += len(content)
+    return files, size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='codemod.corpus', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('out', help='directory to create the tree in')
+    parser.add_argument('--scale', type=float, default=1, help='multiple of the real tree size (default: 1)')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+    files, size = generate(args.out, args.scale, args.seed)
+    print(f"Wrote {files} files, {size / 1024 / 1024:.1f} MiB to {args.out}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,350 @@
+"""
+Read tsc / next build / next lint logs into a file -> diagnostics index and
+turn it into a targeted rule run.
+
+    python -m codemod diagnostics                      # index of the default logs + the run plan
+    python -m codemod diagnostics tsc_errors.log       # one log
+    python -m codemod --from-log tsc_errors.log        # run only the mapped rules on those files
+
+The logs in this project come from PowerShell as often as from a shell:
+UTF-16 with a BOM, CRLF, `node.exe : ...` error records hard-wrapped at
+the console width (paths split mid-word), ANSI colour codes with their ESC
+dropped, and Windows paths. decode() and unwrap() undo that before parsing.
+
+Recognised formats:
+
+    app/x.tsx(12,5): error TS2304: Cannot find name 'auth'.      tsc
+    app/x.tsx:12:5 - error TS2304: Cannot find name 'auth'.      tsc --pretty
+    ./app/x.tsx:12:5                                              next build
+    Type error: Cannot find name 'auth'.
+    ./app/x.tsx                                                   next lint / eslint
+    12:5  Error: 'x' is defined but never used.  no-unused-vars
+
+ROUTES maps a diagnostic (code and/or message) to the rules that fix it;
+plan() turns an index into {file: [rule names]} for engine.run(targets=...).
+"""
+import argparse
+import collections
+import os
+import re
+import sys
+
+DEFAULT_LOGS = ['tsc_errors.log', 'tsc-output.txt', 'build_error.txt', 'lint_output.txt']
+
+ANSI_RE = re.compile(r'\x1b?\[[0-9;]{1,12}m')
+SOURCE_EXT = r'\.(?:tsx?|jsx?|mjs|cjs)'
+# `./app/(dashboard)/case/[id]/page.tsx`, `C:\\proj\\app\\x.ts`: no spaces or colons past the drive
+PATH_RE = r'(?:[A-Za-z]:[\\/])?[^\s:"\']+?' + SOURCE_EXT
+TSC_RE = re.compile(r'^\s*(?P<path>\S.*?' + SOURCE_EXT + r')\((?P<line>\d+),(?P<col>\d+)\):\s*'
+                    r'(?P<sev>error|warning)\s+(?P<code>TS\d+):\s*(?P<msg>.*)')
+TSC_PRETTY_RE = re.compile(r'^\s*(?P<path>\S.*?' + SOURCE_EXT + r'):(?P<line>\d+):(?P<col>\d+)\s+-\s+'
+                           r'(?P<sev>error|warning)\s+(?P<code>TS\d+):\s*(?P<msg>.*)')
+BUILD_LOCATION_RE = re.compile(r'(?P<path>' + PATH_RE + r'):(?P<line>\d+):(?P<col>\d+)\s*$')
+BUILD_MESSAGE_RE = re.compile(r'^\s*(?P<kind>Type error|Error|Syntax error|Module not found):\s*(?P<msg>.*)')
+LINT_FILE_RE = re.compile(r'^(?P<path>' + PATH_RE + r')\s*$')
+LINT_ITEM_RE = re.compile(r'^\s*(?P<line>\d+):(?P<col>\d+)\s+(?P<sev>Error|Warning|error|warning):?\s+'
+                          r'(?P<msg>.*?)(?:\s{2,}(?P<code>[@\w/-]+))?\s*$')
+WRAP_MIN_LINES = 5
+# Only PowerShell hard-wraps; its NativeCommandError records give it away
+POWERSHELL_RE = re.compile(r'^node(?:\.exe)? : |NativeCommandError|RemoteException')
+# Lines that always start a new line, however short the one before
+RECORD_START_RE = re.compile(r'^(?:\./|node(?:\.exe)? : |> )')
+
+
+class Diagnostic:
+    __slots__ = ('path', 'line', 'col', 'severity', 'code', 'message', 'source')
+
+    def __init__(self, path, line, col, severity, code, message, source):
+        self.path = path
+        self.line = line
+        self.col = col
+        self.severity = severity    # error or warning
+        self.code = code            # TS2304, an eslint rule id, or None (next build)
+        self.message = message
+        self.source = source        # log file it came from
+
+    @property
+    def key(self):
+        return (self.path, self.line, self.col, self.code, self.message)
+
+    def __repr__(self):
+        return f"{self.path}:{self.line}:{self.col} {self.code or self.severity}: {self.message}"
+
+
+class Route:
+    """Diagnostics with one of `codes` (any, if None) whose message matches `pattern` go to `rules`."""
+    __slots__ = ('codes', 'pattern', 'rules')
+
+    def __init__(self, codes, pattern, rules):
+        self.codes = set(codes) if codes else None
+        self.pattern = re.compile(pattern) if pattern else None
+        self.rules = rules
+
+    def matches(self, diag):
+        if self.codes is not None and diag.code not in self.codes:
+            return False
+        return self.pattern is None or bool(self.pattern.search(diag.message))
+
+
+# First match wins. next build reports type errors without a TS code, so
+# the message patterns have to stand on their own too.
+ROUTES = [
+    # `supabase` declared twice: injections piled up
+    Route(None, r"(?:[Rr]edeclare|[Dd]uplicate identifier|defined multiple times).*\bsupabase\b",
+          ['definitive_fix']),
+    # `supabase` used without a declaration in scope
+    Route(None, r"Cannot find name 'supabase'", ['smart_inject', 'module_level_fix']),
+    Route(None, r"Cannot find name '(?:createClient|auth|useSession)'", ['fix_missing_imports']),
+    Route(['TS2304', 'TS2552', 'react/jsx-no-undef'], None, ['fix_missing_imports']),
+    Route(None, r"Cannot find name '", ['fix_missing_imports']),
+    Route(None, r"Cannot find module '@supabase/", ['cleanup_supabase']),
+    Route(None, r"Property '(?:auth|getUser|getSession)' does not exist", ['migrate_auth', 'cleanup_supabase']),
+    # Parse errors: what a misplaced injection leaves behind
+    Route(['TS1005', 'TS1109', 'TS1128', 'TS1003', 'TS1135', 'TS1136', 'TS1131'], None,
+          ['fix_syntax', 'fix_bad_injection', 'fix_return_type_injection', 'fix_import_injection',
+           'fix_object_injection']),
+    Route(None, r"(?:Expression expected|Declaration or statement expected|'[,;)}]' expected|Unexpected token)",
+          ['fix_syntax', 'fix_bad_injection', 'fix_return_type_injection', 'fix_import_injection',
+           'fix_object_injection']),
+]
+
+
+class DiagnosticIndex:
+    def __init__(self):
+        self.by_file = collections.OrderedDict()   # path -> [Diagnostic]
+        self.logs = []                             # (log path, encoding, wrap width, diagnostics found)
+        self._seen = set()
+
+    def add(self, diag):
+        if diag.key in self._seen:
+            return
+        self._seen.add(diag.key)
+        self.by_file.setdefault(diag.path, []).append(diag)
+
+    def __iter__(self):
+        for diags in self.by_file.values():
+            yield from diags
+
+    def __len__(self):
+        return len(self._seen)
+
+
+def print_index(index, out=sys.stdout, warnings=False):
+    for log, encoding, width, found in index.logs:
+        wrapped = f", wrapped at {width}" if width else ''
+        print(f"{log}: {found} diagnostics ({encoding}{wrapped})", file=out)
+    for path, diags in index.by_file.items():
+        shown = [d for d in diags if warnings or d.severity == 'error']
+        if not shown:
+            continue
+        print(f"\n{path}", file=out)
+        for d in sorted(shown, key=lambda d: (d.line, d.col)):
+            print(f"  {d.line}:{d.col}  {d.code or d.severity}  {d.message}", file=out)
+
+
+def print_plan(targets, unrouted, out=sys.stdout):
+    print(f"\n{len(targets)} files to fix:", file=out)
+    for path, names in targets.items():
+        print(f"  {path}: {', '.join(names)}", file=out)
+    if unrouted:
+        counts = collections.Counter(d.code or d.message.split(':')[0] for d in unrouted)
+        print(f"\n{len(unrouted)} errors no rule handles: "
+              + ', '.join(f"{c} ({n})" for c, n in counts.most_common(10)), file=out)
+
+
+# ---------------------------------------------------------------------------
+# Decoding
+
+def decode(data):
+    """Bytes of a log -> (text with \\n line ends, encoding name)."""
+    if data.startswith((b'\xff\xfe', b'\xfe\xff')):
+        encoding = 'utf-16'
+    elif data.startswith(b'\xef\xbb\xbf'):
+        encoding = 'utf-8-sig'
+    elif len(data) > 3 and data[1:4:2] == b'\x00\x00':
+        # UTF-16LE without a BOM: every other byte of ASCII text is zero
+        encoding = 'utf-16-le'
+    else:
+        encoding = 'utf-8'
+    text = data.decode(encoding, errors='replace')
+    return text.replace('\r\n', '\n').replace('\r', '\n'), encoding
+
+
+def wrap_width(lines):
+    """Console width a PowerShell capture was hard-wrapped at, or None."""
+    if not any(POWERSHELL_RE.search(l) for l in lines):
+        return None
+    lengths = collections.Counter(len(l) for l in lines if l)
+    width, count = lengths.most_common(1)[0]
+    return width if count >= WRAP_MIN_LINES else None
+
+
+def unwrap(lines, width):
+    """
+    Join lines the console wrapped. A line was wrapped when it is not longer
+    than the width and the next line's first word would not have fit after
+    it; longer lines came from a stream that wasn't wrapped.
+    """
+    out = []
+    buf = ''
+    for i, line in enumerate(lines):
+        buf += line
+        nxt = lines[i + 1] if i + 1 < len(lines) else ''
+        word = len(nxt) - len(nxt.lstrip(' ')) + len((nxt.split() or [''])[0])
+        if nxt and len(line) <= width and len(line) + (0 if line.endswith(' ') else 1) + word > width \
+                and not RECORD_START_RE.match(nxt):
+            continue
+        out.append(buf)
+        buf = ''
+    if buf:
+        out.append(buf)
+    return out
+
+
+def strip_ansi(line):
+    return ANSI_RE.sub('', line)
+
+
+# ---------------------------------------------------------------------------
+# Paths
+
+_path_cache = {}
+
+
+def normalize_path(raw, root='.'):
+    """Project-relative '/' path of a log path: drops `./`, Windows drive prefixes and checkout dirs."""
+    key = (raw, root)
+    if key in _path_cache:
+        return _path_cache[key]
+    path = raw.strip().strip('"\'').replace('\\', '/')
+    parts = [p for p in path.split('/') if p and p != '.']
+    if parts and re.match(r'^[A-Za-z]:$', parts[0]):
+        parts = parts[1:]
+    result = '/'.join(parts)
+    # an absolute path from another machine: keep the longest tail that exists here
+    for i in range(len(parts)):
+        candidate = '/'.join(parts[i:])
+        if os.path.exists(os.path.join(root, candidate)):
+            result = candidate
+            break
+    _path_cache[key] = result
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Parsing
+
+def parse_lines(lines, source, root='.'):
+    """Yield Diagnostics from unwrapped, ANSI-free log lines."""
+    lint_file = None
+    pending = None      # next build location waiting for its message line
+    for line in lines:
+        m = TSC_RE.search(line) or TSC_PRETTY_RE.search(line)
+        if m:
+            lint_file = pending = None
+            yield Diagnostic(normalize_path(m.group('path'), root), int(m.group('line')), int(m.group('col')),
+                             m.group('sev'), m.group('code'), m.group('msg').strip(), source)
+            continue
+        if pending is not None:
+            m = BUILD_MESSAGE_RE.match(line)
+            if m:
+                path, ln, col = pending
+                pending = None
+                yield Diagnostic(path, ln, col, 'error', None, m.group('msg').strip(), source)
+                continue
+            if line.strip():
+                pending = None
+        m = BUILD_LOCATION_RE.search(line)
+        if m:
+            lint_file = None
+            pending = (normalize_path(m.group('path'), root), int(m.group('line')), int(m.group('col')))
+            continue
+        m = LINT_FILE_RE.match(line)
+        if m:
+            lint_file = normalize_path(m.group('path'), root)
+            continue
+        if lint_file is not None:
+            m = LINT_ITEM_RE.match(line)
+            if m:
+                yield Diagnostic(lint_file, int(m.group('line')), int(m.group('col')), m.group('sev').lower(),
+                                 m.group('code'), m.group('msg').strip(), source)
+            elif not line.strip() or not line.startswith(' ') and not line[:1].isdigit():
+                lint_file = None
+
+
+def read_log(path, index, root='.'):
+    with open(path, 'rb') as f:
+        text, encoding = decode(f.read())
+    lines = text.split('\n')
+    width = wrap_width(lines)
+    if width:
+        lines = unwrap(lines, width)
+    found = 0
+    for diag in parse_lines([strip_ansi(l) for l in lines], path, root):
+        index.add(diag)
+        found += 1
+    index.logs.append((path, encoding, width, found))
+    return index
+
+
+def load(paths, root='.'):
+    index = DiagnosticIndex()
+    for path in paths:
+        read_log(path, index, root)
+    return index
+
+
+def default_logs(root='.'):
+    return [p for p in DEFAULT_LOGS if os.path.exists(os.path.join(root, p))]
+
+
+# ---------------------------------------------------------------------------
+# Planning
+
+def route(diag):
+    for r in ROUTES:
+        if r.matches(diag):
+            return r.rules
+    return None
+
+
+def plan(index, rule_names, root_dirs=None, errors_only=True):
+    """
+    ({file: [rule names in chain order]}, [errors no rule in `rule_names` handles]).
+    Files outside `root_dirs` or no longer on disk are left out.
+    """
+    order = {n: i for i, n in enumerate(rule_names)}
+    targets = collections.OrderedDict()
+    unrouted = []
+    for path, diags in sorted(index.by_file.items()):
+        if root_dirs is not None and path.split('/', 1)[0] not in root_dirs:
+            continue
+        if not os.path.isfile(path):
+            continue
+        names = set()
+        for d in diags:
+            if errors_only and d.severity != 'error':
+                continue
+            rules = [n for n in route(d) or () if n in order]
+            if rules:
+                names.update(rules)
+            else:
+                unrouted.append(d)
+        if names:
+            targets[path.replace('/', os.sep)] = sorted(names, key=order.get)
+    return targets, unrouted
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='codemod diagnostics', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('logs', nargs='*', help=f"default: whichever of {', '.join(DEFAULT_LOGS)} exist")
+    parser.add_argument('--warnings', action='store_true', help='list warnings too')
+    args = parser.parse_args(argv)
+
+    from . import engine
+    index = load(args.logs or default_logs())
+    print_index(index, warnings=args.warnings)
+    targets, unrouted = plan(index, engine.RULE_ORDER, engine.ROOT_DIRS)
+    print_plan(targets, unrouted)
+    return 0
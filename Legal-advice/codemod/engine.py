@@ -0,0 +1,574 @@
+"""
+Single-pass codemod engine.
+
+The fix-up scripts in the project root each register their `fix_file` as a
+rule. The engine walks the source tree once, reads every .ts/.tsx file once,
+runs the ordered rule chain over the in-memory content and writes each
+changed file once, collecting per-rule hit counts and timings on the way.
+
+With `max_passes` > 1 the chain is run over each file again and again until
+a pass changes nothing (a fixed point), giving up after `max_passes` passes.
+A file whose content comes back to an earlier state is reported as
+oscillating, with the rules that undo each other; the report also keeps a
+histogram of how many passes the files needed.
+
+With a ByteScan (`--mmap`) each file is memory-mapped and the rules' literal
+needles are looked up in the raw bytes first; the file is only decoded when
+some rule might fire, and files over a size limit are skipped unless they
+are allow-listed.
+"""
+import fnmatch
+import hashlib
+import importlib
+import mmap
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from . import outline, walk
+from .cache import content_hash
+from .walk import EXTENSIONS, PRUNE_DIRS
+
+ROOT_DIRS = ['app', 'components', 'lib']
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Default rule chain, in the order the scripts were historically run.
+# Each entry is both the module name and the rule name it registers.
+RULE_ORDER = [
+    'migrate_auth',
+    'cleanup_supabase',
+    'fix_syntax',
+    'fix_missing_imports',
+    'inject_supabase',
+    'smart_inject',
+    'module_level_fix',
+    'fix_bad_injection',
+    'fix_return_type_injection',
+    'fix_import_injection',
+    'fix_object_injection',
+    'definitive_fix',
+]
+
+RULES = {}
+
+
+class Rule:
+    """A registered rewrite: `func(content, filepath) -> content`."""
+
+    def __init__(self, name, func, paths=None, skip=None, needles=None):
+        self.name = name
+        self.func = func
+        # Optional allow-list of '/'-separated paths the rule is limited to
+        self.paths = tuple(paths) if paths else None
+        # Optional predicate; files it accepts are never passed to the rule
+        self.skip = skip
+        # Optional literals, one of which is in every file the rule can change
+        # (None: it may change anything). Only ByteScan looks at them.
+        self.needles = None if needles is None else tuple(sorted(set(needles), key=len))
+        self.byte_needles = None if needles is None else tuple(_byte_needle(n) for n in self.needles)
+
+    def applies_to(self, filepath):
+        if self.paths is not None and filepath.replace(os.sep, '/') not in self.paths:
+            return False
+        if self.skip is not None and self.skip(filepath):
+            return False
+        return True
+
+
+def _byte_needle(needle):
+    # Files are read with universal newlines, so a `\n` in the text may be `\r\n`
+    # on disk: look for the longest newline-free piece instead.
+    return max(needle.split('\n'), key=len).encode('utf-8')
+
+
+def rule(name, paths=None, skip=None, needles=None):
+    """Decorator registering a pure `(content, filepath) -> content` rewrite."""
+    def register(func):
+        RULES[name] = Rule(name, func, paths=paths, skip=skip, needles=needles)
+        return func
+    return register
+
+
+def load_rules(names=None):
+    """Import the rule modules and return the requested rules in chain order."""
+    if PROJECT_ROOT not in sys.path:
+        sys.path.insert(0, PROJECT_ROOT)
+    names = list(names) if names else list(RULE_ORDER)
+    for name in names:
+        if name not in RULES:
+            importlib.import_module(name)
+        if name not in RULES:
+            raise KeyError(f"Unknown rule: {name}")
+    return [RULES[n] for n in names]
+
+
+class RuleStats:
+    def __init__(self):
+        self.hits = 0
+        self.seconds = 0.0
+
+
+class RunReport:
+    def __init__(self, rules):
+        self.scanned = 0
+        self.cached = 0
+        self.resumed = 0            # files an interrupted run already wrote
+        self.changed = []
+        self.rule_stats = {r.name: RuleStats() for r in rules}
+        # Fixed-point mode only: changing passes -> files, and the files that never settled
+        self.passes = Counter()
+        self.unstable = []          # (filepath, Convergence)
+        self.scan = None            # the run's ByteScan, if any
+
+
+def iter_source_files(root_dirs=ROOT_DIRS):
+    """Yield source files in a stable (sorted) order, so runs are reproducible."""
+    for entry in walk.scan(root_dirs):
+        yield entry.path
+
+
+def apply_rules(content, filepath, rules, rule_stats, fired=None, trace=None):
+    """
+    Run the rule chain over one file's content, recording hits and time.
+    Names of the rules that changed the content are appended to `fired`, and
+    (name, digest before, digest after) to `trace` when one is given.
+    """
+    for r in rules:
+        if not r.applies_to(filepath):
+            continue
+        start = time.perf_counter()
+        new_content = r.func(content, filepath)
+        stats = rule_stats[r.name]
+        stats.seconds += time.perf_counter() - start
+        if new_content != content:
+            stats.hits += 1
+            if fired is not None:
+                fired.append(r.name)
+            if trace is not None:
+                trace.append((r.name, content_hash(content), content_hash(new_content)))
+            content = new_content
+    return content
+
+
+# Fixed-point verdicts
+CONVERGED, OSCILLATING, CAPPED = 'converged', 'oscillating', 'capped'
+DEFAULT_MAX_PASSES = 5
+
+
+class Convergence:
+    __slots__ = ('passes', 'verdict', 'rules')
+
+    def __init__(self, passes, verdict, rules=()):
+        self.passes = passes        # passes that changed the content
+        self.verdict = verdict
+        self.rules = list(rules)    # oscillating: 'b undoes a' pairs; capped: rules still firing
+
+    def describe(self):
+        return f"{self.verdict} after {self.passes} passes" + (f": {', '.join(self.rules)}" if self.rules else "")
+
+
+def undoing_rules(steps):
+    """
+    Explain a cycle from its (rule, digest in, digest out) steps: 'b undoes a'
+    for every rule that turns a's output straight back into a's input, or
+    else the rules that went round the cycle, in order.
+    """
+    pairs = []
+    for a, a_in, a_out in steps:
+        for b, b_in, b_out in steps:
+            if b_in == a_out and b_out == a_in:
+                pair = f"{b} undoes {a}"
+                if pair not in pairs:
+                    pairs.append(pair)
+    if pairs:
+        return pairs
+    return list(dict.fromkeys(name for name, _, _ in steps))
+
+
+def apply_to_fixed_point(content, filepath, rules, rule_stats, fired, max_passes):
+    """
+    Re-run the chain until a pass changes nothing, for at most `max_passes`
+    passes. Returns (content, Convergence); oscillating and capped files get
+    the content of their last pass, as a single run would.
+    """
+    seen = {content_hash(content): 0}
+    passes = []                 # per changing pass, its trace
+    for n in range(1, max_passes + 1):
+        trace = []
+        new_content = apply_rules(content, filepath, rules, rule_stats, fired, trace)
+        if new_content == content:
+            return content, Convergence(n - 1, CONVERGED)
+        digest = trace[-1][2]
+        passes.append(trace)
+        if digest in seen:
+            steps = [step for p in passes[seen[digest]:] for step in p]
+            return new_content, Convergence(n, OSCILLATING, undoing_rules(steps))
+        seen[digest] = n
+        content = new_content
+    return content, Convergence(max_passes, CAPPED, dict.fromkeys(name for name, _, _ in passes[-1]))
+
+
+def read_source(filepath):
+    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+        return f.read()
+
+
+def decode_source(data):
+    """What read_source returns for a file holding `data`."""
+    content = str(data, 'utf-8', 'ignore')
+    if '\r' in content:
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+    return content
+
+
+MAX_SCAN_BYTES = 1024 * 1024
+
+
+class ByteScan:
+    """
+    Settings and byte counters for the memory-mapped scanning mode. Files over
+    `max_bytes` are skipped unless they match an `allow` pattern (fnmatch on
+    the '/'-separated path).
+    """
+    __slots__ = ('max_bytes', 'allow', 'scanned', 'decoded', 'skipped')
+
+    def __init__(self, max_bytes=MAX_SCAN_BYTES, allow=()):
+        self.max_bytes = max_bytes
+        self.allow = tuple(allow)
+        self.scanned = 0            # bytes mapped and searched
+        self.decoded = 0            # bytes decoded to str for the rules
+        self.skipped = []           # files over max_bytes
+
+    def fresh(self):
+        """Same settings, zeroed counters (for a worker process)."""
+        return ByteScan(self.max_bytes, self.allow)
+
+    def add(self, scanned, decoded, skipped):
+        self.scanned += scanned
+        self.decoded += decoded
+        self.skipped.extend(skipped)
+
+    def allowed(self, filepath):
+        path = filepath.replace(os.sep, '/')
+        return any(fnmatch.fnmatch(path, pattern) for pattern in self.allow)
+
+
+def might_fire(data, rules, filepath):
+    """Whether any rule applying to `filepath` has a needle in `data` (or has no needles)."""
+    found = {}
+    for r in rules:
+        if not r.applies_to(filepath):
+            continue
+        if r.byte_needles is None:
+            return True
+        for needle in r.byte_needles:
+            hit = found.get(needle)
+            if hit is None:
+                hit = found[needle] = data.find(needle) >= 0
+            if hit:
+                return True
+    return False
+
+
+def write_source(filepath, content):
+    with open(filepath, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+# process_file statuses
+CACHED, NOOP, CHANGED, SKIPPED = 'cached', 'noop', 'changed', 'skipped'
+
+
+def _scan_file(filepath, rules, scan, noop_digest, hash_content):
+    """
+    ByteScan side of process_file: (status, digest, content), with content only
+    when the rules have to run. The digest is taken over the raw bytes, which
+    equals content_hash() of the decoded text for any UTF-8 file without `\r`
+    (otherwise the cache just misses).
+    """
+    with open(filepath, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size > scan.max_bytes and not scan.allowed(filepath):
+            scan.skipped.append(filepath)
+            return SKIPPED, None, None
+        if size == 0:
+            data = b''
+        else:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            scan.scanned += size
+            digest = hashlib.sha1(data).hexdigest() if hash_content else None
+            if digest is not None and digest == noop_digest:
+                return CACHED, digest, None
+            if not might_fire(data, rules, filepath):
+                return NOOP, digest, None
+            scan.decoded += size
+            return None, digest, decode_source(data)
+        finally:
+            if size:
+                data.close()
+
+
+def process_file(filepath, rules, rule_stats, noop_digest=None, hash_content=False,
+                 keep_original=False, max_passes=1, scan=None):
+    """
+    Load one file and run the chain over it. Returns
+    (status, digest, new_content, original, fired, convergence); the file is
+    not written. With `hash_content` the content digest is returned and
+    content matching `noop_digest` (a cached no-op) skips the rules entirely.
+    `original` (the content as read) is only kept for changed files with
+    `keep_original`. `convergence` is only set with `max_passes` > 1.
+    `scan` (a ByteScan) reads through mmap and may return NOOP (no rule can
+    fire) or SKIPPED (too large) without decoding the file.
+    """
+    if scan is not None:
+        status, digest, content = _scan_file(filepath, rules, scan, noop_digest, hash_content)
+        if status is not None:
+            return status, digest, None, None, None, None
+    else:
+        content = read_source(filepath)
+        digest = content_hash(content) if hash_content else None
+        if digest is not None and digest == noop_digest:
+            return CACHED, digest, None, None, None, None
+    fired = []
+    convergence = None
+    if max_passes > 1:
+        new_content, convergence = apply_to_fixed_point(content, filepath, rules, rule_stats, fired,
+                                                        max_passes)
+        fired = list(dict.fromkeys(fired))
+    else:
+        new_content = apply_rules(content, filepath, rules, rule_stats, fired)
+    if new_content == content:
+        return NOOP, digest, None, None, None, convergence
+    return CHANGED, digest, new_content, content if keep_original else None, fired, convergence
+
+
+# Parallel mode: each worker loads the rule chain once and processes chunks
+# of files, so only paths go out and only changed contents come back.
+CHUNKS_PER_WORKER = 4
+MIN_CHUNK_BYTES = 64 * 1024
+
+_worker_rules = None
+_worker_scan = None
+
+
+def _init_worker(rule_names, scan):
+    global _worker_rules, _worker_scan
+    _worker_rules = load_rules(rule_names)
+    _worker_scan = scan
+
+
+def _process_chunk(chunk):
+    rule_stats = {r.name: RuleStats() for r in _worker_rules}
+    scan = _worker_scan.fresh() if _worker_scan is not None else None
+    results = [process_file(fp, _worker_rules, rule_stats, noop_digest, hash_content, keep_original,
+                            max_passes, scan)
+               for fp, noop_digest, hash_content, keep_original, max_passes in chunk]
+    scan_stats = (scan.scanned, scan.decoded, scan.skipped) if scan is not None else None
+    return results, {n: (s.hits, s.seconds) for n, s in rule_stats.items()}, scan_stats
+
+
+def make_chunks(pending, jobs):
+    """
+    Group (filepath, stat, ...) items into contiguous chunks of roughly equal
+    byte size. Tiny files get batched together so IPC stays a small fraction of
+    the work, while CHUNKS_PER_WORKER chunks per worker keep the load balanced.
+    """
+    total = sum(item[1].st_size for item in pending)
+    target = max(total // (jobs * CHUNKS_PER_WORKER), MIN_CHUNK_BYTES)
+    chunks, chunk, size = [], [], 0
+    for item in pending:
+        chunk.append(item)
+        size += item[1].st_size
+        if size >= target:
+            chunks.append(chunk)
+            chunk, size = [], 0
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def _process_parallel(rules, pending, rule_stats, hash_content, keep_original, max_passes, scan, jobs):
+    chunks = make_chunks(pending, jobs)
+    work = [[(fp, noop_digest, hash_content, keep_original, max_passes) for fp, _, noop_digest in chunk]
+            for chunk in chunks]
+    names = [r.name for r in rules]
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(names, scan)) as pool:
+        # map() yields chunk results in submission order, keeping output deterministic
+        for results, chunk_stats, scan_stats in pool.map(_process_chunk, work):
+            for name, (hits, seconds) in chunk_stats.items():
+                rule_stats[name].hits += hits
+                rule_stats[name].seconds += seconds
+            if scan is not None:
+                scan.add(*scan_stats)
+            yield from results
+
+
+def run(rules, root_dirs=ROOT_DIRS, write=True, verbose=True, cache=None, jobs=1,
+        patch=None, log=sys.stdout, targets=None, max_passes=1, scan=None, writer=None):
+    """
+    Run the rule chain over the tree. `cache` is an optional codemod.cache.Cache;
+    `jobs` > 1 spreads the files over a process pool. Files are reported and
+    written in walk order either way. `patch` is an optional
+    codemod.patch.PatchWriter that is handed each changed file as it comes in
+    (only changed files are ever diffed).
+
+    `targets` ({filepath: [rule names]}, e.g. from codemod.diagnostics.plan)
+    replaces the walk: only those files are read, each with only its rules,
+    in-process and without the cache (a partial chain proves nothing about
+    the full one).
+
+    `max_passes` > 1 runs each file's chain to a fixed point (see
+    apply_to_fixed_point); only files that converged are cached as no-ops
+    once written.
+
+    `scan` (a ByteScan) switches to memory-mapped reads with the byte-level
+    prefilter; its counters end up in `report.scan`.
+
+    `writer` (a codemod.writeback.WriteBack) takes the changed files instead
+    of writing each one straight away, and is closed (committed) at the end.
+    Files in its `done` set, written by the interrupted run it resumes, are
+    left alone.
+    """
+    if targets is not None:
+        return _run_targets(rules, targets, write, verbose, patch, log, max_passes, scan, writer)
+    report = RunReport(rules)
+    report.scan = scan
+    hash_content = cache is not None
+    keep_original = patch is not None
+
+    pending = []
+    done = writer.done if writer is not None else ()
+    for entry in walk.scan(root_dirs):
+        fp = entry.path
+        report.scanned += 1
+        if fp in done:
+            report.resumed += 1
+            continue
+        # The walk's DirEntry already holds the stat on most platforms
+        st = entry.stat() if cache is not None or jobs > 1 else None
+        if cache is not None and cache.is_fresh(fp, st):
+            report.cached += 1
+            continue
+        noop_digest = cache.noop_digest(fp) if cache is not None else None
+        pending.append((fp, st, noop_digest))
+
+    if jobs > 1 and len(pending) > jobs:
+        results = _process_parallel(rules, pending, report.rule_stats, hash_content,
+                                    keep_original, max_passes, scan, jobs)
+    else:
+        results = (process_file(fp, rules, report.rule_stats, noop_digest, hash_content, keep_original,
+                                max_passes, scan)
+                   for fp, _, noop_digest in pending)
+
+    settled = []                # written files already proven fixed points
+    for (fp, st, _), (status, digest, new_content, original, fired, convergence) in zip(pending, results):
+        if convergence is not None:
+            _record_convergence(report, fp, convergence, verbose, log)
+        if status == CACHED:
+            report.cached += 1
+            cache.record_noop(fp, st, digest)
+            continue
+        if status == SKIPPED:
+            if verbose:
+                print(f"  Skipped (over {scan.max_bytes} bytes): {fp}", file=log)
+            continue
+        if status == NOOP:
+            if cache is not None:
+                cache.record_noop(fp, st, digest)
+            continue
+        if patch is not None:
+            patch.add(fp, original, new_content, fired)
+        if write:
+            if writer is not None:
+                writer.add(fp, new_content)
+            else:
+                write_source(fp, new_content)
+        if cache is not None:
+            if write and convergence is not None and convergence.verdict == CONVERGED:
+                # The last pass already proved the rewritten content is a fixed point
+                settled.append((fp, content_hash(new_content)))
+            else:
+                # The rewritten content still has to prove it is a fixed point
+                cache.forget(fp)
+        report.changed.append(fp)
+        if verbose:
+            print(f"  Fixed: {fp}", file=log)
+    if writer is not None:
+        writer.close()
+    if cache is not None:
+        # Stat only now: with a writer the files are on disk once it is closed
+        for fp, digest in settled:
+            cache.record_noop(fp, os.stat(fp), digest)
+        cache.save()
+    outline.store.save()
+    return report
+
+
+def _record_convergence(report, fp, convergence, verbose, log):
+    report.passes[convergence.passes] += 1
+    if convergence.verdict != CONVERGED:
+        report.unstable.append((fp, convergence))
+        if verbose:
+            print(f"  Unstable: {fp} ({convergence.describe()})", file=log)
+
+
+def _run_targets(rules, targets, write, verbose, patch, log, max_passes=1, scan=None, writer=None):
+    report = RunReport(rules)
+    report.scan = scan
+    done = writer.done if writer is not None else ()
+    for fp, names in targets.items():
+        report.scanned += 1
+        if fp in done:
+            report.resumed += 1
+            continue
+        file_rules = [r for r in rules if r.name in names]
+        status, _, new_content, original, fired, convergence = process_file(
+            fp, file_rules, report.rule_stats, keep_original=patch is not None, max_passes=max_passes,
+            scan=scan)
+        if convergence is not None:
+            _record_convergence(report, fp, convergence, verbose, log)
+        if status != CHANGED:
+            continue
+        if patch is not None:
+            patch.add(fp, original, new_content, fired)
+        if write:
+            if writer is not None:
+                writer.add(fp, new_content)
+            else:
+                write_source(fp, new_content)
+        report.changed.append(fp)
+        if verbose:
+            print(f"  Fixed: {fp}", file=log)
+    if writer is not None:
+        writer.close()
+    outline.store.save()
+    return report
+
+
+def print_report(report, out=sys.stdout):
+    cached = f", {report.cached} unchanged since last run" if report.cached else ""
+    if report.resumed:
+        cached += f", {report.resumed} already written by the interrupted run"
+    print(f"\nTotal files modified: {len(report.changed)} (scanned {report.scanned}{cached})", file=out)
+    if report.passes:
+        histogram = ', '.join(f"{n}: {count}" for n, count in sorted(report.passes.items()))
+        print(f"Passes to fixed point (passes: files): {histogram}", file=out)
+    for fp, convergence in report.unstable:
+        print(f"  {fp}: {convergence.describe()}", file=out)
+    scan = report.scan
+    if scan is not None:
+        share = f" ({scan.decoded / scan.scanned:.0%})" if scan.scanned else ""
+        print(f"Bytes scanned: {scan.scanned}, decoded: {scan.decoded}{share}", file=out)
+        if scan.skipped:
+            print(f"Skipped {len(scan.skipped)} files over {scan.max_bytes} bytes (allow with --allow-large)",
+                  file=out)
+    if not report.rule_stats:
+        return
+    width = max(len(n) for n in report.rule_stats)
+    print(f"\n{'Rule':<{width}}  {'Hits':>6}  {'Time (ms)':>10}", file=out)
+    for name, stats in report.rule_stats.items():
+        print(f"{name:<{width}}  {stats.hits:>6}  {stats.seconds * 1000:>10.1f}", file=out)
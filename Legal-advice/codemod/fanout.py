@@ -0,0 +1,501 @@
+"""
+Fold the proxy queries a client component makes into one server action.
+
+    python -m codemod.fanout                       # report, worst pages first
+    python -m codemod.fanout app/(dashboard)/lawyer --top 5
+    python -m codemod.fanout -n > fanout.patch     # the rewrite as a patch
+    python -m codemod.fanout --write
+
+In a 'use client' file every `.from()` chain goes through the client shim
+(lib/supabase/client-shim.ts), which makes one POST to /api/supabase-proxy per
+query. An effect or handler that loads a page's data that way makes one round
+trip from the browser per table, one after the other:
+
+    const { data: req, error: reqError } = await (await __getSupabaseClient()).from('legal_requests')
+      .select('*').eq('id', requestId).single();
+    if (reqError) throw reqError;
+    setRequest(req);
+    const { data: acc } = await (await __getSupabaseClient()).from('request_acceptance')
+      .select('*').eq('request_id', requestId).single();
+
+Per function, the awaited reads declared with const/let that
+
+    - sit directly in the same block,
+    - read a literal table with methods the shim supports,
+    - don't use a name an earlier one declares, or one assigned in between,
+    - have no other await (a write, a fetch) between them
+
+make a group. Each group of two or more becomes one exported async function in
+a sibling `<Component>.queries.ts` ('use server') that runs the chains with
+Promise.all against the server client, taking the chains' non-literal
+arguments as parameters (typed as the component annotates or casts them, else
+by the method they go to). Each chain goes through `settled()` from
+lib/supabase/result.ts, so a query that throws gives `{ data: null, error }`
+as the proxy's error response did instead of rejecting its group. The component awaits it once where the first query
+was, and each original statement takes its result from there:
+
+    const [reqResult, accResult] = await fetchRequestDataQueries(requestId);
+    const { data: req, error: reqError } = reqResult;
+    ...
+    const { data: acc } = accResult;
+
+The results go through JSON like the proxy's response did, so the component
+sees the same values (dates as strings). All the reads of a group now run
+before the first result is looked at; they are reads, so that only costs a
+query when an early one makes the function return or throw.
+
+The report gives, per file and per page (page.tsx plus the local modules it
+imports, transitively), the proxy queries in the client code and how many
+requests they come down to. A component that already has a .queries.ts
+file is left alone.
+"""
+import argparse
+import os
+import re
+import sys
+from collections import deque
+
+from . import engine, tslex, writeback
+from .imports import add_import, parse_imports
+from .outline import directive
+from .patch import PatchWriter
+from .querychain import find_chains, line_of, string_value
+from .roundtrips import BLANK_RE, WORD_RE, statement_of
+from .symbols import canonical_module, code_only
+
+SUFFIX = '.queries.ts'
+HEADER = '// Generated by codemod.fanout'
+PAGE_NAMES = ('page.tsx', 'page.ts')
+RESULT_MODULE = '@/lib/supabase/result'
+SERVER_MODULE = '@/lib/supabase/server'
+
+# Methods ClientPostgresShimQueryBuilder forwards for a read
+READ_METHODS = {'select', 'eq', 'neq', 'in', 'not', 'ilike', 'or', 'contains', 'order',
+                'limit', 'range', 'single', 'maybeSingle'}
+# Parameter types by (method, argument index), for arguments whose declared type
+# isn't found in the component; anything else is unknown
+ARG_TYPES = {
+    ('select', 0): 'string',
+    ('eq', 1): 'string',
+    ('neq', 1): 'string',
+    ('in', 1): 'unknown[]',
+    ('ilike', 1): 'string',
+    ('or', 0): 'string',
+    ('limit', 0): 'number',
+    ('range', 0): 'number',
+    ('range', 1): 'number',
+}
+LITERAL_WORDS = {'true', 'false', 'null', 'undefined'}
+NUMBER_RE = re.compile(r'-?\d[\d_]*(?:\.\d+)?')
+PATH_RE = re.compile(r'[A-Za-z_$][\w$]*(?:\??\.[A-Za-z_$][\w$]*)*')
+BARRIER_RE = re.compile(r'\bawait\b|\.then\s*\(|\bfetch\s*\(')
+SIMPLE_TYPE = r'(?:string|number|boolean)(?:\s*\|\s*(?:null|undefined))*(?![\w$\[<.])'
+CLIENT_RECEIVER_RE = re.compile(r'\(\s*await\s+__getSupabaseClient\s*\(\s*\)\s*\)|(?<![\w$.])supabase\b')
+
+
+class Query:
+    """A statement of a group: the chain rebuilt against `supabase` with parameters in place."""
+    __slots__ = ('stmt', 'chain', 'text', 'result')
+
+    def __init__(self, stmt, chain, text, result):
+        self.stmt = stmt
+        self.chain = chain
+        self.text = text
+        self.result = result
+
+
+class Group:
+    __slots__ = ('name', 'scope', 'queries', 'params', 'line')
+
+    def __init__(self, name, scope, queries, params, line):
+        self.name = name
+        self.scope = scope
+        self.queries = queries
+        self.params = params            # [(name, type, argument text)]
+        self.line = line
+
+
+class FileReport:
+    __slots__ = ('path', 'queries', 'groups', 'skipped')
+
+    def __init__(self, path, queries):
+        self.path = path
+        self.queries = queries          # proxy queries in the file
+        self.groups = []
+        self.skipped = None             # why the file wasn't rewritten
+
+    @property
+    def saved(self):
+        return sum(len(g.queries) - 1 for g in self.groups)
+
+
+# ---------------------------------------------------------------------------
+# Finding groups
+
+def is_literal(arg):
+    """Whether an argument is a constant: strings, numbers, and objects/arrays of them."""
+    if string_value(arg) is not None or NUMBER_RE.fullmatch(arg):
+        return True
+    if '${' in arg:
+        return False
+    code = code_only(arg)
+    for m in WORD_RE.finditer(code):
+        # `{ ascending: false }`: keys and literal words only
+        if m.group() in LITERAL_WORDS or code.startswith(':', BLANK_RE.match(code, m.end()).end()):
+            continue
+        return False
+    return True
+
+
+def is_proxied(content, chain):
+    """Whether a chain goes through the client shim rather than some other client."""
+    return CLIENT_RECEIVER_RE.match(content, chain.start) is not None
+
+
+def readable(content, chain):
+    names = chain.names()
+    return (chain.table is not None and 'select' in names and set(names) <= READ_METHODS
+            and is_proxied(content, chain))
+
+
+def assigned_between(code, names):
+    """The names in `names` that `code` assigns or declares."""
+    found = set()
+    for name in names:
+        n = re.escape(name)
+        if re.search(rf'(?<![\w$.]){n}\s*(?:[-+*/%&|^?]?=(?![=>])|\+\+|--)|(?:\+\+|--){n}\b', code):
+            found.add(name)
+        elif re.search(rf'\b(?:const|let|var)\s+(?:[^=;]*[{{\[,\s])?{n}\b', code):
+            found.add(name)
+    return found
+
+
+def arg_names(chain):
+    names = set()
+    for call in chain.calls:
+        for arg in call.args:
+            if not is_literal(arg):
+                names.update(WORD_RE.findall(code_only(arg)))
+    return names
+
+
+def candidate_runs(content, tree):
+    """Runs of read statements in one block that may run together, in source order."""
+    statements = []
+    for chain in find_chains(content):
+        if not readable(content, chain):
+            statements.append(None)     # a write or something the shim can't forward: a barrier
+            continue
+        stmt = statement_of(content, chain, tree.scope_at(chain.start))
+        statements.append(stmt if stmt is not None and stmt.decl in ('const', 'let') else None)
+
+    runs, run = [], []
+    for stmt in statements:
+        if stmt is not None and run and joins(content, run, stmt):
+            run.append(stmt)
+            continue
+        if len(run) > 1:
+            runs.append(run)
+        run = [stmt] if stmt is not None else []
+    if len(run) > 1:
+        runs.append(run)
+    return runs
+
+
+def joins(content, run, stmt):
+    prev = run[-1]
+    if stmt.scope is not prev.scope:
+        return False
+    between = code_only(content[prev.end:stmt.start])
+    if BARRIER_RE.search(between):
+        return False
+    declared = set()
+    for s in run:
+        declared |= s.names()
+    used = arg_names(stmt.call)
+    if declared & (used | stmt.names()):
+        return False
+    # The arguments are evaluated where the first query was
+    return not assigned_between(code_only(content[run[0].end:stmt.start]), used)
+
+
+# ---------------------------------------------------------------------------
+# Building the server action
+
+def param_name(arg, taken):
+    m = PATH_RE.fullmatch(arg.replace(' ', ''))
+    if m:
+        parts = re.split(r'\??\.', m.group())
+        name = parts[0] + ''.join(p[:1].upper() + p[1:] for p in parts[1:])
+    else:
+        name = 'arg'
+    base, i = name, 2
+    while name in taken:
+        name = f"{base}{i}"
+        i += 1
+    taken.add(name)
+    return name
+
+
+def result_name(stmt, chain, taken):
+    pattern = stmt.pattern
+    m = re.search(r'\bdata\s*:\s*([A-Za-z_$][\w$]*)', pattern)
+    if m:
+        base = m.group(1)
+    elif pattern[0] not in '{[':
+        base = pattern
+    else:
+        base = re.sub(r'_(\w)', lambda x: x.group(1).upper(), chain.table)
+    name = base = base + 'Result'
+    i = 2
+    while name in taken:
+        name = f"{base}{i}"
+        i += 1
+    taken.add(name)
+    return name
+
+
+def declared_type(code, arg):
+    """The type `code` annotates or casts a plain-name argument to (`requestId: string`,
+    `const requestId = params.id as string`), if it is a simple one and the only one."""
+    if not re.fullmatch(r'[A-Za-z_$][\w$]*', arg):
+        return None
+    n = re.escape(arg)
+    found = set()
+    for m in re.finditer(rf'(?<![\w$.]){n}(\??)\s*:\s*({SIMPLE_TYPE})', code):
+        # an optional prop may be undefined
+        found.add(re.sub(r'\s+', ' ', m.group(2)) + (' | undefined' if m.group(1) else ''))
+    for m in re.finditer(rf'\b(?:const|let)\s+{n}\s*=[^;\n]*?\bas\s+({SIMPLE_TYPE})', code):
+        found.add(re.sub(r'\s+', ' ', m.group(1)))
+    return found.pop() if len(found) == 1 else None
+
+
+def rebuild(chain, params, taken, indent, code=''):
+    """The chain against `supabase`, one link per line, non-literal arguments replaced by parameters."""
+    lines = [f"supabase.from('{chain.table}')"]
+    for call in chain.calls:
+        args = []
+        for i, arg in enumerate(call.args):
+            if is_literal(arg):
+                args.append(arg)
+                continue
+            if arg not in params:
+                kind = declared_type(code, arg) or ARG_TYPES.get((call.name, i), 'unknown')
+                params[arg] = (param_name(arg, taken), kind)
+            args.append(params[arg][0])
+        lines.append(f".{call.name}({', '.join(args)})")
+    return f"\n{indent}  ".join(lines)
+
+
+def build_groups(content, path, tree):
+    taken = set(WORD_RE.findall(content))
+    stem = re.sub(r'\W', '', os.path.basename(path).split('.')[0])
+    groups = []
+    counter = 0
+    for run in candidate_runs(content, tree):
+        owner = run[0].scope
+        while owner is not None and owner.kind != tslex.FUNCTION:
+            owner = owner.parent
+        counter += 1
+        if owner is not None and owner.name:
+            base = owner.name + 'Queries'
+        else:
+            base = f"{stem[:1].lower()}{stem[1:]}Queries{counter}"
+        name, i = base, 2
+        while name in taken:
+            name = f"{base}{i}"
+            i += 1
+        taken.add(name)
+        params = {}
+        param_taken = {'supabase', 'results'}
+        queries = []
+        code = code_only(content)
+        for stmt in run:
+            text = rebuild(stmt.call, params, param_taken, '    ', code)
+            queries.append(Query(stmt, stmt.call, text, result_name(stmt, stmt.call, taken)))
+        groups.append(Group(name, owner, queries,
+                            [(n, t, arg) for arg, (n, t) in params.items()],
+                            line_of(content, run[0].start)))
+    return groups
+
+
+def server_module(path, groups):
+    source = os.path.basename(path)
+    out = ["'use server';", '',
+           f"import {{ createClient }} from '{SERVER_MODULE}';",
+           f"import {{ settled, type QueryResult }} from '{RESULT_MODULE}';", '',
+           f"{HEADER} from {source}: each function runs the queries one",
+           f"// effect or handler of {source} made through /api/supabase-proxy, in one request."]
+    for g in groups:
+        params = ', '.join(f"{n}: {t}" for n, t, _ in g.params)
+        tuple_type = ', '.join('QueryResult' for _ in g.queries)
+        out += ['', f"export async function {g.name}({params}): Promise<[{tuple_type}]> {{",
+                '  const supabase = await createClient();',
+                '  const results = await Promise.all([']
+        out += [f"    settled({q.text})," for q in g.queries]
+        out += ['  ]);',
+                '  // Same values the proxy returned (dates as strings)',
+                '  return JSON.parse(JSON.stringify(results));',
+                '}']
+    return '\n'.join(out) + '\n'
+
+
+def rewrite(content, groups, module):
+    """The component with each group's queries replaced by one call to its server action."""
+    edits = []
+    for g in groups:
+        for i, q in enumerate(g.queries):
+            s = q.stmt
+            indent = content[s.start:s.start + len(content[s.start:]) - len(content[s.start:].lstrip(' \t'))]
+            line = f"{indent}{s.decl} {s.pattern} = {q.result};"
+            if i == 0:
+                results = ', '.join(x.result for x in g.queries)
+                args = ', '.join(arg for _, _, arg in g.params)
+                line = f"{indent}const [{results}] = await {g.name}({args});\n{line}"
+            edits.append((s.start, s.end, line))
+    for start, end, text in sorted(edits, reverse=True):
+        content = content[:start] + text + content[end:]
+    for g in groups:
+        content = add_import(content, g.name, module)
+    return content
+
+
+# ---------------------------------------------------------------------------
+# Per file and per page
+
+def queries_path(path):
+    return os.path.splitext(path)[0] + SUFFIX
+
+
+def proxy_queries(content):
+    return [c for c in find_chains(content) if is_proxied(content, c)]
+
+
+def analyze(content, path):
+    """(FileReport, groups) for a client component; None for other files."""
+    if directive(content) != 'use client' or '.from' not in content:
+        return None
+    report = FileReport(path, len(proxy_queries(content)))
+    if not report.queries:
+        return None
+    tree = tslex.parse_file_content(content, path)
+    groups = build_groups(content, path, tree)
+    report.groups = groups
+    if groups and os.path.exists(queries_path(path)):
+        report.skipped = f"{os.path.basename(queries_path(path))} exists"
+        groups = []
+    return report, groups
+
+
+def resolve(spec, relpath, known):
+    """The local file an import specifier names, if it is one of `known`."""
+    module = canonical_module(spec, relpath)
+    if not module.startswith('@/'):
+        return None
+    base = module[2:]
+    for candidate in [base] + [base + ext for ext in engine.EXTENSIONS] \
+            + [f"{base}/index{ext}" for ext in engine.EXTENSIONS]:
+        if candidate in known:
+            return candidate
+    return None
+
+
+def page_totals(files, reports):
+    """{page: (queries, requests after)} over each page's local imports."""
+    known = {os.path.normpath(p).replace(os.sep, '/'): p for p in files}
+    imports = {}
+    for rel, path in known.items():
+        deps = []
+        for imp in parse_imports(engine.read_source(path)):
+            if not imp.type_only:
+                target = resolve(imp.module, rel, known)
+                if target is not None:
+                    deps.append(target)
+        imports[rel] = deps
+    by_rel = {os.path.normpath(r.path).replace(os.sep, '/'): r for r in reports}
+    totals = {}
+    for rel in known:
+        if os.path.basename(rel) not in PAGE_NAMES:
+            continue
+        seen, todo = {rel}, deque([rel])
+        while todo:
+            for dep in imports[todo.popleft()]:
+                if dep not in seen:
+                    seen.add(dep)
+                    todo.append(dep)
+        queries = saved = 0
+        for r in (by_rel[f] for f in seen if f in by_rel):
+            queries += r.queries
+            saved += 0 if r.skipped else r.saved
+        if queries:
+            totals[known[rel]] = (queries, queries - saved)
+    return totals
+
+
+def print_report(reports, pages, out=sys.stdout, top=None):
+    grouped = [r for r in reports if r.groups]
+    queries = sum(r.queries for r in reports)
+    saved = sum(r.saved for r in grouped if not r.skipped)
+    print(f"{queries} proxy queries in {len(reports)} client files; {sum(len(r.groups) for r in grouped)} "
+          f"groups in {len(grouped)} files fold {saved} of them away", file=out)
+    grouped.sort(key=lambda r: (-r.saved, r.path))
+    for r in grouped[:top]:
+        note = f"  (skipped: {r.skipped})" if r.skipped else ''
+        print(f"\n{r.path}  {r.queries} -> {r.queries - r.saved} requests{note}", file=out)
+        for g in r.groups:
+            tables = ', '.join(q.chain.table for q in g.queries)
+            print(f"    {r.path}:{g.line}  {g.name}: {len(g.queries)} -> 1 ({tables})", file=out)
+    ranked = sorted(pages.items(), key=lambda kv: (kv[1][1] - kv[1][0], kv[0]))
+    ranked = [(p, t) for p, t in ranked if t[0] != t[1]]
+    if ranked:
+        print(f"\nPages (proxy queries in the page and the client code it imports):", file=out)
+        for page, (before, after) in ranked[:top]:
+            print(f"    {page}  {before} -> {after} ({before - after} fewer)", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='codemod.fanout', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('dirs', nargs='*', default=engine.ROOT_DIRS,
+                        help='directories to walk (default: %(default)s)')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('-n', '--dry-run', action='store_true',
+                      help='print the rewrite as a patch (the report goes to stderr)')
+    mode.add_argument('--write', action='store_true', help='rewrite the components and write the .queries.ts files')
+    parser.add_argument('--top', type=int, metavar='N', help='only the N files and pages that save most')
+    args = parser.parse_args(argv)
+
+    files = list(engine.iter_source_files(engine.ROOT_DIRS))
+    roots = tuple(os.path.normpath(d) for d in args.dirs)
+    reports = []
+    changes = []
+    for path in files:
+        if not os.path.normpath(path).startswith(roots) and roots != ('.',):
+            continue
+        content = engine.read_source(path)
+        found = analyze(content, path)
+        if found is None:
+            continue
+        report, groups = found
+        reports.append(report)
+        if groups:
+            module = './' + os.path.basename(queries_path(path))[:-len('.ts')]
+            changes.append((path, content, rewrite(content, groups, module), server_module(path, groups)))
+
+    if args.dry_run:
+        patch = PatchWriter(sys.stdout)
+        for path, old, new, actions in changes:
+            patch.add(path, old, new, ['fanout'])
+            patch.add(queries_path(path), None, actions, ['fanout'])
+    elif args.write and changes:
+        writer = writeback.WriteBack(rules=['fanout'])
+        for path, _, new, actions in changes:
+            writer.add(queries_path(path), actions)
+            writer.add(path, new)
+        writer.close()
+    print_report(reports, page_totals(files, reports), sys.stderr if args.dry_run else sys.stdout, args.top)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,113 @@
+"""
+Idempotence check: every rule, run twice over the benchmark corpus.
+
+    python -m codemod.idempotence                     # every rule, then the whole chain
+    python -m codemod.idempotence --rules smart_inject,definitive_fix
+    python -m codemod.idempotence --dir .             # the real tree instead of a corpus
+
+A rule's output should already be a fixed point of the rule: running it again
+over what it produced must change nothing. For each file of a codemod.corpus
+tree (or of --dir) each rule runs once over the file and once more over its
+own output; a rule whose second run still changes any file is flagged, with a
+few files and the first lines the second run touched. The whole chain (as
+"all") is checked the same way. Nothing is written; the exit status is 1 when
+anything was flagged.
+"""
+import argparse
+import difflib
+import os
+import shutil
+import tempfile
+
+from . import corpus, engine
+
+CHAIN = 'all'
+# Rules registered by root scripts that are not part of the default chain
+EXTRA_RULES = ['parallelize_awaits', 'supabase_to_prisma']
+
+
+def first_change(before, after, lines=4):
+    """The first few removed/added lines between two contents."""
+    diff = difflib.unified_diff(before.splitlines(), after.splitlines(), n=0, lineterm='')
+    out = [line for line in diff if line[:1] in '+-' and line[:3] not in ('+++', '---')]
+    return out[:lines]
+
+
+class Finding:
+    __slots__ = ('name', 'files', 'changed', 'unstable')
+
+    def __init__(self, name):
+        self.name = name
+        self.files = 0
+        self.changed = 0            # files the first run changed
+        self.unstable = []          # (filepath, first changed lines) the second run still changed
+
+
+def check(name, rules, files, examples):
+    finding = Finding(name)
+    rule_stats = {r.name: engine.RuleStats() for r in rules}
+    for fp in files:
+        content = engine.read_source(fp)
+        once = engine.apply_rules(content, fp, rules, rule_stats)
+        finding.files += 1
+        if once == content:
+            continue
+        finding.changed += 1
+        twice = engine.apply_rules(once, fp, rules, rule_stats)
+        if twice != once:
+            finding.unstable.append((fp, first_change(once, twice) if len(finding.unstable) < examples else []))
+    return finding
+
+
+def print_finding(f, examples):
+    status = f"FLAGGED ({len(f.unstable)} files change again)" if f.unstable else "ok"
+    print(f"{f.name:<28} {f.files:>6} {f.changed:>8}  {status}")
+    for fp, lines in f.unstable[:examples]:
+        print(f"    {fp}")
+        for line in lines:
+            print(f"      {line[:120]}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='codemod.idempotence', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rules', help='comma separated rules (default: every rule, then the whole chain)')
+    parser.add_argument('--scale', type=float, default=1, help='corpus size (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=1, help='corpus seed (default: %(default)s)')
+    parser.add_argument('--dir', help='check this tree instead of a generated corpus')
+    parser.add_argument('--examples', type=int, default=3,
+                        help='files to show per flagged rule (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    names = args.rules.split(',') if args.rules else list(engine.RULE_ORDER) + EXTRA_RULES + [CHAIN]
+    chain = engine.load_rules()
+    checks = [(n, chain if n == CHAIN else engine.load_rules([n])) for n in names]
+
+    cwd = os.getcwd()
+    work_dir = None
+    if args.dir:
+        tree = args.dir
+    else:
+        tree = work_dir = tempfile.mkdtemp(prefix='codemod-idempotence-')
+        corpus.generate(tree, args.scale, args.seed)
+    flagged = 0
+    try:
+        # Rules match paths relative to the project root (fix_object_injection's allow-list)
+        os.chdir(tree)
+        files = list(engine.iter_source_files(engine.ROOT_DIRS))
+        print(f"{'Rule':<28} {'Files':>6} {'Changed':>8}  Second run")
+        for name, rules in checks:
+            f = check(name, rules, files, args.examples)
+            print_finding(f, args.examples)
+            flagged += bool(f.unstable)
+    finally:
+        os.chdir(cwd)
+        if work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    if flagged:
+        print(f"\n{flagged} of {len(checks)} checked rules are not idempotent")
+    return 1 if flagged else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,141 @@
+"""
+Read and edit the import statements at the top of a TS/TSX file.
+
+    imports = parse_imports(content)
+    content = add_import(content, 'Eye', 'lucide-react')
+    content = add_import(content, 'Link', 'next/link', default=True)
+
+add_import() merges into an existing `import { ... } from 'module'` clause
+(keeping its one-line or one-name-per-line layout), adds a default or named
+part to a clause that lacks it, and only writes a new import line when the
+module isn't imported yet. New lines go after the last import, following the
+file's quote and semicolon style.
+"""
+import re
+
+IMPORT_RE = re.compile(r"""
+    ^import\s+
+    (?:(?P<type>type)\s+)?
+    (?:(?P<clause>[\w$*{][^;'"]*?)\s+from\s+)?
+    (?P<quote>['"])(?P<module>[^'"\n]+)(?P=quote)
+    (?P<semi>[ \t]*;)?
+""", re.M | re.X)
+DIRECTIVE_RE = re.compile(r"""^(['"])use (?:server|client)\1;?[ \t]*\n""", re.M)
+NAMESPACE_RE = re.compile(r'\*\s*as\s+([\w$]+)')
+DEFAULT_RE = re.compile(r'^([\w$]+)\s*(?:,|$)')
+
+
+class Import:
+    __slots__ = ('start', 'end', 'module', 'type_only', 'default', 'namespace',
+                 'names', 'brace_start', 'brace_end', 'quote', 'semi')
+
+    def __init__(self, m):
+        self.start = m.start()
+        self.end = m.end()
+        self.module = m.group('module')
+        self.type_only = bool(m.group('type'))
+        self.quote = m.group('quote')
+        self.semi = bool(m.group('semi'))
+        self.default = self.namespace = None
+        self.names = []             # (imported, local, type_only)
+        self.brace_start = self.brace_end = None
+        clause = m.group('clause') or ''
+        clause_start = m.start('clause')
+        d = DEFAULT_RE.match(clause)
+        if d:
+            self.default = d.group(1)
+        ns = NAMESPACE_RE.search(clause)
+        if ns:
+            self.namespace = ns.group(1)
+        brace = clause.find('{')
+        if brace >= 0:
+            close = clause.rfind('}')
+            self.brace_start = clause_start + brace
+            self.brace_end = clause_start + close
+            for item in clause[brace + 1:close].split(','):
+                item = re.sub(r'//[^\n]*|/\*[\s\S]*?\*/', '', item).strip()
+                if not item:
+                    continue
+                type_only = item.startswith('type ')
+                if type_only:
+                    item = item[5:].strip()
+                parts = re.split(r'\s+as\s+', item)
+                self.names.append((parts[0], parts[-1], type_only))
+
+    def locals(self):
+        out = [local for _, local, _ in self.names]
+        if self.default:
+            out.append(self.default)
+        if self.namespace:
+            out.append(self.namespace)
+        return out
+
+    def __repr__(self):
+        return f"Import({self.module!r}, default={self.default}, names={[n for n, _, _ in self.names]})"
+
+
+def parse_imports(content):
+    return [Import(m) for m in IMPORT_RE.finditer(content)]
+
+
+def imported_names(imports):
+    """Local names bound by value (non-`import type`) imports."""
+    names = set()
+    for imp in imports:
+        if not imp.type_only:
+            names.update(imp.locals())
+    return names
+
+
+def _insert_named(content, imp, name):
+    inner = content[imp.brace_start + 1:imp.brace_end]
+    if '\n' not in inner:
+        body = inner.strip().rstrip(',').strip()
+        new_inner = f" {body}, {name} " if body else f" {name} "
+        return content[:imp.brace_start + 1] + new_inner + content[imp.brace_end:]
+    # One name per line: copy the indent of the last item, keep any trailing comma
+    lines = inner.rstrip().split('\n')
+    last = lines[-1]
+    indent = re.match(r'[ \t]*', last).group() or '  '
+    trailing = inner[len(inner.rstrip()):]
+    if last.rstrip().endswith(','):
+        lines.append(f"{indent}{name},")
+    else:
+        lines[-1] = last.rstrip() + ','
+        lines.append(f"{indent}{name}")
+    return content[:imp.brace_start + 1] + '\n'.join(lines) + trailing + content[imp.brace_end:]
+
+
+def _new_line_position(content, imports):
+    if imports:
+        end = imports[-1].end
+        nl = content.find('\n', end)
+        return len(content) if nl < 0 else nl + 1
+    m = DIRECTIVE_RE.match(content)
+    return m.end() if m else 0
+
+
+def add_import(content, name, module, default=False):
+    """Import `name` from `module` into `content`, merging with an existing clause when possible."""
+    imports = parse_imports(content)
+    if name in imported_names(imports):
+        return content
+    for imp in imports:
+        if imp.module != module or imp.type_only or imp.namespace or not imp.locals():
+            continue
+        if default:
+            if imp.default is None:
+                return content[:imp.start] + f"import {name}, " + content[imp.start + len('import '):]
+            continue
+        if imp.brace_start is not None:
+            return _insert_named(content, imp, name)
+        if imp.default is not None:
+            at = content.index(imp.default, imp.start) + len(imp.default)
+            return content[:at] + f", {{ {name} }}" + content[at:]
+
+    quote = imports[0].quote if imports else "'"
+    semi = ';' if not imports or imports[-1].semi else ''
+    clause = name if default else f"{{ {name} }}"
+    line = f"import {clause} from {quote}{module}{quote}{semi}\n"
+    pos = _new_line_position(content, imports)
+    return content[:pos] + line + content[pos:]
@@ -0,0 +1,215 @@
+"""
+File manifest: (size, mtime, hash) per source file, diffed between runs.
+
+    python -m codemod.manifest                   # what changed since the last run
+    python -m codemod.manifest --bench           # walk times against the old os.walk loop
+
+The manifest (.codemod-manifest.json) also keeps each directory's mtime and
+filtered listing, so a walk with it (codemod.walk.scan(dirs, manifest=m))
+only stats unchanged directories instead of listing them, and refresh() only
+re-reads the files whose size or mtime changed. Listings are dropped when
+the extensions, the .gitignore switch or any .gitignore above the walked
+directories changed; a directory whose own .gitignore changed is relisted
+with everything below it.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+from .engine import ROOT_DIRS
+from .walk import EXTENSIONS, PRUNE_DIRS, ignore_stat, scan
+
+MANIFEST_FILE = '.codemod-manifest.json'
+MANIFEST_FORMAT = 1
+# mtimes this close to "now" may still change within the same tick
+RACY_WINDOW_NS = 2 * 10**9
+
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+class Changes:
+    __slots__ = ('added', 'removed', 'modified', 'touched', 'unchanged')
+
+    def __init__(self):
+        self.added = []
+        self.removed = []
+        self.modified = []
+        self.touched = []           # stat changed, content didn't
+        self.unchanged = 0
+
+
+class Manifest:
+    def __init__(self, path=MANIFEST_FILE):
+        self.path = path
+        self.extensions = None
+        self.ignore = None
+        self.ignore_sources = {}
+        self.dirs = {}              # dir -> [mtime, .gitignore stat, subdirs, files]
+        self.files = {}             # path -> [size, mtime, sha1]
+        self.seen_dirs = set()
+        self.listed = 0             # directories read this run (the rest came from the manifest)
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        if data.get('format') != MANIFEST_FORMAT:
+            return self
+        self.extensions = tuple(data.get('extensions', ()))
+        self.ignore = data.get('ignore')
+        self.ignore_sources = data.get('ignore_sources', {})
+        self.dirs = data.get('dirs', {})
+        self.files = data.get('files', {})
+        return self
+
+    def usable(self, extensions, ignore):
+        """Whether the recorded listings were made with the same filters and .gitignore files."""
+        if self.extensions != tuple(extensions) or self.ignore != ignore:
+            self.extensions, self.ignore = tuple(extensions), ignore
+            return False
+        return all(ignore_stat(p) == sig for p, sig in self.ignore_sources.items())
+
+    def listing(self, path, st):
+        entry = self.dirs.get(path)
+        if entry is not None and entry[0] is not None and entry[0] == st.st_mtime_ns:
+            return entry
+        return None
+
+    def record_listing(self, path, st, ignore_sig, subdirs, files):
+        self.listed += 1
+        mtime = st.st_mtime_ns
+        if time.time_ns() - mtime < RACY_WINDOW_NS:
+            mtime = None  # relist next time
+        self.dirs[path] = [mtime, ignore_sig, subdirs, files]
+
+    def refresh(self, entries):
+        """Bring the file records up to date with `entries` (from scan()); returns the Changes."""
+        changes = Changes()
+        old = self.files
+        self.files = {}
+        for entry in entries:
+            path = entry.path
+            st = entry.stat()
+            mtime = st.st_mtime_ns
+            record = old.get(path)
+            if record is not None and record[0] == st.st_size and record[1] == mtime:
+                self.files[path] = record
+                changes.unchanged += 1
+                continue
+            digest = file_hash(path)
+            if time.time_ns() - mtime < RACY_WINDOW_NS:
+                mtime = None  # re-read next time
+            self.files[path] = [st.st_size, mtime, digest]
+            if record is None:
+                changes.added.append(path)
+            elif record[2] != digest:
+                changes.modified.append(path)
+            else:
+                changes.touched.append(path)
+        changes.removed = sorted(p for p in old if p not in self.files)
+        return changes
+
+    def save(self):
+        dirs = {p: e for p, e in self.dirs.items() if p in self.seen_dirs}
+        data = {'format': MANIFEST_FORMAT, 'extensions': list(self.extensions or ()),
+                'ignore': self.ignore, 'ignore_sources': self.ignore_sources,
+                'dirs': dirs, 'files': self.files}
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp, self.path)
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+
+def legacy_walk(root_dirs, extensions=EXTENSIONS):
+    """The os.walk loop the engine and the symbol index used before."""
+    for d in root_dirs:
+        for root, dirs, files in os.walk(d):
+            dirs[:] = sorted(x for x in dirs if x not in PRUNE_DIRS)
+            for fname in sorted(files):
+                if fname.endswith(extensions):
+                    path = os.path.join(root, fname)
+                    os.stat(path)
+                    yield path
+
+
+def _best(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, count
+
+
+def bench(root_dirs, repeat, out=sys.stdout):
+    """Time the old loop, scan() and a manifest rerun (each including one stat per file)."""
+    manifest_path = MANIFEST_FILE + '.bench'
+
+    def walk_scan():
+        return sum(1 for e in scan(root_dirs) if e.stat())
+
+    def rerun():
+        manifest = Manifest(manifest_path).load()
+        n = sum(1 for e in scan(root_dirs, manifest=manifest) if e.stat())
+        return n
+
+    warm = Manifest(manifest_path)
+    warm.refresh(scan(root_dirs, manifest=warm))
+    warm.save()
+    try:
+        rows = [('os.walk loop', _best(lambda: sum(1 for _ in legacy_walk(root_dirs)), repeat)),
+                ('scandir + .gitignore', _best(walk_scan, repeat)),
+                ('manifest rerun', _best(rerun, repeat))]
+    finally:
+        os.remove(manifest_path)
+    print(f"{'Walker':<22} {'Files':>6} {'Best (ms)':>10}", file=out)
+    for name, (seconds, count) in rows:
+        print(f"{name:<22} {count:>6} {seconds * 1000:>10.2f}", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='codemod.manifest', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('dirs', nargs='*', default=ROOT_DIRS, help='directories to walk (default: %(default)s)')
+    parser.add_argument('--manifest', default=MANIFEST_FILE, metavar='PATH',
+                        help='manifest to diff against and update (default: %(default)s)')
+    parser.add_argument('--list', action='store_true', help='only list the files the walk yields')
+    parser.add_argument('--no-ignore', action='store_true', help="don't read .gitignore files")
+    parser.add_argument('--bench', action='store_true', help='compare walk times with the old os.walk loop')
+    parser.add_argument('--repeat', type=int, default=5, help='with --bench, runs per walker (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        bench(args.dirs, args.repeat)
+        return 0
+    if args.list:
+        for entry in scan(args.dirs, ignore=not args.no_ignore):
+            print(entry.path)
+        return 0
+    manifest = Manifest(args.manifest).load()
+    changes = manifest.refresh(scan(args.dirs, ignore=not args.no_ignore, manifest=manifest))
+    manifest.save()
+    for label, paths in (('added', changes.added), ('removed', changes.removed),
+                         ('modified', changes.modified)):
+        for path in paths:
+            print(f"{label:<9}{path}")
+    print(f"\n{len(changes.added)} added, {len(changes.removed)} removed, {len(changes.modified)} modified, "
+          f"{len(changes.touched)} touched, {changes.unchanged} unchanged; "
+          f"{manifest.listed} of {len(manifest.seen_dirs)} directories listed", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,299 @@
+"""
+Lazily parsed, memoized outline of a source file, shared by all rules.
+
+    from codemod import outline
+
+    o = outline.of(content, filepath)
+    o.directive            # 'use client', 'use server' or None
+    o.imports_end          # where a statement after the imports goes
+    for d in o.exported_functions(is_async=True):
+        d.body             # (start, end) of the `{ ... }` body
+
+An Outline is worked out the first time a rule asks for it (one tslex pass
+plus the import parser) and memoized by content hash, so every rule that sees
+the same content shares one parse; a rule that changes the content simply
+gets a fresh one on its next call. Rules that need the full scope tree get
+it from tree_of(), memoized the same way. At most MAX_MEMO files are held in
+memory (least recently used go first).
+
+Outlines are plain offsets and names, so they are also kept on disk in
+.codemod-outline.json, again keyed by content hash: a file that hasn't
+changed since an earlier run is never lexed again, whatever rule set runs.
+The file is stamped with a hash of the code that builds outlines (this
+module, tslex and imports); a store written by other code is dropped.
+engine.run saves the store at the end of a run. Worker processes (-j) read
+it but don't write it back.
+"""
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+
+from . import imports, tslex
+from .imports import parse_imports
+
+OUTLINE_FILE = '.codemod-outline.json'
+OUTLINE_FORMAT = 1
+MAX_MEMO = 128
+MAX_STORED = 4096
+
+DIRECTIVE_RE = re.compile(r"""\A(?:\s|//[^\n]*|/\*[\s\S]*?\*/)*(['"])use (client|server)\1;?""")
+DECLARATION_RE = re.compile(r"""
+    ^(?P<export>export\s+(?P<default>default\s+)?)?
+    (?:declare\s+)?
+    (?P<async>async\s+)?
+    (?P<kind>function\s*\*?|const|let|var|class|abstract\s+class|interface|type|enum)
+    \s+(?P<name>[\w$]+)
+""", re.M | re.X)
+# `= async (...) =>` / `= function (...)` after a const name: its body is a function
+FUNCTION_VALUE_RE = re.compile(r'\s*(?::[^=]+)?=\s*(?P<async>async\b)?\s*(?:function\b|\(|[\w$]+\s*=>)')
+
+
+class Declaration:
+    __slots__ = ('kind', 'name', 'start', 'end', 'exported', 'default', 'is_async', 'body')
+
+    def __init__(self, kind, name, start, end, exported=False, default=False, is_async=False, body=None):
+        self.kind = kind            # function / const / let / var / class / interface / type / enum
+        self.name = name
+        self.start = start          # start of the statement, `export` included
+        self.end = end              # just after the statement
+        self.exported = exported
+        self.default = default      # `export default ...`
+        self.is_async = is_async
+        self.body = body            # (start, end) of the function body braces, end inclusive
+
+    def to_list(self):
+        return [self.kind, self.name, self.start, self.end, self.exported, self.default,
+                self.is_async, self.body]
+
+    def __repr__(self):
+        return f"<Declaration {self.kind} {self.name} {self.start}-{self.end}>"
+
+
+class Outline:
+    __slots__ = ('directive', 'imports', 'imports_end', 'declarations')
+
+    def __init__(self, directive, imports, imports_end, declarations):
+        self.directive = directive          # 'use client' / 'use server' / None
+        self.imports = imports              # [(start, end, module)]
+        self.imports_end = imports_end      # offset after the last import line (or the directive)
+        self.declarations = declarations    # top-level Declarations, in source order
+
+    @property
+    def is_client(self):
+        return self.directive == 'use client'
+
+    def declared(self, name):
+        return [d for d in self.declarations if d.name == name]
+
+    def functions(self):
+        """Top-level functions: `function` declarations and consts holding a function."""
+        return [d for d in self.declarations if d.body is not None]
+
+    def exported_functions(self, is_async=None, default=True):
+        """Exported `function` declarations; `default=False` leaves out `export default function`."""
+        return [d for d in self.functions() if d.exported and d.kind == 'function'
+                and (default or not d.default) and (is_async is None or d.is_async == is_async)]
+
+    def to_json(self):
+        return [self.directive, self.imports, self.imports_end,
+                [d.to_list() for d in self.declarations]]
+
+    @classmethod
+    def from_json(cls, data):
+        directive, imports, imports_end, declarations = data
+        decls = []
+        for kind, name, start, end, exported, default, is_async, body in declarations:
+            decls.append(Declaration(kind, name, start, end, exported, default, is_async,
+                                     tuple(body) if body else None))
+        return cls(directive, [tuple(i) for i in imports], imports_end, decls)
+
+
+# ---------------------------------------------------------------------------
+# Building an outline
+
+def _line_end(content, pos):
+    nl = content.find('\n', pos)
+    return len(content) if nl < 0 else nl + 1
+
+
+def _statement_end(content, pos, children, i):
+    """End of a statement running on from `pos`: just after its `;` outside any brace, or its line end."""
+    n = len(content)
+    while pos < n:
+        semi = content.find(';', pos)
+        nl = content.find('\n', pos)
+        stop = min(x for x in (semi, nl, n) if x >= 0)
+        while i < len(children) and children[i].end < stop:
+            i += 1
+        if i < len(children) and children[i].start < stop:
+            # The `;` / newline is inside a `{ ... }` of this statement; carry on after it
+            pos = children[i].end + 1
+            continue
+        return stop + 1 if stop < n and content[stop] == ';' else stop
+    return n
+
+
+def _next_function(children, j, limit):
+    """The first function scope among children[j:] opening before `limit`."""
+    while j < len(children) and children[j].start < limit:
+        if children[j].kind == tslex.FUNCTION:
+            return children[j]
+        j += 1
+    return None
+
+
+def directive(content):
+    """'use client' / 'use server' when the file opens with that directive, else None (no parse needed)."""
+    m = DIRECTIVE_RE.match(content)
+    return f"use {m.group(2)}" if m else None
+
+
+def build(content, tree):
+    m = DIRECTIVE_RE.match(content)
+    directive = f"use {m.group(2)}" if m else None
+
+    imports = [(imp.start, imp.end, imp.module) for imp in parse_imports(content)]
+    if imports:
+        imports_end = _line_end(content, imports[-1][1])
+    elif m:
+        imports_end = _line_end(content, m.end())
+    else:
+        imports_end = 0
+
+    children = [s for s in tree.root.children if s.end is not None]
+    declarations = []
+    i = 0
+    for m in DECLARATION_RE.finditer(content):
+        start = m.start()
+        # Only statements at the top level, not `const` lines inside a function
+        while i < len(children) and children[i].end < start:
+            i += 1
+        if i < len(children) and children[i].start < start:
+            continue
+        kind = m.group('kind').split()[-1].rstrip('*').strip()
+        is_async = bool(m.group('async'))
+        end = _statement_end(content, m.end(), children, i)
+        fn = None
+        if kind == 'function':
+            fn = _next_function(children, i, len(content))
+        elif kind in ('const', 'let', 'var'):
+            fv = FUNCTION_VALUE_RE.match(content, m.end())
+            if fv:
+                is_async = bool(fv.group('async'))
+                fn = _next_function(children, i, end)
+        body = (fn.start, fn.end) if fn is not None else None
+        if kind == 'function' and fn is not None:
+            end = fn.end + 1
+        declarations.append(Declaration(kind, m.group('name'), start, end, bool(m.group('export')),
+                                        bool(m.group('default')), is_async, body))
+    return Outline(directive, imports, imports_end, declarations)
+
+
+# ---------------------------------------------------------------------------
+# Memo and on-disk store
+
+class _Entry:
+    __slots__ = ('outline', 'tree')
+
+    def __init__(self):
+        self.outline = None
+        self.tree = None
+
+
+_builder_version = None
+
+
+def builder_version():
+    """OUTLINE_FORMAT plus the source of the modules build() depends on."""
+    global _builder_version
+    if _builder_version is None:
+        h = hashlib.sha1(f"format={OUTLINE_FORMAT}".encode())
+        for module in (__file__, tslex.__file__, imports.__file__):
+            with open(module, 'rb') as f:
+                h.update(f.read())
+        _builder_version = h.hexdigest()
+    return _builder_version
+
+
+class OutlineStore:
+    def __init__(self, path=OUTLINE_FILE):
+        self.path = path
+        self.memo = OrderedDict()       # key -> _Entry, least recently used first
+        self.stored = None              # key -> json, loaded on first use
+        self.dirty = False
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        if data.get('format') == builder_version():
+            self.stored = OrderedDict(data.get('entries', {}))
+            return
+        self.stored = OrderedDict()
+        if data:
+            # written by another version of the outliner: none of it can be trusted
+            self.dirty = True
+
+    def _entry(self, content, filepath):
+        jsx = filepath.endswith(('.tsx', '.jsx'))
+        key = hashlib.sha1(content.encode('utf-8')).hexdigest() + ('x' if jsx else '')
+        entry = self.memo.get(key)
+        if entry is not None:
+            self.memo.move_to_end(key)
+            return key, entry
+        entry = self.memo[key] = _Entry()
+        if len(self.memo) > MAX_MEMO:
+            self.memo.popitem(last=False)
+        return key, entry
+
+    def tree(self, content, filepath):
+        _, entry = self._entry(content, filepath)
+        if entry.tree is None:
+            entry.tree = tslex.parse_file_content(content, filepath)
+        return entry.tree
+
+    def outline(self, content, filepath):
+        key, entry = self._entry(content, filepath)
+        if entry.outline is not None:
+            return entry.outline
+        if self.stored is None:
+            self._load()
+        data = self.stored.get(key)
+        if data is not None:
+            entry.outline = Outline.from_json(data)
+            self.stored.move_to_end(key)
+        else:
+            if entry.tree is None:
+                entry.tree = tslex.parse_file_content(content, filepath)
+            entry.outline = build(content, entry.tree)
+            self.stored[key] = entry.outline.to_json()
+            self.dirty = True
+        return entry.outline
+
+    def save(self):
+        if not self.dirty:
+            return
+        while len(self.stored) > MAX_STORED:
+            self.stored.popitem(last=False)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'format': builder_version(), 'entries': self.stored}, f, separators=(',', ':'))
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+
+store = OutlineStore()
+
+
+def of(content, filepath):
+    """The Outline of `content`, from memory, from disk or freshly built."""
+    return store.outline(content, filepath)
+
+
+def tree_of(content, filepath):
+    """The tslex ScopeTree of `content`, shared with every other rule that asks (memory only)."""
+    return store.tree(content, filepath)
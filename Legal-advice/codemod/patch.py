@@ -0,0 +1,82 @@
+"""
+Streaming patch output for dry runs.
+
+PatchWriter turns each changed file into a git-style unified diff and writes
+it out straight away, so a dry run over the whole tree never holds more than
+one file's diff in memory. The output applies with `git apply` or `patch -p1`.
+A small per-file summary (bytes and lines changed, rules that fired) is kept
+alongside and can be dumped as JSON at the end.
+"""
+import difflib
+import json
+import os
+
+
+def split_lines(text):
+    """Split on '\\n' only, the way git and patch count lines."""
+    lines = text.split('\n')
+    out = [line + '\n' for line in lines[:-1]]
+    if lines[-1]:
+        out.append(lines[-1])
+    return out
+
+
+def file_diff(path, old, new, context=3):
+    """Yield the git-style unified diff lines for one file; `old` is None for a new file."""
+    path = path.replace(os.sep, '/')
+    yield f"diff --git a/{path} b/{path}\n"
+    if old is None:
+        yield "new file mode 100644\n"
+    for line in difflib.unified_diff(split_lines(old or ''), split_lines(new),
+                                     '/dev/null' if old is None else f"a/{path}", f"b/{path}", n=context):
+        if line.endswith('\n'):
+            yield line
+        else:
+            yield line + '\n'
+            yield '\\ No newline at end of file\n'
+
+
+class PatchWriter:
+    """Writes diffs to `out` (a text stream) as files are reported changed."""
+
+    def __init__(self, out, context=3):
+        self.out = out
+        self.context = context
+        self.files = []
+
+    def add(self, path, old, new, rules=()):
+        added = removed = 0
+        headers = 3 if old is not None else 4
+        for i, line in enumerate(file_diff(path, old, new, self.context)):
+            # diff --git / --- / +++ (and new file mode) headers
+            if i >= headers:
+                if line.startswith('+'):
+                    added += 1
+                elif line.startswith('-'):
+                    removed += 1
+            self.out.write(line)
+        self.out.flush()
+        before, after = len((old or '').encode('utf-8')), len(new.encode('utf-8'))
+        self.files.append({
+            'path': path.replace(os.sep, '/'),
+            'bytes_before': before,
+            'bytes_after': after,
+            'bytes_delta': after - before,
+            'lines_added': added,
+            'lines_removed': removed,
+            'rules': list(rules),
+        })
+
+    def summary(self):
+        return {
+            'files_changed': len(self.files),
+            'bytes_delta': sum(f['bytes_delta'] for f in self.files),
+            'lines_added': sum(f['lines_added'] for f in self.files),
+            'lines_removed': sum(f['lines_removed'] for f in self.files),
+            'files': self.files,
+        }
+
+    def write_summary(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
+            f.write('\n')
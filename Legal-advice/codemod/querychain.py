@@ -0,0 +1,376 @@
+"""
+Parser for supabase-js query chains in TS/TSX source.
+
+    (await __getSupabaseClient()).from('legal_requests')
+      .select('id, title, department:departments(name)')
+      .eq('client_id', user.id)
+      .order('created_at', { ascending: false })
+
+find_chains() locates every `.from(...)` call on a supabase client and reads
+the method calls hanging off it into a Chain: the receiver/end offsets, the
+table and one Call per link, each argument kept as its source text. The
+scanner understands strings, template literals, regex literals, comments and
+nested brackets, so commas and parens inside arguments are safe. Chains in
+comments are ignored.
+
+parse_select() turns a PostgREST select string into Column and Embed items.
+"""
+import bisect
+import re
+
+# `supabase`, `supabaseAdmin`, `(await createClient())`, `(await __getSupabaseClient())`, ...
+RECEIVER_RE = re.compile(r"""
+    (?:\(\s*await\s+(?:[\w$]*[Ss]upabase[\w$]*|create\w*Client)\s*\(\s*\)\s*\)
+     | (?<![\w$.])[\w$]*[Ss]upabase[\w$]*)
+    \s*\.\s*from\s*\(
+""", re.X)
+IDENT_RE = re.compile(r'[A-Za-z_$][\w$]*')
+SPACE_RE = re.compile(r'(?:\s+|//[^\n]*|/\*[\s\S]*?\*/)*')
+# Characters after which `/` starts a regex literal rather than a division
+REGEX_PREFIX = set('(,=:[!&|?{};+-*%<>~^') | {''}
+STRING_RE = re.compile(r"""^(?:'((?:[^'\\\n]|\\.)*)'|"((?:[^"\\\n]|\\.)*)"|`((?:[^`\\$]|\\.|\$(?!\{))*)`)$""", re.S)
+
+
+class ChainError(ValueError):
+    pass
+
+
+class Call:
+    __slots__ = ('name', 'args', 'start', 'end')
+
+    def __init__(self, name, args, start, end):
+        self.name = name
+        self.args = args
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return f"Call({self.name}, {self.args!r})"
+
+
+class Chain:
+    __slots__ = ('start', 'end', 'table', 'calls')
+
+    def __init__(self, start, end, table, calls):
+        self.start = start      # start of the receiver
+        self.end = end          # just after the last call's `)`
+        self.table = table      # None when `.from()` isn't given a string literal
+        self.calls = calls      # links after `.from()`
+
+    def names(self):
+        return [c.name for c in self.calls]
+
+    def __repr__(self):
+        return f"Chain({self.table}, {self.names()})"
+
+
+# ---------------------------------------------------------------------------
+# Scanning
+
+def skip_quoted(text, i):
+    """`text[i]` is ' or "; return the index after the closing quote."""
+    quote = text[i]
+    i += 1
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == quote or c == '\n':
+            return i + 1
+        i += 1
+    return n
+
+
+def skip_template(text, i):
+    """`text[i]` is a backtick; return the index after the closing one."""
+    i += 1
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '`':
+            return i + 1
+        if c == '$' and text.startswith('${', i):
+            i = skip_group(text, i + 1)
+            continue
+        i += 1
+    return n
+
+
+def skip_regex(text, i):
+    i += 1
+    n = len(text)
+    in_class = False
+    while i < n:
+        c = text[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '\n':
+            return i
+        if c == '[':
+            in_class = True
+        elif c == ']':
+            in_class = False
+        elif c == '/' and not in_class:
+            i += 1
+            while i < n and (text[i].isalnum() or text[i] == '_'):
+                i += 1
+            return i
+        i += 1
+    return n
+
+
+def last_code_char(text, i):
+    j = i - 1
+    while j >= 0 and text[j].isspace():
+        j -= 1
+    return text[j] if j >= 0 else ''
+
+
+def skip_group(text, i):
+    """`text[i]` opens (, [ or {; return the index after its matching close."""
+    depth = 0
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c in '([{':
+            depth += 1
+        elif c in ')]}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        elif c in '\'"':
+            i = skip_quoted(text, i)
+            continue
+        elif c == '`':
+            i = skip_template(text, i)
+            continue
+        elif c == '/':
+            if text.startswith('//', i):
+                end = text.find('\n', i)
+                i = n if end < 0 else end
+                continue
+            if text.startswith('/*', i):
+                end = text.find('*/', i + 2)
+                i = n if end < 0 else end + 2
+                continue
+            if last_code_char(text, i) in REGEX_PREFIX:
+                i = skip_regex(text, i)
+                continue
+        i += 1
+    raise ChainError('unbalanced brackets')
+
+
+def split_args(text, start, end):
+    """Top-level comma separated pieces of text[start:end], stripped."""
+    args, i, piece = [], start, start
+    while i < end:
+        c = text[i]
+        if c in '([{':
+            i = skip_group(text, i)
+            continue
+        if c in '\'"':
+            i = skip_quoted(text, i)
+            continue
+        if c == '`':
+            i = skip_template(text, i)
+            continue
+        if c == '/' and (text.startswith('//', i) or text.startswith('/*', i)):
+            i = SPACE_RE.match(text, i).end()
+            continue
+        if c == ',':
+            args.append(text[piece:i].strip())
+            piece = i + 1
+        i += 1
+    last = text[piece:end].strip()
+    if last or args:
+        args.append(last)
+    return [a for a in args if a]
+
+
+def comment_spans(text):
+    """Sorted (start, end) of every comment, skipping strings and templates."""
+    spans = []
+    i, n = 0, len(text)
+    while i < n:
+        c = text[i]
+        if c in '\'"':
+            i = skip_quoted(text, i)
+        elif c == '`':
+            i = skip_template(text, i)
+        elif c == '/' and text.startswith('//', i):
+            end = text.find('\n', i)
+            end = n if end < 0 else end
+            spans.append((i, end))
+            i = end
+        elif c == '/' and text.startswith('/*', i):
+            end = text.find('*/', i + 2)
+            end = n if end < 0 else end + 2
+            spans.append((i, end))
+            i = end
+        else:
+            i += 1
+    return spans
+
+
+def in_spans(spans, pos):
+    i = bisect.bisect_right(spans, (pos, float('inf'))) - 1
+    return i >= 0 and spans[i][0] <= pos < spans[i][1]
+
+
+# ---------------------------------------------------------------------------
+# Chains
+
+def string_value(arg):
+    """Value of a '..', ".." or substitution-free `..` literal, else None."""
+    m = STRING_RE.match(arg.strip())
+    if not m:
+        return None
+    raw = next(g for g in m.groups() if g is not None) if any(g is not None for g in m.groups()) else ''
+    return re.sub(r'\\(.)', r'\1', raw, flags=re.S)
+
+
+def read_calls(text, i):
+    """Read `.name(args)` links starting at i; returns (calls, end)."""
+    calls = []
+    end = i
+    while True:
+        j = SPACE_RE.match(text, end).end()
+        if not text.startswith('.', j):
+            break
+        m = IDENT_RE.match(text, SPACE_RE.match(text, j + 1).end())
+        if not m:
+            break
+        k = SPACE_RE.match(text, m.end()).end()
+        if not text.startswith('(', k):
+            break
+        close = skip_group(text, k)
+        calls.append(Call(m.group(), split_args(text, k + 1, close - 1), j, close))
+        end = close
+    return calls, end
+
+
+def find_chains(text):
+    """Every supabase `.from()` chain in `text`, in source order."""
+    if '.from' not in text:
+        return []
+    spans = comment_spans(text)
+    chains = []
+    pos = 0
+    for m in RECEIVER_RE.finditer(text):
+        if m.start() < pos or in_spans(spans, m.start()):
+            continue
+        open_paren = m.end() - 1
+        try:
+            close = skip_group(text, open_paren)
+            args = split_args(text, open_paren + 1, close - 1)
+            calls, end = read_calls(text, close)
+        except ChainError:
+            continue
+        table = string_value(args[0]) if len(args) == 1 else None
+        chains.append(Chain(m.start(), end, table, calls))
+        pos = end
+    return chains
+
+
+def line_of(text, pos):
+    return text.count('\n', 0, pos) + 1
+
+
+# ---------------------------------------------------------------------------
+# Select strings
+
+class Column:
+    __slots__ = ('name', 'alias')
+
+    def __init__(self, name, alias=None):
+        self.name = name
+        self.alias = alias
+
+    def __repr__(self):
+        return f"Column({self.alias + ':' if self.alias else ''}{self.name})"
+
+
+class Embed:
+    """`alias:target!hint(items)`: a related table (or the FK column leading to it)."""
+    __slots__ = ('target', 'alias', 'hint', 'items')
+
+    def __init__(self, target, alias=None, hint=None, items=()):
+        self.target = target
+        self.alias = alias
+        self.hint = hint
+        self.items = list(items)
+
+    @property
+    def key(self):
+        return self.alias or self.target
+
+    def __repr__(self):
+        return f"Embed({self.key}={self.target}{'!' + self.hint if self.hint else ''}, {self.items!r})"
+
+
+STAR = Column('*')
+SELECT_TOKEN_RE = re.compile(r'\s*(?:([A-Za-z_][\w]*)|(::|->>|->|\.\.\.|[*:!(),]))')
+
+
+def parse_select(text):
+    """Parse a select string into Columns and Embeds; raises ChainError on syntax it can't map."""
+    tokens = []
+    pos = 0
+    text = text.strip()
+    while pos < len(text):
+        m = SELECT_TOKEN_RE.match(text, pos)
+        if not m:
+            raise ChainError(f"select syntax near {text[pos:pos + 20]!r}")
+        tokens.append(m.group(1) or m.group(2))
+        pos = m.end()
+    items, i = _select_items(tokens, 0)
+    if i != len(tokens):
+        raise ChainError(f"unexpected {tokens[i]!r} in select")
+    return items
+
+
+def _select_items(tokens, i):
+    items = []
+    while i < len(tokens) and tokens[i] != ')':
+        tok = tokens[i]
+        if tok == '*':
+            items.append(STAR)
+            i += 1
+        elif tok in ('::', '->', '->>', '...'):
+            raise ChainError(f"'{tok}' in select")
+        elif tok in (':', '!', '(', ','):
+            raise ChainError(f"unexpected {tok!r} in select")
+        else:
+            alias = None
+            if i + 1 < len(tokens) and tokens[i + 1] == ':':
+                alias, i = tok, i + 2
+                tok = tokens[i] if i < len(tokens) else ''
+            name = tok
+            i += 1
+            hint = None
+            if i < len(tokens) and tokens[i] == '!':
+                hint = tokens[i + 1]
+                i += 2
+            if i < len(tokens) and tokens[i] in ('::', '->', '->>'):
+                raise ChainError(f"'{tokens[i]}' in select")
+            if i < len(tokens) and tokens[i] == '(':
+                inner, i = _select_items(tokens, i + 1)
+                if i >= len(tokens) or tokens[i] != ')':
+                    raise ChainError('unbalanced parens in select')
+                i += 1
+                items.append(Embed(name, alias, hint, inner))
+            elif hint is not None:
+                raise ChainError(f"'!{hint}' on a column")
+            else:
+                items.append(Column(name, alias))
+        if i < len(tokens) and tokens[i] == ',':
+            i += 1
+        elif i < len(tokens) and tokens[i] != ')':
+            raise ChainError(f"expected ',' in select, got {tokens[i]!r}")
+    return items, i
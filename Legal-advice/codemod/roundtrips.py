@@ -0,0 +1,367 @@
+"""
+Find database round trips that could be batched or run concurrently.
+
+    python -m codemod.roundtrips                 # whole tree, worst functions first
+    python -m codemod.roundtrips app/actions     # one directory
+    python -m codemod.roundtrips --top 10
+
+Every supabase `.from()` chain and every `prisma.<model>.<method>()` call is
+one MySQL round trip (an update chain without .single() is two: the shim
+runs updateMany and then findMany to return the rows). Per function it
+reports:
+
+    loop         a query inside for/while, or a .map/.forEach callback:
+                 one round trip per item (an insert there can be one createMany)
+    sequential   adjacent awaited queries that don't use each other's results
+                 and could share one Promise.all
+
+and an estimate of round trips per invocation, with N items per loop. The
+ranking assumes N = 10.
+
+Sequential groups of reads declared with `const` are rewritten to
+Promise.all by parallelize_awaits.py; groups containing a write are only
+reported, since running them together changes what happens when one fails.
+"""
+import argparse
+import re
+import sys
+
+from . import engine, tslex
+from .querychain import comment_spans, find_chains, in_spans, line_of, skip_group
+
+ASSUMED_N = 10
+
+WRITE_METHODS = {'insert', 'update', 'upsert', 'delete'}
+PRISMA_CALL_RE = re.compile(r'\b(?:prisma|tx)\s*\.\s*([A-Za-z_]\w*)\s*\.\s*(\w+)\s*\(')
+PRISMA_READS = {'findMany', 'findFirst', 'findFirstOrThrow', 'findUnique', 'findUniqueOrThrow',
+                'count', 'aggregate', 'groupBy'}
+PRISMA_WRITES = {'create', 'createMany', 'update', 'updateMany', 'upsert', 'delete', 'deleteMany'}
+PRISMA_INSERTS = {'create'}
+
+LOOP_HEADER_RE = re.compile(r'\b(for|while)\s*(?:await\s*)?$')
+DO_RE = re.compile(r'\bdo\s*$')
+CALLBACK_RE = re.compile(r"""\.(map|flatMap|forEach|filter|reduce|some|every|find)\s*\(\s*
+    (?:async\s+)?(?:\([^()]*\)|[\w$]+)(?:\s*:\s*[^=(){};]+)?\s*=>\s*$""", re.X)
+PROMISE_ALL_RE = re.compile(r'\bPromise\.(?:all|allSettled)\s*\(\s*(?:\[\s*)?(?:\.\.\.)?\s*\(?[^;]*$')
+# `const { data: x, error } = await` / `const x = await` / `await` at the start of a statement
+STATEMENT_RE = re.compile(r"""(?:^|(?<=[;{}\n]))[ \t]*
+    (?:(?P<decl>const|let|var)\s+(?P<pattern>[\w$]+|\{[^{}]*\}|\[[^\[\]]*\])\s*=\s*)?
+    await\s+$""", re.X)
+STATEMENT_END_RE = re.compile(r'[ \t]*;?[ \t]*(?=\n|$)')
+BLANK_RE = re.compile(r'(?:\s+|//[^\n]*|/\*[\s\S]*?\*/)*')
+WORD_RE = re.compile(r'[A-Za-z_$][\w$]*')
+
+
+class DbCall:
+    """One query: a supabase chain or a prisma call."""
+    __slots__ = ('start', 'end', 'table', 'method', 'write', 'insert', 'trips', 'line')
+
+    def __init__(self, start, end, table, method, write, insert, trips, line):
+        self.start = start
+        self.end = end
+        self.table = table
+        self.method = method
+        self.write = write
+        self.insert = insert
+        self.trips = trips
+        self.line = line
+
+    def describe(self):
+        return f"{self.table or '?'}.{self.method}"
+
+
+class Statement:
+    """`const <pattern> = await <call>;` or `await <call>;` on its own."""
+    __slots__ = ('start', 'end', 'decl', 'pattern', 'call', 'scope')
+
+    def __init__(self, start, end, decl, pattern, call, scope):
+        self.start = start
+        self.end = end
+        self.decl = decl
+        self.pattern = pattern
+        self.call = call
+        self.scope = scope
+
+    def names(self):
+        """Identifiers the statement declares."""
+        if not self.pattern:
+            return set()
+        if self.pattern[0] not in '{[':
+            return {self.pattern}
+        names = set()
+        for part in self.pattern[1:-1].split(','):
+            # `data: x = []` declares x, `error` declares error
+            target = part.split(':', 1)[-1].split('=', 1)[0].strip().lstrip('.')
+            if WORD_RE.fullmatch(target):
+                names.add(target)
+        return names
+
+
+class Finding:
+    __slots__ = ('kind', 'line', 'calls', 'depth', 'concurrent', 'fixable', 'note')
+
+    def __init__(self, kind, line, calls, depth=0, concurrent=False, fixable=False, note=None):
+        self.kind = kind            # loop or sequential
+        self.line = line
+        self.calls = calls
+        self.depth = depth          # loop nesting
+        self.concurrent = concurrent
+        self.fixable = fixable
+        self.note = note
+
+
+class FunctionReport:
+    def __init__(self, path, name, line):
+        self.path = path
+        self.name = name
+        self.line = line
+        self.fixed = 0                # round trips outside loops
+        self.per_item = {}            # loop depth -> round trips per item
+        self.findings = []
+
+    def estimate(self):
+        terms = [str(self.fixed)] if self.fixed or not self.per_item else []
+        for depth, trips in sorted(self.per_item.items()):
+            n = 'N' if depth == 1 else f"N^{depth}"
+            terms.append(n if trips == 1 else f"{trips}*{n}")
+        return ' + '.join(terms)
+
+    def score(self, n=ASSUMED_N):
+        return self.fixed + sum(trips * n ** depth for depth, trips in self.per_item.items())
+
+
+def print_report(reports, out=sys.stdout, top=None):
+    reports = [r for r in reports if r.findings]
+    reports.sort(key=lambda r: (-r.score(), r.path, r.line))
+    total = sum(len(r.findings) for r in reports)
+    fixable = sum(f.fixable for r in reports for f in r.findings)
+    print(f"{total} findings in {len(reports)} functions ({fixable} sequential groups fixable by "
+          f"parallelize_awaits.py)", file=out)
+    for r in reports[:top]:
+        print(f"\n{r.path}:{r.line}  {r.name}  ~{r.estimate()} round trips "
+              f"({r.score()} at N={ASSUMED_N})", file=out)
+        for f in r.findings:
+            calls = ', '.join(c.describe() for c in f.calls)
+            if f.kind == 'loop':
+                how = 'concurrent per item' if f.concurrent else 'per item'
+                what = f"loop{'' if f.depth == 1 else ' x' + str(f.depth)}: {calls} {how}"
+            else:
+                what = f"sequential: {len(f.calls)} independent awaits ({calls})"
+                if f.fixable:
+                    what += ' [fixable]'
+            note = f" -- {f.note}" if f.note else ''
+            print(f"    {r.path}:{f.line}  {what}{note}", file=out)
+
+
+# ---------------------------------------------------------------------------
+# Queries
+
+def db_calls(content):
+    """Every query in the file, in source order."""
+    calls = []
+    for chain in find_chains(content):
+        names = chain.names()
+        method = next((n for n in names if n in WRITE_METHODS), 'select')
+        trips = 2 if method == 'update' and not {'single', 'maybeSingle'} & set(names) else 1
+        calls.append(DbCall(chain.start, chain.end, chain.table, method, method != 'select',
+                            method == 'insert', trips, line_of(content, chain.start)))
+    if 'prisma' in content or 'tx.' in content:
+        spans = comment_spans(content)
+        for m in PRISMA_CALL_RE.finditer(content):
+            table, method = m.groups()
+            if method not in PRISMA_READS and method not in PRISMA_WRITES or in_spans(spans, m.start()):
+                continue
+            try:
+                end = skip_group(content, m.end() - 1)
+            except ValueError:
+                continue
+            calls.append(DbCall(m.start(), end, table, method, method in PRISMA_WRITES,
+                                method in PRISMA_INSERTS, 1, line_of(content, m.start())))
+    calls.sort(key=lambda c: c.start)
+    return calls
+
+
+# ---------------------------------------------------------------------------
+# Loops and callbacks
+
+def loop_kind(content, scope):
+    """'loop' for a for/while/do body, the array method for a callback body, else None."""
+    before = content[max(scope.start - 400, 0):scope.start].rstrip()
+    if scope.kind == tslex.BLOCK:
+        if DO_RE.search(before):
+            return 'loop'
+        if before.endswith(')'):
+            open_paren = matching_open(content, len(before) - 1 + max(scope.start - 400, 0))
+            if open_paren is not None and LOOP_HEADER_RE.search(content[max(open_paren - 20, 0):open_paren]):
+                return 'loop'
+        return None
+    if scope.kind == tslex.FUNCTION:
+        m = CALLBACK_RE.search(before)
+        return m.group(1) if m else None
+    return None
+
+
+def matching_open(content, close):
+    """Offset of the `(` matching the `)` at `close`; a rough backwards count, good enough for headers."""
+    depth = 0
+    for i in range(close, max(close - 400, -1), -1):
+        c = content[i]
+        if c == ')':
+            depth += 1
+        elif c == '(':
+            depth -= 1
+            if depth == 0:
+                return i
+    return None
+
+
+def call_context(content, tree, call, cache):
+    """(owning function scope, loop depth, concurrent) for a query."""
+    depth = 0
+    concurrent = False
+    scope = tree.scope_at(call.start)
+    while scope is not None and scope.kind != tslex.MODULE:
+        if scope.kind in (tslex.BLOCK, tslex.FUNCTION):
+            if scope not in cache:
+                cache[scope] = loop_kind(content, scope)
+            kind = cache[scope]
+            if kind is not None:
+                depth += 1
+                if kind != 'loop':
+                    # map under Promise.all, or a fire-and-forget forEach(async ...)
+                    head = content[max(scope.start - 400, 0):scope.start]
+                    concurrent = concurrent or kind == 'forEach' or bool(PROMISE_ALL_RE.search(head))
+            elif scope.kind == tslex.FUNCTION:
+                return scope, depth, concurrent
+        scope = scope.parent
+    return tree.root, depth, concurrent
+
+
+# ---------------------------------------------------------------------------
+# Sequential awaits
+
+def statement_of(content, call, scope):
+    """The Statement a query makes up on its own, or None."""
+    before = content[max(call.start - 300, 0):call.start]
+    m = STATEMENT_RE.search(before)
+    if not m:
+        return None
+    end = STATEMENT_END_RE.match(content, call.end)
+    if end is None:
+        return None
+    start = call.start - (len(before) - m.start())
+    return Statement(start, end.end(), m.group('decl'), m.group('pattern'), call, scope)
+
+
+def sequential_groups(content, tree=None, calls=None):
+    """Runs of adjacent awaited statements in one block that don't use each other's names."""
+    if tree is None:
+        tree = tslex.parse(content)
+    if calls is None:
+        calls = db_calls(content)
+    statements = []
+    for call in calls:
+        scope = tree.scope_at(call.start)
+        stmt = statement_of(content, call, scope)
+        if stmt is not None:
+            statements.append(stmt)
+    groups = []
+    group = []
+    for stmt in statements:
+        if group and adjacent(content, group[-1], stmt) and independent(content, group, stmt):
+            group.append(stmt)
+            continue
+        if len(group) > 1:
+            groups.append(group)
+        group = [stmt]
+    if len(group) > 1:
+        groups.append(group)
+    return groups
+
+
+def adjacent(content, prev, stmt):
+    if prev.scope is not stmt.scope:
+        return False
+    return BLANK_RE.match(content, prev.end).end() >= stmt.start
+
+
+def independent(content, group, stmt):
+    declared = set()
+    for s in group:
+        declared |= s.names()
+    used = set(WORD_RE.findall(content[stmt.call.start:stmt.call.end]))
+    return not (declared & used) and not (declared & stmt.names())
+
+
+def fixable(group):
+    """Only reads declared with const are rewritten: no behaviour change if one of them fails."""
+    return all(s.decl == 'const' and not s.call.write for s in group)
+
+
+# ---------------------------------------------------------------------------
+# Per file
+
+def analyze(content, path):
+    """FunctionReports for the functions in one file that make queries."""
+    calls = db_calls(content)
+    if not calls:
+        return []
+    tree = tslex.parse_file_content(content, path)
+    reports = {}
+    cache = {}
+    loops = {}
+
+    def report_for(scope):
+        if scope not in reports:
+            name = scope.name or ('<module>' if scope.kind == tslex.MODULE else '<anonymous>')
+            reports[scope] = FunctionReport(path, name, line_of(content, scope.start))
+        return reports[scope]
+
+    for call in calls:
+        owner, depth, concurrent = call_context(content, tree, call, cache)
+        r = report_for(owner)
+        if depth == 0:
+            r.fixed += call.trips
+            continue
+        r.per_item[depth] = r.per_item.get(depth, 0) + call.trips
+        key = (owner, depth, concurrent, tree.scope_at(call.start))
+        if key not in loops:
+            loops[key] = Finding('loop', call.line, [], depth, concurrent)
+            r.findings.append(loops[key])
+        finding = loops[key]
+        finding.calls.append(call)
+        if call.insert and not finding.note:
+            finding.note = 'per-row insert: build the rows, then one insert([...]) / createMany'
+
+    for group in sequential_groups(content, tree, calls):
+        owner, depth, _ = call_context(content, tree, group[0].call, cache)
+        if fixable(group):
+            note = None
+        elif any(s.call.write for s in group):
+            note = 'includes writes; Promise.all only if a failed one may leave the others applied'
+        else:
+            note = 'let/var or bare await; rewrite by hand'
+        report_for(owner).findings.append(Finding('sequential', group[0].call.line, [s.call for s in group],
+                                                  depth, fixable=fixable(group), note=note))
+    for r in reports.values():
+        r.findings.sort(key=lambda f: f.line)
+    return list(reports.values())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='codemod.roundtrips', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('dirs', nargs='*', default=engine.ROOT_DIRS,
+                        help='directories to walk (default: %(default)s)')
+    parser.add_argument('--top', type=int, metavar='N', help='only the N worst functions')
+    args = parser.parse_args(argv)
+
+    reports = []
+    for path in engine.iter_source_files(args.dirs):
+        reports.extend(analyze(engine.read_source(path), path))
+    print_report(reports, top=args.top)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
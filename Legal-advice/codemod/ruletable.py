@@ -0,0 +1,91 @@
+"""
+Precompiled regex rule tables with a literal prefilter.
+
+A RuleTable is an ordered list of substitutions compiled once at import.
+Each Sub names the literal needles every one of its matches must contain.
+Before any pattern runs, the table checks which needles occur in the file
+and skips every Sub whose needles are absent. A file with no `supabase` in
+it therefore costs a few substring searches, not one regex pass per
+pattern.
+
+Needles are checked shortest first, and an absent needle rules out every
+longer needle that contains it (`supabase.auth.` missing means no
+`supabase.auth.signUp(` either). That gives the shared-prefix pruning of an
+Aho-Corasick scan while each check stays in CPython's C substring search.
+A single combined alternation regex was measured and was slower.
+"""
+import re
+
+
+class Sub:
+    """One `re.sub` step. `needles` are literals every match contains (empty: always run)."""
+
+    def __init__(self, pattern, repl, needles=(), flags=0, count=0):
+        self.regex = re.compile(pattern, flags)
+        self.repl = repl
+        self.needles = frozenset(needles)
+        self.count = count
+
+    def __repr__(self):
+        return f"Sub({self.regex.pattern!r})"
+
+    def apply(self, content):
+        return self.regex.sub(self.repl, content, count=self.count)
+
+
+class Prefilter:
+    """Multi-needle presence scan returning the set of needles found in a text."""
+
+    def __init__(self, needles):
+        # Shortest first, so an absent needle rules out every needle containing it
+        self.needles = sorted(set(needles), key=lambda n: (len(n), n))
+        self.containing = {n: frozenset(m for m in self.needles if m != n and n in m)
+                           for n in self.needles}
+
+    def scan(self, text):
+        found = set()
+        ruled_out = set()
+        for needle in self.needles:
+            if needle in ruled_out:
+                continue
+            if needle in text:
+                found.add(needle)
+            else:
+                ruled_out |= self.containing[needle]
+        return found
+
+
+class RuleTable:
+    """An ordered list of Subs sharing one prefilter."""
+
+    def __init__(self, subs):
+        self.subs = list(subs)
+        self.prefilter = Prefilter(n for s in self.subs for n in s.needles)
+
+    def __iter__(self):
+        return iter(self.subs)
+
+    @property
+    def needles(self):
+        """Every needle of the table, or None when a Sub runs unconditionally."""
+        if any(not s.needles for s in self.subs):
+            return None
+        return frozenset(n for s in self.subs for n in s.needles)
+
+    def apply(self, content):
+        present = self.prefilter.scan(content)
+        for sub in self.subs:
+            if sub.needles and present.isdisjoint(sub.needles):
+                continue
+            new_content = sub.apply(content)
+            if new_content != content:
+                content = new_content
+                # A replacement can introduce needles for later steps
+                present = self.prefilter.scan(content)
+        return content
+
+    def apply_unfiltered(self, content):
+        """The old behaviour: every pattern over the full text, through re's pattern cache."""
+        for sub in self.subs:
+            content = re.sub(sub.regex.pattern, sub.repl, content, count=sub.count, flags=sub.regex.flags)
+        return content
@@ -0,0 +1,563 @@
+"""
+On-disk index of importable symbols, for resolving unimported names.
+
+    python -m codemod.symbols                 # refresh the index, print counts
+    python -m codemod.symbols Eye useEffect   # where would these be imported from?
+    python -m codemod.symbols --rebuild       # drop the index and re-read everything
+
+Three sources feed it:
+
+    exports   `export ...` declarations in lib/, components/ and types/,
+              under their `@/...` module path
+    packages  the .d.ts entry points of lucide-react, react and next-auth,
+              when node_modules is installed
+    imports   every `import { X } from 'm'` already in the tree, so names
+              the project imports elsewhere (icons, hooks, next/link, ...)
+              resolve even without node_modules
+
+Each file's entry is keyed by its (size, mtime) like codemod.cache, so a
+refresh only re-reads files that changed; the name -> module map is rebuilt
+from the entries in memory and looked up in O(1). Only value exports are
+indexed (not types/interfaces), since only those turn up as unresolved names
+in code.
+
+When a name has several candidates the one the project imports most wins;
+with no imports to go by, a local export beats a package export, and a tie
+between two modules leaves the name unresolved.
+
+The incremental codemod cache folds digest() into the version of the rules
+that use the index, so after adding an export those rules revisit the files
+they previously left alone.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+
+from . import walk
+from .imports import parse_imports
+from .querychain import last_code_char, skip_quoted, skip_template
+from .walk import EXTENSIONS
+
+INDEX_FILE = '.codemod-symbols.json'
+INDEX_FORMAT = 1
+EXPORT_DIRS = ['lib', 'components', 'types']
+IMPORT_DIRS = ['app', 'components', 'lib']
+PACKAGES = ['lucide-react', 'react', 'next-auth']
+NODE_MODULES = 'node_modules'
+MAX_REEXPORT_DEPTH = 8
+
+# Never import these, whatever the project happens to import under the same
+# name (lucide-react has `Map`, `Image`, `File`, `Link`, ...)
+GLOBALS = frozenset('''
+    Array ArrayBuffer BigInt Blob Boolean Date Element Error Event EventTarget File FileReader
+    FormData Function Headers HTMLElement Image Infinity Intl JSON Map Math NaN Node Number
+    Object Promise Proxy Reflect RegExp Request Response Set String Symbol TextDecoder
+    TextEncoder TypeError URL URLSearchParams Uint8Array WeakMap WeakSet Worker
+    alert atob btoa clearInterval clearTimeout console crypto decodeURIComponent document
+    encodeURIComponent fetch globalThis isNaN localStorage location navigator parseFloat
+    parseInt process queueMicrotask require sessionStorage setInterval setTimeout
+    structuredClone undefined window
+'''.split())
+KEYWORDS = frozenset('''
+    await case catch class const delete do else export extends for function if import in
+    instanceof let new return super switch this throw try typeof var void while with yield
+'''.split())
+
+EXPORT_DECL_RE = re.compile(r"""
+    ^[ \t]*export\s+(?:declare\s+)?(?P<default>default\s+)?
+    (?:async\s+)?(?:abstract\s+)?
+    (?:function\s*\*?|class|const|let|var|enum|namespace)\s+(?P<name>[\w$]+)
+""", re.M | re.X)
+EXPORT_DEFAULT_NAME_RE = re.compile(r'^[ \t]*export\s+default\s+([\w$]+)\s*;', re.M)
+EXPORT_LIST_RE = re.compile(r"""
+    ^[ \t]*export\s+(?P<type>type\s+)?\{(?P<body>[^}]*)\}
+    (?:\s*from\s*(?P<q>['"])(?P<module>[^'"]+)(?P=q))?
+""", re.M | re.X)
+EXPORT_STAR_RE = re.compile(r"""^[ \t]*export\s+\*\s+from\s*(['"])([^'"]+)\1""", re.M)
+EXPORT_ASSIGN_RE = re.compile(r'^[ \t]*export\s*=\s*([\w$]+)\s*;', re.M)
+NAMESPACE_RE = r'declare\s+namespace\s+{}\s*\{{'
+NAMESPACE_MEMBER_RE = re.compile(r'^[ \t]*(?:export\s+)?(?:function|const|let|var|class)\s+([\w$]+)', re.M)
+TYPE_NAME_RE = re.compile(r'^[ \t]*(?:export\s+)?(?:declare\s+)?(?:interface|type)\s+([\w$]+)', re.M)
+
+
+# ---------------------------------------------------------------------------
+# Reading exports
+
+def strip_comments(text):
+    return re.sub(r'/\*[\s\S]*?\*/|(?<![:\'"])//[^\n]*', '', text)
+
+
+def scan_exports(text):
+    """
+    Value exports of one module as ([(name, kind)], [star specifiers]), kind
+    being 'named' or 'default'. Names re-exported from another module are
+    included; `export * from` is left to the caller to follow.
+    """
+    text = strip_comments(text)
+    types = set(TYPE_NAME_RE.findall(text))
+    exports = []
+    for m in EXPORT_DECL_RE.finditer(text):
+        exports.append((m.group('name'), 'default' if m.group('default') else 'named'))
+    for m in EXPORT_DEFAULT_NAME_RE.finditer(text):
+        exports.append((m.group(1), 'default'))
+    for m in EXPORT_LIST_RE.finditer(text):
+        if m.group('type'):
+            continue
+        for item in m.group('body').split(','):
+            item = item.strip()
+            if not item or item.startswith('type '):
+                continue
+            parts = re.split(r'\s+as\s+', item)
+            local, exported = parts[0], parts[-1]
+            if local in types and not m.group('module'):
+                continue
+            if exported == 'default':
+                exports.append((local, 'default'))
+            else:
+                exports.append((exported, 'named'))
+    stars = [m.group(2) for m in EXPORT_STAR_RE.finditer(text)]
+    return exports, stars
+
+
+def scan_declaration_file(text):
+    """Like scan_exports, plus the `declare namespace X {...}; export = X` layout of @types/react."""
+    exports, stars = scan_exports(text)
+    text = strip_comments(text)
+    m = EXPORT_ASSIGN_RE.search(text)
+    if m:
+        ns = re.search(NAMESPACE_RE.format(re.escape(m.group(1))), text)
+        if ns:
+            body = text[ns.end():]
+            exports.extend((name, 'named') for name in NAMESPACE_MEMBER_RE.findall(body))
+        exports.append((m.group(1), 'default'))
+    return exports, stars
+
+
+def module_path(relpath):
+    """`components/shared/Card.tsx` -> `@/components/shared/Card`."""
+    path = relpath.replace(os.sep, '/')
+    for ext in ('.d.ts',) + EXTENSIONS:
+        if path.endswith(ext):
+            path = path[:-len(ext)]
+            break
+    if path.endswith('/index'):
+        path = path[:-len('/index')]
+    return '@/' + path
+
+
+def canonical_module(spec, relpath):
+    """Rewrite a relative import specifier in `relpath` to its `@/...` form."""
+    if not spec.startswith('.'):
+        return spec
+    base = os.path.dirname(relpath.replace(os.sep, '/'))
+    return '@/' + os.path.normpath(os.path.join(base, spec)).replace(os.sep, '/')
+
+
+def scan_source(text, relpath, exports_too):
+    entry = {'exports': [], 'stars': [], 'imports': []}
+    if exports_too:
+        exports, stars = scan_exports(text)
+        entry['exports'] = [list(e) for e in exports]
+        entry['stars'] = [canonical_module(s, relpath) for s in stars]
+    for imp in parse_imports(text):
+        if imp.type_only:
+            continue
+        module = canonical_module(imp.module, relpath)
+        if imp.default:
+            entry['imports'].append([imp.default, module, 'default'])
+        for imported, local, type_only in imp.names:
+            if not type_only and imported == local:
+                entry['imports'].append([local, module, 'named'])
+    return entry
+
+
+def resolve_declaration(path):
+    for candidate in (path + '.d.ts', os.path.join(path, 'index.d.ts'), path):
+        if os.path.isfile(candidate) and candidate.endswith('.d.ts'):
+            return candidate
+    return None
+
+
+def package_types(name, root):
+    """Path of the .d.ts entry point of installed package `name` (or its @types), or None."""
+    for pkg in (name, '@types/' + name):
+        pkg_dir = os.path.join(root, NODE_MODULES, pkg)
+        try:
+            with open(os.path.join(pkg_dir, 'package.json'), encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            continue
+        entry = meta.get('types') or meta.get('typings') or 'index.d.ts'
+        path = resolve_declaration(os.path.join(pkg_dir, entry.replace('.d.ts', '')))
+        if path:
+            return path
+    return None
+
+
+def scan_package(name, root):
+    """Value exports of an installed package, following `export * from` inside it."""
+    entry_point = package_types(name, root)
+    if entry_point is None:
+        return None
+    exports, seen = [], set()
+    pending = [(entry_point, 0)]
+    while pending:
+        path, depth = pending.pop()
+        if path in seen or depth > MAX_REEXPORT_DEPTH:
+            continue
+        seen.add(path)
+        with open(path, encoding='utf-8', errors='ignore') as f:
+            found, stars = scan_declaration_file(f.read())
+        if depth:
+            # `export *` never re-exports a default
+            found = [e for e in found if e[1] == 'named']
+        exports.extend(found)
+        for spec in stars:
+            if spec.startswith('.'):
+                target = resolve_declaration(os.path.join(os.path.dirname(path), spec.replace('.js', '')))
+                if target:
+                    pending.append((target, depth + 1))
+    return sorted(set(exports))
+
+
+def _signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def iter_index_files(root):
+    dirs = [os.path.join(root, d) for d in sorted(set(EXPORT_DIRS) | set(IMPORT_DIRS))]
+    for entry in walk.scan(dirs, base=root):
+        yield os.path.relpath(entry.path, root).replace(os.sep, '/')
+
+
+# ---------------------------------------------------------------------------
+# The index
+
+class SymbolIndex:
+    def __init__(self, path=INDEX_FILE, root='.'):
+        self.path = path
+        self.root = root
+        self.files = {}         # relpath -> {sig, exports, stars, imports}
+        self.packages = {}      # package -> {sig, exports}
+        self.by_name = {}       # name -> [(module, kind, uses, rank)]
+        self.dirty = False
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        if data.get('format') == INDEX_FORMAT:
+            self.files = data.get('files', {})
+            self.packages = data.get('packages', {})
+        return self
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'format': INDEX_FORMAT, 'files': self.files, 'packages': self.packages},
+                      f, separators=(',', ':'))
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+    def refresh(self):
+        """Re-read changed files and packages, drop deleted ones; return the number re-read."""
+        reread = 0
+        seen = set()
+        export_prefixes = tuple(d + '/' for d in EXPORT_DIRS)
+        for rel in iter_index_files(self.root):
+            seen.add(rel)
+            sig = _signature(os.path.join(self.root, rel))
+            entry = self.files.get(rel)
+            if entry is not None and entry['sig'] == sig:
+                continue
+            with open(os.path.join(self.root, rel), 'r', encoding='utf-8', errors='ignore') as f:
+                entry = scan_source(f.read(), rel, rel.startswith(export_prefixes))
+            entry['sig'] = sig
+            self.files[rel] = entry
+            reread += 1
+        for rel in list(self.files):
+            if rel not in seen:
+                del self.files[rel]
+                self.dirty = True
+
+        for name in PACKAGES:
+            sig = _signature(os.path.join(self.root, NODE_MODULES, name, 'package.json'))
+            entry = self.packages.get(name)
+            if entry is not None and entry['sig'] == sig:
+                continue
+            exports = scan_package(name, self.root) if sig is not None else None
+            self.packages[name] = {'sig': sig, 'exports': [list(e) for e in exports or ()]}
+            reread += 1
+
+        if reread:
+            self.dirty = True
+        self._build()
+        return reread
+
+    def _local_exports(self, rel, depth=0, seen=None):
+        """(name, kind, depth) exported by a local file, following its `export * from '@/...'`."""
+        seen = set() if seen is None else seen
+        entry = self.files.get(rel)
+        if entry is None or rel in seen or depth > MAX_REEXPORT_DEPTH:
+            return []
+        seen.add(rel)
+        exports = [(name, kind, depth) for name, kind in entry['exports'] if depth == 0 or kind == 'named']
+        for spec in entry['stars']:
+            target = self._file_for_module(spec)
+            if target:
+                exports.extend(self._local_exports(target, depth + 1, seen))
+        return exports
+
+    def _file_for_module(self, module):
+        base = module[2:] if module.startswith('@/') else module
+        for ext in EXTENSIONS + ('.d.ts',):
+            for candidate in (base + ext, base + '/index' + ext):
+                if candidate in self.files:
+                    return candidate
+        return None
+
+    def _build(self):
+        # rank: 3 = defined locally, 2 = re-exported by a local barrel,
+        # 1 = package export, 0 = only seen imported
+        candidates = {}
+
+        def add(name, module, kind, uses, rank):
+            key = (name, module, kind)
+            old = candidates.get(key, (0, 0))
+            candidates[key] = (old[0] + uses, max(old[1], rank))
+
+        for rel, entry in self.files.items():
+            if entry['exports'] or entry['stars']:
+                module = module_path(rel)
+                for name, kind, depth in self._local_exports(rel):
+                    add(name, module, kind, 0, 3 if depth == 0 else 2)
+            for name, module, kind in entry['imports']:
+                add(name, module, kind, 1, 0)
+        for pkg, entry in self.packages.items():
+            for name, kind in entry['exports']:
+                add(name, pkg, kind, 0, 1)
+
+        by_name = {}
+        for (name, module, kind), (uses, rank) in candidates.items():
+            if name in GLOBALS:
+                continue
+            by_name.setdefault(name, []).append((module, kind, uses, rank))
+        for options in by_name.values():
+            options.sort(key=lambda o: (-o[2], -o[3], o[0]))
+        self.by_name = by_name
+
+    def resolve(self, name):
+        """(module, kind) to import `name` from, or None if unknown or ambiguous."""
+        options = self.by_name.get(name)
+        if not options:
+            return None
+        best = options[0]
+        if len(options) > 1 and options[1][2:] == best[2:] and options[1][0] != best[0]:
+            return None
+        return best[0], best[1]
+
+    def __contains__(self, name):
+        return name in self.by_name
+
+    def digest(self):
+        """Hash of what every known name resolves to."""
+        resolved = {name: self.resolve(name) for name in self.by_name}
+        return hashlib.sha1(json.dumps(resolved, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+_index = None
+
+
+def get_index():
+    """The process-wide index, loaded and refreshed on first use."""
+    global _index
+    if _index is None:
+        _index = SymbolIndex().load()
+        _index.refresh()
+        _index.save()
+    return _index
+
+
+# ---------------------------------------------------------------------------
+# Unresolved names in a file
+
+DECL_RE = re.compile(r'\b(?:const|let|var|function\s*\*?|class|enum|namespace|interface|type)\s+([\w$]+)')
+DESTRUCTURE_RE = re.compile(r'\b(?:const|let|var)\s*([\[{])')
+ARROW_PARAM_RE = re.compile(r'([\w$]+)\s*=>')
+CATCH_RE = re.compile(r'\bcatch\s*\(\s*([\w$]+)')
+# After a `(...)`: an arrow, or a function/method body, possibly behind a return type
+PARAMS_FOLLOW_RE = re.compile(r'\s*(?::[^;={]*(?:\{[^{}]*\}[^;={]*)*)?(?:=>|\{)')
+IDENT_RE = re.compile(r'[A-Za-z_$][\w$]*')
+TYPE_PREFIX = set(':<>|&,')
+SKIPPABLE_RE = re.compile(r"['\"`/]")
+BRACKET_RE = re.compile(r'[()\[\]{}]')
+CALL_AFTER_RE = re.compile(r'\s*(?:<[\w\s,\[\]|]*>)?\(')      # useEffect(...), useState<T>(...)
+MEMBER_AFTER_RE = re.compile(r'\s*\??\.(?![.\d])')               # React.useState
+TAG_AFTER_RE = re.compile(r'[\s/>]')                               # <Eye ...
+
+
+def code_only(text):
+    """`text` with comments, strings and template literals blanked out (offsets kept)."""
+    out = list(text)
+    n = len(text)
+    m = SKIPPABLE_RE.search(text)
+    while m:
+        i = m.start()
+        c = text[i]
+        if c in '\'"':
+            end = skip_quoted(text, i)
+        elif c == '`':
+            end = skip_template(text, i)
+        elif text.startswith('//', i):
+            end = text.find('\n', i)
+            end = n if end < 0 else end
+        elif text.startswith('/*', i):
+            end = text.find('*/', i + 2)
+            end = n if end < 0 else end + 2
+        else:
+            m = SKIPPABLE_RE.search(text, i + 1)
+            continue
+        out[i:end] = ' ' * (end - i)
+        m = SKIPPABLE_RE.search(text, end)
+    return ''.join(out)
+
+
+def bracket_pairs(code):
+    """{offset of an opening bracket: offset just after its match}, in one pass."""
+    pairs, stack = {}, []
+    for m in BRACKET_RE.finditer(code):
+        if m.group() in '([{':
+            stack.append(m.start())
+        elif stack:
+            pairs[stack.pop()] = m.end()
+    return pairs
+
+
+def bound_names(code):
+    """
+    Names `code` may declare itself. Deliberately generous: every identifier
+    in a parameter list or destructuring pattern counts, types and defaults
+    included, so a name is only ever reported missing when nothing could
+    possibly bind it.
+    """
+    names = set(DECL_RE.findall(code))
+    names.update(ARROW_PARAM_RE.findall(code))
+    names.update(CATCH_RE.findall(code))
+    pairs = bracket_pairs(code)
+    n = len(code)
+    for m in DESTRUCTURE_RE.finditer(code):
+        names.update(IDENT_RE.findall(code, m.start(1), pairs.get(m.start(1), n)))
+    for start, end in pairs.items():
+        if code[start] == '(' and PARAMS_FOLLOW_RE.match(code, end):
+            names.update(IDENT_RE.findall(code, start, end))
+    return names
+
+
+def occurrences(code, name):
+    """Offsets of `name` as a whole word that isn't a property (`x.name`)."""
+    n = len(name)
+    i = code.find(name)
+    while i >= 0:
+        before = code[i - 1] if i else ''
+        after = code[i + n:i + n + 1]
+        if not (before.isalnum() or before in ('_', '$', '.')) and not (after.isalnum() or after in ('_', '$')):
+            yield i
+        i = code.find(name, i + n)
+
+
+def is_used(code, name):
+    """True if `code` uses `name` as a value: a call, JSX tag, `new`, member root or `={name}`."""
+    n = len(name)
+    for i in occurrences(code, name):
+        end = i + n
+        if CALL_AFTER_RE.match(code, end):
+            return True
+        if i and code[i - 1] == '<' and TAG_AFTER_RE.match(code, end):
+            return True
+        if code[i - 2:i] == '={' and code[end:end + 1] == '}':
+            return True
+        j = i
+        while j and code[j - 1].isspace():
+            j -= 1
+        if j < i and code[j - 3:j] == 'new' and not (code[j - 4:j - 3].isalnum()):
+            return True
+        # `children: React.ReactNode` is a type, not a use
+        if MEMBER_AFTER_RE.match(code, end) and last_code_char(code, i) not in TYPE_PREFIX:
+            return True
+    return False
+
+
+def declared_names(content, imports=None):
+    """Names imported by `content` or declared with a keyword anywhere in it (a cheap superset check)."""
+    imports = parse_imports(content) if imports is None else imports
+    names = set(DECL_RE.findall(content))
+    for imp in imports:
+        names.update(imp.locals())
+    return names
+
+
+def missing_names(content, imports=None, known=None):
+    """
+    Names `content` uses in code (calls, JSX tags, `new`, member roots) but
+    never imports or declares, optionally limited to the names in `known`.
+    Most files are settled by a word set difference; only the candidates
+    left over are looked for in the comment- and string-free code.
+    """
+    candidates = set(IDENT_RE.findall(content)) - GLOBALS - KEYWORDS
+    if known is not None:
+        candidates = {n for n in candidates if n in known}
+    candidates -= declared_names(content, imports)
+    # A use in the raw text is necessary for one in the code; checking that first
+    # drops the words that only turn up in strings and JSX text
+    candidates = {n for n in candidates if is_used(content, n)}
+    if not candidates:
+        return []
+    code = code_only(content)
+    candidates -= bound_names(code)
+    return sorted(n for n in candidates if is_used(code, n))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m codemod.symbols', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('names', nargs='*', help='names to resolve')
+    parser.add_argument('--index', default=INDEX_FILE, metavar='PATH',
+                        help='index file (default: %(default)s)')
+    parser.add_argument('--rebuild', action='store_true', help='ignore the stored index')
+    args = parser.parse_args(argv)
+
+    index = SymbolIndex(args.index)
+    if not args.rebuild:
+        index.load()
+    reread = index.refresh()
+    index.save()
+
+    if not args.names:
+        installed = [p for p, e in index.packages.items() if e['sig'] is not None]
+        print(f"{len(index.by_name)} names from {len(index.files)} files "
+              f"({reread} re-read); packages: {', '.join(installed) or 'none installed'}")
+        return 0
+    for name in args.names:
+        found = index.resolve(name)
+        if found is None:
+            options = index.by_name.get(name)
+            note = 'ambiguous: ' + ', '.join(o[0] for o in options) if options else 'unknown'
+            print(f"{name}: {note}")
+        else:
+            module, kind = found
+            print(f"{name}: {'import ' + name if kind == 'default' else '{ ' + name + ' }'} from '{module}'")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
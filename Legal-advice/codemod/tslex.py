@@ -0,0 +1,622 @@
+"""
+Streaming TypeScript/TSX lexer that builds a brace scope tree in one linear pass.
+
+Counting `{` and `}` per line goes wrong as soon as a brace sits inside a
+string, template literal, regex, comment or JSX text, and cannot tell a
+function body from an object literal, a type literal or an import list.
+This lexer tokenizes properly (including template `${}` nesting, regex
+literals and JSX children) and classifies every `{ ... }` pair as one of:
+
+    function  function / method / arrow function body
+    block     if/for/try/else/plain statement block
+    object    object literal or destructuring pattern
+    type      type literal, interface body
+    import    import / export specifier list
+    class     class body
+    enum      enum body
+    template  `${ ... }` substitution
+    jsx       JSX expression container
+
+It is a classifier, not a full parser: it only keeps the handful of recent
+tokens and open groups it needs, so its cost is linear in the file size.
+"""
+import bisect
+import re
+
+FUNCTION, BLOCK, OBJECT, TYPE, IMPORT, CLASS, ENUM, TEMPLATE, JSX, MODULE = (
+    'function', 'block', 'object', 'type', 'import', 'class', 'enum', 'template', 'jsx', 'module')
+
+CODE_RE = re.compile(r"""
+    (?P<ws>[ \t\r\n\f\v\u00a0\ufeff\u2028\u2029]+)
+  | (?P<comment>//[^\n]*|/\*[\s\S]*?(?:\*/|\Z))
+  | (?P<ident>[A-Za-z_$\u0080-\uffff][\w$\u0080-\uffff]*)
+  | (?P<num>(?:\d|\.\d)[\w.]*)
+  | (?P<str>'(?:[^'\\\n]|\\[\s\S])*'?|"(?:[^"\\\n]|\\[\s\S])*"?)
+  | (?P<punct>>>>=|\.\.\.|===|!==|\*\*=|<<=|>>=|\?\?=|&&=|\|\|=|>>>|=>|==|!=|<=|>=|&&|\|\||\?\?
+              |\?\.(?!\d)|\+\+|--|\+=|-=|\*=|/=|%=|&=|\|=|\^=|<<|>>|\*\*|[(){}\[\];,<>+\-*/%&|^!~?:=.@\#`])
+""", re.VERBOSE)
+REGEX_RE = re.compile(r"/(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[A-Za-z]*")
+TEMPLATE_RE = re.compile(r"(?:[^`\\$]|\\[\s\S]|\$(?!\{))*")
+JSX_TEXT_RE = re.compile(r"[^<{]+")
+JSX_TAG_RE = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<name>[A-Za-z_$][\w$.:\-]*)
+  | (?P<str>'[^']*'?|"[^"]*"?)
+  | (?P<comment>//[^\n]*|/\*[\s\S]*?(?:\*/|\Z))
+  | (?P<punct>/>|[>{=/])
+""", re.VERBOSE)
+NEXT_IDENT_RE = re.compile(r"\s*[A-Za-z_$]")
+NOT_STATIC_IMPORT_RE = re.compile(r"\s*[(.]")
+# `<T,>(` / `<T extends X>(` in .tsx is a generic arrow function, not JSX
+GENERIC_ARROW_RE = re.compile(r"<\s*[A-Za-z_$][\w$]*\s*(?:,|extends\b)")
+
+CONTROL_KEYWORDS = {'if', 'for', 'while', 'switch', 'catch', 'with'}
+BLOCK_KEYWORDS = {'else', 'try', 'finally', 'do'}
+EXPR_KEYWORDS = {'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+                 'throw', 'case', 'do', 'else', 'yield', 'await', 'default'}
+TYPE_KEYWORDS = {'extends', 'implements', 'keyof', 'typeof', 'as', 'satisfies', 'is', 'infer'}
+DECL_KEYWORDS = {'const', 'let', 'var'}
+STATEMENT_PREFIXES = {'export', 'declare', 'default', 'abstract'}
+# Tokens after which a newline cannot end a type (the type continues)
+TYPE_CONTINUATION = {'|', '&', '.', '<', '[', '?', ':', '=>', ',', '(', 'extends', 'keyof', 'typeof'}
+
+
+class Token:
+    __slots__ = ('kind', 'value', 'pos')
+
+    def __init__(self, kind, value, pos):
+        self.kind = kind
+        self.value = value
+        self.pos = pos
+
+    def __repr__(self):
+        return f"Token({self.kind}, {self.value!r}, {self.pos})"
+
+
+class Scope:
+    """A `{ ... }` pair (or the whole module). `start`/`end` are the brace offsets."""
+    __slots__ = ('kind', 'start', 'end', 'parent', 'children', 'name', 'is_async', 'declared')
+
+    def __init__(self, kind, start, parent=None, name=None, is_async=False):
+        self.kind = kind
+        self.start = start
+        self.end = None
+        self.parent = parent
+        self.children = []
+        self.name = name
+        self.is_async = is_async
+        self.declared = set()
+        if parent is not None:
+            parent.children.append(self)
+
+    def __repr__(self):
+        label = f" {self.name}" if self.name else ''
+        return f"<Scope {self.kind}{label} {self.start}-{self.end}>"
+
+    @property
+    def body_start(self):
+        """Offset just inside the opening brace."""
+        return self.start + 1 if self.kind != MODULE else 0
+
+    def ancestors(self):
+        """This scope and its parents, innermost first."""
+        scope = self
+        while scope is not None:
+            yield scope
+            scope = scope.parent
+
+    def is_declared(self, name):
+        """True if `name` is declared in this scope or any enclosing one."""
+        return any(name in s.declared for s in self.ancestors())
+
+    def functions(self):
+        """Enclosing function scopes, innermost first."""
+        return [s for s in self.ancestors() if s.kind == FUNCTION]
+
+
+class ScopeTree:
+    def __init__(self, text):
+        self.text = text
+        self.root = Scope(MODULE, 0)
+        self.scopes = []        # every non-module scope, in opening order
+        self.member_uses = []   # (name, pos, scope) for every `name.` / `name?.` root
+
+    def _starts(self):
+        return [s.start for s in self.scopes]
+
+    def scope_at(self, pos):
+        """Innermost scope containing offset `pos`."""
+        i = bisect.bisect_right(self._starts(), pos) - 1
+        while i >= 0:
+            s = self.scopes[i]
+            if s.start < pos <= s.end:
+                return s
+            i -= 1
+        return self.root
+
+    def of_kind(self, kind):
+        return [s for s in self.scopes if s.kind == kind]
+
+    def uses_of(self, name):
+        return [(pos, scope) for n, pos, scope in self.member_uses if n == name]
+
+
+class _Group:
+    """An open `(`, `[`, `{`, template or JSX construct on the lexer stack."""
+    __slots__ = ('kind', 'scope', 'owner', 'params', 'ternaries', 'named', 'closing')
+
+    def __init__(self, kind, scope=None, owner=None):
+        self.kind = kind
+        self.scope = scope
+        self.owner = owner
+        self.params = []
+        self.ternaries = 0
+        # JSX tags only
+        self.named = False
+        self.closing = False
+
+
+class _Owner:
+    """What a `(` group belongs to: a control keyword, a function header or a call/arrow."""
+    __slots__ = ('kind', 'name', 'is_async')
+
+    def __init__(self, kind, name=None, is_async=False):
+        self.kind = kind
+        self.name = name
+        self.is_async = is_async
+
+
+class _TypeContext:
+    """An open type annotation: return type, `x: T` annotation or `type X = ...`."""
+    __slots__ = ('kind', 'depth', 'angle', 'owner', 'params', 'alias_eq')
+
+    def __init__(self, kind, depth, owner=None, params=()):
+        self.kind = kind
+        self.depth = depth
+        self.angle = 0
+        # Return types only: the function header the type belongs to
+        self.owner = owner
+        self.params = params
+        self.alias_eq = False
+
+
+class _Lexer:
+    def __init__(self, text, jsx):
+        self.text = text
+        self.jsx = jsx
+        self.tree = ScopeTree(text)
+        self.groups = []
+        self.recent = [None, None, None]   # prev3, prev2, prev
+        self.newline = False
+        self.type_ctx = None
+        self.pending_function = None
+        self.pending_decl = None
+        self.pending_arrow = None
+        self.pending_arrow_params = []
+        self.last_closed = None
+        self.var_decl = None
+        self.in_import = False
+
+    # -- helpers ------------------------------------------------------------
+
+    @property
+    def prev(self):
+        return self.recent[2]
+
+    def _prev_value(self, back=1):
+        tok = self.recent[3 - back]
+        return tok.value if tok is not None else None
+
+    def _push_token(self, tok):
+        self.recent = [self.recent[1], self.recent[2], tok]
+        self.newline = False
+
+    def _scope(self):
+        for g in reversed(self.groups):
+            if g.scope is not None:
+                return g.scope
+        return self.tree.root
+
+    def _top(self):
+        return self.groups[-1] if self.groups else None
+
+    def _expression_position(self):
+        prev = self.prev
+        if prev is None:
+            return True
+        if prev.kind == 'punct':
+            return prev.value not in (')', ']', '}', '++', '--')
+        if prev.kind == 'ident':
+            return prev.value in EXPR_KEYWORDS
+        return False
+
+    @staticmethod
+    def _ends_type(tok):
+        if tok is None:
+            return False
+        if tok.kind in ('str', 'num'):
+            return True
+        if tok.kind == 'ident':
+            return tok.value not in TYPE_CONTINUATION
+        return tok.value in (')', ']', '}', '>', '>>', '>>>')
+
+    # -- main loop ----------------------------------------------------------
+
+    def run(self):
+        text = self.text
+        pos = 0
+        end = len(text)
+        while pos < end:
+            top = self._top()
+            kind = top.kind if top is not None else None
+            if kind == '`':
+                pos = self._lex_template(pos)
+            elif kind == 'jsxtag':
+                pos = self._lex_jsx_tag(pos, top)
+            elif kind == 'jsxchildren':
+                pos = self._lex_jsx_children(pos)
+            else:
+                pos = self._lex_code(pos)
+        for g in self.groups:
+            if g.scope is not None and g.scope.end is None:
+                g.scope.end = end
+        self.tree.root.end = end
+        return self.tree
+
+    def _lex_template(self, pos):
+        m = TEMPLATE_RE.match(self.text, pos)
+        pos = m.end()
+        if pos >= len(self.text):
+            return pos
+        if self.text[pos] == '`':
+            self.groups.pop()
+            self._push_token(Token('str', '`', pos))
+            return pos + 1
+        # `${`
+        self._open_scope(TEMPLATE, pos + 1)
+        return pos + 2
+
+    def _lex_jsx_children(self, pos):
+        text = self.text
+        m = JSX_TEXT_RE.match(text, pos)
+        if m:
+            return m.end()
+        if text[pos] == '{':
+            self._open_scope(JSX, pos)
+        else:
+            self.groups.append(_Group('jsxtag'))
+        return pos + 1
+
+    def _lex_jsx_tag(self, pos, tag):
+        if self.text[pos] == '/' and not tag.named and not tag.closing:
+            # `</Tag>` or the fragment close `</>`
+            tag.closing = True
+            return pos + 1
+        m = JSX_TAG_RE.match(self.text, pos)
+        if m is None:
+            return pos + 1
+        value = m.group()
+        if m.lastgroup != 'punct':
+            tag.named = tag.named or m.lastgroup == 'name'
+            return m.end()
+        if value == '{':
+            self._open_scope(JSX, pos)
+        elif value == '/>':
+            self.groups.pop()
+            self._jsx_element_done(pos)
+        elif value == '>':
+            self.groups.pop()
+            if tag.closing:
+                # `</Tag>` ends the element whose children we were in
+                if self._top() is not None and self._top().kind == 'jsxchildren':
+                    self.groups.pop()
+                self._jsx_element_done(pos)
+            else:
+                self.groups.append(_Group('jsxchildren'))
+        return m.end()
+
+    def _jsx_element_done(self, pos):
+        top = self._top()
+        if top is None or top.kind not in ('jsxchildren', 'jsxtag'):
+            self._push_token(Token('jsx', '', pos))
+
+    def _lex_code(self, pos):
+        text = self.text
+        ch = text[pos]
+
+        if ch == '/' and pos + 1 < len(text) and text[pos + 1] not in '/*' \
+                and self._expression_position():
+            m = REGEX_RE.match(text, pos)
+            if m:
+                self._push_token(Token('regex', m.group(), pos))
+                return m.end()
+        if ch == '<' and self.jsx and self._expression_position() and self.type_ctx is None \
+                and not GENERIC_ARROW_RE.match(text, pos):
+            nxt = text[pos + 1:pos + 2]
+            if nxt == '>' or nxt.isalpha() or nxt in '_$':
+                self.groups.append(_Group('jsxtag'))
+                return pos + 1
+        if ch == '`':
+            self.groups.append(_Group('`'))
+            return pos + 1
+
+        m = CODE_RE.match(text, pos)
+        if m is None:
+            return pos + 1
+        group = m.lastgroup
+        if group == 'ws':
+            if '\n' in m.group():
+                self.newline = True
+            return m.end()
+        if group == 'comment':
+            if m.group().startswith('//'):
+                self.newline = True
+            return m.end()
+
+        tok = Token(group, m.group(), pos)
+        self._end_type_on_newline(tok)
+        if group == 'str' and self.in_import:
+            # The module specifier ends an import/export-from statement
+            self.in_import = False
+        if group == 'ident':
+            self._on_ident(tok, m.end())
+        elif group == 'punct':
+            self._on_punct(tok)
+        self._push_token(tok)
+        return m.end()
+
+    # -- token handlers -----------------------------------------------------
+
+    def _end_type_on_newline(self, tok):
+        ctx = self.type_ctx
+        if ctx is None or not self.newline or ctx.angle or len(self.groups) != ctx.depth:
+            return
+        if tok.value in TYPE_CONTINUATION or tok.value in ('|', '&', '=', '{', '>'):
+            return
+        if self._ends_type(self.prev):
+            self.type_ctx = None
+
+    def _on_ident(self, tok, end):
+        value = tok.value
+        prev = self._prev_value()
+        if prev in ('.', '?.'):
+            return
+        top = self._top()
+
+        if self.pending_function is not None and self.pending_function.name is None \
+                and prev in ('function', '*'):
+            self.pending_function.name = value
+            self._scope().declared.add(value)
+            return
+
+        if value == 'function':
+            self.pending_function = _Owner(FUNCTION, is_async=prev == 'async')
+        elif value in ('class', 'interface', 'enum', 'namespace') and self.type_ctx is None \
+                and NEXT_IDENT_RE.match(self.text, end):
+            self.pending_decl = value
+        elif value == 'type' and (prev is None or prev in (';', '{', '}') or prev in STATEMENT_PREFIXES) \
+                and NEXT_IDENT_RE.match(self.text, end) and self.type_ctx is None:
+            self.type_ctx = _TypeContext('alias', len(self.groups))
+        elif value in DECL_KEYWORDS:
+            self.var_decl = len(self.groups)
+        elif value == 'import' and not NOT_STATIC_IMPORT_RE.match(self.text, end):
+            self.in_import = True
+        elif self.var_decl == len(self.groups) and prev in DECL_KEYWORDS:
+            self._scope().declared.add(value)
+        elif self.pending_decl is not None and prev == self.pending_decl:
+            self._scope().declared.add(value)
+        elif self.in_import and value not in ('type', 'as', 'from') and (prev in (',', '{', 'as', 'import', 'type')):
+            self.tree.root.declared.add(value)
+        elif top is not None and top.kind == '(' and prev in ('(', ',', '...'):
+            top.params.append(value)
+        elif top is not None and top.scope is not None and top.scope.kind == OBJECT \
+                and self.var_decl == len(self.groups) - 1 and prev in ('{', ',', '...'):
+            # `const { a, b } = ...` destructuring
+            top.scope.parent.declared.add(value)
+
+    def _on_punct(self, tok):
+        value = tok.value
+        top = self._top()
+        ctx = self.type_ctx
+
+        if ctx is not None:
+            depth = len(self.groups)
+            if value == '<':
+                ctx.angle += 1
+            elif value in ('>', '>>', '>>>') and ctx.angle:
+                ctx.angle = max(0, ctx.angle - len(value))
+            elif depth == ctx.depth and not ctx.angle:
+                if value == '=' and ctx.kind == 'alias' and not ctx.alias_eq:
+                    ctx.alias_eq = True
+                elif value in ('=', ';', ','):
+                    self.type_ctx = None
+                elif value == '=>' and ctx.kind == 'return' and ctx.owner is not None \
+                        and ctx.owner.kind != FUNCTION:
+                    self.type_ctx = None
+                    self.pending_arrow = ctx.owner
+                    self.pending_arrow_params = ctx.params
+                    return
+
+        if value == '{':
+            self._on_open_brace(tok)
+        elif value == '}':
+            self._close_scope(tok.pos)
+        elif value in ('(', '['):
+            self._on_open_paren(tok)
+        elif value in (')', ']'):
+            if top is not None and top.kind == ('(' if value == ')' else '['):
+                self.last_closed = self.groups.pop()
+            if self.type_ctx is not None and len(self.groups) < self.type_ctx.depth:
+                self.type_ctx = None
+        elif value == '?':
+            if top is not None:
+                top.ternaries += 1
+        elif value == ':':
+            self._on_colon(top)
+        elif value in ('.', '?.'):
+            self._record_member_use()
+        elif value == '=>':
+            self._on_arrow()
+        elif value == ';':
+            self.var_decl = None
+            self.in_import = False
+            self.pending_decl = None
+        elif value == '=' and self.var_decl == len(self.groups):
+            self.var_decl = None
+
+    def _on_open_paren(self, tok):
+        prev, prev2, prev3 = self._prev_value(), self._prev_value(2), self._prev_value(3)
+        owner = None
+        if tok.value == '(':
+            if self.pending_function is not None:
+                owner, self.pending_function = self.pending_function, None
+            elif prev in CONTROL_KEYWORDS and prev2 not in ('.', '?.'):
+                owner = _Owner('control')
+            elif prev == 'await' and prev2 == 'for':
+                owner = _Owner('control')
+            elif prev == 'async':
+                name = prev3 if prev2 == '=' else None
+                owner = _Owner('callable', name=name, is_async=True)
+            elif self.prev is not None and self.prev.kind == 'ident' and prev not in EXPR_KEYWORDS:
+                owner = _Owner('callable', name=prev, is_async=prev2 == 'async')
+            else:
+                name = prev2 if prev in ('=', ':') and self.recent[1] is not None \
+                    and self.recent[1].kind == 'ident' else None
+                owner = _Owner('paren', name=name)
+        self.groups.append(_Group(tok.value, owner=owner))
+
+    def _on_colon(self, top):
+        if top is not None and top.ternaries:
+            top.ternaries -= 1
+            return
+        if self.type_ctx is not None:
+            return
+        prev = self.prev
+        scope = self._scope()
+        if prev is not None and prev.value == ')' and self.last_closed is not None \
+                and self.last_closed.owner is not None and self.last_closed.owner.kind != 'control':
+            self.type_ctx = _TypeContext('return', len(self.groups), owner=self.last_closed.owner,
+                                         params=self.last_closed.params)
+        elif top is not None and top.kind == '(':
+            self.type_ctx = _TypeContext('annotation', len(self.groups))
+        elif self.var_decl == len(self.groups):
+            self.type_ctx = _TypeContext('annotation', len(self.groups))
+        elif scope.kind == CLASS and top is not None and top.scope is scope:
+            self.type_ctx = _TypeContext('annotation', len(self.groups))
+
+    def _on_arrow(self):
+        prev = self.prev
+        if prev is not None and prev.value == ')' and self.last_closed is not None:
+            owner = self.last_closed.owner or _Owner('paren')
+            self.pending_arrow = _Owner(FUNCTION, name=owner.name, is_async=owner.is_async)
+            self.pending_arrow_params = self.last_closed.params
+        elif prev is not None and prev.kind == 'ident':
+            is_async = self._prev_value(2) == 'async'
+            self.pending_arrow = _Owner(FUNCTION, is_async=is_async)
+            self.pending_arrow_params = [prev.value]
+        else:
+            self.pending_arrow = _Owner(FUNCTION)
+            self.pending_arrow_params = []
+
+    # -- braces ---------------------------------------------------------------
+
+    def _classify_brace(self):
+        """Return (kind, owner, params) for a `{` about to be opened in code mode."""
+        prev = self.prev
+        pv = prev.value if prev is not None else None
+        scope = self._scope()
+        top = self._top()
+        ctx = self.type_ctx
+
+        if ctx is not None:
+            if ctx.kind == 'return' and not ctx.angle and len(self.groups) == ctx.depth \
+                    and self._ends_type(prev):
+                self.type_ctx = None
+                return FUNCTION, ctx.owner, ctx.params
+            return TYPE, None, ()
+        if scope.kind == TYPE and top is not None and top.scope is scope:
+            return TYPE, None, ()
+        if self.pending_decl is not None:
+            decl, self.pending_decl = self.pending_decl, None
+            return {'interface': TYPE, 'class': CLASS, 'enum': ENUM}.get(decl, BLOCK), None, ()
+        if pv == '=>' and self.pending_arrow is not None:
+            owner, self.pending_arrow = self.pending_arrow, None
+            return FUNCTION, owner, self.pending_arrow_params
+        if pv == ')' and self.last_closed is not None and self.last_closed.owner is not None:
+            owner = self.last_closed.owner
+            if owner.kind == 'control':
+                return BLOCK, None, ()
+            return FUNCTION, owner, self.last_closed.params
+        if prev is not None and prev.kind == 'ident':
+            if pv in ('import', 'export') or (pv == 'type' and self._prev_value(2) in ('import', 'export')):
+                return IMPORT, None, ()
+            if pv in BLOCK_KEYWORDS:
+                return BLOCK, None, ()
+            if pv in DECL_KEYWORDS:
+                return OBJECT, None, ()
+            if pv in TYPE_KEYWORDS:
+                return TYPE, None, ()
+            if pv in EXPR_KEYWORDS:
+                return OBJECT, None, ()
+            return BLOCK, None, ()
+        if pv == '<':
+            return TYPE, None, ()
+        if pv is None or pv in (';', '}'):
+            return BLOCK, None, ()
+        if pv == '{':
+            return (OBJECT if scope.kind in (JSX, TEMPLATE, OBJECT) else BLOCK), None, ()
+        if pv == ':':
+            if scope.kind in (OBJECT, JSX, TEMPLATE) or (top is not None and top.kind in ('(', '[')):
+                return OBJECT, None, ()
+            return BLOCK, None, ()   # case/label
+        if prev is not None and prev.kind in ('str', 'num', 'regex', 'jsx'):
+            return BLOCK, None, ()
+        return OBJECT, None, ()
+
+    def _on_open_brace(self, tok):
+        kind, owner, params = self._classify_brace()
+        name = owner.name if owner is not None else None
+        is_async = owner.is_async if owner is not None else False
+        scope = self._open_scope(kind, tok.pos, name=name, is_async=is_async)
+        if kind == FUNCTION and params:
+            scope.declared.update(params)
+        if kind == IMPORT:
+            self.in_import = True
+
+    def _open_scope(self, kind, pos, name=None, is_async=False):
+        scope = Scope(kind, pos, parent=self._scope(), name=name, is_async=is_async)
+        self.tree.scopes.append(scope)
+        self.groups.append(_Group('{', scope=scope))
+        if kind != OBJECT:
+            self.var_decl = None
+        return scope
+
+    def _close_scope(self, pos):
+        # Drop unbalanced parens/brackets, but never unwind past a template or JSX construct
+        while self.groups and self.groups[-1].kind in ('(', '['):
+            self.groups.pop()
+        if not self.groups or self.groups[-1].kind != '{':
+            return
+        group = self.groups.pop()
+        group.scope.end = pos
+        if self.type_ctx is not None and len(self.groups) < self.type_ctx.depth:
+            self.type_ctx = None
+        if group.scope.kind in (FUNCTION, BLOCK, CLASS):
+            self.var_decl = None
+
+    # -- member uses ----------------------------------------------------------
+
+    def _record_member_use(self):
+        prev = self.prev
+        if prev is not None and prev.kind == 'ident' and self._prev_value(2) not in ('.', '?.'):
+            self.tree.member_uses.append((prev.value, prev.pos, self._scope()))
+
+
+def parse(text, jsx=False):
+    """Lex `text` once and return its ScopeTree. Pass jsx=True for .tsx files."""
+    lexer = _Lexer(text, jsx)
+    return lexer.run()
+
+
+def parse_file_content(content, filepath):
+    return parse(content, jsx=filepath.endswith(('.tsx', '.jsx')))
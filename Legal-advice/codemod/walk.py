@@ -0,0 +1,262 @@
+"""
+Source tree walker: os.scandir with .gitignore-aware pruning.
+
+    for entry in walk.scan(['app', 'components', 'lib']):
+        entry.path, entry.stat()
+
+scan() yields the .ts/.tsx files under the root directories in the same order
+the old os.walk loops did (a directory's files sorted, then its
+subdirectories sorted), as os.DirEntry objects, so their stat comes from the
+walk. PRUNE_DIRS are always pruned; on top of that every .gitignore from the
+project root down is honoured (`!` negation, `dir/` only-directory patterns,
+`/anchored` patterns and `**`), so supabase/.temp, build output and the like
+are never entered.
+
+Given a codemod.manifest.Manifest, scan() only stats a directory whose mtime
+hasn't changed since the manifest was written and reuses the listing
+recorded there instead of reading the directory again.
+"""
+import os
+import re
+
+EXTENSIONS = ('.ts', '.tsx')
+PRUNE_DIRS = ('node_modules', '.next', 'generated')
+IGNORE_FILE = '.gitignore'
+
+
+# ---------------------------------------------------------------------------
+# .gitignore
+
+def _translate(pattern):
+    """Regex for one gitignore glob (no leading `/`, no trailing `/`)."""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('**', i):
+            out.append('.*')
+            i += 2
+        elif c == '*':
+            out.append('[^/]*')
+            i += 1
+        elif c == '?':
+            out.append('[^/]')
+            i += 1
+        elif c == '[':
+            close = pattern.find(']', i + 2)
+            if close < 0:
+                out.append(re.escape(c))
+                i += 1
+                continue
+            body = pattern[i + 1:close]
+            if body.startswith('!'):
+                body = '^' + body[1:]
+            out.append(f"[{body}]")
+            i = close + 1
+        elif c == '\\' and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return ''.join(out)
+
+
+def parse_ignore(text, base):
+    """
+    Rules for a .gitignore in directory `base` (absolute, '/'-separated), as
+    (base, negate, name regex, path regex, dir name regex, dir path regex)
+    groups. Only the order of a pattern relative to the negations around it
+    matters, so each run of plain (or of `!`) patterns is compiled into one
+    alternation per kind: patterns without a `/` match the last path
+    component, the others the path below `base`; `dir/` patterns only
+    match directories.
+    """
+    runs = []                   # [negate, name, path, dir name, dir path]
+    for line in text.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        if not line.endswith('\\ '):
+            line = line.rstrip()
+        negate = line.startswith('!')
+        if negate or line.startswith('\\!') or line.startswith('\\#'):
+            line = line[1:]
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            continue
+        anchored = '/' in line
+        if not runs or runs[-1][0] != negate:
+            runs.append([negate, [], [], [], []])
+        runs[-1][1 + 2 * dir_only + anchored].append(_translate(line.lstrip('/')))
+    return [(base, negate) + tuple(_compile(p) for p in patterns) for negate, *patterns in runs]
+
+
+def _compile(patterns):
+    return re.compile(f"(?:{'|'.join(patterns)})\\Z") if patterns else None
+
+
+def is_ignored(rules, abspath, is_dir):
+    """Whether the last rule group matching `abspath` ignores it."""
+    name = abspath.rfind('/') + 1
+    for base, negate, name_re, path_re, dir_name_re, dir_path_re in reversed(rules):
+        if not abspath.startswith(base):
+            continue
+        pos = len(base)
+        if (name_re is not None and name_re.match(abspath, name)
+                or path_re is not None and path_re.match(abspath, pos)
+                or is_dir and (dir_name_re is not None and dir_name_re.match(abspath, name)
+                               or dir_path_re is not None and dir_path_re.match(abspath, pos))):
+            return not negate
+    return False
+
+
+def _abs(path):
+    return os.path.abspath(path).replace(os.sep, '/')
+
+
+def ignore_stat(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def load_ignore(directory, rules, sources=None):
+    """
+    `rules` plus those of `directory`'s .gitignore, if it has one. `sources`
+    collects the stat of the file looked at (None if there is none).
+    """
+    path = os.path.join(directory, IGNORE_FILE)
+    if sources is not None:
+        sources[path] = ignore_stat(path)
+    try:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            text = f.read()
+    except OSError:
+        return rules
+    base = _abs(directory).rstrip('/') + '/'
+    return rules + parse_ignore(text, base)
+
+
+def _root_rules(base, root_dir, sources):
+    """Rules from `base` down to (not including) `root_dir`."""
+    rules = load_ignore(base, [], sources)
+    base_abs = _abs(base).rstrip('/')
+    root_abs = _abs(root_dir)
+    if not root_abs.startswith(base_abs + '/'):
+        return rules
+    parts = root_abs[len(base_abs) + 1:].split('/')
+    directory = base
+    for part in parts[:-1]:
+        directory = os.path.join(directory, part)
+        rules = load_ignore(directory, rules, sources)
+    return rules
+
+
+# ---------------------------------------------------------------------------
+# Walking
+
+class ListedFile:
+    """Stand-in for os.DirEntry when a directory listing comes from the manifest."""
+    __slots__ = ('path', '_stat')
+
+    def __init__(self, path):
+        self.path = path
+        self._stat = None
+
+    def stat(self):
+        if self._stat is None:
+            self._stat = os.stat(self.path)
+        return self._stat
+
+
+class Walker:
+    def __init__(self, extensions=EXTENSIONS, ignore=True, base='.', manifest=None):
+        self.extensions = extensions
+        self.ignore = ignore
+        self.base = base
+        self.manifest = manifest
+        self.ignore_sources = {}        # .gitignore above the root dirs -> [size, mtime] or None
+
+    def scan(self, root_dirs):
+        force = False
+        if self.manifest is not None:
+            force = not self.manifest.usable(self.extensions, self.ignore)
+        for d in root_dirs:
+            if not os.path.isdir(d):
+                continue
+            rules = _root_rules(self.base, d, self.ignore_sources) if self.ignore else []
+            if rules and is_ignored(rules, _abs(d), True):
+                continue
+            yield from self._walk(d, _abs(d), rules, force)
+
+    def _listing(self, path, abspath, rules):
+        """(subdirs, files, entries, rules, .gitignore stat) of a directory read from disk."""
+        with os.scandir(path) as it:
+            listed = list(it)
+        ignore_sig = None
+        if self.ignore and any(entry.name == IGNORE_FILE for entry in listed):
+            ignore_sig = ignore_stat(os.path.join(path, IGNORE_FILE))
+            rules = load_ignore(path, rules)
+        subdirs, files = [], []
+        entries = {}
+        for entry in listed:
+            name = entry.name
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                # os.walk doesn't descend into symlinked directories either
+                if name in PRUNE_DIRS or entry.is_symlink():
+                    continue
+            elif not name.endswith(self.extensions):
+                continue
+            if rules and is_ignored(rules, f"{abspath}/{name}", is_dir):
+                continue
+            (subdirs if is_dir else files).append(name)
+            entries[name] = entry
+        subdirs.sort()
+        files.sort()
+        return subdirs, files, entries, rules, ignore_sig
+
+    def _walk(self, path, abspath, rules, force):
+        manifest = self.manifest
+        cached = old = None
+        if manifest is not None:
+            st = os.stat(path)
+            old = manifest.dirs.get(path)
+            if not force and manifest.listing(path, st) is not None:
+                # A new or removed .gitignore changes the directory's mtime, an edited one doesn't
+                if old[1] is None or ignore_stat(os.path.join(path, IGNORE_FILE)) == old[1]:
+                    cached = old
+        if cached is not None:
+            subdirs, files, entries = cached[2], cached[3], {}
+            if self.ignore and cached[1] is not None:
+                rules = load_ignore(path, rules)
+        else:
+            subdirs, files, entries, rules, ignore_sig = self._listing(path, abspath, rules)
+            if manifest is not None:
+                if old is not None and old[1] != ignore_sig:
+                    # This directory's .gitignore changed: relist everything below it too
+                    force = True
+                manifest.record_listing(path, st, ignore_sig, subdirs, files)
+        if manifest is not None:
+            manifest.seen_dirs.add(path)
+        for name in files:
+            yield entries.get(name) or ListedFile(os.path.join(path, name))
+        for name in subdirs:
+            yield from self._walk(os.path.join(path, name), f"{abspath}/{name}", rules, force)
+
+
+def scan(root_dirs, extensions=EXTENSIONS, ignore=True, base='.', manifest=None):
+    """Yield the source files under `root_dirs` as DirEntry-like objects (`.path`, `.stat()`)."""
+    walker = Walker(extensions, ignore, base, manifest)
+    yield from walker.scan(root_dirs)
+    if manifest is not None:
+        manifest.ignore_sources = walker.ignore_sources
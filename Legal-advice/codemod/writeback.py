@@ -0,0 +1,232 @@
+"""
+Transactional write-back for codemod runs.
+
+WriteBack buffers the changed files of a run and commits them in batches.
+Each file is written to a temp file next to it and moved over the original
+with os.replace, so a file is either old or new, never half written. The
+temp file gets the original's permission bits.
+
+Before a batch is replaced, the original bytes of its files go to backup
+files and the batch is recorded in the journal (.codemod-journal, one JSON
+record per line, flushed and fsynced at each step); a second record marks
+the batch committed. A clean run deletes the journal and the backups at the
+end, so a journal left on disk means the run was interrupted. Then either
+
+    python -m codemod --rollback    # put every journaled file back as it was
+    python -m codemod --resume      # carry on, skipping files already written
+
+Rollback only puts back a file that still holds the content the run wrote,
+never one edited since. Resume counts a journaled file as done
+when it holds the content the run wrote. Those files are not run through the
+rules again, which matters because the chain isn't idempotent on every file.
+
+With `jobs` > 1 the backups and replaces of a batch run on a thread pool
+(the work is I/O bound).
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+JOURNAL_FILE = '.codemod-journal'
+BATCH_SIZE = 64
+
+
+def _sha1(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def encode_source(content):
+    """The bytes engine.write_source would put on disk (text mode newlines)."""
+    if os.linesep != '\n':
+        content = content.replace('\n', os.linesep)
+    return content.encode('utf-8')
+
+
+def _file_sha1(path):
+    try:
+        with open(path, 'rb') as f:
+            return _sha1(f.read())
+    except OSError:
+        return None
+
+
+def replace_file(path, data):
+    """Write `data` over `path` through a temp file in the same directory and os.replace."""
+    directory, name = os.path.split(path)
+    fd, tmp = tempfile.mkstemp(prefix=f".{name}.", suffix='.tmp', dir=directory or '.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        if os.path.exists(path):
+            shutil.copymode(path, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def read_journal(path):
+    """
+    (begin record, [batch records]). A torn last line is ignored. Whether a
+    batch got its commit record doesn't matter to rollback or resume: both
+    look at what each file holds now.
+    """
+    begin, batches = None, []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+    except OSError:
+        return begin, batches
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if 'begin' in record:
+            begin = record['begin']
+        elif 'files' in record:
+            batches.append(record)
+    return begin, batches
+
+
+class WriteBack:
+    """
+    Buffers (path, content) writes and commits them in batches of
+    `batch_size` under the journal at `journal`. `rules` (names) are recorded
+    so a resume can check it runs the same chain.
+    """
+
+    def __init__(self, journal=JOURNAL_FILE, batch_size=BATCH_SIZE, jobs=1, rules=()):
+        self.path = journal
+        self.backup_dir = journal + '.d'
+        self.batch_size = max(batch_size, 1)
+        self.jobs = jobs
+        self.rules = list(rules)
+        self.pending = []           # (path, bytes)
+        self.batches = 0            # batch records in the journal, earlier runs included
+        self.written = 0
+        self.done = set()           # files a resumed run must not touch again
+        self.journal = None
+        self.pool = None
+
+    @classmethod
+    def resume(cls, journal=JOURNAL_FILE, batch_size=BATCH_SIZE, jobs=1, rules=()):
+        """A WriteBack continuing the interrupted run recorded in `journal`."""
+        writer = cls(journal, batch_size, jobs, rules)
+        begin, batches = read_journal(journal)
+        if begin is not None and begin.get('rules') != writer.rules:
+            raise ValueError(f"{journal} was written by a run of {','.join(begin.get('rules') or [])}")
+        writer.batches = max((b['batch'] for b in batches), default=0)
+        for batch in batches:
+            for path, _, _, new_sha in batch['files']:
+                if _file_sha1(path) == new_sha:
+                    writer.done.add(path)
+        return writer
+
+    def add(self, filepath, content):
+        self.pending.append((filepath, encode_source(content)))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def _open(self):
+        exists = os.path.exists(self.path)
+        os.makedirs(self.backup_dir, exist_ok=True)
+        self.journal = open(self.path, 'a', encoding='utf-8')
+        if not exists:
+            self._record({'begin': {'time': int(time.time()), 'rules': self.rules}})
+
+    def _record(self, record):
+        self.journal.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self.journal.flush()
+        os.fsync(self.journal.fileno())
+
+    def _map(self, func, items):
+        if self.jobs > 1 and len(items) > 1:
+            if self.pool is None:
+                self.pool = ThreadPoolExecutor(max_workers=self.jobs)
+            return list(self.pool.map(func, items))
+        return [func(item) for item in items]
+
+    def _backup(self, item):
+        i, (path, data) = item
+        backup = None
+        old_sha = None
+        if os.path.exists(path):
+            backup = f"{self.batches}-{i}"
+            with open(path, 'rb') as f:
+                old = f.read()
+            old_sha = _sha1(old)
+            with open(os.path.join(self.backup_dir, backup), 'wb') as f:
+                f.write(old)
+        return [path, backup, old_sha, _sha1(data)]
+
+    def flush(self):
+        """Commit the buffered files as one batch."""
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        if self.journal is None:
+            self._open()
+        self.batches += 1
+        files = self._map(self._backup, list(enumerate(batch)))
+        self._record({'batch': self.batches, 'files': files})
+        self._map(lambda item: replace_file(*item), batch)
+        self._record({'commit': self.batches})
+        self.written += len(batch)
+
+    def close(self):
+        """Commit what is left and, the run being complete, drop the journal and backups."""
+        try:
+            self.flush()
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
+                self.pool = None
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        discard(self.path)
+
+
+def discard(journal=JOURNAL_FILE):
+    """Delete the journal and its backups."""
+    try:
+        os.remove(journal)
+    except OSError:
+        pass
+    shutil.rmtree(journal + '.d', ignore_errors=True)
+
+
+def rollback(journal=JOURNAL_FILE):
+    """
+    Undo the interrupted run recorded in `journal`, newest batch first.
+    Returns (restored, kept): files put back, and files left alone because
+    they changed since the run wrote them.
+    """
+    _, batches = read_journal(journal)
+    backup_dir = journal + '.d'
+    restored, kept = [], []
+    for batch in reversed(batches):
+        for path, backup, old_sha, new_sha in batch['files']:
+            current = _file_sha1(path)
+            if current == old_sha:
+                continue
+            if current != new_sha:
+                kept.append(path)
+                continue
+            if backup is None:
+                # The run created the file
+                os.remove(path)
+            else:
+                with open(os.path.join(backup_dir, backup), 'rb') as f:
+                    replace_file(path, f.read())
+            restored.append(path)
+    discard(journal)
+    return restored, kept
@@ -0,0 +1,552 @@
+"""
+Check the query shapes the app uses against the indexes in schema.prisma.
+
+    python -m dbmigrate.indexcov                  # uncovered shapes, most call sites first
+    python -m dbmigrate.indexcov --all            # covered shapes too
+    python -m dbmigrate.indexcov --check          # exit 1 if anything is uncovered
+
+A query shape is the table, the columns compared for equality (eq, in, is),
+the first range column (gt/gte/lt/lte) and the sort order. Shapes come from
+supabase `.from()` chains and from direct `prisma.<model>.find*/count/
+updateMany/deleteMany({ where, orderBy })` calls; each `or()` / `OR` branch
+is its own shape, since MySQL can only serve an OR by merging one index
+lookup per branch.
+
+A shape is covered by a B-tree index whose leading columns are exactly its
+equality columns (in any order), followed by the range column or the sort
+columns. Primary keys, unique fields and foreign key columns (InnoDB indexes
+every FK) count as indexes. A shape whose equality columns are only partly
+covered, or that still needs a filesort, is reported as partial.
+
+For every table with uncovered shapes a set of composite indexes is
+suggested as `@@index` lines ready to paste into the model.
+"""
+import argparse
+import collections
+import os
+import re
+import sys
+
+from codemod.engine import ROOT_DIRS, iter_source_files, read_source
+from codemod.querychain import ChainError, comment_spans, find_chains, in_spans, line_of, skip_group, split_args, string_value
+from dbmigrate import prisma
+
+DEFAULT_SCHEMA = os.path.join('prisma', 'schema.prisma')
+
+EQ_FILTERS = ('eq', 'in', 'is', 'match')
+RANGE_FILTERS = ('gt', 'gte', 'lt', 'lte')
+UNINDEXED_FILTERS = ('like', 'ilike', 'contains', 'containedBy', 'overlaps', 'textSearch')
+SKIPPED_FILTERS = ('neq', 'not')
+
+PRISMA_CALL_RE = re.compile(
+    r'\b(?:prisma|tx)\s*\.\s*(\w+)\s*\.\s*'
+    r'(findMany|findFirst|findFirstOrThrow|findUnique|findUniqueOrThrow|count|aggregate|groupBy|'
+    r'update|updateMany|delete|deleteMany|upsert)\s*\(')
+PRISMA_RANGE_OPS = ('gt', 'gte', 'lt', 'lte', 'startsWith')
+PRISMA_EQ_OPS = ('equals', 'in')
+PRISMA_UNINDEXED_OPS = ('contains', 'endsWith', 'search', 'array_contains', 'string_contains', 'has', 'hasSome')
+MAX_NAME = 64  # MySQL identifier limit
+
+
+class Shape:
+    """Columns one query filters and sorts on."""
+    __slots__ = ('table', 'eq', 'range', 'order', 'unindexed')
+
+    def __init__(self, table, eq=(), range=None, order=(), unindexed=()):
+        self.table = table
+        self.eq = tuple(sorted(set(eq)))
+        self.range = range
+        self.order = tuple(order)           # (column, 'asc'|'desc')
+        self.unindexed = tuple(sorted(set(unindexed)))
+
+    @property
+    def key(self):
+        return (self.table, self.eq, self.range, self.order)
+
+    def empty(self):
+        return not (self.eq or self.range or self.order)
+
+    def describe(self):
+        parts = [f"{c} =" for c in self.eq]
+        if self.range:
+            parts.append(f"{self.range} <>")
+        text = ', '.join(parts) or '(no filter)'
+        if self.order:
+            text += ' order by ' + ', '.join(c + (' desc' if d == 'desc' else '') for c, d in self.order)
+        if self.unindexed:
+            text += ' [+ ' + ', '.join(self.unindexed) + ' not indexable]'
+        return text
+
+
+class Index:
+    __slots__ = ('name', 'columns', 'kind')
+
+    def __init__(self, name, columns, kind):
+        self.name = name
+        self.columns = columns
+        self.kind = kind  # primary, unique, index or fk
+
+    def describe(self):
+        return f"{self.name or self.kind}({', '.join(self.columns)})"
+
+
+class Coverage:
+    __slots__ = ('shape', 'status', 'index', 'note')
+
+    def __init__(self, shape, status, index=None, note=None):
+        self.shape = shape
+        self.status = status  # covered, partial or uncovered
+        self.index = index
+        self.note = note
+
+
+class CoverageReport:
+    def __init__(self):
+        self.sites = collections.defaultdict(list)  # shape key -> [(path, line)]
+        self.shapes = {}                            # shape key -> Shape
+        self.coverage = {}                          # shape key -> Coverage
+        self.unknown = collections.Counter()        # table without a model, or table.column -> call sites
+        self.dynamic = []                           # (path, line, reason) for calls that couldn't be read
+
+    def add(self, shape, path, line):
+        self.shapes.setdefault(shape.key, shape)
+        self.sites[shape.key].append((path, line))
+
+    def ranked(self, statuses):
+        items = [c for c in self.coverage.values() if c.status in statuses]
+        items.sort(key=lambda c: (-len(self.sites[c.shape.key]), c.shape.table, c.shape.key))
+        return items
+
+
+def print_report(report, suggestions, out=sys.stdout, show_all=False, min_sites=1):
+    counts = collections.Counter(c.status for c in report.coverage.values())
+    sites = collections.Counter()
+    for c in report.coverage.values():
+        sites[c.status] += len(report.sites[c.shape.key])
+    print(f"{len(report.coverage)} query shapes from {sum(sites.values())} call sites: "
+          + ', '.join(f"{counts[s]} {s} ({sites[s]} sites)" for s in ('covered', 'partial', 'uncovered')), file=out)
+    statuses = ('uncovered', 'partial', 'covered') if show_all else ('uncovered', 'partial')
+    for c in report.ranked(statuses):
+        found = report.sites[c.shape.key]
+        if len(found) < min_sites:
+            continue
+        via = f" via {c.index.describe()}" if c.index else ''
+        note = f"; {c.note}" if c.note else ''
+        print(f"\n{len(found):4}  {c.status:9} {c.shape.table}: {c.shape.describe()}{via}{note}", file=out)
+        for path, line in found:
+            print(f"        {path}:{line}", file=out)
+    if report.unknown:
+        print('\nNot in the schema: '
+              + ', '.join(f"{t} ({n})" for t, n in report.unknown.most_common()), file=out)
+    if report.dynamic:
+        print(f"\n{len(report.dynamic)} calls with a filter that couldn't be read:", file=out)
+        for path, line, reason in report.dynamic:
+            print(f"        {path}:{line}  {reason}", file=out)
+    if suggestions:
+        print('\nSuggested indexes:', file=out)
+        for table, lines in suggestions:
+            print(f"\n  model {table} {{", file=out)
+            for line, n, replaced in lines:
+                note = f"; supersedes {', '.join(replaced)}" if replaced else ''
+                print(f"    {line}  // {n} call site{'' if n == 1 else 's'}{note}", file=out)
+            print('  }', file=out)
+
+
+# ---------------------------------------------------------------------------
+# Indexes from the schema
+
+def model_indexes(model, enums):
+    """Every index on the model's table, with the scalar fields of the model."""
+    indexes = []
+    fk_columns = []
+    scalars = set()
+    for f in model.fields:
+        relation = f.attribute('relation')
+        if relation is not None:
+            fields = [prisma.field_ref(i)[0] for i in prisma.list_items(relation.arg('fields', ''))]
+            if fields:
+                fk_columns.append(fields)
+            continue
+        if f.type in prisma.SCALAR_TYPES or f.type in enums:
+            scalars.add(f.name)
+        if f.attribute('id'):
+            indexes.append(Index('PRIMARY', [f.name], 'primary'))
+        elif f.attribute('unique'):
+            unique = f.attribute('unique')
+            indexes.append(Index(prisma.unquote(unique.arg('map', '')) or None, [f.name], 'unique'))
+    for attr in model.attributes:
+        if attr.name not in ('id', 'unique', 'index'):
+            continue
+        key = 'fields' if attr.arg('fields') is not None else None
+        columns = [prisma.field_ref(i)[0] for i in prisma.list_items(attr.arg(key, ''))]
+        kind = {'id': 'primary', 'unique': 'unique', 'index': 'index'}[attr.name]
+        name = prisma.unquote(attr.arg('map', '') or attr.arg('name', '')) or ('PRIMARY' if kind == 'primary' else None)
+        indexes.append(Index(name, columns, kind))
+    for columns in fk_columns:
+        # InnoDB creates an index for a foreign key unless one already starts with its columns
+        if not any(ix.columns[:len(columns)] == columns for ix in indexes):
+            indexes.append(Index(None, columns, 'fk'))
+    return indexes, scalars
+
+
+def load_indexes(schema):
+    """{table: ([Index], {scalar columns})}; relationMode = "prisma" means no FK indexes."""
+    ds = schema.block('datasource')
+    mode = ds.setting('relationMode') if ds else None
+    no_fks = mode is not None and prisma.unquote(mode.value) == 'prisma'
+    enums = schema.enums
+    tables = {}
+    for model in schema.models:
+        indexes, scalars = model_indexes(model, enums)
+        if no_fks:
+            indexes = [ix for ix in indexes if ix.kind != 'fk']
+        mapped = [a for a in model.attributes if a.name == 'map']
+        tables[prisma.unquote(mapped[0].arg(None)) if mapped else model.name] = (indexes, scalars)
+    return tables
+
+
+# ---------------------------------------------------------------------------
+# Coverage
+
+def check(shape, indexes):
+    """Best Coverage of a shape by one of the indexes."""
+    eq = set(shape.eq)
+    for ix in indexes:
+        if ix.kind in ('primary', 'unique') and set(ix.columns) <= eq:
+            # at most one row; anything else is checked on that row
+            return Coverage(shape, 'covered', ix, 'unique lookup')
+    best = None
+    best_rank = (-1,)
+    for ix in indexes:
+        k = 0
+        while k < len(ix.columns) and ix.columns[k] in eq:
+            k += 1
+        rest = ix.columns[k:]
+        eq_done = k == len(eq)
+        if shape.range:
+            tail_ok = eq_done and rest[:1] == [shape.range]
+        elif shape.order:
+            # after the equality prefix, the index must continue with the sort columns;
+            # sort columns fixed by an equality don't matter
+            wanted = [c for c, _ in shape.order if c not in eq]
+            tail_ok = eq_done and (not wanted or rest[:len(wanted)] == wanted) and uniform(shape.order)
+        else:
+            tail_ok = eq_done
+        rank = (2 if eq_done and tail_ok else 1 if k else 0, k, -len(ix.columns))
+        if rank > best_rank:
+            best, best_rank = ix, rank
+    if best_rank[0] == 2:
+        return Coverage(shape, 'covered', best)
+    if best_rank[0] == 1:
+        if best_rank[1] == len(eq):
+            what = 'range' if shape.range else 'filesort'
+            return Coverage(shape, 'partial', best, f"{what} after the index prefix")
+        missing = [c for c in shape.eq if c not in best.columns[:best_rank[1]]]
+        return Coverage(shape, 'partial', best, f"{', '.join(missing)} filtered after the lookup")
+    if not shape.eq and not shape.range:
+        return Coverage(shape, 'uncovered', None, 'full scan + filesort')
+    return Coverage(shape, 'uncovered')
+
+
+def uniform(order):
+    """An index serves a multi-column sort (forwards or backwards) only if the directions agree."""
+    return len({d for _, d in order}) <= 1
+
+
+def suggest(report, tables):
+    """[(table, [(@@index line, call sites, [superseded index names])])] for the uncovered and partial shapes."""
+    by_table = collections.defaultdict(list)
+    for c in report.ranked(('uncovered', 'partial')):
+        by_table[c.shape.table].append(c.shape)
+    result = []
+    for table, shapes in sorted(by_table.items()):
+        weight = collections.Counter()
+        for s in shapes:
+            for col in s.eq:
+                weight[col] += len(report.sites[s.key])
+        candidates = collections.OrderedDict()
+        for s in shapes:
+            if not uniform(s.order):
+                continue
+            cols = sorted(s.eq, key=lambda col: (-weight[col], col))
+            tail = [(s.range, 'asc')] if s.range else [(c, d) for c, d in s.order if c not in s.eq]
+            key = tuple(cols) + tuple(tail)
+            if not key:
+                continue
+            candidates[key] = candidates.get(key, 0) + len(report.sites[s.key])
+        existing = [ix.columns for ix in tables[table][0]]
+        picked = []
+        for key, n in sorted(candidates.items(), key=lambda kv: (-len(kv[0]), -kv[1])):
+            names = [k if isinstance(k, str) else k[0] for k in key]
+            # a longer index covers its prefixes
+            absorbed = [p for p in picked if [k if isinstance(k, str) else k[0] for k in p[0]][:len(names)] == names]
+            if absorbed:
+                absorbed[0][1] += n
+                continue
+            if any(cols[:len(names)] == names for cols in existing):
+                continue
+            picked.append([key, n])
+        picked.sort(key=lambda p: -p[1])
+        lines = []
+        for key, n in picked:
+            names = [k if isinstance(k, str) else k[0] for k in key]
+            # an existing index on a prefix of the new one becomes redundant
+            replaced = [ix.name for ix in tables[table][0]
+                        if ix.kind == 'index' and ix.name and names[:len(ix.columns)] == ix.columns]
+            lines.append((index_line(table, key), n, replaced))
+        if lines:
+            result.append((table, lines))
+    return result
+
+
+def index_line(table, key):
+    refs = []
+    names = []
+    for k in key:
+        if isinstance(k, str):
+            refs.append(k)
+            names.append(k)
+        else:
+            col, direction = k
+            refs.append(f"{col}(sort: Desc)" if direction == 'desc' else col)
+            names.append(col)
+    name = f"idx_{table}_" + '_'.join(names)
+    return f'@@index([{", ".join(refs)}], map: "{name[:MAX_NAME]}")'
+
+
+# ---------------------------------------------------------------------------
+# Query shapes from supabase chains
+
+def or_branches(arg):
+    """Columns of each `col.op.value` segment of an or() filter: [(eq cols, unindexed cols)]."""
+    text = arg.strip()
+    body = text[1:-1] if text.startswith('`') and text.endswith('`') else string_value(text)
+    if body is None:
+        return None
+    branches = []
+    depth, start = 0, 0
+    segments = []
+    for i, c in enumerate(body):
+        if c in '({':
+            depth += 1
+        elif c in ')}':
+            depth -= 1
+        elif c == ',' and depth == 0:
+            segments.append(body[start:i])
+            start = i + 1
+    segments.append(body[start:])
+    for seg in segments:
+        m = re.match(r'^\s*(\w+)\.(\w+)\.', seg)
+        if not m:
+            if seg.strip():
+                return None
+            continue
+        col, op = m.groups()
+        if op in ('eq', 'in', 'is'):
+            branches.append(((col,), ()))
+        else:
+            branches.append(((), (col,)))
+    return branches
+
+
+def chain_shapes(chain):
+    """Shapes of one supabase chain; raises ValueError when a filter can't be read."""
+    eq, unindexed, order = [], [], []
+    rng = None
+    branches = None
+    for call in chain.calls:
+        name = call.name
+        if name in ('insert', 'upsert'):
+            return []
+        column = string_value(call.args[0]) if call.args else None
+        if name in EQ_FILTERS + RANGE_FILTERS + UNINDEXED_FILTERS + ('order',):
+            if column is None:
+                raise ValueError(f".{name}() column is not a literal")
+            if '.' in column:
+                # filter on an embedded table
+                continue
+        if name in EQ_FILTERS:
+            eq.append(column)
+        elif name in RANGE_FILTERS:
+            rng = rng or column
+        elif name in UNINDEXED_FILTERS:
+            unindexed.append(column)
+        elif name == 'order':
+            desc = len(call.args) > 1 and re.search(r'ascending\s*:\s*false', call.args[1])
+            order.append((column, 'desc' if desc else 'asc'))
+        elif name == 'or':
+            branches = or_branches(call.args[0]) if call.args else None
+            if branches is None:
+                raise ValueError('or() filter is not a literal')
+    if branches:
+        return [Shape(chain.table, eq + list(b_eq), rng, (), unindexed + list(b_un)) for b_eq, b_un in branches]
+    return [Shape(chain.table, eq, rng, order, unindexed)]
+
+
+# ---------------------------------------------------------------------------
+# Query shapes from prisma calls
+
+def object_entries(text):
+    """`{ a: 1, b, 'c': x }` -> [('a', '1'), ('b', 'b'), ('c', 'x')]; None if not an object literal."""
+    text = text.strip()
+    if not (text.startswith('{') and text.endswith('}')):
+        return None
+    entries = []
+    for item in split_args(text, 1, len(text) - 1):
+        if item.startswith('...'):
+            return None
+        m = re.match(r'^(?:([\w$]+)|\'([^\']*)\'|"([^"]*)")\s*(?::\s*([\s\S]*))?$', item)
+        if not m:
+            return None
+        key = m.group(1) or m.group(2) or m.group(3)
+        entries.append((key, m.group(4) if m.group(4) is not None else key))
+    return entries
+
+
+def where_columns(text, scalars):
+    """(eq, range, unindexed, or-branches) of a Prisma where object; raises ValueError if dynamic."""
+    entries = object_entries(text)
+    if entries is None:
+        raise ValueError('where is not an object literal')
+    eq, unindexed, branches = [], [], []
+    rng = None
+    for key, value in entries:
+        if key == 'AND':
+            parts = split_args(value.strip(), 1, len(value.strip()) - 1) if value.strip().startswith('[') else [value]
+            for part in parts:
+                p_eq, p_rng, p_un, p_br = where_columns(part, scalars)
+                eq += p_eq
+                unindexed += p_un
+                rng = rng or p_rng
+                branches += p_br
+        elif key == 'OR':
+            value = value.strip()
+            if not value.startswith('['):
+                raise ValueError('OR is not an array literal')
+            for part in split_args(value, 1, len(value) - 1):
+                b_eq, b_rng, b_un, _ = where_columns(part, scalars)
+                branches.append((b_eq, b_rng, b_un))
+        elif key == 'NOT' or key not in scalars:
+            # negations and relation filters don't pick an index on this table
+            continue
+        else:
+            ops = object_entries(value)
+            if ops is None:
+                eq.append(key)
+                continue
+            names = {k for k, _ in ops} - {'mode'}
+            if names & set(PRISMA_EQ_OPS):
+                eq.append(key)
+            elif names & set(PRISMA_RANGE_OPS):
+                rng = rng or key
+            elif names & set(PRISMA_UNINDEXED_OPS):
+                unindexed.append(key)
+    return eq, rng, unindexed, branches
+
+
+def order_columns(text):
+    text = text.strip()
+    items = split_args(text, 1, len(text) - 1) if text.startswith('[') else [text]
+    order = []
+    for item in items:
+        entries = object_entries(item)
+        if entries is None:
+            raise ValueError('orderBy is not a literal')
+        for col, direction in entries:
+            order.append((col, 'desc' if 'desc' in direction else 'asc'))
+    return order
+
+
+def prisma_shapes(table, method, arg, scalars):
+    args = object_entries(arg) if arg else []
+    if args is None:
+        raise ValueError(f"{method}() argument is not an object literal")
+    args = dict(args)
+    if method == 'upsert' or 'where' not in args and 'orderBy' not in args:
+        return []
+    eq, rng, unindexed, branches = where_columns(args['where'], scalars) if 'where' in args else ([], None, [], [])
+    order = order_columns(args['orderBy']) if 'orderBy' in args else []
+    order = [(c, d) for c, d in order if c in scalars]
+    if branches:
+        return [Shape(table, eq + b_eq, rng or b_rng, (), unindexed + b_un) for b_eq, b_rng, b_un in branches]
+    return [Shape(table, eq, rng, order, unindexed)]
+
+
+# ---------------------------------------------------------------------------
+# Scanning
+
+def scan_file(path, content, tables, report):
+    for chain in find_chains(content):
+        line = line_of(content, chain.start)
+        if chain.table is None:
+            report.dynamic.append((path, line, 'table is not a literal'))
+            continue
+        if chain.table not in tables:
+            report.unknown[chain.table] += 1
+            continue
+        try:
+            shapes = chain_shapes(chain)
+        except ValueError as e:
+            report.dynamic.append((path, line, str(e)))
+            continue
+        scalars = tables[chain.table][1]
+        for shape in shapes:
+            missing = [c for c in shape.eq + (shape.range,) + tuple(c for c, _ in shape.order) if c and c not in scalars]
+            if missing:
+                report.unknown.update(f"{chain.table}.{c}" for c in missing)
+            elif not shape.empty():
+                report.add(shape, path, line)
+
+    if 'prisma' not in content and 'tx.' not in content:
+        return
+    spans = comment_spans(content)
+    for m in PRISMA_CALL_RE.finditer(content):
+        table, method = m.groups()
+        if in_spans(spans, m.start()):
+            continue
+        line = line_of(content, m.start())
+        if table not in tables:
+            report.unknown[table] += 1
+            continue
+        try:
+            close = skip_group(content, m.end() - 1)
+            args = split_args(content, m.end(), close - 1)
+            shapes = prisma_shapes(table, method, args[0] if args else '', tables[table][1])
+        except (ChainError, ValueError) as e:
+            report.dynamic.append((path, line, str(e)))
+            continue
+        for shape in shapes:
+            if not shape.empty():
+                report.add(shape, path, line)
+
+
+def analyze(schema, root_dirs=ROOT_DIRS):
+    tables = load_indexes(schema)
+    report = CoverageReport()
+    for path in iter_source_files(root_dirs):
+        scan_file(path, read_source(path), tables, report)
+    for key, shape in report.shapes.items():
+        report.coverage[key] = check(shape, tables[shape.table][0])
+    return report, suggest(report, tables)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='dbmigrate.indexcov', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('dirs', nargs='*', default=ROOT_DIRS, help='directories to scan (default: %(default)s)')
+    parser.add_argument('--schema', default=DEFAULT_SCHEMA, help='default: %(default)s')
+    parser.add_argument('--all', action='store_true', help='list covered shapes too')
+    parser.add_argument('--min-sites', type=int, default=1, metavar='N',
+                        help='only list shapes used by at least N call sites')
+    parser.add_argument('--check', action='store_true', help='exit 1 if any shape is uncovered')
+    args = parser.parse_args(argv)
+
+    report, suggestions = analyze(prisma.load(args.schema), args.dirs)
+    print_report(report, suggestions, show_all=args.all, min_sites=args.min_sites)
+    if args.check:
+        return 1 if any(c.status == 'uncovered' for c in report.coverage.values()) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
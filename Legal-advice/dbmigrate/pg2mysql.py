@@ -0,0 +1,1652 @@
+"""
+Postgres (Supabase) -> MySQL migration translator.
+
+    python -m dbmigrate.pg2mysql                          # default inputs, script on stdout
+    python -m dbmigrate.pg2mysql -o mysql_schema.sql --report pg2mysql.json
+    python -m dbmigrate.pg2mysql supabase/migrations extra.sql
+
+Reads setup_auth.sql, every file in supabase/migrations (in migration order)
+and PHASE2_MIGRATION.sql one statement at a time and writes one MySQL
+script. The translator keeps a model of the schema built so far (tables,
+columns, enums, constraints, indexes); that is what lets it expand ALTER
+COLUMN into MODIFY COLUMN, resolve IF [NOT] EXISTS and the
+information_schema checks inside DO blocks, and keep enum columns in step
+with ALTER TYPE ... ADD VALUE.
+
+Statements with no MySQL meaning (RLS policies, grants, extensions, NOTIFY,
+catalog queries) are dropped with a one-line comment. Statements that can't
+be translated (plpgsql functions, triggers, sequences, array operators, ...)
+are copied into the script commented out under an UNTRANSLATED marker and
+listed in the report.
+"""
+import argparse
+import collections
+import copy
+import json
+import os
+import re
+import sys
+
+from .sqlsplit import Statement, iter_file_statements, tokenize
+from .typemap import KEY_TEXT_TYPE, enum_sql, map_type, normalize
+
+DEFAULT_INPUTS = ['setup_auth.sql', 'supabase/migrations', 'PHASE2_MIGRATION.sql']
+# Supabase-managed schemas; nothing in them exists on MySQL
+SUPABASE_SCHEMAS = ('auth', 'storage', 'realtime', 'extensions', 'supabase_functions', 'graphql', 'vault')
+
+# Words that end a column's type and start its next constraint
+COLUMN_CONSTRAINTS = ('CONSTRAINT', 'NOT', 'NULL', 'PRIMARY', 'UNIQUE', 'DEFAULT', 'REFERENCES', 'CHECK',
+                      'GENERATED', 'COLLATE')
+TABLE_CONSTRAINTS = ('CONSTRAINT', 'PRIMARY', 'UNIQUE', 'FOREIGN', 'CHECK', 'EXCLUDE')
+# Words that can be followed by "(" without being a function call
+KEYWORDS = {'AND', 'OR', 'NOT', 'IN', 'EXISTS', 'VALUES', 'AS', 'ON', 'FROM', 'SELECT', 'WHERE', 'THEN', 'WHEN',
+            'ELSE', 'CASE', 'IS', 'USING', 'BY', 'JOIN', 'SET', 'INTO', 'WITH', 'LIKE', 'BETWEEN', 'UNION',
+            'OVER', 'END', 'DISTINCT', 'LATERAL', 'ROW', 'ALL', 'ANY', 'SOME'}
+# Words that continue a type name after "::"
+TYPE_WORDS = ('PRECISION', 'VARYING', 'WITH', 'WITHOUT', 'TIME', 'ZONE')
+
+# Functions that mean the same on both sides
+SAME_FUNCTIONS = {'abs', 'avg', 'ceil', 'ceiling', 'char_length', 'character_length', 'coalesce', 'concat',
+                  'count', 'floor', 'greatest', 'least', 'left', 'length', 'lower', 'ltrim', 'max', 'min', 'mod',
+                  'nullif', 'power', 'replace', 'right', 'round', 'rtrim', 'sign', 'sqrt', 'substr', 'substring',
+                  'sum', 'trim', 'upper'}
+RENAMED_FUNCTIONS = {
+    'jsonb_build_object': 'JSON_OBJECT',
+    'json_build_object': 'JSON_OBJECT',
+    'jsonb_build_array': 'JSON_ARRAY',
+    'json_build_array': 'JSON_ARRAY',
+    'array_agg': 'JSON_ARRAYAGG',
+    'jsonb_agg': 'JSON_ARRAYAGG',
+    'json_agg': 'JSON_ARRAYAGG',
+    'cardinality': 'JSON_LENGTH',
+    'jsonb_array_length': 'JSON_LENGTH',
+    'json_array_length': 'JSON_LENGTH',
+}
+INTERVAL_UNITS = {
+    'second': 'SECOND', 'seconds': 'SECOND', 'sec': 'SECOND', 'secs': 'SECOND',
+    'minute': 'MINUTE', 'minutes': 'MINUTE', 'min': 'MINUTE', 'mins': 'MINUTE',
+    'hour': 'HOUR', 'hours': 'HOUR',
+    'day': 'DAY', 'days': 'DAY',
+    'week': 'WEEK', 'weeks': 'WEEK',
+    'month': 'MONTH', 'months': 'MONTH', 'mon': 'MONTH', 'mons': 'MONTH',
+    'year': 'YEAR', 'years': 'YEAR',
+}
+ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f'}
+ARRAY_ITEM_RE = re.compile(r'\s*("(?:[^"\\]|\\.)*"|[^,"{}]*?)\s*(,|$)')
+NONDETERMINISTIC_RE = re.compile(r'\b(now|current_timestamp|current_date|utc_timestamp|uuid|select)\b', re.I)
+
+Tok = collections.namedtuple('Tok', 'kind text space')
+
+
+class Untranslatable(Exception):
+    """The statement has no mechanical MySQL equivalent; it goes in the report."""
+
+
+class Dropped(Exception):
+    """The statement is meaningless on MySQL (RLS, grants, ...) and is left out."""
+
+
+# ---------------------------------------------------------------------------
+# Tokens
+
+def significant(text):
+    """Tokens of one statement minus whitespace, comments and the final ";"; `space` keeps the layout."""
+    toks, space = [], ''
+    for t in tokenize(text):
+        if t.kind == 'ws':
+            space += t.text
+        elif t.kind == 'comment':
+            space = space or ' '
+        else:
+            toks.append(Tok(t.kind, t.text, space))
+            space = ''
+    if toks and toks[-1].text == ';':
+        toks.pop()
+    return toks
+
+
+def render(toks):
+    return ''.join(t.space + t.text for t in toks).strip()
+
+
+def upper(tok):
+    return tok.text.upper() if tok.kind == 'word' else tok.text
+
+
+def match(toks, i, *words):
+    if i < 0 or i + len(words) > len(toks):
+        return False
+    return all(upper(toks[i + k]) == w for k, w in enumerate(words))
+
+
+def is_open(tok):
+    return tok.kind == 'punct' and tok.text in ('(', '[')
+
+
+def is_close(tok):
+    return tok.kind == 'punct' and tok.text in (')', ']')
+
+
+def matching(toks, i):
+    """Index of the bracket closing toks[i]."""
+    depth = 0
+    for j in range(i, len(toks)):
+        if is_open(toks[j]):
+            depth += 1
+        elif is_close(toks[j]):
+            depth -= 1
+            if depth == 0:
+                return j
+    raise Untranslatable('unbalanced brackets')
+
+
+def split_top(toks, word=None):
+    """Split at top-level commas (or at the keyword `word`)."""
+    parts, cur, depth = [], [], 0
+    for t in toks:
+        if is_open(t):
+            depth += 1
+        elif is_close(t):
+            depth -= 1
+        elif depth == 0 and (upper(t) == word if word else t.kind == 'punct' and t.text == ','):
+            parts.append(cur)
+            cur = []
+            continue
+        cur.append(t)
+    parts.append(cur)
+    return parts
+
+
+def find_top(toks, start, *words):
+    depth = 0
+    for j in range(start, len(toks)):
+        if is_open(toks[j]):
+            depth += 1
+        elif is_close(toks[j]):
+            depth -= 1
+        elif depth == 0 and match(toks, j, *words):
+            return j
+    return -1
+
+
+def clause_end(toks, start):
+    """Index of the next top-level column constraint keyword at or after `start`."""
+    depth = 0
+    for j in range(start, len(toks)):
+        if is_open(toks[j]):
+            depth += 1
+        elif is_close(toks[j]):
+            depth -= 1
+        elif depth == 0 and upper(toks[j]) in COLUMN_CONSTRAINTS:
+            # ON DELETE SET NULL / NOT DEFERRABLE belong to the clause
+            if match(toks, j - 1, 'SET', 'NULL') or match(toks, j, 'NOT', 'DEFERRABLE'):
+                continue
+            return j
+    return len(toks)
+
+
+def line_at(toks, i, first_line):
+    return first_line + sum(t.space.count('\n') + t.text.count('\n') for t in toks[:i]) + toks[i].space.count('\n')
+
+
+# ---------------------------------------------------------------------------
+# Names and literals
+
+def ident(tok):
+    if tok.kind == 'qident':
+        return tok.text[1:-1].replace('""', '"')
+    if tok.kind == 'word':
+        return tok.text.lower()
+    raise Untranslatable(f"expected a name, got {tok.text}")
+
+
+def qname(toks, i):
+    """Read `name` or `schema.name` at i; returns (schema, name, next index)."""
+    name = ident(toks[i])
+    if i + 2 < len(toks) and toks[i + 1].text == '.' and toks[i + 2].kind in ('word', 'qident'):
+        return name, ident(toks[i + 2]), i + 3
+    return None, name, i + 1
+
+
+def bq(name):
+    return '`' + name.replace('`', '``') + '`'
+
+
+def sql_string(value):
+    # MySQL treats backslash as an escape inside strings
+    return "'" + value.replace('\\', '\\\\').replace("'", "''") + "'"
+
+
+def pg_string(tok):
+    text = tok.text
+    if tok.kind == 'dollar':
+        return text[text.index('$', 1) + 1:text.rindex('$', 0, len(text) - 1)]
+    if tok.kind != 'str':
+        raise Untranslatable(f"expected a string, got {text}")
+    if text[0] in 'Ee':
+        return re.sub(r"''|\\(.)", lambda m: "'" if m.group(0) == "''" else ESCAPES.get(m.group(1), m.group(1)),
+                      text[2:-1], flags=re.S)
+    return text[1:-1].replace("''", "'")
+
+
+def pg_array_items(value):
+    """Items of a Postgres array literal like {a,"b c",NULL}; None for NULL."""
+    value = value.strip()
+    if not (value.startswith('{') and value.endswith('}')):
+        raise Untranslatable(f"array literal {value[:40]}")
+    body = value[1:-1]
+    items, i = [], 0
+    if not body.strip():
+        return items
+    while True:
+        m = ARRAY_ITEM_RE.match(body, i)
+        if not m:
+            raise Untranslatable(f"array literal {value[:40]}")
+        raw = m.group(1)
+        if raw.startswith('"'):
+            items.append(re.sub(r'\\(.)', r'\1', raw[1:-1]))
+        else:
+            items.append(None if raw.upper() == 'NULL' else raw)
+        if not m.group(2):
+            return items
+        i = m.end()
+
+
+def json_array_sql(items, numeric=False):
+    def item(v):
+        if v is None:
+            return 'NULL'
+        return v if numeric else sql_string(v)
+    return 'JSON_ARRAY(' + ', '.join(item(v) for v in items) + ')'
+
+
+def json_literal_sql(value):
+    if value.strip() == '{}':
+        return 'JSON_OBJECT()'
+    if value.strip() == '[]':
+        return 'JSON_ARRAY()'
+    return f"CAST({sql_string(value)} AS JSON)"
+
+
+def interval_sql(value):
+    m = re.match(r'^\s*([-+]?\d+)\s*([a-z]+)\s*$', value.lower())
+    if not m or m.group(2) not in INTERVAL_UNITS:
+        raise Untranslatable(f"interval '{value}'")
+    return f"INTERVAL {int(m.group(1))} {INTERVAL_UNITS[m.group(2)]}"
+
+
+def element_type(pg_type):
+    return re.sub(r'(\s*\[\s*\d*\s*\])+$|\s+array$', '', normalize(pg_type))
+
+
+def multi_valued_key(col, enums):
+    """Key part of the MySQL multi-valued index over the JSON array a Postgres array column became."""
+    elem = map_type(element_type(col.pg_type), enums)
+    cast = {'uuid': 'CHAR(36)', 'int': 'SIGNED'}.get(elem.kind if elem else None, 'CHAR(255)')
+    return f"(CAST({bq(col.name)}->'$' AS {cast} ARRAY))"
+
+
+def summary(text, width=100):
+    text = ' '.join(text.split())
+    return text if len(text) <= width else text[:width - 3] + '...'
+
+
+# ---------------------------------------------------------------------------
+# Schema model
+
+class Column:
+    def __init__(self, name, pg_type, mtype, enum=None):
+        self.name = name
+        self.pg_type = pg_type
+        self.type = mtype.sql
+        self.kind = mtype.kind
+        self.auto_increment = mtype.auto_increment
+        self.enum = enum
+        self.nullable = True
+        self.default = None
+        self.generated = None
+        self.comment = None
+
+    def sql(self):
+        parts = [bq(self.name), self.type]
+        if self.generated:
+            parts.append(f"GENERATED ALWAYS AS ({self.generated}) STORED")
+        if not self.nullable:
+            parts.append('NOT NULL')
+        if self.auto_increment:
+            parts.append('AUTO_INCREMENT')
+        if self.default is not None:
+            parts.append('DEFAULT ' + self.default)
+        if self.comment:
+            parts.append('COMMENT ' + sql_string(self.comment))
+        return ' '.join(parts)
+
+
+class Constraint:
+    def __init__(self, kind, name, columns=(), body=''):
+        self.kind = kind  # pk, unique, fk or check
+        self.pg_name = name
+        self.name = name
+        self.columns = list(columns)
+        self.body = body
+
+    def sql(self):
+        cols = ', '.join(bq(c) for c in self.columns)
+        if self.kind == 'pk':
+            return f"PRIMARY KEY ({cols})"
+        head = f"CONSTRAINT {bq(self.name)} "
+        if self.kind == 'unique':
+            return head + f"UNIQUE ({cols})"
+        if self.kind == 'fk':
+            return head + f"FOREIGN KEY ({cols}) {self.body}"
+        return head + f"CHECK ({self.body})"
+
+
+class Table:
+    def __init__(self, name):
+        self.name = name
+        self.columns = {}
+        self.constraints = {}  # Postgres name -> Constraint
+        self.indexes = set()
+
+
+class Schema:
+    def __init__(self):
+        self.enums = {}
+        self.tables = {}
+        self.views = set()
+        self.indexes = {}  # index name -> table name (Postgres index names are per schema)
+        self.constraint_names = set()  # MySQL wants CHECK and FK names unique per database
+
+    def has_constraint(self, pg_name):
+        return any(pg_name in t.constraints for t in self.tables.values())
+
+
+class TranslateReport:
+    def __init__(self):
+        self.files = 0
+        self.statements = 0
+        self.translated = 0
+        self.dropped = collections.Counter()
+        self.untranslated = []  # (source, line, summary, reason)
+        self.warnings = []  # (source, line, message)
+
+    def to_json(self):
+        return {
+            'files': self.files,
+            'statements': self.statements,
+            'translated': self.translated,
+            'dropped': dict(self.dropped.most_common()),
+            'untranslated': [dict(zip(('source', 'line', 'statement', 'reason'), u)) for u in self.untranslated],
+            'warnings': [dict(zip(('source', 'line', 'message'), w)) for w in self.warnings],
+        }
+
+
+def print_report(report, out=sys.stderr, verbose=True):
+    print(f"\n{report.statements} statements in {report.files} files: {report.translated} translated, "
+          f"{sum(report.dropped.values())} dropped, {len(report.untranslated)} untranslated, "
+          f"{len(report.warnings)} warnings", file=out)
+    if report.dropped:
+        print('Dropped: ' + ', '.join(f"{reason} ({n})" for reason, n in report.dropped.most_common()), file=out)
+    if verbose and report.untranslated:
+        print('\nUntranslated:', file=out)
+        for source, line, text, reason in report.untranslated:
+            print(f"  {source}:{line}  [{reason}]  {text}", file=out)
+
+
+# ---------------------------------------------------------------------------
+# Translator
+
+class Translator:
+    def __init__(self, report):
+        self.schema = Schema()
+        self.report = report
+        self.warnings = []
+
+    def warn(self, message):
+        self.warnings.append(message)
+
+    # -- driving -----------------------------------------------------------
+
+    def translate(self, stmt, out):
+        """Translate one Statement and write the result (or the reason it was left out) to `out`."""
+        toks = significant(stmt.text)
+        if not toks:
+            return
+        if match(toks, 0, 'DO'):
+            self.flatten_do(stmt, toks, out)
+            return
+        self.report.statements += 1
+        self.warnings = []
+        saved = copy.deepcopy(self.schema) if upper(toks[0]) in ('CREATE', 'ALTER', 'DROP', 'COMMENT') else None
+        try:
+            results = self.dispatch(toks)
+        except Dropped as e:
+            if saved is not None:
+                self.schema = saved
+            self.dropped(stmt, str(e), out)
+            return
+        except (Untranslatable, IndexError, KeyError, ValueError) as e:
+            if saved is not None:
+                self.schema = saved
+            self.untranslated(stmt, str(e) if isinstance(e, Untranslatable) else 'unexpected syntax', out)
+            return
+        self.report.translated += 1
+        for message in self.warnings:
+            self.report.warnings.append((stmt.source, stmt.line, message))
+            out.write(f"-- WARNING: {message}\n")
+        for sql in results:
+            out.write(sql + '\n' if sql.startswith('--') else sql + ';\n')
+        out.write('\n')
+
+    def dropped(self, stmt, reason, out):
+        self.report.dropped[reason] += 1
+        out.write(f"-- dropped ({reason}): {summary(stmt.text)}\n")
+
+    def untranslated(self, stmt, reason, out):
+        self.report.untranslated.append((stmt.source, stmt.line, summary(stmt.text), reason))
+        out.write(f"-- UNTRANSLATED ({reason}) {stmt.source}:{stmt.line}\n")
+        for line in stmt.text.strip().splitlines():
+            out.write(('-- ' + line).rstrip() + '\n')
+        out.write('\n')
+
+    def dispatch(self, toks):
+        head = upper(toks[0])
+        if head == 'CREATE':
+            return self.create(toks)
+        if head == 'ALTER':
+            return self.alter(toks)
+        if head == 'DROP':
+            return self.drop(toks)
+        if head == 'COMMENT':
+            return self.comment_on(toks)
+        if head == 'INSERT':
+            return self.insert(toks)
+        if head == 'UPDATE':
+            return self.update(toks)
+        if head == 'DELETE':
+            return self.delete(toks)
+        if head in ('SELECT', 'WITH'):
+            return self.select(toks)
+        if head in ('BEGIN', 'START'):
+            return ['START TRANSACTION']
+        if head in ('COMMIT', 'END'):
+            return ['COMMIT']
+        if head == 'ROLLBACK':
+            return ['ROLLBACK']
+        if head in ('GRANT', 'REVOKE', 'NOTIFY', 'LISTEN', 'SET', 'RESET', 'VACUUM', 'ANALYZE'):
+            raise Dropped(head.lower())
+        raise Untranslatable(head)
+
+    # -- names -------------------------------------------------------------
+
+    def table_ref(self, toks, i):
+        schema, name, i = qname(toks, i)
+        if schema in SUPABASE_SCHEMAS:
+            raise Dropped('supabase schema')
+        if schema not in (None, 'public'):
+            raise Untranslatable(f"schema {schema}")
+        return name, i
+
+    def table(self, name):
+        if name not in self.schema.tables:
+            raise Untranslatable(f"unknown table {name}")
+        return self.schema.tables[name]
+
+    def column(self, table, name):
+        if name not in table.columns:
+            raise Untranslatable(f"unknown column {table.name}.{name}")
+        return table.columns[name]
+
+    def unique_name(self, name):
+        base, n = name[:64], 1
+        name = base
+        while name in self.schema.constraint_names:
+            n += 1
+            name = base[:64 - len(str(n))] + str(n)
+        self.schema.constraint_names.add(name)
+        return name
+
+    # -- CREATE ------------------------------------------------------------
+
+    def create(self, toks):
+        i = 1
+        replace = match(toks, i, 'OR', 'REPLACE')
+        if replace:
+            i += 2
+        unique = match(toks, i, 'UNIQUE')
+        if unique:
+            i += 1
+        what = upper(toks[i])
+        if what == 'TABLE':
+            return self.create_table(toks, i + 1)
+        if what == 'INDEX':
+            return self.create_index(toks, i + 1, unique)
+        if what == 'TYPE':
+            return self.create_type(toks, i + 1)
+        if what == 'VIEW':
+            return self.create_view(toks, i + 1, replace)
+        if what == 'POLICY':
+            raise Dropped('rls policy')
+        if what in ('EXTENSION', 'PUBLICATION', 'ROLE'):
+            raise Dropped(what.lower())
+        if what == 'SCHEMA':
+            j = i + 1 + 3 * match(toks, i + 1, 'IF', 'NOT', 'EXISTS')
+            if ident(toks[j]) in SUPABASE_SCHEMAS:
+                raise Dropped('supabase schema')
+            raise Untranslatable('CREATE SCHEMA')
+        if what in ('FUNCTION', 'PROCEDURE'):
+            raise Untranslatable('plpgsql function')
+        if what == 'TRIGGER' or match(toks, i, 'CONSTRAINT', 'TRIGGER'):
+            raise Untranslatable('trigger')
+        if what == 'SEQUENCE':
+            raise Untranslatable('sequence')
+        raise Untranslatable('CREATE ' + what)
+
+    def create_table(self, toks, i):
+        if_not_exists = match(toks, i, 'IF', 'NOT', 'EXISTS')
+        if if_not_exists:
+            i += 3
+        name, i = self.table_ref(toks, i)
+        if name in self.schema.tables:
+            if if_not_exists:
+                raise Dropped('already exists')
+            raise Untranslatable(f"table {name} already exists")
+        if i >= len(toks) or toks[i].text != '(':
+            raise Untranslatable('CREATE TABLE AS / PARTITION OF')
+        end = matching(toks, i)
+        if end != len(toks) - 1:
+            raise Untranslatable('table options (INHERITS, PARTITION BY, WITH)')
+        table = Table(name)
+        self.schema.tables[name] = table
+        constraints = []
+        for part in split_top(toks[i + 1:end]):
+            if not part:
+                continue
+            if upper(part[0]) in TABLE_CONSTRAINTS:
+                constraints += self.table_constraint(table, part)
+            else:
+                col, column_constraints = self.column_def(table, part)
+                table.columns[col.name] = col
+                constraints += column_constraints
+        for c in constraints:
+            self.add_constraint(table, c)
+        lines = [col.sql() for col in table.columns.values()] + [c.sql() for c in constraints]
+        head = 'CREATE TABLE IF NOT EXISTS' if if_not_exists else 'CREATE TABLE'
+        return [f"{head} {bq(name)} (\n  " + ',\n  '.join(lines) + "\n) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"]
+
+    def new_column(self, name, pg_type):
+        mtype = map_type(pg_type, self.schema.enums)
+        if mtype is None:
+            raise Untranslatable(f"type {pg_type}")
+        return Column(name, pg_type, mtype, normalize(pg_type) if mtype.kind == 'enum' else None)
+
+    def column_def(self, table, part):
+        """Parse `name type [constraints]`; returns the Column and its constraints (not yet added)."""
+        name = ident(part[0])
+        j = 1
+        while j < len(part) and upper(part[j]) not in COLUMN_CONSTRAINTS:
+            j += 1
+        if j == 1:
+            raise Untranslatable(f"column {name} has no type")
+        col = self.new_column(name, render(part[1:j]))
+        constraints = []
+        cname = None
+        while j < len(part):
+            w = upper(part[j])
+            if w == 'CONSTRAINT':
+                cname = ident(part[j + 1])
+                j += 2
+                continue
+            if match(part, j, 'NOT', 'NULL'):
+                col.nullable = False
+                j += 2
+            elif w == 'NULL':
+                j += 1
+            elif match(part, j, 'PRIMARY', 'KEY'):
+                col.nullable = False
+                constraints.append(Constraint('pk', cname or f"{table.name}_pkey", [name]))
+                j += 2
+            elif w == 'UNIQUE':
+                constraints.append(Constraint('unique', cname or f"{table.name}_{name}_key", [name]))
+                j += 1
+            elif w == 'DEFAULT':
+                k = clause_end(part, j + 2)
+                col.default = self.default_sql(col, part[j + 1:k])
+                j = k
+            elif w == 'CHECK':
+                k = matching(part, j + 1)
+                c = self.check(cname or f"{table.name}_{name}_check", part[j + 2:k])
+                if c:
+                    constraints.append(c)
+                j = k + 1
+            elif w == 'REFERENCES':
+                k = clause_end(part, j + 1)
+                c = self.foreign_key(table, cname or f"{table.name}_{name}_fkey", [name], part[j + 1:k])
+                if c:
+                    constraints.append(c)
+                j = k
+            elif match(part, j, 'GENERATED', 'ALWAYS', 'AS', '('):
+                k = matching(part, j + 3)
+                col.generated = self.expr(part[j + 4:k]).strip()
+                j = k + 1 + match(part, k + 1, 'STORED')
+            elif w == 'GENERATED':
+                k = find_top(part, j, 'IDENTITY')
+                if k < 0:
+                    raise Untranslatable('GENERATED column')
+                col.auto_increment = True
+                j = k + 1
+                if j < len(part) and part[j].text == '(':
+                    j = matching(part, j) + 1
+            elif w == 'COLLATE':
+                self.warn(f"collation on {table.name}.{name} dropped")
+                j += 2
+            else:
+                raise Untranslatable(f"column option {part[j].text}")
+            cname = None
+        return col, constraints
+
+    def literal(self, toks):
+        """The value of a lone string literal (optionally cast), else None."""
+        if toks and toks[0].kind in ('str', 'dollar') and (len(toks) == 1 or toks[1].text == '::'):
+            return pg_string(toks[0])
+        return None
+
+    def default_sql(self, col, toks):
+        if len(toks) == 1 and upper(toks[0]) == 'NULL':
+            return 'NULL'
+        value = self.literal(toks)
+        if value is not None:
+            if col.kind == 'array':
+                elem = map_type(element_type(col.pg_type), self.schema.enums)
+                numeric = elem is not None and elem.kind in ('int', 'float', 'decimal')
+                return '(' + json_array_sql(pg_array_items(value), numeric) + ')'
+            if col.kind == 'json':
+                return '(' + json_literal_sql(value) + ')'
+            if col.kind == 'bool':
+                return 'TRUE' if value.lower() in ('t', 'true', 'y', 'yes', 'on', '1') else 'FALSE'
+            if col.kind in ('text', 'binary'):
+                # TEXT/BLOB columns only take expression defaults
+                return '(' + sql_string(value) + ')'
+            return sql_string(value)
+        if len(toks) == 1 and (toks[0].kind == 'num' or upper(toks[0]) in ('TRUE', 'FALSE')):
+            return upper(toks[0])
+        if len(toks) == 2 and toks[0].text == '-' and toks[1].kind == 'num':
+            return '-' + toks[1].text
+        e = self.expr(toks).strip()
+        if e in ('NOW(6)', 'CURRENT_TIMESTAMP(6)', 'UTC_TIMESTAMP(6)') and col.kind in ('datetime', 'datetimetz'):
+            # the script runs with time_zone = '+00:00', so this is UTC
+            return 'CURRENT_TIMESTAMP(6)'
+        return '(' + e + ')'
+
+    def check(self, name, toks):
+        try:
+            body = self.expr(toks).strip()
+        except Untranslatable as e:
+            self.warn(f"CHECK {name} dropped ({e})")
+            return None
+        if NONDETERMINISTIC_RE.search(body):
+            self.warn(f"CHECK {name} dropped: MySQL checks can't use subqueries or non-deterministic functions")
+            return None
+        return Constraint('check', name, (), body)
+
+    def foreign_key(self, table, name, columns, toks):
+        """`toks` follows REFERENCES; returns a Constraint, or None for references into Supabase schemas."""
+        schema, ref, j = qname(toks, 0)
+        if schema in SUPABASE_SCHEMAS:
+            self.warn(f"{table.name}.{', '.join(columns)} references {schema}.{ref}; foreign key dropped")
+            return None
+        if schema not in (None, 'public'):
+            raise Untranslatable(f"schema {schema}")
+        ref_cols = []
+        if j < len(toks) and toks[j].text == '(':
+            k = matching(toks, j)
+            ref_cols = [ident(p[0]) for p in split_top(toks[j + 1:k])]
+            j = k + 1
+        if not ref_cols:
+            pk = [c for c in self.schema.tables.get(ref, Table(ref)).constraints.values() if c.kind == 'pk']
+            ref_cols = pk[0].columns if pk else ['id']
+        actions = []
+        while j < len(toks):
+            if match(toks, j, 'ON', 'DELETE') or match(toks, j, 'ON', 'UPDATE'):
+                k = j + 2
+                n = 2 if match(toks, k, 'SET', 'NULL') or match(toks, k, 'NO', 'ACTION') else 1
+                if match(toks, k, 'SET', 'DEFAULT'):
+                    raise Untranslatable('ON DELETE SET DEFAULT')
+                actions.append(' '.join(upper(t) for t in toks[j:k + n]))
+                j = k + n
+            elif match(toks, j, 'MATCH'):
+                j += 2
+            elif upper(toks[j]) in ('DEFERRABLE', 'NOT', 'INITIALLY', 'DEFERRED', 'IMMEDIATE'):
+                j += 1
+            else:
+                raise Untranslatable(f"REFERENCES option {toks[j].text}")
+        body = f"REFERENCES {bq(ref)} ({', '.join(bq(c) for c in ref_cols)})"
+        return Constraint('fk', name, columns, ' '.join([body] + actions))
+
+    def column_list(self, toks, i):
+        if toks[i].text != '(':
+            raise Untranslatable('expected a column list')
+        k = matching(toks, i)
+        return [ident(p[0]) for p in split_top(toks[i + 1:k])], k + 1
+
+    def table_constraint(self, table, part):
+        j, name = 0, None
+        if match(part, 0, 'CONSTRAINT'):
+            name, j = ident(part[1]), 2
+        if match(part, j, 'PRIMARY', 'KEY'):
+            cols, _ = self.column_list(part, j + 2)
+            for c in cols:
+                self.column(table, c).nullable = False
+            return [Constraint('pk', name or f"{table.name}_pkey", cols)]
+        if match(part, j, 'UNIQUE'):
+            cols, _ = self.column_list(part, j + 1)
+            return [Constraint('unique', name or f"{table.name}_{'_'.join(cols)}_key", cols)]
+        if match(part, j, 'FOREIGN', 'KEY'):
+            cols, k = self.column_list(part, j + 2)
+            if not match(part, k, 'REFERENCES'):
+                raise Untranslatable('FOREIGN KEY without REFERENCES')
+            c = self.foreign_key(table, name or f"{table.name}_{'_'.join(cols)}_fkey", cols, part[k + 1:])
+            return [c] if c else []
+        if match(part, j, 'CHECK'):
+            k = matching(part, j + 1)
+            c = self.check(name or f"{table.name}_check", part[j + 2:k])
+            return [c] if c else []
+        raise Untranslatable(f"{upper(part[j])} constraint")
+
+    def add_constraint(self, table, c):
+        """Register `c` on `table`; returns columns whose type had to change for it."""
+        changed = []
+        if c.kind in ('pk', 'unique', 'fk'):
+            for name in c.columns:
+                col = self.column(table, name)
+                if col.kind in ('json', 'array'):
+                    raise Untranslatable(f"key on JSON column {table.name}.{name}")
+                if col.type == 'TEXT':
+                    # TEXT can't be a key without a prefix; narrow it instead
+                    col.type = KEY_TEXT_TYPE
+                    self.warn(f"{table.name}.{name} is part of a key; TEXT narrowed to {KEY_TEXT_TYPE}")
+                    changed.append(col)
+        if c.kind != 'pk':
+            c.name = self.unique_name(c.pg_name)
+        if c.kind == 'unique':
+            self.schema.indexes[c.name] = table.name
+            table.indexes.add(c.name)
+        table.constraints[c.pg_name] = c
+        return changed
+
+    def forget_constraint(self, table, c):
+        del table.constraints[c.pg_name]
+        self.schema.constraint_names.discard(c.name)
+        if c.kind == 'unique':
+            self.schema.indexes.pop(c.name, None)
+            table.indexes.discard(c.name)
+
+    def create_type(self, toks, i):
+        schema, name, i = qname(toks, i)
+        if schema not in (None, 'public'):
+            raise Untranslatable(f"schema {schema}")
+        if not match(toks, i, 'AS', 'ENUM'):
+            raise Untranslatable('composite or range type')
+        k = matching(toks, i + 2)
+        values = [pg_string(p[0]) for p in split_top(toks[i + 3:k]) if p]
+        if name in self.schema.enums:
+            raise Dropped('already exists')
+        self.schema.enums[name] = values
+        return [f"-- enum {name} {enum_sql(values)} is inlined into its columns"]
+
+    def create_view(self, toks, i, replace):
+        name, i = self.table_ref(toks, i)
+        cols = ''
+        if toks[i].text == '(':
+            names, i = self.column_list(toks, i)
+            cols = ' (' + ', '.join(bq(c) for c in names) + ')'
+        if not match(toks, i, 'AS'):
+            raise Untranslatable('view options')
+        self.schema.views.add(name)
+        head = 'CREATE OR REPLACE VIEW' if replace else 'CREATE VIEW'
+        return [f"{head} {bq(name)}{cols} AS\n{self.expr(toks[i + 1:]).strip()}"]
+
+    def create_index(self, toks, i, unique):
+        if match(toks, i, 'CONCURRENTLY'):
+            i += 1
+        if_not_exists = match(toks, i, 'IF', 'NOT', 'EXISTS')
+        if if_not_exists:
+            i += 3
+        name = None
+        if not match(toks, i, 'ON'):
+            name = ident(toks[i])
+            i += 1
+        i += 1 + match(toks, i + 1, 'ONLY')
+        tname, i = self.table_ref(toks, i)
+        table = self.table(tname)
+        method = 'btree'
+        if match(toks, i, 'USING'):
+            method = ident(toks[i + 1])
+            i += 2
+        k = matching(toks, i)
+        parts = split_top(toks[i + 1:k])
+        j = k + 1
+        if match(toks, j, 'INCLUDE'):
+            self.warn('INCLUDE columns dropped')
+            j = matching(toks, j + 1) + 1
+        if match(toks, j, 'WHERE'):
+            if unique:
+                raise Untranslatable('partial unique index')
+            self.warn(f"partial index {name}: WHERE {render(toks[j + 1:])} dropped, the MySQL index covers every row")
+        elif j < len(toks):
+            raise Untranslatable('index storage options')
+        if name is None:
+            name = f"{tname}_{'_'.join(ident(p[0]) for p in parts if p[0].kind in ('word', 'qident'))}_idx"
+        if name in self.schema.indexes:
+            if if_not_exists:
+                raise Dropped('already exists')
+            raise Untranslatable(f"index {name} already exists")
+        kind = 'UNIQUE ' if unique else ''
+        if method in ('btree', 'hash'):
+            keys = [self.index_key(table, p) for p in parts]
+        elif method == 'gin':
+            kind, keys = self.gin_index(table, name, parts)
+        else:
+            raise Untranslatable(f"{method} index")
+        self.schema.indexes[name] = tname
+        table.indexes.add(name)
+        return [f"CREATE {kind}INDEX {bq(name)} ON {bq(tname)} ({', '.join(keys)})"]
+
+    def index_key(self, table, part):
+        order = ''
+        if match(part, len(part) - 2, 'NULLS'):
+            self.warn(f"NULLS {upper(part[-1])} dropped from index key")
+            part = part[:-2]
+        if upper(part[-1]) in ('ASC', 'DESC'):
+            order = ' ' + upper(part[-1])
+            part = part[:-1]
+        if len(part) > 1 and part[-1].kind == 'word' and part[-1].text.lower().endswith('_ops'):
+            part = part[:-1]
+        if len(part) == 1 and part[0].kind in ('word', 'qident'):
+            col = self.column(table, ident(part[0]))
+            if col.kind in ('json', 'array'):
+                raise Untranslatable(f"btree index on JSON column {table.name}.{col.name}")
+            if col.type in ('TEXT', 'LONGBLOB'):
+                return f"{bq(col.name)}(255){order}"
+            return bq(col.name) + order
+        e = self.expr(part).strip()
+        # Functional indexes can't return TEXT
+        words = {ident(t) for t in part if t.kind in ('word', 'qident')}
+        if any(table.columns[w].type == 'TEXT' for w in words if w in table.columns):
+            e = f"CAST({e} AS CHAR(255))"
+        return f"({e}){order}"
+
+    def gin_index(self, table, name, parts):
+        """GIN has no MySQL twin: arrays get a multi-valued index, text search a FULLTEXT one."""
+        if len(parts) != 1:
+            raise Untranslatable('multi-column GIN index')
+        part = parts[0]
+        if len(part) > 1 and part[-1].text.lower().endswith('_ops'):
+            part = part[:-1]
+        if len(part) == 1:
+            col = self.column(table, ident(part[0]))
+            if col.kind == 'array':
+                return '', [multi_valued_key(col, self.schema.enums)]
+            if col.kind in ('text', 'string'):
+                self.warn(f"GIN index {name} became FULLTEXT; pattern searches on {col.name} need MATCH ... AGAINST")
+                return 'FULLTEXT ', [bq(col.name)]
+            raise Untranslatable(f"GIN index on {col.kind} column")
+        if match(part, 0, 'TO_TSVECTOR', '('):
+            cols = []
+            for t in part[2:matching(part, 1)]:
+                if t.kind in ('word', 'qident') and ident(t) in table.columns and ident(t) not in cols:
+                    cols.append(ident(t))
+            if not cols:
+                raise Untranslatable('to_tsvector index')
+            self.warn(f"GIN index {name} became FULLTEXT; full-text queries need MATCH ... AGAINST")
+            return 'FULLTEXT ', [bq(c) for c in cols]
+        raise Untranslatable('GIN expression index')
+
+    # -- ALTER -------------------------------------------------------------
+
+    def alter(self, toks):
+        what = upper(toks[1])
+        if what == 'TABLE':
+            return self.alter_table(toks, 2)
+        if what == 'TYPE':
+            return self.alter_type(toks, 2)
+        if what == 'POLICY':
+            raise Dropped('rls policy')
+        if what in ('FUNCTION', 'PUBLICATION', 'ROLE', 'DEFAULT'):
+            raise Dropped(what.lower())
+        raise Untranslatable('ALTER ' + what)
+
+    def alter_table(self, toks, i):
+        if_exists = match(toks, i, 'IF', 'EXISTS')
+        if if_exists:
+            i += 2
+        if match(toks, i, 'ONLY'):
+            i += 1
+        name, i = self.table_ref(toks, i)
+        parts = split_top(toks[i:])
+        if all(find_top(p, 0, 'ROW', 'LEVEL', 'SECURITY') >= 0 for p in parts):
+            raise Dropped('rls')
+        if name not in self.schema.tables:
+            if if_exists:
+                raise Dropped('no such table')
+            raise Untranslatable(f"unknown table {name}")
+        table = self.schema.tables[name]
+        actions, skipped = [], []
+        for part in parts:
+            try:
+                actions += self.alter_action(table, part)
+            except Dropped as e:
+                skipped.append((summary(render(part), 60), str(e)))
+        if not actions:
+            raise Dropped(skipped[0][1])
+        for action, reason in skipped:
+            self.warn(f"{action} skipped ({reason})")
+        return [f"ALTER TABLE {bq(table.name)}\n  " + ',\n  '.join(actions)]
+
+    def modify(self, col):
+        return f"MODIFY COLUMN {col.sql()}"
+
+    def add_constraints(self, table, constraints, new_col=None):
+        changed, adds = [], []
+        for c in constraints:
+            changed += [col for col in self.add_constraint(table, c) if col is not new_col and col not in changed]
+            adds.append('ADD ' + c.sql())
+        return [self.modify(col) for col in changed] + adds
+
+    def alter_action(self, table, part):
+        w = upper(part[0])
+        if w == 'ADD':
+            j = 1
+            if match(part, j, 'COLUMN'):
+                j += 1
+            elif upper(part[j]) in TABLE_CONSTRAINTS:
+                return self.add_constraints(table, self.table_constraint(table, part[j:]))
+            if match(part, j, 'IF', 'NOT', 'EXISTS'):
+                j += 3
+                if ident(part[j]) in table.columns:
+                    raise Dropped('already exists')
+            col, constraints = self.column_def(table, part[j:])
+            if col.name in table.columns:
+                raise Untranslatable(f"column {table.name}.{col.name} already exists")
+            table.columns[col.name] = col
+            rest = self.add_constraints(table, constraints, col)
+            return ['ADD COLUMN ' + col.sql()] + rest
+        if w == 'DROP':
+            j = 1
+            if match(part, j, 'CONSTRAINT'):
+                if_exists = match(part, j + 1, 'IF', 'EXISTS')
+                j += 1 + 2 * if_exists
+                c = table.constraints.get(ident(part[j]))
+                if c is None:
+                    if if_exists:
+                        raise Dropped('no such constraint')
+                    raise Untranslatable(f"unknown constraint {ident(part[j])}")
+                self.forget_constraint(table, c)
+                return [{'pk': 'DROP PRIMARY KEY', 'fk': f"DROP FOREIGN KEY {bq(c.name)}",
+                         'unique': f"DROP INDEX {bq(c.name)}", 'check': f"DROP CHECK {bq(c.name)}"}[c.kind]]
+            j += match(part, j, 'COLUMN')
+            if_exists = match(part, j, 'IF', 'EXISTS')
+            j += 2 * if_exists
+            cname = ident(part[j])
+            if cname not in table.columns:
+                if if_exists:
+                    raise Dropped('no such column')
+                raise Untranslatable(f"unknown column {table.name}.{cname}")
+            del table.columns[cname]
+            actions = []
+            for c in list(table.constraints.values()):
+                if cname in c.columns:
+                    # MySQL refuses to drop a column a foreign key still uses
+                    if c.kind == 'fk':
+                        actions.append(f"DROP FOREIGN KEY {bq(c.name)}")
+                    self.forget_constraint(table, c)
+            return actions + [f"DROP COLUMN {bq(cname)}"]
+        if w == 'ALTER':
+            j = 1 + match(part, 1, 'COLUMN')
+            col = self.column(table, ident(part[j]))
+            j += 1
+            if match(part, j, 'SET', 'DEFAULT'):
+                col.default = self.default_sql(col, part[j + 2:])
+            elif match(part, j, 'DROP', 'DEFAULT'):
+                col.default = None
+            elif match(part, j, 'SET', 'NOT', 'NULL'):
+                col.nullable = False
+            elif match(part, j, 'DROP', 'NOT', 'NULL'):
+                col.nullable = True
+            elif match(part, j, 'TYPE') or match(part, j, 'SET', 'DATA', 'TYPE'):
+                j += 1 if match(part, j, 'TYPE') else 3
+                k = find_top(part, j, 'USING')
+                if k >= 0:
+                    self.warn(f"USING clause for {table.name}.{col.name} dropped; MySQL converts the values itself")
+                new = self.new_column(col.name, render(part[j:k] if k >= 0 else part[j:]))
+                new.nullable, new.default, new.comment = col.nullable, col.default, col.comment
+                table.columns[col.name] = col = new
+            else:
+                raise Untranslatable(f"ALTER COLUMN {render(part[j:j + 2])}")
+            return [self.modify(col)]
+        if w == 'RENAME':
+            if match(part, 1, 'TO'):
+                new = ident(part[2])
+                self.schema.tables[new] = self.schema.tables.pop(table.name)
+                for index in table.indexes:
+                    self.schema.indexes[index] = new
+                table.name = new
+                return [f"RENAME TO {bq(new)}"]
+            j = 1 + match(part, 1, 'COLUMN')
+            if match(part, j, 'CONSTRAINT'):
+                raise Untranslatable('RENAME CONSTRAINT')
+            old, new = ident(part[j]), ident(part[j + 2])
+            col = self.column(table, old)
+            col.name = new
+            table.columns = {new if k == old else k: v for k, v in table.columns.items()}
+            for c in table.constraints.values():
+                c.columns = [new if n == old else n for n in c.columns]
+            return [f"RENAME COLUMN {bq(old)} TO {bq(new)}"]
+        if find_top(part, 0, 'ROW', 'LEVEL', 'SECURITY') >= 0:
+            raise Dropped('rls')
+        if w == 'OWNER':
+            raise Dropped('owner')
+        if match(part, 0, 'REPLICA', 'IDENTITY'):
+            raise Dropped('replica identity')
+        if w in ('ENABLE', 'DISABLE') and match(part, 1, 'TRIGGER'):
+            raise Dropped('trigger')
+        raise Untranslatable(f"ALTER TABLE {render(part[:2])}")
+
+    def alter_type(self, toks, i):
+        schema, name, i = qname(toks, i)
+        if name not in self.schema.enums:
+            raise Untranslatable(f"unknown type {name}")
+        values = self.schema.enums[name]
+        if match(toks, i, 'ADD', 'VALUE'):
+            j = i + 2
+            if_not_exists = match(toks, j, 'IF', 'NOT', 'EXISTS')
+            j += 3 * if_not_exists
+            value = pg_string(toks[j])
+            if value in values:
+                if if_not_exists:
+                    raise Dropped('already exists')
+                raise Untranslatable(f"enum value {value} already exists")
+            if match(toks, j + 1, 'BEFORE') or match(toks, j + 1, 'AFTER'):
+                values.insert(values.index(pg_string(toks[j + 2])) + match(toks, j + 1, 'AFTER'), value)
+            else:
+                values.append(value)
+            return self.enum_columns(name)
+        if match(toks, i, 'RENAME', 'TO'):
+            new = ident(toks[i + 2])
+            self.schema.enums[new] = self.schema.enums.pop(name)
+            for table in self.schema.tables.values():
+                for col in table.columns.values():
+                    if col.enum == name:
+                        col.enum = new
+            return [f"-- enum {name} renamed to {new}"]
+        if match(toks, i, 'OWNER'):
+            raise Dropped('owner')
+        # RENAME VALUE would need the stored rows rewritten too
+        raise Untranslatable(f"ALTER TYPE {render(toks[i:i + 2])}")
+
+    def enum_columns(self, name):
+        """MODIFY every column using enum `name` after its value list changed."""
+        out = []
+        for table in self.schema.tables.values():
+            for col in table.columns.values():
+                if col.enum == name:
+                    col.type = enum_sql(self.schema.enums[name])
+                    out.append(f"ALTER TABLE {bq(table.name)} {self.modify(col)}")
+        return out or [f"-- enum {name} is now {enum_sql(self.schema.enums[name])}"]
+
+    # -- DROP / COMMENT ----------------------------------------------------
+
+    def drop(self, toks):
+        what = upper(toks[1])
+        if what == 'POLICY':
+            raise Dropped('rls policy')
+        if what in ('FUNCTION', 'PROCEDURE', 'TRIGGER'):
+            # never created on the MySQL side
+            raise Dropped(what.lower())
+        if what in ('EXTENSION', 'PUBLICATION', 'ROLE'):
+            raise Dropped(what.lower())
+        i = 2
+        if_exists = match(toks, i, 'IF', 'EXISTS')
+        i += 2 * if_exists
+        if upper(toks[-1]) in ('CASCADE', 'RESTRICT'):
+            toks = toks[:-1]
+        names = [self.table_ref(p, 0)[0] for p in split_top(toks[i:])]
+        exists = 'IF EXISTS ' if if_exists else ''
+        if what == 'TABLE':
+            for name in names:
+                table = self.schema.tables.pop(name, None)
+                if table is None and not if_exists:
+                    raise Untranslatable(f"unknown table {name}")
+                if table:
+                    for c in list(table.constraints.values()):
+                        self.forget_constraint(table, c)
+                    for index in table.indexes:
+                        self.schema.indexes.pop(index, None)
+            return [f"DROP TABLE {exists}{', '.join(bq(n) for n in names)}"]
+        if what == 'INDEX':
+            out = []
+            for name in names:
+                tname = self.schema.indexes.pop(name, None)
+                if tname is None:
+                    if if_exists:
+                        continue
+                    raise Untranslatable(f"unknown index {name}")
+                self.schema.tables[tname].indexes.discard(name)
+                out.append(f"DROP INDEX {bq(name)} ON {bq(tname)}")
+            if not out:
+                raise Dropped('no such index')
+            return out
+        if what == 'VIEW':
+            self.schema.views.difference_update(names)
+            return [f"DROP VIEW {exists}{', '.join(bq(n) for n in names)}"]
+        if what == 'TYPE':
+            for name in names:
+                for table in self.schema.tables.values():
+                    if any(col.enum == name for col in table.columns.values()):
+                        raise Untranslatable(f"enum {name} is still in use")
+                self.schema.enums.pop(name, None)
+            return [f"-- enum {', '.join(names)} dropped"]
+        raise Untranslatable('DROP ' + what)
+
+    def comment_on(self, toks):
+        what = upper(toks[2])
+        k = find_top(toks, 3, 'IS')
+        value = '' if match(toks, k + 1, 'NULL') else pg_string(toks[k + 1])
+        if what == 'TABLE':
+            name, _ = self.table_ref(toks, 3)
+            self.table(name)
+            return [f"ALTER TABLE {bq(name)} COMMENT = {sql_string(value)}"]
+        if what == 'COLUMN':
+            names = [ident(t) for t in toks[3:k] if t.text != '.']
+            if len(names) == 3 and names[0] != 'public':
+                raise Dropped('supabase schema') if names[0] in SUPABASE_SCHEMAS else Untranslatable(names[0])
+            table = self.table(names[-2])
+            col = self.column(table, names[-1])
+            col.comment = value or None
+            return [f"ALTER TABLE {bq(table.name)} {self.modify(col)}"]
+        raise Dropped(f"comment on {what.lower()}")
+
+    # -- DML ---------------------------------------------------------------
+
+    def insert(self, toks):
+        if not match(toks, 1, 'INTO'):
+            raise Untranslatable('INSERT')
+        schema, name, i = qname(toks, 2)
+        if schema in SUPABASE_SCHEMAS:
+            raise Dropped('supabase schema')
+        table = self.schema.tables.get(name)
+        columns = []
+        if i < len(toks) and toks[i].text == '(':
+            columns, i = self.column_list(toks, i)
+        if find_top(toks, i, 'RETURNING') >= 0:
+            raise Untranslatable('INSERT ... RETURNING')
+        ignore, tail = False, ''
+        end = find_top(toks, i, 'ON', 'CONFLICT')
+        if end >= 0:
+            j = find_top(toks, end, 'DO')
+            if match(toks, j + 1, 'NOTHING'):
+                ignore = True
+            elif match(toks, j + 1, 'UPDATE', 'SET'):
+                if find_top(toks, j + 3, 'WHERE') >= 0:
+                    raise Untranslatable('ON CONFLICT DO UPDATE ... WHERE')
+                sets = []
+                for part in split_top(toks[j + 3:]):
+                    sets.append(f"{bq(ident(part[0]))} = {self.expr(part[2:]).strip()}")
+                tail = '\nON DUPLICATE KEY UPDATE ' + ', '.join(sets)
+            else:
+                raise Untranslatable('ON CONFLICT')
+        else:
+            end = len(toks)
+        body = toks[i:end]
+        if match(body, 0, 'VALUES'):
+            rows = [self.values_row(table, columns, row) for row in split_top(body[1:])]
+            source = 'VALUES\n' + ',\n'.join(rows)
+        else:
+            source = self.expr(body).strip()
+        head = 'INSERT IGNORE INTO' if ignore else 'INSERT INTO'
+        cols = f" ({', '.join(bq(c) for c in columns)})" if columns else ''
+        return [f"{head} {bq(name)}{cols}\n{source}{tail}"]
+
+    def values_row(self, table, columns, row):
+        if not row or row[0].text != '(' or matching(row, 0) != len(row) - 1:
+            raise Untranslatable('VALUES row')
+        items = []
+        for n, item in enumerate(split_top(row[1:-1])):
+            col = table.columns.get(columns[n]) if table and n < len(columns) else None
+            value = self.literal(item)
+            if col is not None and col.kind == 'array' and value is not None:
+                items.append(json_array_sql(pg_array_items(value)))
+            else:
+                items.append(self.expr(item).strip())
+        return '(' + ', '.join(items) + ')'
+
+    def update(self, toks):
+        schema, name, i = qname(toks, 1 + match(toks, 1, 'ONLY'))
+        if schema in SUPABASE_SCHEMAS:
+            raise Dropped('supabase schema')
+        if find_top(toks, i, 'FROM') >= 0:
+            raise Untranslatable('UPDATE ... FROM')
+        if find_top(toks, i, 'RETURNING') >= 0:
+            raise Untranslatable('UPDATE ... RETURNING')
+        return [self.expr(toks).strip()]
+
+    def delete(self, toks):
+        schema, name, i = qname(toks, 2 + match(toks, 2, 'ONLY'))
+        if schema in SUPABASE_SCHEMAS:
+            raise Dropped('supabase schema')
+        if find_top(toks, i, 'USING') >= 0:
+            raise Untranslatable('DELETE ... USING')
+        if find_top(toks, i, 'RETURNING') >= 0:
+            raise Untranslatable('DELETE ... RETURNING')
+        return [self.expr(toks).strip()]
+
+    def select(self, toks):
+        for t in toks:
+            if t.kind == 'word' and (t.text.lower().startswith('pg_') or t.text.lower() == 'information_schema'):
+                raise Dropped('catalog query')
+        return [self.expr(toks).strip()]
+
+    # -- expressions -------------------------------------------------------
+
+    def expr(self, toks, nested=False):
+        """
+        Translate an expression or query fragment. Each output item is one
+        operand or operator, so a "::" cast can wrap the item before it.
+        """
+        toks = list(toks)
+        out = []  # [space, text, literal value or None]
+        values = False  # inside VALUES (...), (...) of a subquery: rows need ROW()
+        i, n = 0, len(toks)
+        while i < n:
+            t = toks[i]
+            u = upper(t)
+            nxt = toks[i + 1] if i + 1 < n else None
+            prev = upper(Tok('word', out[-1][1], '')) if out else ''
+            if t.kind in ('word', 'qident'):
+                if t.kind == 'word' and u == 'PUBLIC' and nxt is not None and nxt.text == '.':
+                    toks[i + 2] = toks[i + 2]._replace(space=t.space)
+                    i += 2
+                    continue
+                names = [t]
+                j = i + 1
+                while j + 1 < n and toks[j].text == '.' and (toks[j + 1].kind in ('word', 'qident')
+                                                              or toks[j + 1].text == '*'):
+                    names.append(toks[j + 1])
+                    j += 2
+                text = '.'.join(bq(ident(x)) if x.kind == 'qident' else x.text for x in names)
+                if len(names) > 1 and names[0].text.lower() in SUPABASE_SCHEMAS:
+                    raise Untranslatable(f"supabase {text}")
+                if len(names) == 2 and names[0].text.lower() == 'excluded':
+                    out.append([t.space, f"VALUES({bq(ident(names[1]))})", None])
+                    i = j
+                    continue
+                after = toks[j] if j < n else None
+                if after is not None and after.text == '(' and (len(names) > 1 or u not in KEYWORDS) \
+                        and prev != 'AS' and t.kind == 'word':
+                    k = matching(toks, j)
+                    call = self.call(text, toks[j + 1:k])
+                    i = k + 1
+                    if match(toks, i, 'FILTER', '(', 'WHERE'):
+                        f = matching(toks, i + 1)
+                        call = self.filtered(text, toks[j + 1:k], self.expr(toks[i + 3:f]).strip())
+                        i = f + 1
+                    out.append([t.space, call, None])
+                    continue
+                i = j
+                if len(names) > 1 or t.kind == 'qident':
+                    out.append([t.space, text, None])
+                    continue
+                if u == 'ARRAY' and after is not None and after.text == '[':
+                    k = matching(toks, i)
+                    items = [self.expr(p).strip() for p in split_top(toks[i + 1:k])]
+                    out.append([t.space, 'JSON_ARRAY(' + ', '.join(items) + ')', None])
+                    i = k + 1
+                elif u == 'ARRAY':
+                    raise Untranslatable('ARRAY(subquery)')
+                elif u in ('ANY', 'ALL', 'SOME') and after is not None and after.text == '(' \
+                        and not match(toks, i + 1, 'SELECT'):
+                    raise Untranslatable(f"{u}(array)")
+                elif u == 'INTERVAL' and after is not None and after.kind == 'str':
+                    out.append([t.space, interval_sql(pg_string(after)), None])
+                    i += 1
+                elif u == 'ILIKE':
+                    out.append([t.space, 'LIKE', None])
+                elif u == 'CURRENT_TIMESTAMP':
+                    out.append([t.space, 'CURRENT_TIMESTAMP(6)', None])
+                elif match(toks, i - 1, 'IS', 'NOT', 'DISTINCT', 'FROM'):
+                    out.append([t.space, '<=>', None])
+                    i += 3
+                elif match(toks, i - 1, 'IS', 'DISTINCT', 'FROM'):
+                    raise Untranslatable('IS DISTINCT FROM')
+                elif u in ('SIMILAR', 'RETURNING'):
+                    raise Untranslatable(u)
+                else:
+                    out.append([t.space, t.text, None])
+                    if u == 'VALUES' and nested:
+                        values = True
+                        continue
+            elif t.kind in ('str', 'dollar'):
+                value = pg_string(t)
+                out.append([t.space, sql_string(value), value])
+                i += 1
+            elif t.kind == 'param':
+                raise Untranslatable('positional parameter')
+            elif t.text == '::':
+                if not out:
+                    raise Untranslatable('cast')
+                space, operand, value = out.pop()
+                k = i + 2
+                while k < n and (upper(toks[k]) in TYPE_WORDS or toks[k].text == '.'
+                                 or toks[k - 1].text == '.' and toks[k].kind in ('word', 'qident')):
+                    k += 1
+                if k < n and toks[k].text == '(':
+                    k = matching(toks, k) + 1
+                while k < n and toks[k].text == '[':
+                    k = matching(toks, k) + 1
+                out.append([space, self.cast(operand, value, render(toks[i + 1:k])), None])
+                i = k
+            elif t.text == '(':
+                k = matching(toks, i)
+                inner = self.expr(toks[i + 1:k], nested=True)
+                text = '(' + inner + toks[k].space + ')'
+                out.append([t.space, 'ROW' + text if values else text, None])
+                i = k + 1
+                continue
+            elif t.text == '[':
+                raise Untranslatable('array subscript')
+            elif t.text in ('~', '!') and t.kind == 'op':
+                negate = t.text == '!'
+                if negate and (nxt is None or nxt.text != '~'):
+                    raise Untranslatable('operator !')
+                i += 1 + negate
+                if i < n and toks[i].text == '*':
+                    i += 1
+                out.append([t.space, 'NOT REGEXP' if negate else 'REGEXP', None])
+            elif t.text in ('->', '->>') and nxt is not None and nxt.kind in ('str', 'num'):
+                key = pg_string(nxt) if nxt.kind == 'str' else nxt.text
+                if nxt.kind == 'num':
+                    path = f"$[{key}]"
+                elif re.fullmatch(r'[A-Za-z_]\w*', key):
+                    path = f"$.{key}"
+                else:
+                    path = '$."' + key.replace('"', '\\"') + '"'
+                out.append([t.space, t.text, None])
+                out.append([nxt.space, sql_string(path), None])
+                i += 2
+            elif t.text in ('||', '#>', '#>>', '@>', '<@', '&&', '?', '->', '->>'):
+                raise Untranslatable(f"operator {t.text}")
+            else:
+                out.append([t.space, t.text, None])
+                i += 1
+            if t.text != ',':
+                values = False
+        return ''.join(space + text for space, text, _ in out)
+
+    def call(self, name, inner):
+        lname = name.lower()
+        if lname.startswith('pg_') or '.' in lname and not lname.startswith('public.'):
+            raise Untranslatable(f"function {name}()")
+        if lname == 'cast':
+            k = find_top(inner, 0, 'AS')
+            operand = inner[:k]
+            return self.cast(self.expr(operand).strip(), self.literal(operand) if len(operand) == 1 else None,
+                             render(inner[k + 1:]))
+        args = [self.expr(a).strip() for a in split_top(inner)] if inner else []
+        if lname in ('gen_random_uuid', 'uuid_generate_v4'):
+            return 'UUID()'
+        if lname == 'now':
+            return 'NOW(6)'
+        if lname == 'timezone':
+            if len(args) == 2 and args[0].lower() == "'utc'" and args[1] in ('NOW(6)', 'CURRENT_TIMESTAMP(6)'):
+                return 'UTC_TIMESTAMP(6)'
+            raise Untranslatable('timezone()')
+        if lname == 'array_length':
+            return f"JSON_LENGTH({args[0]})"
+        if lname == 'string_agg':
+            return f"GROUP_CONCAT({args[0]} SEPARATOR {args[1]})"
+        if lname in RENAMED_FUNCTIONS:
+            return f"{RENAMED_FUNCTIONS[lname]}({', '.join(args)})"
+        if lname in SAME_FUNCTIONS:
+            return f"{name}({', '.join(args)})"
+        raise Untranslatable(f"function {name}()")
+
+    def filtered(self, name, inner, cond):
+        """agg(x) FILTER (WHERE c) -> agg(CASE WHEN c THEN x END)."""
+        if name.lower() not in SAME_FUNCTIONS and name.lower() not in RENAMED_FUNCTIONS:
+            raise Untranslatable(f"function {name}()")
+        arg = '1' if render(inner) == '*' else self.expr(inner).strip()
+        return f"{name}(CASE WHEN {cond} THEN {arg} END)"
+
+    def cast(self, operand, value, pg_type):
+        """`operand::pg_type`; `value` is the decoded string when the operand is a string literal."""
+        if normalize(pg_type) == 'interval' and value is not None:
+            return interval_sql(value)
+        mtype = map_type(pg_type, self.schema.enums)
+        if mtype is None:
+            raise Untranslatable(f"cast to {pg_type}")
+        if mtype.kind == 'array':
+            if value is None:
+                return operand
+            elem = map_type(element_type(pg_type), self.schema.enums)
+            return json_array_sql(pg_array_items(value), elem is not None and elem.kind in ('int', 'float', 'decimal'))
+        if mtype.kind == 'json':
+            return json_literal_sql(value) if value is not None else f"CAST({operand} AS JSON)"
+        if mtype.kind == 'int':
+            return f"CAST({operand} AS SIGNED)"
+        if mtype.kind in ('decimal', 'float', 'date', 'time', 'datetime', 'datetimetz'):
+            return f"CAST({operand} AS {'DOUBLE' if mtype.kind == 'float' else mtype.sql})"
+        if mtype.kind in ('text', 'string') and value is None:
+            return f"CAST({operand} AS CHAR)"
+        # uuid, enum, bool and string literals are already what MySQL expects
+        return operand
+
+    # -- DO blocks ---------------------------------------------------------
+
+    def flatten_do(self, stmt, toks, out):
+        """
+        Resolve a DO block against the schema model: IF [NOT] EXISTS checks on
+        the catalogs are evaluated here and only the chosen statements are
+        translated, one by one.
+        """
+        body = next((t for t in toks[1:] if t.kind in ('dollar', 'str')), None)
+        try:
+            if body is None:
+                raise Untranslatable('DO block')
+            first_line = stmt.line + stmt.text[:stmt.text.index(body.text)].count('\n')
+            btoks = significant(pg_string(body))
+            items = self.do_block(btoks, first_line)
+        except (Untranslatable, IndexError) as e:
+            self.report.statements += 1
+            self.untranslated(stmt, str(e) if isinstance(e, Untranslatable) else 'unexpected syntax', out)
+            return
+        if not items:
+            self.report.statements += 1
+            self.dropped(stmt, 'raise notice', out)
+            return
+        out.write(f"-- DO block {stmt.source}:{stmt.line} resolved against the schema\n")
+        self.run_items(items, stmt.source, out)
+
+    def do_block(self, toks, first_line):
+        if match(toks, 0, 'DECLARE'):
+            raise Untranslatable('DO block with variables')
+        if not match(toks, 0, 'BEGIN'):
+            raise Untranslatable('DO block')
+        items, i = self.parse_block(toks, 1, (('EXCEPTION',), ('END',)), first_line)
+        if match(toks, i, 'EXCEPTION'):
+            # only "WHEN x THEN NULL;" handlers: errors are ignored, and the
+            # statements that would raise them (duplicates) are skipped anyway
+            i += 1
+            while match(toks, i, 'WHEN'):
+                k = find_top(toks, i, 'THEN')
+                if k < 0 or not match(toks, k + 1, 'NULL', ';'):
+                    raise Untranslatable('exception handler')
+                i = k + 3
+        if not match(toks, i, 'END'):
+            raise Untranslatable('DO block')
+        return items
+
+    def parse_block(self, toks, i, stops, first_line):
+        """plpgsql statements from i up to a word sequence in `stops`; returns (items, index)."""
+        items = []
+        while i < len(toks):
+            if any(match(toks, i, *s) for s in stops):
+                return items, i
+            if match(toks, i, 'IF'):
+                item, i = self.parse_if(toks, i, first_line)
+                items.append(item)
+                continue
+            j = find_top(toks, i, ';')
+            j = len(toks) if j < 0 else j
+            head = upper(toks[i])
+            if head in ('CREATE', 'ALTER', 'DROP', 'INSERT', 'UPDATE', 'DELETE', 'COMMENT', 'GRANT', 'REVOKE'):
+                items.append(('sql', toks[i:j], line_at(toks, i, first_line)))
+            elif head not in ('RAISE', 'NULL'):
+                raise Untranslatable(f"{head} in DO block")
+            i = j + 1
+        raise Untranslatable('unterminated DO block')
+
+    def parse_if(self, toks, i, first_line):
+        start, branches = i, []
+        while True:
+            # i is at IF or ELSIF
+            j = find_top(toks, i + 1, 'THEN')
+            if j < 0:
+                raise Untranslatable('IF without THEN')
+            cond = toks[i + 1:j]
+            block, i = self.parse_block(toks, j + 1, (('ELSIF',), ('ELSEIF',), ('ELSE',), ('END', 'IF')), first_line)
+            branches.append((cond, block))
+            if match(toks, i, 'ELSE'):
+                block, i = self.parse_block(toks, i + 1, (('END', 'IF'),), first_line)
+                branches.append((None, block))
+            if match(toks, i, 'END', 'IF'):
+                i += 2 + match(toks, i + 2, ';')
+                return ('if', branches, toks[start:i], line_at(toks, start, first_line)), i
+
+    def run_items(self, items, source, out):
+        for item in items:
+            if item[0] == 'sql':
+                self.translate(Statement(source, item[2], render(item[1]) + ';'), out)
+                continue
+            _, branches, toks, line = item
+            try:
+                block = next((b for cond, b in branches if cond is None or self.condition(cond)), [])
+            except (Untranslatable, IndexError, KeyError) as e:
+                self.report.statements += 1
+                reason = str(e) if isinstance(e, Untranslatable) else 'unexpected syntax'
+                self.untranslated(Statement(source, line, render(toks) + ';'), reason, out)
+                continue
+            self.run_items(block, source, out)
+
+    def condition(self, toks):
+        """Evaluate an IF condition made of [NOT] EXISTS (catalog query) tests joined by AND / OR."""
+        return any(all(self.exists_test(test) for test in split_top(alt, 'AND')) for alt in split_top(toks, 'OR'))
+
+    def exists_test(self, toks):
+        negate = match(toks, 0, 'NOT')
+        toks = toks[negate:]
+        if not match(toks, 0, 'EXISTS', '(') or matching(toks, 1) != len(toks) - 1:
+            raise Untranslatable(f"IF condition {summary(render(toks), 40)}")
+        query = toks[2:-1]
+        f = find_top(query, 0, 'FROM')
+        if not match(query, 0, 'SELECT') or f < 0:
+            raise Untranslatable('IF condition')
+        _, relation, j = qname(query, f + 1)
+        filters = {}
+        w = find_top(query, j, 'WHERE')
+        for test in split_top(query[w + 1:], 'AND') if w >= 0 else []:
+            if len(test) < 3 or test[-2].text != '=' or test[-1].kind != 'str':
+                raise Untranslatable(f"IF condition {summary(render(test), 40)}")
+            filters[ident(test[-3])] = pg_string(test[-1])
+        return self.catalog_lookup(relation, filters) != negate
+
+    def catalog_lookup(self, relation, filters):
+        """Answer an information_schema / pg_catalog existence query from the schema model."""
+        tables = self.schema.tables
+        if relation == 'columns':
+            table = tables.get(filters['table_name'])
+            return table is not None and filters.get('column_name', next(iter(table.columns), None)) in table.columns
+        if relation == 'tables':
+            return filters['table_name'] in tables
+        if relation == 'pg_type':
+            return filters['typname'] in self.schema.enums
+        if relation == 'pg_constraint':
+            return self.schema.has_constraint(filters['conname'])
+        if relation == 'pg_indexes':
+            return filters['indexname'] in self.schema.indexes
+        if relation == 'pg_class':
+            return filters['relname'] in tables or filters['relname'] in self.schema.indexes
+        if relation in ('pg_policies', 'pg_policy', 'pg_trigger'):
+            # policies and triggers are never created on the MySQL side
+            return False
+        raise Untranslatable(f"IF EXISTS on {relation}")
+
+
+# ---------------------------------------------------------------------------
+# Driver
+
+def migration_key(path):
+    """Order files like the Supabase CLI: by the numeric version prefix, unversioned files last."""
+    name = os.path.basename(path)
+    m = re.match(r'(\d+)', name)
+    if not m:
+        return (1, '', name)
+    # 20260109_x and 20260109050001_y: pad so the date-only version sorts first
+    return (0, m.group(1).ljust(14, '0'), name)
+
+
+def expand_inputs(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            names = [os.path.join(path, f) for f in os.listdir(path) if f.endswith('.sql')]
+            files += sorted(names, key=migration_key)
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            print(f"  Skipped (not found): {path}", file=sys.stderr)
+    return files
+
+
+def translate_files(files, out, report):
+    """Stream every statement of `files` through one Translator into `out`."""
+    translator = Translator(report)
+    out.write('-- MySQL translation of the Supabase migrations, generated by dbmigrate.pg2mysql\n')
+    out.write('-- from:\n' + ''.join(f"--   {path}\n" for path in files) + '\n')
+    out.write("SET NAMES utf8mb4;\nSET time_zone = '+00:00';\nSET FOREIGN_KEY_CHECKS = 0;\n\n")
+    for path in files:
+        report.files += 1
+        out.write(f"\n-- ==== {path} ====\n\n")
+        for stmt in iter_file_statements(path):
+            translator.translate(stmt, out)
+    out.write('SET FOREIGN_KEY_CHECKS = 1;\n')
+    return translator
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='dbmigrate.pg2mysql', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('inputs', nargs='*', default=DEFAULT_INPUTS,
+                        help='SQL files or directories, in order (default: %(default)s)')
+    parser.add_argument('-o', '--output', default='-', metavar='PATH', help='MySQL script (default: stdout)')
+    parser.add_argument('--report', metavar='PATH', help='write the report as JSON')
+    parser.add_argument('-q', '--quiet', action='store_true', help="don't list untranslated statements")
+    args = parser.parse_args(argv)
+
+    files = expand_inputs(args.inputs)
+    report = TranslateReport()
+    if args.output == '-':
+        translate_files(files, sys.stdout, report)
+    else:
+        with open(args.output, 'w', encoding='utf-8', newline='\n') as out:
+            translate_files(files, out, report)
+    print_report(report, sys.stderr, verbose=not args.quiet)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report.to_json(), f, indent=2)
+            f.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
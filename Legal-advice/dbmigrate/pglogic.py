@@ -0,0 +1,1540 @@
+"""
+Postgres trigger functions and RLS policies -> MySQL triggers and row filters.
+
+    python -m dbmigrate.pglogic                                # report only
+    python -m dbmigrate.pglogic --triggers mysql_triggers.sql --predicates lib/rls.ts
+    python -m dbmigrate.pglogic --report pglogic.json
+
+pg2mysql leaves the plpgsql trigger functions, the triggers and the RLS
+policies of the migrations out of the MySQL script. This tool reads the same
+inputs in the same order, keeps the last definition of each function,
+trigger and policy (DROP / CREATE OR REPLACE / ALTER POLICY applied), and
+
+  - writes a MySQL CREATE TRIGGER for every trigger whose function it can
+    translate. Postgres fires one function for `INSERT OR UPDATE`; MySQL
+    wants one trigger per event, so those are split, with TG_OP resolved per
+    event and OLD / NEW read as NULL where the event has no such row. The
+    WHEN clause and `UPDATE OF cols` become an IF around the body, and
+    triggers on the same table, timing and event keep Postgres' alphabetical
+    firing order through FOLLOWS. Expressions go through pg2mysql's
+    translator (`||` becomes CONCAT, IS DISTINCT FROM becomes <=>).
+
+  - compiles the policies of every table with RLS enabled into a TypeScript
+    map of Prisma `where` builders, one per table and command, so server
+    code can AND them into its queries and MySQL does the filtering with its
+    indexes:
+
+        prisma.documents.findMany({ where: { AND: [where, rls.documents.select(ctx)] } })
+
+    auth.uid() is `ctx.uid`; a subquery that looks up the user's own
+    profiles row (`WHERE id = auth.uid()`) reads `ctx.profile` instead of
+    joining; other EXISTS / IN (SELECT ...) subqueries correlated with the
+    row become relation filters through the relations in schema.prisma.
+    Permissive policies are ORed, restrictive ones ANDed on top.
+
+Anything that can't be translated is listed with the reason: a table's
+command then only has the policies that could be, which lets through fewer
+rows than Postgres did, never more.
+"""
+import argparse
+import collections
+import json
+import re
+import sys
+
+from . import prisma
+from .pg2mysql import (DEFAULT_INPUTS, Dropped, KEYWORDS, SUPABASE_SCHEMAS, TYPE_WORDS, TranslateReport, Translator,
+                       Untranslatable, bq, expand_inputs, find_top, ident, is_open, match, matching, pg_string,
+                       qname, render, significant, split_top, upper, Tok)
+from .sqlsplit import iter_file_statements
+from .typemap import map_type
+
+DEFAULT_SCHEMA = 'prisma/schema.prisma'
+EVENTS = ('INSERT', 'UPDATE', 'DELETE')
+COMMANDS = ('select', 'insert', 'update', 'delete')
+# Words that never start an operand
+NON_OPERANDS = KEYWORDS | {'INTO', 'UPDATE', 'INSERT', 'DELETE', 'LIMIT', 'ORDER', 'GROUP', 'HAVING', 'ASC',
+                           'DESC', 'RETURN', 'IF', 'ELSIF', 'ELSEIF', 'DECLARE', 'BEGIN', 'INTERVAL'}
+ARITHMETIC = ('+', '-', '*', '/', '%')
+UNIT_RE = re.compile(r'^\s*(second|minute|hour|day|week|month|year)s?\s*$', re.I)
+RAISE_LEVELS = ('DEBUG', 'LOG', 'INFO', 'NOTICE', 'WARNING')
+# Casts a policy can ignore: the value compares the same either way
+TEXT_CASTS = ('text', 'varchar', 'uuid', 'character varying')
+PRISMA_OPS = {'=': 'equals', '<>': 'not', '!=': 'not', '<': 'lt', '<=': 'lte', '>': 'gt', '>=': 'gte'}
+FLIPPED = {'=': '=', '<>': '<>', '!=': '!=', '<': '>', '<=': '>=', '>': '<', '>=': '<='}
+
+
+class Function:
+    __slots__ = ('name', 'body', 'language', 'source', 'line')
+
+    def __init__(self, name, body, language, source, line):
+        self.name = name
+        self.body = body
+        self.language = language
+        self.source = source
+        self.line = line
+
+
+class Trigger:
+    __slots__ = ('name', 'schema', 'table', 'timing', 'events', 'level', 'when', 'function', 'args',
+                 'source', 'line')
+
+    def __init__(self, name, schema, table, timing, events, level, when, function, args, source, line):
+        self.name = name
+        self.schema = schema
+        self.table = table
+        self.timing = timing            # BEFORE / AFTER / INSTEAD OF
+        self.events = events            # [(event, [columns of UPDATE OF])]
+        self.level = level              # ROW / STATEMENT
+        self.when = when                # tokens of the WHEN condition or None
+        self.function = function
+        self.args = args
+        self.source = source
+        self.line = line
+
+
+class Policy:
+    __slots__ = ('name', 'schema', 'table', 'command', 'permissive', 'roles', 'using', 'check', 'source', 'line')
+
+    def __init__(self, name, schema, table, command, permissive, roles, using, check, source, line):
+        self.name = name
+        self.schema = schema
+        self.table = table
+        self.command = command          # select / insert / update / delete / all
+        self.permissive = permissive
+        self.roles = roles
+        self.using = using              # tokens or None
+        self.check = check
+        self.source = source
+        self.line = line
+
+    @property
+    def where(self):
+        return f"{self.source}:{self.line}"
+
+
+class _Sink:
+    """Where the schema-tracking translator's own output goes."""
+
+    def write(self, text):
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Reading the migrations
+
+class Catalog:
+    """Functions, triggers, policies and RLS switches as the migrations leave them."""
+
+    def __init__(self):
+        self.translator = Translator(TranslateReport())
+        self.sink = _Sink()
+        self.functions = {}             # name -> Function (trigger functions only)
+        self.triggers = {}              # (table, name) -> Trigger
+        self.policies = {}              # (table, name) -> Policy
+        self.rls = set()                # tables with ROW LEVEL SECURITY enabled
+
+    @property
+    def schema(self):
+        return self.translator.schema
+
+    def add(self, stmt):
+        # The translator keeps the table / column / enum model the translations need
+        self.translator.translate(stmt, self.sink)
+        toks = significant(stmt.text)
+        if toks and match(toks, 0, 'DO'):
+            self.do_block(stmt, toks)
+        elif toks:
+            self.collect(toks, stmt)
+
+    def do_block(self, stmt, toks):
+        """CREATE / DROP statements inside a DO block, taken as if they ran."""
+        body = next((t for t in toks[1:] if t.kind in ('dollar', 'str')), None)
+        if body is None:
+            return
+        btoks = significant(pg_string(body))
+        if not match(btoks, 0, 'BEGIN'):
+            return
+        end = find_top(btoks, 1, 'EXCEPTION')
+        end = len(btoks) if end < 0 else end
+        for part in split_top(btoks[1:end], ';'):
+            if part and upper(part[0]) in ('CREATE', 'DROP', 'ALTER'):
+                self.collect(part, stmt)
+
+    def collect(self, toks, stmt):
+        try:
+            head = upper(toks[0])
+            i = 1 + 2 * match(toks, 1, 'OR', 'REPLACE')
+            if head == 'CREATE' and match(toks, i, 'FUNCTION'):
+                self.create_function(toks, i + 1, stmt)
+            elif head == 'CREATE' and (match(toks, i, 'TRIGGER') or match(toks, i, 'CONSTRAINT', 'TRIGGER')):
+                self.create_trigger(toks, i + 1 + match(toks, i, 'CONSTRAINT'), stmt)
+            elif head == 'CREATE' and match(toks, i, 'POLICY'):
+                self.create_policy(toks, i + 1, stmt)
+            elif head == 'ALTER' and match(toks, 1, 'POLICY'):
+                self.alter_policy(toks, stmt)
+            elif head == 'ALTER' and match(toks, 1, 'TABLE'):
+                self.alter_table(toks)
+            elif head == 'DROP' and (match(toks, 1, 'POLICY') or match(toks, 1, 'TRIGGER')):
+                j = 2 + 2 * match(toks, 2, 'IF', 'EXISTS')
+                name = ident(toks[j])
+                _, table, _ = qname(toks, j + 2)
+                store = self.policies if match(toks, 1, 'POLICY') else self.triggers
+                store.pop((table, name), None)
+            elif head == 'DROP' and match(toks, 1, 'FUNCTION'):
+                j = 2 + 2 * match(toks, 2, 'IF', 'EXISTS')
+                for part in split_top(toks[j:]):
+                    if part and part[0].kind in ('word', 'qident'):
+                        self.functions.pop(qname(part, 0)[1], None)
+        except (Untranslatable, IndexError):
+            # Not one of ours, or syntax we don't follow: pg2mysql reports those
+            pass
+
+    def create_function(self, toks, i, stmt):
+        _, name, i = qname(toks, i)
+        r = find_top(toks, i, 'RETURNS')
+        if r < 0 or not match(toks, r + 1, 'TRIGGER'):
+            self.functions.pop(name, None)
+            return
+        lang = find_top(toks, i, 'LANGUAGE')
+        language = None
+        if lang >= 0:
+            t = toks[lang + 1]
+            language = pg_string(t).lower() if t.kind == 'str' else ident(t)
+        a = find_top(toks, i, 'AS')
+        body = next((t for t in toks[a + 1:] if t.kind in ('dollar', 'str')), None) if a >= 0 else None
+        if body is None:
+            return
+        self.functions[name] = Function(name, pg_string(body), language, stmt.source, stmt.line)
+
+    def create_trigger(self, toks, i, stmt):
+        name = ident(toks[i])
+        i += 1
+        if match(toks, i, 'INSTEAD', 'OF'):
+            timing, i = 'INSTEAD OF', i + 2
+        else:
+            timing, i = upper(toks[i]), i + 1
+        events = []
+        while True:
+            event = upper(toks[i])
+            i += 1
+            columns = []
+            if event == 'UPDATE' and match(toks, i, 'OF'):
+                i += 1
+                while True:
+                    columns.append(ident(toks[i]))
+                    i += 1
+                    if toks[i].text != ',':
+                        break
+                    i += 1
+            events.append((event, columns))
+            if not match(toks, i, 'OR'):
+                break
+            i += 1
+        if not match(toks, i, 'ON'):
+            raise Untranslatable('trigger')
+        schema, table, i = qname(toks, i + 1)
+        level = 'STATEMENT'
+        f = find_top(toks, i, 'FOR')
+        if f >= 0:
+            level = upper(toks[f + 1 + match(toks, f + 1, 'EACH')])
+        when = None
+        w = find_top(toks, i, 'WHEN')
+        if w >= 0:
+            when = toks[w + 2:matching(toks, w + 1)]
+        e = find_top(toks, i, 'EXECUTE')
+        _, function, j = qname(toks, e + 2)
+        args = toks[j + 1:matching(toks, j)]
+        referencing = find_top(toks, i, 'REFERENCING') >= 0
+        self.triggers[(table, name)] = Trigger(name, schema, table, timing, events,
+                                               'REFERENCING' if referencing else level, when, function, args,
+                                               stmt.source, stmt.line)
+
+    def policy_clauses(self, toks, i, policy):
+        while i < len(toks):
+            if match(toks, i, 'AS'):
+                policy.permissive = upper(toks[i + 1]) != 'RESTRICTIVE'
+                i += 2
+            elif match(toks, i, 'FOR'):
+                policy.command = toks[i + 1].text.lower()
+                i += 2
+            elif match(toks, i, 'TO'):
+                roles, i = [], i + 1
+                while i < len(toks) and (not roles or toks[i].text == ','):
+                    i += toks[i].text == ','
+                    roles.append(ident(toks[i]))
+                    i += 1
+                policy.roles = roles
+            elif match(toks, i, 'USING', '('):
+                k = matching(toks, i + 1)
+                policy.using, i = toks[i + 2:k], k + 1
+            elif match(toks, i, 'WITH', 'CHECK', '('):
+                k = matching(toks, i + 2)
+                policy.check, i = toks[i + 3:k], k + 1
+            else:
+                raise Untranslatable('policy clause')
+
+    def create_policy(self, toks, i, stmt):
+        name = ident(toks[i])
+        schema, table, i = qname(toks, i + 2)
+        policy = Policy(name, schema, table, 'all', True, ['public'], None, None, stmt.source, stmt.line)
+        self.policy_clauses(toks, i, policy)
+        self.policies[(table, name)] = policy
+
+    def alter_policy(self, toks, stmt):
+        name = ident(toks[2])
+        _, table, i = qname(toks, 4)
+        policy = self.policies.get((table, name))
+        if policy is None:
+            return
+        if match(toks, i, 'RENAME', 'TO'):
+            del self.policies[(table, name)]
+            policy.name = ident(toks[i + 2])
+            self.policies[(table, policy.name)] = policy
+            return
+        self.policy_clauses(toks, i, policy)
+        policy.source, policy.line = stmt.source, stmt.line
+
+    def alter_table(self, toks):
+        i = 2 + 2 * match(toks, 2, 'IF', 'EXISTS')
+        i += match(toks, i, 'ONLY')
+        _, table, i = qname(toks, i)
+        for part in split_top(toks[i:]):
+            if match(part, 0, 'ENABLE', 'ROW', 'LEVEL', 'SECURITY') or match(part, 0, 'FORCE', 'ROW'):
+                self.rls.add(table)
+            elif match(part, 0, 'DISABLE', 'ROW', 'LEVEL', 'SECURITY'):
+                self.rls.discard(table)
+
+
+def read_catalog(files):
+    catalog = Catalog()
+    for path in files:
+        for stmt in iter_file_statements(path):
+            catalog.add(stmt)
+    return catalog
+
+
+# ---------------------------------------------------------------------------
+# Expression rewrites ahead of pg2mysql's translator
+
+def operand_end(toks, i):
+    """End of the operand (name, call, literal, bracket group, CASE, with casts) at i, or None."""
+    n = len(toks)
+    t = toks[i]
+    if is_open(t):
+        j = matching(toks, i) + 1
+    elif t.kind == 'word' and upper(t) == 'CASE':
+        depth, j = 0, i
+        while j < n:
+            if match(toks, j, 'CASE'):
+                depth += 1
+            elif match(toks, j, 'END'):
+                depth -= 1
+                if depth == 0:
+                    break
+            j += 1
+        j += 1
+    elif t.kind in ('word', 'qident'):
+        if t.kind == 'word' and upper(t) in NON_OPERANDS:
+            return None
+        j = i + 1
+        while j + 1 < n and toks[j].text == '.' and toks[j + 1].kind in ('word', 'qident'):
+            j += 2
+        if j < n and toks[j].text == '(':
+            j = matching(toks, j) + 1
+    elif t.kind in ('str', 'num', 'dollar', 'param'):
+        j = i + 1
+    else:
+        return None
+    while j < n and toks[j].text == '::':
+        j += 2
+        while j < n and (upper(toks[j]) in TYPE_WORDS or toks[j].text == '.'):
+            j += 1
+        if j < n and toks[j].text == '(':
+            j = matching(toks, j) + 1
+    return j
+
+
+def units(toks):
+    """`toks` cut into operands and single tokens."""
+    out, i = [], 0
+    while i < len(toks):
+        j = operand_end(toks, i)
+        j = i + 1 if j is None else j
+        out.append(toks[i:j])
+        i = j
+    return out
+
+
+def is_operand(unit):
+    return operand_end(unit, 0) == len(unit)
+
+
+def _spaced(toks, space):
+    return [toks[0]._replace(space=space)] + toks[1:]
+
+
+def _interval(unit):
+    """`(n || ' hours')::interval` -> INTERVAL n HOUR."""
+    if len(unit) < 5 or unit[0].text != '(' or matching(unit, 0) != len(unit) - 3 \
+            or unit[-2].text != '::' or unit[-1].text.lower() != 'interval':
+        return None
+    inner = unit[1:-3]
+    if len(inner) < 3 or inner[-2].text != '||' or inner[-1].kind != 'str':
+        return None
+    m = UNIT_RE.match(pg_string(inner[-1]))
+    if not m or operand_end(inner, 0) != len(inner) - 2:
+        return None
+    return ([Tok('word', 'INTERVAL', unit[0].space)] + _spaced(inner[:-2], ' ')
+            + [Tok('word', m.group(1).upper(), ' ')])
+
+
+def _rewrite_unit(unit):
+    interval = _interval(unit)
+    if interval is not None:
+        return interval
+    if match(unit, 0, 'CASE'):
+        return unit[:1] + rewrite(unit[1:-1]) + unit[-1:]
+    out, i = [], 0
+    while i < len(unit):
+        if is_open(unit[i]):
+            k = matching(unit, i)
+            out += [unit[i]] + rewrite(unit[i + 1:k]) + [unit[k]]
+            i = k + 1
+        else:
+            out.append(unit[i])
+            i += 1
+    return out
+
+
+def _distinct(us):
+    """a IS [NOT] DISTINCT FROM b -> NOT (a <=> b) / (a <=> b)."""
+    out, i = [], 0
+    while i < len(us):
+        u = us[i]
+        if out and match(u, 0, 'IS') and i + 3 < len(us):
+            negate = match(us[i + 1], 0, 'NOT')
+            k = i + 1 + negate
+            if match(us[k], 0, 'DISTINCT') and match(us[k + 1], 0, 'FROM') and k + 2 < len(us):
+                lhs, rhs = out.pop(), us[k + 2]
+                test = ([Tok('punct', '(', '' if negate else ' ')] + _spaced(lhs, '')
+                        + [Tok('op', '<=>', ' ')] + _spaced(rhs, ' ') + [Tok('punct', ')', '')])
+                out.append(test if negate else [Tok('word', 'NOT', lhs[0].space)] + test)
+                i = k + 3
+                continue
+        out.append(u)
+        i += 1
+    return out
+
+
+def _concat(us):
+    """a || b || c -> CONCAT(a, b, c)."""
+    out, i = [], 0
+    while i < len(us):
+        if is_operand(us[i]) and i + 2 < len(us) and us[i + 1][0].text == '||':
+            parts, j = [us[i]], i + 1
+            while j + 1 < len(us) and us[j][0].text == '||':
+                if not is_operand(us[j + 1]):
+                    raise Untranslatable('operator ||')
+                parts.append(us[j + 1])
+                j += 2
+            neighbours = (out[-1] if out else None, us[j] if j < len(us) else None)
+            if any(u is not None and u[0].text in ARITHMETIC for u in neighbours):
+                raise Untranslatable('|| next to arithmetic')
+            call = [Tok('word', 'CONCAT', parts[0][0].space), Tok('punct', '(', '')]
+            for n, part in enumerate(parts):
+                if n:
+                    call.append(Tok('punct', ',', ''))
+                call += _spaced(part, ' ' if n else '')
+            out.append(call + [Tok('punct', ')', '')])
+            i = j
+            continue
+        out.append(us[i])
+        i += 1
+    return out
+
+
+def rewrite(toks):
+    """Postgres operators pg2mysql doesn't map, rewritten into ones it does."""
+    us = [_rewrite_unit(u) for u in units(toks)]
+    return [t for u in _concat(_distinct(us)) for t in u]
+
+
+# ---------------------------------------------------------------------------
+# Triggers
+
+class TriggerContext:
+    __slots__ = ('trigger', 'event', 'label_used', 'declared')
+
+    def __init__(self, trigger, event):
+        self.trigger = trigger
+        self.event = event
+        self.label_used = False
+        self.declared = set()
+
+
+class TriggerTranslator:
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.translator = catalog.translator
+        self.names = set()
+        self.last = {}                  # (table, timing, event) -> name of the last trigger written
+
+    # -- plpgsql -----------------------------------------------------------
+
+    def parse_body(self, toks):
+        """(declarations, statements) of a plpgsql function body."""
+        declarations = []
+        i = 0
+        if match(toks, 0, 'DECLARE'):
+            b = find_top(toks, 1, 'BEGIN')
+            for part in split_top(toks[1:b], ';'):
+                if part:
+                    declarations.append(part)
+            i = b
+        if not match(toks, i, 'BEGIN'):
+            raise Untranslatable('function body')
+        items, i = self.parse_block(toks, i + 1, (('EXCEPTION',), ('END',)))
+        if match(toks, i, 'EXCEPTION'):
+            raise Untranslatable('EXCEPTION handler')
+        return declarations, items
+
+    def parse_block(self, toks, i, stops):
+        items = []
+        while i < len(toks):
+            if any(match(toks, i, *s) for s in stops):
+                return items, i
+            head = upper(toks[i])
+            if head == 'IF':
+                item, i = self.parse_if(toks, i)
+            elif head == 'CASE':
+                item, i = self.parse_case(toks, i)
+            elif head in ('LOOP', 'FOR', 'WHILE', 'FOREACH', 'PERFORM', 'EXECUTE', 'GET', 'BEGIN', 'DECLARE',
+                          'EXIT', 'CONTINUE', 'OPEN', 'FETCH', 'CLOSE', 'COMMIT', 'ROLLBACK'):
+                raise Untranslatable(f"{head} in trigger function")
+            else:
+                j = find_top(toks, i, ';')
+                j = len(toks) if j < 0 else j
+                item = self.statement(toks[i:j])
+                i = j + 1
+            if item is not None:
+                items.append(item)
+        raise Untranslatable('unterminated block')
+
+    def parse_if(self, toks, i):
+        branches = []
+        while True:
+            j = find_top(toks, i + 1, 'THEN')
+            if j < 0:
+                raise Untranslatable('IF without THEN')
+            cond = toks[i + 1:j]
+            block, i = self.parse_block(toks, j + 1, (('ELSIF',), ('ELSEIF',), ('ELSE',), ('END', 'IF')))
+            branches.append((cond, block))
+            if match(toks, i, 'ELSE'):
+                block, i = self.parse_block(toks, i + 1, (('END', 'IF'),))
+                branches.append((None, block))
+            if match(toks, i, 'END', 'IF'):
+                return ('if', branches), i + 2 + match(toks, i + 2, ';')
+
+    def parse_case(self, toks, i):
+        j = find_top(toks, i + 1, 'WHEN')
+        subject = toks[i + 1:j] or None
+        branches = []
+        while match(toks, j, 'WHEN'):
+            k = find_top(toks, j + 1, 'THEN')
+            block, j = self.parse_block(toks, k + 1, (('WHEN',), ('ELSE',), ('END', 'CASE')))
+            branches.append((toks[self._when_start(toks, k) + 1:k], block))
+        if match(toks, j, 'ELSE'):
+            block, j = self.parse_block(toks, j + 1, (('END', 'CASE'),))
+            branches.append((None, block))
+        if not match(toks, j, 'END', 'CASE'):
+            raise Untranslatable('CASE statement')
+        return ('case', subject, branches), j + 2 + match(toks, j + 2, ';')
+
+    @staticmethod
+    def _when_start(toks, then):
+        """Index of the WHEN that `then` closes."""
+        j = then - 1
+        depth = 0
+        while j >= 0:
+            if toks[j].text == ')':
+                depth += 1
+            elif toks[j].text == '(':
+                depth -= 1
+            elif depth == 0 and match(toks, j, 'WHEN'):
+                return j
+            j -= 1
+        raise Untranslatable('CASE statement')
+
+    def statement(self, toks):
+        head = upper(toks[0])
+        if head == 'NULL':
+            return None
+        if head == 'RETURN':
+            return ('return', toks[1:])
+        if head == 'RAISE':
+            level = upper(toks[1]) if len(toks) > 1 else ''
+            if level in RAISE_LEVELS:
+                return None
+            if level != 'EXCEPTION' or len(toks) != 3 or toks[2].kind != 'str' or '%' in pg_string(toks[2]):
+                raise Untranslatable('RAISE with arguments')
+            return ('raise', pg_string(toks[2]))
+        if head in ('INSERT', 'UPDATE', 'DELETE', 'SELECT', 'WITH'):
+            return ('sql', toks)
+        # target := expr / target = expr
+        k = 1
+        while k + 1 < len(toks) and toks[k].text == '.':
+            k += 2
+        if k + 1 < len(toks) and toks[k].text == ':' and toks[k + 1].text == '=':
+            return ('set', toks[:k], toks[k + 2:])
+        if k < len(toks) and toks[k].text == '=':
+            return ('set', toks[:k], toks[k + 1:])
+        raise Untranslatable(f"{head} in trigger function")
+
+    # -- rendering ---------------------------------------------------------
+
+    def expr(self, toks, ctx):
+        toks = self.substitute(toks, ctx)
+        return self.translator.expr(rewrite(toks)).strip()
+
+    def substitute(self, toks, ctx):
+        """TG_OP / TG_TABLE_NAME as literals; OLD in an INSERT and NEW in a DELETE trigger are NULL."""
+        out, i = [], 0
+        missing = {'INSERT': 'OLD', 'DELETE': 'NEW'}.get(ctx.event)
+        while i < len(toks):
+            t = toks[i]
+            u = upper(t)
+            if u == 'TG_OP':
+                out.append(Tok('str', f"'{ctx.event}'", t.space))
+            elif u in ('TG_TABLE_NAME', 'TG_RELNAME'):
+                out.append(Tok('str', f"'{ctx.trigger.table}'", t.space))
+            elif u == 'TG_ARGV' or u == 'TG_NARGS':
+                raise Untranslatable('trigger arguments')
+            elif u == missing and i + 2 < len(toks) and toks[i + 1].text == '.':
+                out.append(Tok('word', 'NULL', t.space))
+                i += 3
+                continue
+            else:
+                out.append(t)
+            i += 1
+        return out
+
+    def constant(self, cond, ctx):
+        """True / False for a condition on TG_OP alone, else None."""
+        toks = self.substitute(cond, ctx)
+        if len(toks) == 3 and toks[0].kind == 'str' and toks[2].kind == 'str' and toks[1].text in ('=', '<>', '!='):
+            return (pg_string(toks[0]) == pg_string(toks[2])) == (toks[1].text == '=')
+        if len(toks) > 3 and toks[0].kind == 'str' and match(toks, 1, 'IN') and toks[2].text == '(':
+            values = [pg_string(p[0]) for p in split_top(toks[3:matching(toks, 2)]) if len(p) == 1 and p[0].kind == 'str']
+            return pg_string(toks[0]) in values
+        return None
+
+    def render(self, items, ctx, depth, top=False):
+        lines = []
+        pad = '    ' * depth
+        for n, item in enumerate(items):
+            kind = item[0]
+            if kind == 'return':
+                self.check_return(item[1], ctx)
+                if not (top and n == len(items) - 1):
+                    ctx.label_used = True
+                    lines.append(f"{pad}LEAVE trigger_body;")
+                # Whatever follows a RETURN never runs
+                break
+            if kind == 'if':
+                chosen = None
+                kept = []
+                for cond, block in item[1]:
+                    value = self.constant(cond, ctx) if cond is not None else True
+                    if value is None:
+                        kept.append((cond, block))
+                    elif value:
+                        if not kept:
+                            chosen = block
+                        else:
+                            kept.append((None, block))
+                        break
+                if chosen is not None:
+                    returns = bool(chosen) and chosen[-1][0] == 'return'
+                    lines += self.render(chosen, ctx, depth, top and (returns or n == len(items) - 1))
+                    if returns:
+                        break
+                    continue
+                if not kept:
+                    continue
+                for k, (cond, block) in enumerate(kept):
+                    if cond is None:
+                        lines.append(f"{pad}ELSE")
+                    else:
+                        lines.append(f"{pad}{'IF' if k == 0 else 'ELSEIF'} {self.expr(cond, ctx)} THEN")
+                    lines += self.render(block, ctx, depth + 1) or [f"{pad}    DO 0;"]
+                lines.append(f"{pad}END IF;")
+            elif kind == 'case':
+                _, subject, branches = item
+                head = f"CASE {self.expr(subject, ctx)}" if subject else 'CASE'
+                lines.append(pad + head)
+                for cond, block in branches:
+                    lines.append(f"{pad}    WHEN {self.expr(cond, ctx)} THEN" if cond is not None else f"{pad}    ELSE")
+                    lines += self.render(block, ctx, depth + 2) or [f"{pad}        DO 0;"]
+                lines.append(f"{pad}END CASE;")
+            elif kind == 'set':
+                target = [t.text for t in item[1]]
+                if upper(item[1][0]) in ('NEW', 'OLD'):
+                    if ctx.trigger.timing != 'BEFORE' or upper(item[1][0]) == 'OLD':
+                        # Changing the row only means something in a BEFORE trigger
+                        continue
+                    target = ['NEW', '.', bq(ident(item[1][-1]))]
+                elif ident(item[1][0]) not in ctx.declared:
+                    raise Untranslatable(f"assignment to {''.join(target)}")
+                lines.append(f"{pad}SET {''.join(target)} = {self.expr(item[2], ctx)};")
+            elif kind == 'raise':
+                message = item[1].replace("'", "''")
+                lines.append(f"{pad}SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = '{message}';")
+            elif kind == 'sql':
+                lines += [pad + line for line in self.sql(item[1], ctx).split('\n')]
+        return lines
+
+    def check_return(self, toks, ctx):
+        value = upper(toks[0]) if toks else ''
+        if ctx.trigger.timing == 'AFTER':
+            return
+        if value == 'NULL':
+            raise Untranslatable('RETURN NULL (skip the row) in a BEFORE trigger')
+        if value not in ('NEW', 'OLD') or (value == 'OLD') != (ctx.event == 'DELETE'):
+            raise Untranslatable(f"RETURN {render(toks)} in a BEFORE {ctx.event} trigger")
+
+    def sql(self, toks, ctx):
+        toks = rewrite(self.substitute(toks, ctx))
+        head = upper(toks[0])
+        if head in ('INSERT', 'UPDATE', 'DELETE'):
+            i = 2 if head in ('INSERT', 'DELETE') else 1 + match(toks, 1, 'ONLY')
+            _, table, _ = qname(toks, i)
+            if table == ctx.trigger.table:
+                raise Untranslatable(f"{head} on the trigger's own table (MySQL error 1442)")
+        if head == 'SELECT' and find_top(toks, 0, 'INTO') < 0:
+            raise Untranslatable('SELECT without INTO')
+        results = self.translator.dispatch(toks)
+        return ';\n'.join(results) + ';'
+
+    def declaration(self, toks, ctx):
+        name = ident(toks[0])
+        i = 1 + match(toks, 1, 'CONSTANT')
+        k = i
+        while k < len(toks) and not (toks[k].text in (':', '=') or upper(toks[k]) in ('DEFAULT', 'NOT')):
+            k += 1
+        pg_type = render(toks[i:k])
+        mtype = map_type(pg_type, self.catalog.schema.enums)
+        if mtype is None or mtype.kind == 'array':
+            raise Untranslatable(f"variable of type {pg_type}")
+        default = ''
+        if match(toks, k, 'NOT', 'NULL'):
+            k += 2
+        if k < len(toks):
+            k += 2 if toks[k].text == ':' else 1
+            default = f" DEFAULT {self.expr(toks[k:], ctx)}"
+        ctx.declared.add(name)
+        return f"DECLARE {bq(name)} {mtype.sql}{default};"
+
+    # -- one trigger -------------------------------------------------------
+
+    def translate(self, trigger):
+        """[(name, event, sql)] for one Postgres trigger; raises Untranslatable."""
+        if trigger.schema in SUPABASE_SCHEMAS:
+            raise Untranslatable(f"trigger on {trigger.schema}.{trigger.table}")
+        if trigger.timing not in ('BEFORE', 'AFTER'):
+            raise Untranslatable(f"{trigger.timing} trigger")
+        if trigger.level != 'ROW':
+            raise Untranslatable(f"FOR EACH {trigger.level}")
+        if trigger.args:
+            raise Untranslatable('trigger arguments')
+        if trigger.table not in self.catalog.schema.tables:
+            raise Untranslatable(f"unknown table {trigger.table}")
+        function = self.catalog.functions.get(trigger.function)
+        if function is None:
+            raise Untranslatable(f"function {trigger.function}() not defined")
+        if function.language != 'plpgsql':
+            raise Untranslatable(f"{function.language or 'unknown'} function")
+        declarations, items = self.parse_body(significant(function.body))
+        out = []
+        for event, columns in trigger.events:
+            if event not in EVENTS:
+                raise Untranslatable(f"{event} trigger")
+            ctx = TriggerContext(trigger, event)
+            decls = [self.declaration(d, ctx) for d in declarations]
+            body = self.render(items, ctx, 1 + bool(trigger.when or columns), top=True)
+            conds = []
+            if trigger.when:
+                conds.append(self.expr(trigger.when, ctx))
+            if columns:
+                conds.append('(' + ' OR '.join(f"NOT (OLD.{bq(c)} <=> NEW.{bq(c)})" for c in columns) + ')')
+            if conds:
+                body = [f"    IF {' AND '.join(conds)} THEN"] + (body or ['        DO 0;']) + ['    END IF;']
+            out.append((event, function, ['    ' + d for d in decls] + body, ctx.label_used))
+        return out
+
+    def write(self, trigger, parts, out):
+        """Write the translated triggers of one Postgres trigger to `out`."""
+        split = len(parts) > 1
+        for event, function, body, labelled in parts:
+            name = f"{trigger.name}_{event.lower()}" if split else trigger.name
+            if name in self.names:
+                name = f"{trigger.table}_{name}"
+            name = name[:64]
+            self.names.add(name)
+            key = (trigger.table, trigger.timing, event)
+            follows = f" FOLLOWS {bq(self.last[key])}" if key in self.last else ''
+            self.last[key] = name
+            out.write(f"-- {trigger.table}.{trigger.name} ({trigger.source}:{trigger.line}), "
+                      f"function {function.name}() ({function.source}:{function.line})\n")
+            out.write(f"DROP TRIGGER IF EXISTS {bq(name)};\nDELIMITER $$\n")
+            out.write(f"CREATE TRIGGER {bq(name)} {trigger.timing} {event} ON {bq(trigger.table)}\n"
+                      f"FOR EACH ROW{follows}\n")
+            out.write(f"{'trigger_body: ' if labelled else ''}BEGIN\n")
+            for line in body:
+                out.write(line + '\n')
+            out.write('END$$\nDELIMITER ;\n\n')
+
+
+def translate_triggers(catalog, out, report):
+    translator = TriggerTranslator(catalog)
+    out.write('-- MySQL triggers translated from the plpgsql triggers of the Supabase migrations,\n'
+              '-- generated by dbmigrate.pglogic. Run after the pg2mysql script.\n\n')
+    # Postgres fires the triggers of one event in name order; FOLLOWS keeps that order
+    for trigger in sorted(catalog.triggers.values(), key=lambda t: (t.table, t.name)):
+        try:
+            parts = translator.translate(trigger)
+        except (Untranslatable, Dropped, IndexError, KeyError, ValueError) as e:
+            reason = str(e) if isinstance(e, (Untranslatable, Dropped)) else 'unexpected syntax'
+            report.untranslated_triggers.append((trigger.source, trigger.line, trigger.table, trigger.name, reason))
+            out.write(f"-- UNTRANSLATED ({reason}) trigger {trigger.table}.{trigger.name} "
+                      f"{trigger.source}:{trigger.line}\n\n")
+            continue
+        translator.write(trigger, parts, out)
+        report.triggers.append((trigger.table, trigger.name, [p[0] for p in parts]))
+
+
+# ---------------------------------------------------------------------------
+# Policies: parsing
+
+class Subquery:
+    __slots__ = ('select', 'tables', 'where')
+
+    def __init__(self, select, tables, where):
+        self.select = select            # tokens of the select list
+        self.tables = tables            # [(schema, table, alias, ON condition or None)]
+        self.where = where              # condition node or None
+
+
+class PolicyParser:
+    """
+    Recursive descent over a USING / WITH CHECK expression. Conditions are
+    ('and', [..]), ('or', [..]), ('not', c), ('exists', Subquery),
+    ('cmp', op, a, b), ('in', a, [operands] or Subquery, negated),
+    ('null', a, negated), ('like', a, pattern, negated) and a bare TRUE /
+    FALSE ('lit', value); operands are ('col', qualifier, name),
+    ('lit', value), ('uid',), ('role',) and ('now',).
+    """
+
+    def __init__(self, toks):
+        self.toks = toks
+        self.i = 0
+
+    def parse(self):
+        node = self.or_expr()
+        if self.i != len(self.toks):
+            raise Untranslatable(f"unexpected {self.toks[self.i].text}")
+        return node
+
+    def peek(self, *words):
+        return match(self.toks, self.i, *words)
+
+    def or_expr(self):
+        parts = [self.and_expr()]
+        while self.peek('OR'):
+            self.i += 1
+            parts.append(self.and_expr())
+        return parts[0] if len(parts) == 1 else ('or', parts)
+
+    def and_expr(self):
+        parts = [self.not_expr()]
+        while self.peek('AND'):
+            self.i += 1
+            parts.append(self.not_expr())
+        return parts[0] if len(parts) == 1 else ('and', parts)
+
+    def not_expr(self):
+        if self.peek('NOT') and not self.peek('NOT', 'NULL'):
+            self.i += 1
+            return ('not', self.not_expr())
+        return self.condition()
+
+    def condition(self):
+        toks = self.toks
+        if self.peek('EXISTS', '('):
+            k = matching(toks, self.i + 1)
+            sub = subquery(toks[self.i + 2:k])
+            self.i = k + 1
+            return ('exists', sub)
+        if self.peek('(') and not self.peek('(', 'SELECT'):
+            k = matching(toks, self.i)
+            node = PolicyParser(toks[self.i + 1:k]).parse()
+            self.i = k + 1
+            return node
+        a = self.operand()
+        if self.i >= len(toks):
+            if a[0] == 'col':
+                return ('cmp', '=', a, ('lit', True))
+            if a[0] == 'lit' and a[1] in (True, False):
+                return a
+            raise Untranslatable('condition')
+        t = toks[self.i]
+        if t.text in PRISMA_OPS:
+            self.i += 1
+            return ('cmp', t.text, a, self.operand())
+        negated = self.peek('NOT')
+        if negated:
+            self.i += 1
+        if self.peek('IN', '('):
+            k = matching(toks, self.i + 1)
+            inner = toks[self.i + 2:k]
+            self.i = k + 1
+            if match(inner, 0, 'SELECT'):
+                return ('in', a, subquery(inner), negated)
+            return ('in', a, [PolicyParser(p).operand_only() for p in split_top(inner)], negated)
+        if self.peek('LIKE') or self.peek('ILIKE'):
+            self.i += 1
+            return ('like', a, self.operand(), negated)
+        if self.peek('IS'):
+            self.i += 1
+            negated = self.peek('NOT')
+            self.i += negated
+            if self.peek('NULL'):
+                self.i += 1
+                return ('null', a, negated)
+            if self.peek('TRUE') or self.peek('FALSE'):
+                value = self.peek('TRUE')
+                self.i += 1
+                return ('cmp', '<>' if negated else '=', a, ('lit', value))
+        raise Untranslatable(f"operator {t.text}")
+
+    def operand_only(self):
+        node = self.operand()
+        if self.i != len(self.toks):
+            raise Untranslatable('IN list')
+        return node
+
+    def operand(self):
+        toks = self.toks
+        t = toks[self.i]
+        u = upper(t)
+        if t.kind == 'str':
+            node = ('lit', pg_string(t))
+            self.i += 1
+        elif t.kind == 'num':
+            node = ('lit', float(t.text) if '.' in t.text else int(t.text))
+            self.i += 1
+        elif u in ('TRUE', 'FALSE', 'NULL'):
+            node = ('lit', {'TRUE': True, 'FALSE': False, 'NULL': None}[u])
+            self.i += 1
+        elif t.text == '(' and match(toks, self.i + 1, 'SELECT'):
+            # (select auth.uid()), the form Supabase recommends for policies
+            k = matching(toks, self.i)
+            inner = PolicyParser(toks[self.i + 2:k])
+            node = inner.operand_only()
+            self.i = k + 1
+        elif t.kind in ('word', 'qident') and u not in NON_OPERANDS:
+            names = [ident(t)]
+            self.i += 1
+            while self.i + 1 < len(toks) and toks[self.i].text == '.' and toks[self.i + 1].kind in ('word', 'qident'):
+                names.append(ident(toks[self.i + 1]))
+                self.i += 2
+            if self.i < len(toks) and toks[self.i].text == '(':
+                k = matching(toks, self.i)
+                name = '.'.join(names)
+                if name == 'auth.uid' and k == self.i + 1:
+                    node = ('uid',)
+                elif name == 'auth.role' and k == self.i + 1:
+                    node = ('role',)
+                elif name == 'now' and k == self.i + 1:
+                    node = ('now',)
+                else:
+                    raise Untranslatable(f"function {name}()")
+                self.i = k + 1
+            else:
+                if names[0] == 'public':
+                    names = names[1:]
+                node = ('col', names[-2] if len(names) > 1 else None, names[-1])
+        else:
+            raise Untranslatable(f"operand {t.text}")
+        while self.i < len(toks) and toks[self.i].text == '::':
+            k = self.i + 1
+            while k + 1 < len(toks) and upper(toks[k + 1]) in TYPE_WORDS:
+                k += 1
+            pg_type = render(toks[self.i + 1:k + 1]).lower()
+            if pg_type not in TEXT_CASTS and not (node[0] == 'lit' and isinstance(node[1], str)):
+                raise Untranslatable(f"cast to {pg_type}")
+            self.i = k + 1
+        return node
+
+
+def subquery(toks):
+    """Subquery for `SELECT ... FROM t [alias] [JOIN u alias ON c]* [WHERE c]`."""
+    f = find_top(toks, 0, 'FROM')
+    if not match(toks, 0, 'SELECT') or f < 0:
+        raise Untranslatable('subquery')
+    w = find_top(toks, f, 'WHERE')
+    end = w if w >= 0 else len(toks)
+    for word in ('GROUP', 'ORDER', 'LIMIT', 'HAVING', 'UNION'):
+        if find_top(toks, f, word) >= 0:
+            raise Untranslatable(f"{word} in subquery")
+    tables = []
+    i = f + 1
+    on = None
+    while i < end:
+        schema, table, i = qname(toks, i)
+        alias = table
+        if match(toks, i, 'AS'):
+            i += 1
+        if i < end and toks[i].kind in ('word', 'qident') and upper(toks[i]) not in ('JOIN', 'INNER', 'ON'):
+            alias = ident(toks[i])
+            i += 1
+        if match(toks, i, 'ON'):
+            j = find_top(toks, i, 'JOIN')
+            k = min(x for x in (j, end) if x >= 0) if j >= 0 else end
+            on = PolicyParser(toks[i + 1:k]).parse()
+            i = k
+        tables.append((schema, table, alias, on))
+        on = None
+        if match(tables and toks, i, 'INNER'):
+            i += 1
+        if match(toks, i, 'JOIN'):
+            i += 1
+        elif i < end:
+            raise Untranslatable('FROM list')
+    # The ON of a JOIN belongs to the table it joins
+    where = PolicyParser(toks[w + 1:]).parse() if w >= 0 else None
+    return Subquery(toks[1:f], tables, where)
+
+
+# ---------------------------------------------------------------------------
+# Policies: compiling to Prisma where builders
+
+def js(value):
+    if value is None:
+        return 'null'
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return "'" + value.replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+
+class W:
+    """A Prisma where object (JS source)."""
+    __slots__ = ('js',)
+
+    def __init__(self, js):
+        self.js = js
+
+
+class B:
+    """A boolean known before the query runs (JS source)."""
+    __slots__ = ('js',)
+
+    def __init__(self, js):
+        self.js = js
+
+
+def where_of(part):
+    return part.js if isinstance(part, W) else f"when({part.js})"
+
+
+def all_of(parts):
+    bools = [p.js for p in parts if isinstance(p, B)]
+    wheres = [p.js for p in parts if isinstance(p, W) and p.js != 'ALL']
+    where = None
+    if len(wheres) == 1:
+        where = wheres[0]
+    elif wheres:
+        where = '{ AND: [' + ', '.join(wheres) + '] }'
+    test = ' && '.join(f"({b})" if '||' in b else b for b in bools)
+    if not bools:
+        return W(where or 'ALL')
+    if where is None:
+        return B(test)
+    return W(f"when({test}, {where})")
+
+
+def any_of(parts):
+    if all(isinstance(p, B) for p in parts):
+        return B(' || '.join(p.js for p in parts))
+    if any(isinstance(p, W) and p.js == 'ALL' for p in parts):
+        return W('ALL')
+    return W('{ OR: [' + ', '.join(where_of(p) for p in parts) + '] }')
+
+
+class Binding:
+    """A table in scope: a row level being filtered, or the user's own profiles row."""
+    __slots__ = ('kind', 'table', 'names')
+
+    def __init__(self, kind, table, names):
+        self.kind = kind                # 'row' / 'profile'
+        self.table = table
+        self.names = names
+
+
+class PolicyCompiler:
+    def __init__(self, catalog, schema):
+        self.catalog = catalog
+        self.models = {}                # table -> prisma model Block
+        if schema is not None:
+            for model in schema.models:
+                mapped = [a for a in model.attributes if a.name == 'map']
+                self.models[prisma.unquote(mapped[0].arg(None)) if mapped else model.name] = model
+
+    # -- names -------------------------------------------------------------
+
+    def columns(self, table):
+        t = self.catalog.schema.tables.get(table)
+        if t is None:
+            raise Untranslatable(f"unknown table {table}")
+        return t.columns
+
+    def resolve(self, node, scope):
+        """(binding, column) of a column reference, innermost table first."""
+        _, qualifier, name = node
+        for binding in reversed(scope):
+            if qualifier is not None and qualifier not in binding.names:
+                continue
+            if name in self.columns(binding.table):
+                return binding, name
+            if qualifier is not None:
+                raise Untranslatable(f"unknown column {binding.table}.{name}")
+        raise Untranslatable(f"unknown column {qualifier + '.' if qualifier else ''}{name}")
+
+    def relation(self, outer, outer_col, inner, inner_col):
+        """(relation field on `outer`'s model, filter) joining outer.outer_col = inner.inner_col."""
+        model = self.models.get(outer)
+        target = self.models.get(inner)
+        if model is None or target is None:
+            raise Untranslatable(f"no Prisma relation {outer} -> {inner}")
+        for f in model.fields:
+            rel = f.attribute('relation')
+            if rel is None or f.type != target.name:
+                continue
+            fields = [prisma.field_ref(x)[0] for x in prisma.list_items(rel.arg('fields', ''))]
+            refs = [prisma.field_ref(x)[0] for x in prisma.list_items(rel.arg('references', ''))]
+            if fields == [outer_col] and refs == [inner_col]:
+                return f.name, 'is'
+        # The foreign key is on the inner table: the back relation on this model
+        for f in target.fields:
+            rel = f.attribute('relation')
+            if rel is None or f.type != model.name:
+                continue
+            fields = [prisma.field_ref(x)[0] for x in prisma.list_items(rel.arg('fields', ''))]
+            refs = [prisma.field_ref(x)[0] for x in prisma.list_items(rel.arg('references', ''))]
+            if fields == [inner_col] and refs == [outer_col]:
+                name = rel.arg(None) or rel.arg('name')
+                for back in model.fields:
+                    back_rel = back.attribute('relation')
+                    back_name = back_rel and (back_rel.arg(None) or back_rel.arg('name'))
+                    if back.type == target.name and back_name == name and not (back_rel and back_rel.arg('fields')):
+                        return back.name, 'some' if back.list else 'is'
+        raise Untranslatable(f"no Prisma relation {outer}.{outer_col} -> {inner}.{inner_col}")
+
+    # -- values ------------------------------------------------------------
+
+    def value(self, node, scope):
+        """('col', binding, column) for a row column, else ('val', js source, nullable)."""
+        kind = node[0]
+        if kind == 'bound':
+            return node[1]
+        if kind == 'lit':
+            return ('val', js(node[1]), node[1] is None)
+        if kind == 'uid':
+            return ('val', 'ctx.uid', True)
+        if kind == 'now':
+            return ('val', 'new Date()', False)
+        if kind == 'role':
+            return ('val', "(ctx.uid == null ? 'anon' : 'authenticated')", False)
+        binding, column = self.resolve(node, scope)
+        if binding.kind == 'profile':
+            return ('val', f"ctx.profile?.{column}", True)
+        return ('col', binding, column)
+
+    # -- conditions --------------------------------------------------------
+
+    def compile(self, node, scope):
+        kind = node[0]
+        if kind == 'and':
+            return all_of([self.compile(n, scope) for n in node[1]])
+        if kind == 'or':
+            return any_of([self.compile(n, scope) for n in node[1]])
+        if kind == 'not':
+            part = self.compile(node[1], scope)
+            return B(f"!({part.js})") if isinstance(part, B) else W(f"{{ NOT: {part.js} }}")
+        if kind == 'cmp':
+            return self.comparison(node[1], self.value(node[2], scope), self.value(node[3], scope), scope)
+        if kind == 'null':
+            v = self.value(node[1], scope)
+            if v[0] == 'col':
+                self.current(v, scope)
+                return W(f"{{ {v[2]}: {{ not: null }} }}" if node[2] else f"{{ {v[2]}: null }}")
+            return B(f"{v[1]} {'!=' if node[2] else '=='} null")
+        if kind == 'in':
+            return self.in_list(node, scope)
+        if kind == 'like':
+            return self.like(node, scope)
+        if kind == 'exists':
+            return self.exists(node[1], [], scope)
+        if kind == 'lit' and node[1] in (True, False):
+            return B(js(node[1]))
+        raise Untranslatable(kind)
+
+    def current(self, v, scope):
+        rows = [b for b in scope if b.kind == 'row']
+        if v[1] is not rows[-1]:
+            raise Untranslatable(f"{v[1].table}.{v[2]} compared outside its subquery")
+
+    def comparison(self, op, a, b, scope):
+        if a[0] != 'col' and b[0] == 'col':
+            a, b, op = b, a, FLIPPED[op]
+        if a[0] == 'col' and b[0] == 'col':
+            raise Untranslatable('compares two columns')
+        if a[0] == 'col':
+            self.current(a, scope)
+            column, source, nullable = a[2], b[1], b[2]
+            if source == 'null':
+                return W('NONE')
+            if not nullable:
+                return W(f"{{ {column}: {source} }}" if op == '=' else f"{{ {column}: {{ {PRISMA_OPS[op]}: {source} }} }}")
+            return W(f"field('{column}', '{PRISMA_OPS[op]}', {source})")
+        if op == '=':
+            return B(f"same({a[1]}, {b[1]})")
+        if op in ('<>', '!='):
+            return B(f"!same({a[1]}, {b[1]}) && {a[1]} != null && {b[1]} != null")
+        return B(f"{a[1]} != null && {b[1]} != null && {a[1]} {op} {b[1]}")
+
+    def in_list(self, node, scope):
+        _, a, items, negated = node
+        if isinstance(items, Subquery):
+            # v IN (SELECT c FROM t WHERE w) is EXISTS (SELECT FROM t WHERE w AND c = v)
+            if negated:
+                raise Untranslatable('NOT IN (subquery)')
+            select = PolicyParser(items.select).operand_only()
+            # The left operand belongs to the outer query whatever the subquery's tables are
+            return self.exists(items, [('cmp', '=', select, ('bound', self.value(a, scope)))], scope)
+        values = [self.value(n, scope) for n in items]
+        if any(v[0] != 'val' or v[1] == 'null' for v in values):
+            raise Untranslatable('IN list')
+        listed = '[' + ', '.join(v[1] for v in values) + ']'
+        v = self.value(a, scope)
+        if v[0] == 'col':
+            self.current(v, scope)
+            return W(f"{{ {v[2]}: {{ {'notIn' if negated else 'in'}: {listed} }} }}")
+        test = f"{listed}.includes({v[1]})"
+        return B(f"{v[1]} != null && !{test}" if negated else test)
+
+    def like(self, node, scope):
+        _, a, pattern, negated = node
+        v = self.value(a, scope)
+        if v[0] != 'col' or pattern[0] != 'lit' or not isinstance(pattern[1], str):
+            raise Untranslatable('LIKE')
+        self.current(v, scope)
+        text = pattern[1]
+        inner = text.strip('%')
+        if '%' in inner or '_' in inner or not inner:
+            raise Untranslatable('LIKE pattern')
+        op = 'contains' if text.startswith('%') and text.endswith('%') else \
+            'startsWith' if text.endswith('%') else 'endsWith' if text.startswith('%') else 'equals'
+        where = f"{{ {v[2]}: {{ {op}: {js(inner)} }} }}"
+        return W(f"{{ NOT: {where} }}" if negated else where)
+
+    def exists(self, sub, extra, scope):
+        """EXISTS (sub) with `extra` conditions ANDed into its WHERE."""
+        conds = list(extra)
+        if sub.where is not None:
+            conds += sub.where[1] if sub.where[0] == 'and' else [sub.where]
+        bindings = []
+        for schema, table, alias, on in sub.tables:
+            if schema in SUPABASE_SCHEMAS:
+                raise Untranslatable(f"subquery on {schema}.{table}")
+            self.columns(table)
+            bindings.append(Binding('row', table, {table, alias}))
+            if on is not None:
+                conds += on[1] if on[0] == 'and' else [on]
+        inner_scope = scope + bindings
+        # A profiles row picked by id = auth.uid() is the user's own: read it from ctx.profile
+        for binding in bindings:
+            if binding.table != 'profiles':
+                continue
+            for cond in conds:
+                if self.picks_user(cond, binding, inner_scope):
+                    binding.kind = 'profile'
+                    conds.remove(cond)
+                    break
+        rows = [b for b in bindings if b.kind == 'row']
+        if len(rows) > 1:
+            raise Untranslatable('JOIN in subquery')
+        if not rows:
+            parts = [self.compile(c, inner_scope) for c in conds]
+            return all_of(parts + [B('ctx.profile != null')])
+        inner = rows[0]
+        outer = [b for b in scope if b.kind == 'row'][-1]
+        link = None
+        for cond in conds:
+            link = self.correlation(cond, outer, inner, inner_scope)
+            if link is not None:
+                conds.remove(cond)
+                break
+        if link is None:
+            raise Untranslatable(f"subquery on {inner.table} not correlated with {outer.table}")
+        field, how = self.relation(outer.table, link[0], inner.table, link[1])
+        parts = [self.compile(c, inner_scope) for c in conds]
+        where = all_of(parts) if parts else W('ALL')
+        if isinstance(where, B):
+            where = W(f"when({where.js})")
+        if where.js == 'ALL':
+            return W(f"{{ {field}: {{ some: {{}} }} }}" if how == 'some' else f"{{ {field}: {{ isNot: null }} }}")
+        return W(f"{{ {field}: {{ {how}: {where.js} }} }}")
+
+    def picks_user(self, cond, binding, scope):
+        if cond[0] != 'cmp' or cond[1] != '=':
+            return False
+        a, b = cond[2], cond[3]
+        if b[0] != 'uid':
+            a, b = b, a
+        if b[0] != 'uid' or a[0] != 'col':
+            return False
+        found, column = self.resolve(a, scope)
+        return found is binding and column == 'id'
+
+    def column_of(self, node, scope):
+        """(binding, column) of an operand that is a row column, else None."""
+        if node[0] == 'col':
+            return self.resolve(node, scope)
+        if node[0] == 'bound' and node[1][0] == 'col':
+            return node[1][1], node[1][2]
+        return None
+
+    def correlation(self, cond, outer, inner, scope):
+        """(outer column, inner column) when `cond` is outer.x = inner.y."""
+        if cond[0] != 'cmp' or cond[1] != '=':
+            return None
+        a = self.column_of(cond[2], scope)
+        b = self.column_of(cond[3], scope)
+        if a is None or b is None:
+            return None
+        if a[0] is inner and b[0] is outer:
+            a, b = b, a
+        if a[0] is outer and b[0] is inner:
+            return a[1], b[1]
+        return None
+
+    # -- one policy --------------------------------------------------------
+
+    def policy(self, policy, toks):
+        """The where builder (JS source) for one USING / WITH CHECK expression."""
+        if policy.schema in SUPABASE_SCHEMAS:
+            raise Untranslatable(f"policy on {policy.schema}.{policy.table}")
+        self.columns(policy.table)
+        parts = []
+        roles = set(policy.roles or ['public'])
+        if roles - {'public', 'authenticated', 'anon'}:
+            raise Untranslatable(f"role {', '.join(sorted(roles - {'public', 'authenticated', 'anon'}))}")
+        if 'public' not in roles and roles == {'authenticated'}:
+            parts.append(B('ctx.uid != null'))
+        elif 'public' not in roles and roles == {'anon'}:
+            parts.append(B('ctx.uid == null'))
+        if toks is not None:
+            scope = [Binding('row', policy.table, {policy.table})]
+            parts.append(self.compile(PolicyParser(toks).parse(), scope))
+        where = all_of(parts) if parts else W('ALL')
+        return where_of(where)
+
+
+class TableRules:
+    """The compiled policies of one table: command -> [(policy, permissive, js)] plus what failed."""
+
+    def __init__(self, table):
+        self.table = table
+        self.commands = collections.defaultdict(list)
+        self.missing = collections.defaultdict(list)     # command -> [(policy, reason)]
+
+
+def compile_policies(catalog, schema, report):
+    compiler = PolicyCompiler(catalog, schema)
+    tables = {}
+    for (table, _), policy in sorted(catalog.policies.items()):
+        if table not in catalog.rls:
+            report.not_enforced.append((policy.source, policy.line, table, policy.name))
+            continue
+        rules = tables.setdefault(table, TableRules(table))
+        commands = COMMANDS if policy.command == 'all' else (policy.command,)
+        for command in commands:
+            # WITH CHECK guards the rows written; without one USING does for UPDATE and ALL
+            if command == 'insert':
+                keys = [('insert', policy.check if policy.check is not None else policy.using)]
+            elif command == 'update':
+                keys = [('update', policy.using),
+                        ('updateCheck', policy.check if policy.check is not None else policy.using)]
+            else:
+                keys = [(command, policy.using)]
+            for key, toks in keys:
+                try:
+                    where = compiler.policy(policy, toks)
+                except (Untranslatable, IndexError, KeyError, ValueError) as e:
+                    reason = str(e) if isinstance(e, Untranslatable) else 'unexpected syntax'
+                    rules.missing[key].append((policy, reason))
+                    report.untranslated_policies.append((policy.source, policy.line, table, policy.name, key, reason))
+                    continue
+                rules.commands[key].append((policy, policy.permissive, where))
+    for table in sorted(catalog.rls - set(tables)):
+        tables[table] = TableRules(table)
+    return [tables[t] for t in sorted(tables)]
+
+
+PREDICATES_HEADER = """\
+// Generated by dbmigrate.pglogic from the RLS policies of the Supabase migrations.
+// Each builder returns the Prisma `where` a user may read (select), change
+// (update, delete) or write (insert, updateCheck: the rows as written) on one
+// table. AND it into the query's own where:
+//
+//   prisma.documents.findMany({ where: { AND: [where, rls.documents.select(ctx)] } })
+//
+// A command no policy allows, or whose policies couldn't all be translated,
+// gets a builder returning NONE: it allows nothing, as RLS does.
+
+export type RlsContext = {
+  uid: string | null;                     // auth.uid()
+  profile?: Record<string, any> | null;   // the user's own profiles row
+};
+export type Where = Record<string, any>;
+
+const ALL: Where = {};
+const NONE: Where = { OR: [] };
+const when = (test: boolean, where: Where = ALL): Where => (test ? where : NONE);
+// SQL never matches NULL: a value the user doesn't have filters out every row
+const same = (a: unknown, b: unknown): boolean => a != null && a === b;
+const field = (name: string, op: string, value: unknown): Where =>
+  value == null ? NONE : { [name]: op === 'equals' ? value : { [op]: value } };
+"""
+COMMAND_KEYS = ('select', 'insert', 'update', 'updateCheck', 'delete')
+
+
+def write_predicates(rules, out):
+    out.write(PREDICATES_HEADER)
+    out.write('\nexport const rls = {\n')
+    for table in rules:
+        out.write(f"  {table.table}: {{\n")
+        for key in COMMAND_KEYS:
+            entries = table.commands.get(key, [])
+            for policy, reason in table.missing.get(key, []):
+                out.write(f"    // {key}: \"{policy.name}\" ({policy.where}) not translated: {reason}\n")
+            permissive = [w for _, p, w in entries if p]
+            restrictive = [w for _, p, w in entries if not p]
+            if not permissive or any(not p.permissive for p, _ in table.missing.get(key, [])):
+                # Without one of its restrictive policies the builder would let more rows through
+                out.write(f"    {key}: (_ctx: RlsContext): Where => NONE,\n")
+                continue
+            names = ', '.join(f'"{p.name}"' for p, _, _ in entries)
+            where = permissive[0] if len(permissive) == 1 else '{ OR: [' + ', '.join(permissive) + '] }'
+            if restrictive:
+                where = '{ AND: [' + ', '.join([where] + restrictive) + '] }'
+            out.write(f"    // {names}\n")
+            out.write(f"    {key}: (ctx: RlsContext): Where => {where if not where.startswith('{') else f'({where})'},\n")
+        out.write('  },\n')
+    out.write('};\n')
+
+
+# ---------------------------------------------------------------------------
+# Report and driver
+
+class LogicReport:
+    def __init__(self):
+        self.triggers = []                  # (table, name, [events])
+        self.untranslated_triggers = []     # (source, line, table, name, reason)
+        self.untranslated_policies = []     # (source, line, table, name, command, reason)
+        self.not_enforced = []              # (source, line, table, name): policies on tables without RLS
+        self.policies = 0
+
+    def to_json(self, rules=()):
+        return {
+            'triggers': [dict(zip(('table', 'name', 'events'), t)) for t in self.triggers],
+            'untranslated_triggers': [dict(zip(('source', 'line', 'table', 'trigger', 'reason'), u))
+                                      for u in self.untranslated_triggers],
+            'policies': self.policies,
+            'untranslated_policies': [dict(zip(('source', 'line', 'table', 'policy', 'command', 'reason'), u))
+                                      for u in self.untranslated_policies],
+            'not_enforced': [dict(zip(('source', 'line', 'table', 'policy'), u)) for u in self.not_enforced],
+            'tables': {r.table: {key: [p.name for p, _, _ in r.commands.get(key, [])] for key in COMMAND_KEYS}
+                       for r in rules},
+        }
+
+
+def print_report(report, rules, out=sys.stderr, verbose=True):
+    written = sum(len(t[2]) for t in report.triggers)
+    print(f"Triggers: {len(report.triggers)} translated ({written} MySQL triggers), "
+          f"{len(report.untranslated_triggers)} untranslated", file=out)
+    if verbose:
+        for source, line, table, name, reason in report.untranslated_triggers:
+            print(f"  {source}:{line}  {table}.{name}  [{reason}]", file=out)
+    complete = sum(1 for r in rules if not r.missing)
+    print(f"Policies: {report.policies} on {len(rules)} RLS tables; {len(report.untranslated_policies)} "
+          f"(policy, command) pairs untranslated; {complete} tables complete", file=out)
+    if verbose:
+        for source, line, table, name, command, reason in report.untranslated_policies:
+            print(f"  {source}:{line}  {table} \"{name}\" {command}  [{reason}]", file=out)
+    if report.not_enforced:
+        print(f"{len(report.not_enforced)} policies are on tables without RLS enabled and were skipped", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='dbmigrate.pglogic', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('inputs', nargs='*', default=DEFAULT_INPUTS,
+                        help='SQL files or directories, in order (default: %(default)s)')
+    parser.add_argument('--schema', default=DEFAULT_SCHEMA,
+                        help='schema.prisma with the relations (default: %(default)s)')
+    parser.add_argument('--triggers', metavar='PATH', help="write the MySQL triggers ('-' for stdout)")
+    parser.add_argument('--predicates', metavar='PATH', help="write the TypeScript where map ('-' for stdout)")
+    parser.add_argument('--report', metavar='PATH', help='write the report as JSON')
+    parser.add_argument('-q', '--quiet', action='store_true', help="don't list what wasn't translated")
+    args = parser.parse_args(argv)
+
+    catalog = read_catalog(expand_inputs(args.inputs))
+    try:
+        schema = prisma.load(args.schema)
+    except OSError:
+        print(f"  {args.schema} not found: subqueries can't become relation filters", file=sys.stderr)
+        schema = None
+    report = LogicReport()
+    report.policies = len(catalog.policies)
+
+    if args.triggers == '-':
+        translate_triggers(catalog, sys.stdout, report)
+    elif args.triggers:
+        with open(args.triggers, 'w', encoding='utf-8', newline='\n') as out:
+            translate_triggers(catalog, out, report)
+    else:
+        translate_triggers(catalog, _Sink(), report)
+
+    rules = compile_policies(catalog, schema, report)
+    if args.predicates == '-':
+        write_predicates(rules, sys.stdout)
+    elif args.predicates:
+        with open(args.predicates, 'w', encoding='utf-8', newline='\n') as out:
+            write_predicates(rules, out)
+
+    print_report(report, rules, sys.stderr, verbose=not args.quiet)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report.to_json(rules), f, indent=2)
+            f.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,451 @@
+"""
+Parser and printer for schema.prisma.
+
+parse() turns the schema into a list of top-level items: Comment lines
+(blank lines are Comments with empty text) and Blocks (model, enum, view,
+type, datasource, generator). A Block's members are Fields, EnumValues,
+Settings, block Attributes (@@index, @@map, ...) and Comments, in file order.
+Attribute arguments are kept as (key, value) pairs with the value text
+untouched, so `@relation(fields: [a], references: [id])` can be inspected and
+rewritten without a full expression grammar.
+
+dump() prints the tree back in `prisma format` layout (aligned columns), so
+parse -> dump -> parse gives the same tree and dump is stable.
+"""
+import re
+
+BLOCK_RE = re.compile(r'^(model|enum|view|type|datasource|generator)\s+(\w+)\s*\{\s*$')
+SETTING_RE = re.compile(r'^(\w+)\s*=\s*(.+)$')
+ATTR_RE = re.compile(r'^(@@?)([\w.]+)(?:\((.*)\))?$', re.S)
+TYPE_RE = re.compile(r'^(.+?)(\[\])?(\?)?$')
+
+SCALAR_TYPES = ('String', 'Boolean', 'Int', 'BigInt', 'Float', 'Decimal', 'DateTime', 'Json', 'Bytes')
+
+
+class Comment:
+    __slots__ = ('text',)
+
+    def __init__(self, text=''):
+        self.text = text
+
+
+class Attribute:
+    """`@name(args)` on a field or enum value, `@@name(args)` on a block."""
+    __slots__ = ('name', 'args', 'block')
+
+    def __init__(self, name, args=None, block=False):
+        self.name = name
+        # None for a bare `@id`, otherwise a list of (key or None, value text)
+        self.args = args
+        self.block = block
+
+    def arg(self, key, default=None):
+        """Value of the named argument; key None is the first positional one."""
+        for k, v in self.args or ():
+            if k == key:
+                return v
+        return default
+
+    def set_arg(self, key, value):
+        args = self.args or []
+        for i, (k, _) in enumerate(args):
+            if k == key:
+                args[i] = (key, value)
+                break
+        else:
+            args.append((key, value))
+        self.args = args
+
+    def remove_arg(self, key):
+        if self.args:
+            self.args = [(k, v) for k, v in self.args if k != key]
+
+    def render(self):
+        text = ('@@' if self.block else '@') + self.name
+        if self.args is not None:
+            text += '(' + ', '.join(v if k is None else f"{k}: {v}" for k, v in self.args) + ')'
+        return text
+
+
+class Field:
+    __slots__ = ('name', 'type', 'list', 'optional', 'attributes', 'comment')
+
+    def __init__(self, name, type, list=False, optional=False, attributes=None, comment=None):
+        self.name = name
+        self.type = type
+        self.list = list
+        self.optional = optional
+        self.attributes = attributes or []
+        self.comment = comment
+
+    def type_text(self):
+        return self.type + ('[]' if self.list else '') + ('?' if self.optional else '')
+
+    def attribute(self, name):
+        for attr in self.attributes:
+            if attr.name == name:
+                return attr
+        return None
+
+    def native(self):
+        """The @db.* attribute, if any."""
+        for attr in self.attributes:
+            if attr.name.startswith('db.'):
+                return attr
+        return None
+
+    def remove(self, name):
+        self.attributes = [a for a in self.attributes if a.name != name]
+
+
+class EnumValue:
+    __slots__ = ('name', 'attributes', 'comment')
+
+    def __init__(self, name, attributes=None, comment=None):
+        self.name = name
+        self.attributes = attributes or []
+        self.comment = comment
+
+
+class Setting:
+    """`key = value` in a datasource or generator block."""
+    __slots__ = ('key', 'value', 'comment')
+
+    def __init__(self, key, value, comment=None):
+        self.key = key
+        self.value = value
+        self.comment = comment
+
+
+class Block:
+    __slots__ = ('kind', 'name', 'members')
+
+    def __init__(self, kind, name, members=None):
+        self.kind = kind
+        self.name = name
+        self.members = members or []
+
+    @property
+    def fields(self):
+        return [m for m in self.members if isinstance(m, Field)]
+
+    @property
+    def values(self):
+        return [m for m in self.members if isinstance(m, EnumValue)]
+
+    @property
+    def settings(self):
+        return [m for m in self.members if isinstance(m, Setting)]
+
+    @property
+    def attributes(self):
+        return [m for m in self.members if isinstance(m, Attribute)]
+
+    def field(self, name):
+        for m in self.members:
+            if isinstance(m, Field) and m.name == name:
+                return m
+        return None
+
+    def setting(self, key):
+        for m in self.members:
+            if isinstance(m, Setting) and m.key == key:
+                return m
+        return None
+
+    def remove(self, member):
+        self.members = [m for m in self.members if m is not member]
+
+
+class Schema:
+    def __init__(self, items=None):
+        self.items = items or []
+
+    def blocks(self, *kinds):
+        return [i for i in self.items if isinstance(i, Block) and (not kinds or i.kind in kinds)]
+
+    def block(self, kind, name=None):
+        for b in self.blocks(kind):
+            if name is None or b.name == name:
+                return b
+        return None
+
+    @property
+    def models(self):
+        return self.blocks('model', 'view')
+
+    @property
+    def enums(self):
+        """{enum name: [value, ...]}"""
+        return {b.name: [v.name for v in b.values] for b in self.blocks('enum')}
+
+    @property
+    def provider(self):
+        ds = self.block('datasource')
+        setting = ds.setting('provider') if ds else None
+        return unquote(setting.value) if setting else None
+
+
+class ParseError(ValueError):
+    def __init__(self, message, line):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+
+
+# ---------------------------------------------------------------------------
+# Value helpers
+
+def unquote(value):
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1].replace('\\"', '"').replace('\\\\', '\\')
+    return value
+
+
+def quote(text):
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def split_top(text, sep=','):
+    """Split on `sep` outside brackets and strings; parts are stripped."""
+    parts, depth, start, i, n = [], 0, 0, 0, len(text)
+    while i < n:
+        c = text[i]
+        if c == '"':
+            i += 1
+            while i < n and text[i] != '"':
+                i += 2 if text[i] == '\\' else 1
+        elif c in '([{':
+            depth += 1
+        elif c in ')]}':
+            depth -= 1
+        elif c == sep and depth == 0:
+            parts.append(text[start:i].strip())
+            start = i + 1
+        i += 1
+    last = text[start:].strip()
+    if last or parts:
+        parts.append(last)
+    return [p for p in parts if p]
+
+
+def list_items(value):
+    """`[a, b(sort: Desc)]` -> ['a', 'b(sort: Desc)']; a bare `a` -> ['a']."""
+    value = value.strip()
+    if value.startswith('[') and value.endswith(']'):
+        return split_top(value[1:-1])
+    return [value] if value else []
+
+
+def field_ref(item):
+    """'created_at(sort: Desc)' -> ('created_at', [('sort', 'Desc')])."""
+    m = re.match(r'^(\w+)\s*(?:\((.*)\))?$', item.strip(), re.S)
+    if not m:
+        return item.strip(), []
+    return m.group(1), parse_args(m.group(2)) if m.group(2) is not None else []
+
+
+def render_ref(name, args):
+    if not args:
+        return name
+    return name + '(' + ', '.join(v if k is None else f"{k}: {v}" for k, v in args) + ')'
+
+
+def parse_args(text):
+    args = []
+    for part in split_top(text):
+        m = re.match(r'^(\w+)\s*:\s*(.*)$', part, re.S)
+        if m:
+            args.append((m.group(1), m.group(2).strip()))
+        else:
+            args.append((None, part))
+    return args
+
+
+# ---------------------------------------------------------------------------
+# Parsing
+
+def split_words(line):
+    """Split a member line into words and a trailing // comment.
+
+    Parentheses, brackets and strings keep their contents in one word, so
+    `@relation(fields: [a], references: [id])` is a single word.
+    """
+    words, comment = [], None
+    i, n, depth, start = 0, len(line), 0, None
+    while i < n:
+        c = line[i]
+        if c == '"':
+            if start is None:
+                start = i
+            i += 1
+            while i < n and line[i] != '"':
+                i += 2 if line[i] == '\\' else 1
+        elif depth == 0 and line.startswith('//', i):
+            comment = line[i:].rstrip()
+            break
+        elif c in '([{':
+            if start is None:
+                start = i
+            depth += 1
+        elif c in ')]}':
+            depth -= 1
+        elif c.isspace() and depth == 0:
+            if start is not None:
+                words.append(line[start:i])
+                start = None
+        elif start is None:
+            start = i
+        i += 1
+    if start is not None:
+        words.append(line[start:i].rstrip())
+    # `@default (now())` style: glue a parenthesised word onto the one before
+    merged = []
+    for word in words:
+        if merged and word.startswith('(') and merged[-1].startswith('@') and '(' not in merged[-1]:
+            merged[-1] += word
+        else:
+            merged.append(word)
+    return merged, comment
+
+
+def parse_attribute(word, lineno):
+    m = ATTR_RE.match(word)
+    if not m:
+        raise ParseError(f"bad attribute {word!r}", lineno)
+    args = parse_args(m.group(3)) if m.group(3) is not None else None
+    return Attribute(m.group(2), args, block=m.group(1) == '@@')
+
+
+def parse_member(kind, line, lineno):
+    words, comment = split_words(line)
+    if not words:
+        return Comment(comment or '')
+    if words[0].startswith('@@'):
+        if len(words) > 1:
+            raise ParseError(f"unexpected {words[1]!r} after block attribute", lineno)
+        return parse_attribute(words[0], lineno)
+    if kind in ('datasource', 'generator'):
+        body = line[:line.rfind(comment)] if comment else line
+        m = SETTING_RE.match(body.strip())
+        if not m:
+            raise ParseError(f"expected `key = value`, got {line.strip()!r}", lineno)
+        return Setting(m.group(1), m.group(2).strip(), comment)
+    attrs = [parse_attribute(w, lineno) for w in words[1 if kind == 'enum' else 2:]]
+    if kind == 'enum':
+        return EnumValue(words[0], attrs, comment)
+    if len(words) < 2:
+        raise ParseError(f"field {words[0]!r} has no type", lineno)
+    m = TYPE_RE.match(words[1])
+    return Field(words[0], m.group(1), bool(m.group(2)), bool(m.group(3)), attrs, comment)
+
+
+def paren_depth(line):
+    depth, i, n = 0, 0, len(line)
+    while i < n:
+        c = line[i]
+        if c == '"':
+            i += 1
+            while i < n and line[i] != '"':
+                i += 2 if line[i] == '\\' else 1
+        elif line.startswith('//', i):
+            break
+        elif c in '([{':
+            depth += 1
+        elif c in ')]}':
+            depth -= 1
+        i += 1
+    return depth
+
+
+def parse(text):
+    items = []
+    block = None
+    lines = text.splitlines()
+    lineno = 0
+    while lineno < len(lines):
+        line = lines[lineno]
+        lineno += 1
+        stripped = line.strip()
+        if block is None:
+            m = BLOCK_RE.match(stripped)
+            if m:
+                block = Block(m.group(1), m.group(2))
+                items.append(block)
+            elif not stripped or stripped.startswith('//'):
+                items.append(Comment(stripped))
+            else:
+                raise ParseError(f"unexpected {stripped!r}", lineno)
+            continue
+        if stripped == '}':
+            block = None
+            continue
+        if stripped.startswith('//'):
+            block.members.append(Comment(stripped))
+            continue
+        # Arguments may run over several lines
+        start = lineno
+        while paren_depth(line) > 0 and lineno < len(lines):
+            line += ' ' + lines[lineno].strip()
+            lineno += 1
+        block.members.append(parse_member(block.kind, line, start))
+    if block is not None:
+        raise ParseError(f"unterminated {block.kind} {block.name}", lineno)
+    # Trailing blank lines are the printer's business
+    while items and isinstance(items[-1], Comment) and not items[-1].text:
+        items.pop()
+    return Schema(items)
+
+
+def load(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse(f.read())
+
+
+# ---------------------------------------------------------------------------
+# Printing
+
+def runs(members):
+    """Group consecutive aligned members; blank lines and other kinds break a run."""
+    run = []
+    for m in members:
+        if run and (type(m) is not type(run[0]) or isinstance(m, (Comment, Attribute))):
+            yield run
+            run = []
+        run.append(m)
+    if run:
+        yield run
+
+
+def dump_block(block):
+    out = [f"{block.kind} {block.name} {{"]
+    for run in runs(block.members):
+        first = run[0]
+        if isinstance(first, Field):
+            name_w = max(len(f.name) for f in run)
+            type_w = max(len(f.type_text()) for f in run)
+            for f in run:
+                attrs = ' '.join(a.render() for a in f.attributes)
+                line = f"{f.name.ljust(name_w)} {f.type_text().ljust(type_w)} {attrs}".rstrip()
+                out.append('  ' + line + (f" {f.comment}" if f.comment else ''))
+        elif isinstance(first, Setting):
+            key_w = max(len(s.key) for s in run)
+            for s in run:
+                out.append(f"  {s.key.ljust(key_w)} = {s.value}" + (f" {s.comment}" if s.comment else ''))
+        elif isinstance(first, EnumValue):
+            for v in run:
+                line = ' '.join([v.name] + [a.render() for a in v.attributes])
+                out.append('  ' + line + (f" {v.comment}" if v.comment else ''))
+        elif isinstance(first, Attribute):
+            out.append('  ' + first.render())
+        else:
+            out.append(('  ' + first.text) if first.text else '')
+    out.append('}')
+    return '\n'.join(out)
+
+
+def dump(schema):
+    out = []
+    for item in schema.items:
+        out.append(dump_block(item) if isinstance(item, Block) else item.text)
+    return '\n'.join(out) + '\n'
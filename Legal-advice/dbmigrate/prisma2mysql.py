@@ -0,0 +1,377 @@
+"""
+Convert an introspected (`prisma db pull`) Postgres schema.prisma to MySQL.
+
+    python -m dbmigrate.prisma2mysql                       # rewrite prisma/schema.prisma in place
+    python -m dbmigrate.prisma2mysql schema.prisma -o out.prisma
+    python -m dbmigrate.prisma2mysql --check               # exit 1 if a conversion is pending
+
+The conversions are transforms on the tree from dbmigrate.prisma, so each
+one touches only the attribute or type it means to (no blanket comma or
+whitespace regexes). Native column types go through dbmigrate.typemap, which
+keeps the Prisma schema in agreement with the SQL written by pg2mysql:
+uuid -> @db.Char(36), timestamptz -> @db.DateTime(6), text -> @db.Text, or
+@db.VarChar(255) where the column is part of a key.
+
+Type conversions only run while the datasource still says "postgresql"; the
+converted schema says "mysql", so a second run leaves it unchanged.
+"""
+import argparse
+import collections
+import json
+import re
+import sys
+
+from . import prisma
+from .typemap import KEY_TEXT_TYPE, map_type
+
+DEFAULT_SCHEMA = 'prisma/schema.prisma'
+
+# Postgres native type attribute -> Postgres type name for typemap
+PG_NATIVE = {
+    'Uuid': 'uuid',
+    'Text': 'text',
+    'Citext': 'citext',
+    'VarChar': 'varchar',
+    'Char': 'char',
+    'Timestamptz': 'timestamptz',
+    'Timestamp': 'timestamp',
+    'Date': 'date',
+    'Time': 'time',
+    'Timetz': 'time',
+    'SmallInt': 'smallint',
+    'Integer': 'integer',
+    'BigInt': 'bigint',
+    'Real': 'real',
+    'DoublePrecision': 'double precision',
+    'Decimal': 'numeric',
+    'Money': 'money',
+    'Boolean': 'boolean',
+    'Inet': 'inet',
+    'Json': 'json',
+    'JsonB': 'jsonb',
+    'ByteA': 'bytea',
+}
+
+# What Prisma's Postgres connector uses for a field without a native attribute
+PG_DEFAULT_TYPES = {
+    'String': 'text',
+    'Boolean': 'boolean',
+    'Int': 'integer',
+    'BigInt': 'bigint',
+    'Float': 'double precision',
+    'Decimal': 'numeric(65,30)',
+    'DateTime': 'timestamp(3)',
+    'Json': 'jsonb',
+    'Bytes': 'bytea',
+}
+
+# What Prisma's MySQL connector uses for a field without a native attribute
+MYSQL_DEFAULT_TYPES = {
+    'String': 'VARCHAR(191)',
+    'Boolean': 'BOOLEAN',
+    'Int': 'INT',
+    'BigInt': 'BIGINT',
+    'Float': 'DOUBLE',
+    'Decimal': 'DECIMAL(65,30)',
+    'DateTime': 'DATETIME(3)',
+    'Json': 'JSON',
+    'Bytes': 'LONGBLOB',
+}
+
+# MySQL type keyword -> MySQL native type attribute
+MYSQL_NATIVE = {
+    'CHAR': 'Char',
+    'VARCHAR': 'VarChar',
+    'TEXT': 'Text',
+    'SMALLINT': 'SmallInt',
+    'INT': 'Int',
+    'BIGINT': 'BigInt',
+    'BOOLEAN': 'TinyInt',
+    'FLOAT': 'Float',
+    'DOUBLE': 'Double',
+    'DECIMAL': 'Decimal',
+    'DATE': 'Date',
+    'TIME': 'Time',
+    'DATETIME': 'DateTime',
+    'JSON': 'Json',
+    'LONGBLOB': 'LongBlob',
+}
+
+DB_DEFAULTS = {
+    'gen_random_uuid()': 'uuid()',
+    'uuid_generate_v4()': 'uuid()',
+    'extensions.uuid_generate_v4()': 'uuid()',
+    'now()': 'now()',
+    'CURRENT_TIMESTAMP': 'now()',
+}
+
+POSTGRES_ONLY_SETTINGS = ('extensions', 'schemas')
+POSTGRES_ONLY_FEATURES = ('postgresqlExtensions', 'multiSchema')
+
+# Notes `prisma db pull` writes above models it couldn't fully represent
+INTROSPECTION_NOTE_RE = re.compile(r'^///\s*(This table contains|This model|This enum)')
+
+SQL_TYPE_RE = re.compile(r'^(\w+)(?:\(([^)]*)\))?$')
+
+
+class ConvertReport:
+    def __init__(self):
+        self.changes = collections.Counter()
+        self.warnings = []  # (block, field, message)
+
+    def warn(self, block, field, message):
+        self.warnings.append((block, field, message))
+
+
+def print_report(report, out=sys.stderr):
+    total = sum(report.changes.values())
+    print(f"\n{total} changes, {len(report.warnings)} warnings", file=out)
+    if report.changes:
+        print('Changes: ' + ', '.join(f"{what} ({n})" for what, n in report.changes.most_common()), file=out)
+    for block, field, message in report.warnings:
+        where = f"{block}.{field}" if field else block
+        print(f"  WARNING {where}: {message}", file=out)
+
+
+def native_attribute(sql, prisma_type):
+    """The @db.* attribute for a MySQL type, or None when it's the connector default."""
+    if sql == MYSQL_DEFAULT_TYPES.get(prisma_type):
+        return None
+    m = SQL_TYPE_RE.match(sql)
+    if not m or m.group(1) not in MYSQL_NATIVE:
+        return None
+    args = None
+    if m.group(2) is not None:
+        args = [(None, a.strip()) for a in m.group(2).split(',')]
+    return prisma.Attribute('db.' + MYSQL_NATIVE[m.group(1)], args)
+
+
+def json_value(item):
+    """A Prisma list-default item as a JSON value; bare words are enum values."""
+    try:
+        return json.loads(item)
+    except ValueError:
+        return item
+
+
+def pg_type_of(field):
+    """Postgres type name of a scalar field, from its native attribute or the connector default."""
+    native = field.native()
+    if native is None:
+        return PG_DEFAULT_TYPES.get(field.type)
+    base = PG_NATIVE.get(native.name[3:])
+    if base is None:
+        return None
+    if native.args:
+        base += '(' + ','.join(v for _, v in native.args) + ')'
+    return base
+
+
+def key_fields(model):
+    """Names of fields that end up in an index: ids, uniques, indexed and foreign key fields."""
+    keyed = set()
+    for f in model.fields:
+        if f.attribute('id') or f.attribute('unique'):
+            keyed.add(f.name)
+        relation = f.attribute('relation')
+        if relation:
+            keyed.update(prisma.field_ref(i)[0] for i in prisma.list_items(relation.arg('fields', '')))
+    for attr in model.attributes:
+        if attr.name in ('id', 'unique', 'index', 'fulltext'):
+            keyed.update(prisma.field_ref(i)[0] for i in prisma.list_items(attr.arg('fields') or attr.arg(None, '')))
+    return keyed
+
+
+# ---------------------------------------------------------------------------
+# Transforms
+
+def convert_datasource(schema, report):
+    ds = schema.block('datasource')
+    if ds is None:
+        return
+    provider = ds.setting('provider')
+    if provider is not None and prisma.unquote(provider.value) == 'postgresql':
+        provider.value = '"mysql"'
+        report.changes['provider'] += 1
+    for key in POSTGRES_ONLY_SETTINGS:
+        setting = ds.setting(key)
+        if setting is not None:
+            ds.remove(setting)
+            report.changes[f"datasource {key}"] += 1
+
+
+def convert_generators(schema, report):
+    for gen in schema.blocks('generator'):
+        setting = gen.setting('previewFeatures')
+        if setting is None:
+            continue
+        features = prisma.list_items(setting.value)
+        kept = [f for f in features if prisma.unquote(f) not in POSTGRES_ONLY_FEATURES]
+        if len(kept) == len(features):
+            continue
+        report.changes['preview feature'] += len(features) - len(kept)
+        if kept:
+            setting.value = '[' + ', '.join(kept) + ']'
+        else:
+            gen.remove(setting)
+
+
+def drop_schema_attributes(schema, report):
+    """Everything lands in the one MySQL database, so `@@schema` goes with the
+    datasource's `schemas` and the multiSchema feature (Prisma rejects it alone)."""
+    tables = collections.defaultdict(list)
+    for block in schema.blocks('model', 'view', 'enum'):
+        attr = next((a for a in block.attributes if a.name == 'schema'), None)
+        if attr is not None:
+            block.remove(attr)
+            while block.members and isinstance(block.members[-1], prisma.Comment) and not block.members[-1].text:
+                block.members.pop()     # the blank line that set it apart
+            report.changes['@@schema'] += 1
+        if block.kind != 'enum':
+            mapped = next((a for a in block.attributes if a.name == 'map'), None)
+            tables[prisma.unquote(mapped.arg(None)) if mapped else block.name].append(block.name)
+    for table, names in tables.items():
+        if len(names) > 1:
+            report.warn(names[0], None, f"models {', '.join(names)} all map to table {table}")
+
+
+def drop_introspection_notes(schema, report):
+    def keep(item):
+        if isinstance(item, prisma.Comment) and INTROSPECTION_NOTE_RE.match(item.text):
+            report.changes['introspection note'] += 1
+            return False
+        return True
+    schema.items = [i for i in schema.items if keep(i)]
+    for block in schema.blocks():
+        block.members = [m for m in block.members if keep(m)]
+
+
+def convert_default(model, field, report):
+    default = field.attribute('default')
+    value = default.arg(None) if default else None
+    if not value or not value.startswith('dbgenerated('):
+        return
+    expr = prisma.unquote(value[len('dbgenerated('):-1])
+    if expr in DB_DEFAULTS:
+        default.args = [(None, DB_DEFAULTS[expr])]
+        report.changes['db default'] += 1
+    else:
+        report.warn(model.name, field.name, f"default is a Postgres expression: {expr}")
+
+
+def convert_list(model, field, enums, report):
+    """Scalar and enum lists have no MySQL column type; they become JSON arrays."""
+    if field.type not in prisma.SCALAR_TYPES and field.type not in enums:
+        return
+    field.type, field.list, field.optional = 'Json', False, True
+    field.attributes = [a for a in field.attributes if not a.name.startswith('db.')]
+    default = field.attribute('default')
+    if default is not None:
+        items = [json_value(i) for i in prisma.list_items(default.arg(None, ''))]
+        default.args = [(None, prisma.quote(json.dumps(items, separators=(',', ':'))))]
+    report.changes['list -> Json'] += 1
+
+
+def convert_native(model, field, keyed, enums, report):
+    pg_type = pg_type_of(field)
+    if pg_type is None:
+        native = field.native()
+        if native is not None:
+            report.warn(model.name, field.name, f"no MySQL type for @{native.name}")
+        return
+    mapped = map_type(pg_type, enums)
+    if mapped is None:
+        report.warn(model.name, field.name, f"no MySQL type for {pg_type}")
+        return
+    sql = mapped.sql
+    if mapped.kind == 'text' and field.name in keyed:
+        sql = KEY_TEXT_TYPE
+    old = field.native()
+    new = native_attribute(sql, field.type)
+    if old is None and new is None:
+        return
+    attrs = [a for a in field.attributes if not a.name.startswith('db.')]
+    if new is not None:
+        attrs.append(new)
+    field.attributes = attrs
+    report.changes['native type'] += 1
+
+
+def convert_index(model, attr, json_fields, report):
+    """Postgres index options (GIN/GiST types, operator classes) don't exist in MySQL."""
+    if attr.arg('type') is not None:
+        attr.remove_arg('type')
+        report.changes['index type'] += 1
+    key = 'fields' if attr.arg('fields') is not None else None
+    items = prisma.list_items(attr.arg(key, ''))
+    refs = [prisma.field_ref(i) for i in items]
+    if any(name in json_fields for name, _ in refs):
+        # pg2mysql writes the multi-valued JSON index in SQL; Prisma can't express it
+        report.warn(model.name, None, f"@@{attr.name} on Json field dropped: {attr.render()}")
+        report.changes['index on Json'] += 1
+        return False
+    stripped = [(name, [(k, v) for k, v in args if k != 'ops']) for name, args in refs]
+    if stripped != refs:
+        attr.args = [(k, '[' + ', '.join(prisma.render_ref(n, a) for n, a in stripped) + ']' if k == key else v)
+                     for k, v in attr.args]
+        report.changes['index ops'] += 1
+    return True
+
+
+def convert_model(model, enums, report):
+    keyed = key_fields(model)
+    for field in model.fields:
+        if field.type.startswith('Unsupported('):
+            report.warn(model.name, field.name, f"{field.type} has no Prisma type")
+            continue
+        convert_default(model, field, report)
+        if field.list:
+            convert_list(model, field, enums, report)
+        elif field.type in prisma.SCALAR_TYPES:
+            convert_native(model, field, keyed, enums, report)
+    json_fields = {f.name for f in model.fields if f.type == 'Json'}
+    model.members = [m for m in model.members
+                     if not (isinstance(m, prisma.Attribute) and m.name in ('index', 'unique')
+                             and not convert_index(model, m, json_fields, report))]
+
+
+def convert(schema, report):
+    """Rewrite a Postgres schema tree for MySQL in place."""
+    from_postgres = schema.provider == 'postgresql'
+    convert_datasource(schema, report)
+    convert_generators(schema, report)
+    drop_schema_attributes(schema, report)
+    drop_introspection_notes(schema, report)
+    if not from_postgres:
+        return schema
+    enums = schema.enums
+    for model in schema.models:
+        convert_model(model, enums, report)
+    return schema
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='dbmigrate.prisma2mysql', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('schema', nargs='?', default=DEFAULT_SCHEMA, help='default: %(default)s')
+    parser.add_argument('-o', '--output', metavar='PATH', help="'-' for stdout (default: rewrite SCHEMA)")
+    parser.add_argument('--check', action='store_true', help="don't write; exit 1 if the schema would change")
+    args = parser.parse_args(argv)
+
+    with open(args.schema, 'r', encoding='utf-8') as f:
+        text = f.read()
+    report = ConvertReport()
+    result = prisma.dump(convert(prisma.parse(text), report))
+    print_report(report)
+    if args.check:
+        return 1 if report.changes else 0
+    if args.output == '-':
+        sys.stdout.write(result)
+    elif result != text or args.output:
+        with open(args.output or args.schema, 'w', encoding='utf-8', newline='\n') as f:
+            f.write(result)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
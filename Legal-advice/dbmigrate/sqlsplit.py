@@ -0,0 +1,115 @@
+"""
+Streaming SQL statement splitter and tokenizer for Postgres scripts.
+
+iter_statements() reads a script line by line and yields one Statement at a
+time, so only the statement being assembled is ever held in memory. It
+tracks quotes, E'' strings, "identifiers", $tag$ dollar quotes and comments
+across lines, so semicolons inside function bodies or strings never split a
+statement. Comments in front of a statement are dropped.
+
+tokenize() turns a single statement into tokens for the translators. Joining
+the token texts gives back the statement exactly.
+"""
+import collections
+import re
+
+Statement = collections.namedtuple('Statement', 'source line text')
+Token = collections.namedtuple('Token', 'kind text')
+
+# Start of anything that changes the splitter's state
+SPECIAL_RE = re.compile(r"--|/\*|(?<![\w$])[Ee]'|'|\"|(?<![\w$])\$(?:[A-Za-z_]\w*)?\$|;")
+# Rest of a quoted construct, from just after its opening quote
+CLOSE_RE = {
+    "'": re.compile(r"(?:[^']|'')*'(?!')"),
+    "E'": re.compile(r"(?:[^'\\]|\\.|'')*'(?!')"),
+    '"': re.compile(r'(?:[^"]|"")*"(?!")'),
+}
+
+TOKEN_RE = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<comment>--[^\n]*|/\*.*?\*/)
+  | (?P<dollar>\$\$.*?\$\$|\$(?P<tag>[A-Za-z_]\w*)\$.*?\$(?P=tag)\$)
+  | (?P<str>[Ee]'(?:[^'\\]|\\.|'')*'|'(?:[^']|'')*')
+  | (?P<qident>"(?:[^"]|"")*")
+  | (?P<num>\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+  | (?P<word>[A-Za-z_][\w$]*)
+  | (?P<param>\$\d+)
+  | (?P<op>::|<>|!=|<=|>=|\|\||->>|->|\#>>|\#>|@>|<@|&&|[-+*/%=<>!~^&|@\#?])
+  | (?P<punct>[(),;.\[\]{}:])
+""", re.S | re.X)
+
+
+def iter_statements(lines, source='<sql>'):
+    """Yield a Statement for each `;`-terminated (or trailing) statement in `lines`."""
+    buf = []
+    start = None
+    state = None  # None, a quote from CLOSE_RE, '/*' or a '$tag$' delimiter
+    for lineno, line in enumerate(lines, 1):
+        i, n = 0, len(line)
+        while i < n:
+            if state is None:
+                m = SPECIAL_RE.search(line, i)
+                chunk = line[i:m.start()] if m else line[i:]
+                if start is None and chunk.strip():
+                    start = lineno
+                if start is not None:
+                    buf.append(chunk)
+                if not m:
+                    break
+                tok = m.group()
+                i = m.end()
+                if tok == '--':
+                    if start is not None:
+                        buf.append(line[m.start():])
+                    break
+                if tok == ';':
+                    if start is not None:
+                        buf.append(';')
+                        yield Statement(source, start, ''.join(buf))
+                    buf, start = [], None
+                    continue
+                if start is None and tok != '/*':
+                    start = lineno
+                if start is not None:
+                    buf.append(tok)
+                state = "E'" if tok[0] in 'Ee' else tok
+            else:
+                if state == '/*':
+                    end = line.find('*/', i)
+                    end = -1 if end < 0 else end + 2
+                elif state.startswith('$'):
+                    end = line.find(state, i)
+                    end = -1 if end < 0 else end + len(state)
+                else:
+                    m = CLOSE_RE[state].match(line, i)
+                    end = m.end() if m else -1
+                if end < 0:
+                    if start is not None:
+                        buf.append(line[i:])
+                    break
+                if start is not None:
+                    buf.append(line[i:end])
+                i = end
+                state = None
+    if start is not None and ''.join(buf).strip():
+        yield Statement(source, start, ''.join(buf))
+
+
+def iter_file_statements(path):
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        yield from iter_statements(f, path)
+
+
+def tokenize(text):
+    """Split one statement into Tokens; unknown characters become 'op' tokens."""
+    tokens = []
+    pos, n = 0, len(text)
+    while pos < n:
+        m = TOKEN_RE.match(text, pos)
+        if not m:
+            tokens.append(Token('op', text[pos]))
+            pos += 1
+            continue
+        tokens.append(Token(m.lastgroup, m.group()))
+        pos = m.end()
+    return tokens
@@ -0,0 +1,34 @@
+--
+-- PostgreSQL database dump
+--
+
+SET statement_timeout = 0;
+SET client_encoding = 'UTF8';
+SET standard_conforming_strings = on;
+
+--
+-- Data for Name: users; Type: TABLE DATA; Schema: auth; Owner: supabase_auth_admin
+--
+
+COPY auth.users (id, email) FROM stdin;
+0b6f7d1e-3c2a-4f5e-9a1b-2c3d4e5f6aff	client@example.com
+\.
+
+
+--
+-- Data for Name: samples; Type: TABLE DATA; Schema: public; Owner: postgres
+--
+
+COPY public.samples (id, title, tags, scores, flags, meta, status, rating, weight, active, created_at, due_on, payload) FROM stdin;
+0b6f7d1e-3c2a-4f5e-9a1b-2c3d4e5f6a01	Contract review	{nda,"with space"}	{1,2,NULL}	{t,f}	{"a": 1, "note": "line1\\nline2"}	submitted	4.5	1.25	t	2026-01-09 10:15:00.123456+05:30	2026-02-01	\\x00ff10
+0b6f7d1e-3c2a-4f5e-9a1b-2c3d4e5f6a02	tab\there	{}	\N	\N	\N	draft	NaN	Infinity	f	infinity	-infinity	\N
+0b6f7d1e-3c2a-4f5e-9a1b-2c3d4e5f6a03	back\\slash\nnew line	{"quote \\"q\\""}	{-3}	{f}	[]	closed	-0.5	-Infinity	t	2026-03-01 23:30:00-04	2026-03-01	\\x
+\.
+
+
+INSERT INTO public.samples (id, title, tags, scores, flags, meta, status, rating, weight, active, created_at, due_on, payload) VALUES ('0b6f7d1e-3c2a-4f5e-9a1b-2c3d4e5f6a04', 'it''s inserted', '{a,b}', '{7}', NULL, '{"k": null}', 'submitted', 10.0, -1.5e3, true, '2026-01-09 00:00:00+00', '2026-01-09', '\x41');
+
+
+--
+-- PostgreSQL database dump complete
+--
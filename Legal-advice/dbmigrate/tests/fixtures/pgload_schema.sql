@@ -0,0 +1,18 @@
+-- Table the pgload tests load pgload_dump.sql into
+CREATE TYPE public.request_status AS ENUM ('draft', 'submitted', 'closed');
+
+CREATE TABLE public.samples (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    title text NOT NULL,
+    tags text[] DEFAULT '{}',
+    scores integer[],
+    flags boolean[],
+    meta jsonb,
+    status public.request_status DEFAULT 'draft',
+    rating numeric(3,1),
+    weight double precision,
+    active boolean DEFAULT true,
+    created_at timestamptz DEFAULT now(),
+    due_on date,
+    payload bytea
+);
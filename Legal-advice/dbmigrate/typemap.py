@@ -0,0 +1,115 @@
+"""
+Postgres -> MySQL column type mapping.
+
+One table shared by the migration translator, the Prisma schema transforms
+and the data loader, so a uuid column is CHAR(36) everywhere and a text[]
+column is JSON everywhere. map_type() returns the MySQL type plus a coarse
+`kind` the callers use to pick defaults, index prefixes and value
+conversions.
+"""
+import collections
+import re
+
+UUID_TYPE = 'CHAR(36)'
+DATETIME_TYPE = 'DATETIME(6)'
+# TEXT can't be part of a key without a prefix length; keyed text becomes this
+KEY_TEXT_TYPE = 'VARCHAR(255)'
+
+MySQLType = collections.namedtuple('MySQLType', 'sql kind auto_increment')
+
+# Postgres base type -> (MySQL type, kind)
+SIMPLE_TYPES = {
+    'uuid': (UUID_TYPE, 'uuid'),
+    'text': ('TEXT', 'text'),
+    'citext': ('TEXT', 'text'),
+    'name': ('VARCHAR(63)', 'string'),
+    'smallint': ('SMALLINT', 'int'),
+    'int2': ('SMALLINT', 'int'),
+    'integer': ('INT', 'int'),
+    'int': ('INT', 'int'),
+    'int4': ('INT', 'int'),
+    'bigint': ('BIGINT', 'int'),
+    'int8': ('BIGINT', 'int'),
+    'boolean': ('BOOLEAN', 'bool'),
+    'bool': ('BOOLEAN', 'bool'),
+    'real': ('FLOAT', 'float'),
+    'float4': ('FLOAT', 'float'),
+    'double precision': ('DOUBLE', 'float'),
+    'float8': ('DOUBLE', 'float'),
+    'float': ('DOUBLE', 'float'),
+    'money': ('DECIMAL(19,4)', 'decimal'),
+    'date': ('DATE', 'date'),
+    'time': ('TIME(6)', 'time'),
+    'time without time zone': ('TIME(6)', 'time'),
+    'timestamp': (DATETIME_TYPE, 'datetime'),
+    'timestamp without time zone': (DATETIME_TYPE, 'datetime'),
+    # MySQL has no zoned datetime; values are stored normalized to UTC
+    'timestamptz': (DATETIME_TYPE, 'datetimetz'),
+    'timestamp with time zone': (DATETIME_TYPE, 'datetimetz'),
+    'json': ('JSON', 'json'),
+    'jsonb': ('JSON', 'json'),
+    'inet': ('VARCHAR(45)', 'string'),
+    'cidr': ('VARCHAR(49)', 'string'),
+    'macaddr': ('VARCHAR(17)', 'string'),
+    'bytea': ('LONGBLOB', 'binary'),
+    'interval': ('VARCHAR(64)', 'interval'),
+}
+
+SERIAL_TYPES = {
+    'smallserial': 'SMALLINT',
+    'serial': 'INT',
+    'serial4': 'INT',
+    'bigserial': 'BIGINT',
+    'serial8': 'BIGINT',
+}
+
+TYPE_RE = re.compile(r"""
+    ^(?P<base>[a-z_][a-z0-9_ ]*?)
+    \s*(?:\(\s*(?P<args>[0-9 ,]*)\s*\))?
+    (?P<tz>\s+with(?:out)?\s+time\s+zone)?
+    (?P<array>(?:\s*\[\s*\d*\s*\])+|\s+array)?$
+""", re.X)
+
+
+def normalize(pg_type):
+    pg_type = ' '.join(pg_type.strip().lower().replace('"', '').split())
+    if pg_type.startswith(('public.', 'pg_catalog.')):
+        pg_type = pg_type.split('.', 1)[1]
+    return pg_type
+
+
+def enum_sql(values):
+    return 'ENUM(' + ', '.join("'" + v.replace("'", "''") + "'" for v in values) + ')'
+
+
+def map_type(pg_type, enums=None):
+    """
+    Map a Postgres type name ("uuid", "TEXT[]", "numeric(15, 2)",
+    "timestamp with time zone", an enum name in `enums`) to a MySQLType.
+    Returns None for types with no MySQL counterpart (tsvector, ranges, ...).
+    """
+    m = TYPE_RE.match(normalize(pg_type))
+    if not m:
+        return None
+    base = m.group('base').strip()
+    args = [a.strip() for a in (m.group('args') or '').split(',') if a.strip()]
+    if m.group('tz'):
+        base += ' ' + ' '.join(m.group('tz').split())
+    if m.group('array'):
+        return MySQLType('JSON', 'array', False)
+
+    if enums and base in enums:
+        return MySQLType(enum_sql(enums[base]), 'enum', False)
+    if base in SERIAL_TYPES:
+        return MySQLType(SERIAL_TYPES[base], 'int', True)
+    if base in ('varchar', 'character varying'):
+        return MySQLType(f"VARCHAR({args[0] if args else 255})", 'string', False)
+    if base in ('char', 'character', 'bpchar'):
+        return MySQLType(f"CHAR({args[0] if args else 1})", 'string', False)
+    if base in ('numeric', 'decimal'):
+        # Unconstrained numeric gets MySQL's widest DECIMAL
+        return MySQLType(f"DECIMAL({','.join(args) if args else '65,30'})", 'decimal', False)
+    if base in SIMPLE_TYPES:
+        sql, kind = SIMPLE_TYPES[base]
+        return MySQLType(sql, kind, False)
+    return None
@@ -4,10 +4,14 @@ DEFINITIVE cleanup:
    from every file (both correct and incorrect placements)
 2. Then add exactly ONE correct declaration per function that needs it
 """
-import os
 import re
 
-ROOT_DIRS = ['app', 'components', 'lib']
+from codemod import main, outline, rule
+
+DECL_RE = re.compile(r'\n?\s*const supabase = (?:await )?createClient\(\);\s*')
+# An injected declaration already opening the body
+INJECTED_RE = re.compile(r'\s*\n\s*const supabase')
+
 SKIP_FILES = ['shim.ts', 'client-shim.ts', 'server.ts', 'client.ts', 'prisma.ts',
               'auth.ts', 'auth.config.ts', 'middleware.ts', 'test-supabase.ts',
               'supabase-proxy']
@@ -19,72 +23,38 @@ def should_skip(fp):
     return False
 
 
-def fix_file(filepath):
-    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-        content = f.read()
-    original = content
-
+@rule('definitive_fix', skip=should_skip, needles=['supabase.', 'const supabase'])
+def fix_file(content, filepath):
     if 'supabase.' not in content and 'const supabase' not in content:
-        return False
+        return content
 
-    is_client = content[:100].find("'use client'") != -1 or content[:100].find('"use client"') != -1
-    decl_re = re.compile(r'\n?\s*const supabase = (?:await )?createClient\(\);\s*')
+    is_client = outline.directive(content) == 'use client'
 
     # Step 1: Remove ALL existing supabase declarations
-    content = decl_re.sub('', content)
+    content = DECL_RE.sub('', content)
 
     # Step 2: Re-add ONE correct declaration per exported function that uses supabase
     if 'supabase.' not in content:
-        # No more usage after stripping → just write clean content
-        if content != original:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(content)
-            return True
-        return False
+        # No more usage after stripping → just return clean content
+        return content
 
+    parsed = outline.of(content, filepath)
     if is_client:
-        # Client: find where last import ends, add module-level const (shared by all hooks)
-        lines = content.split('\n')
-        last_import = 0
-        for i, l in enumerate(lines):
-            s = l.strip()
-            if s.startswith('import ') or s.startswith("'use ") or s.startswith('"use '):
-                last_import = i
-        # Insert after last import
-        lines.insert(last_import + 1, '\nconst supabase = createClient();')
-        content = '\n'.join(lines)
-    else:
-        # Server: inject inside each exported async function body (after the opening {)
-        def inject_in_fn(m):
-            return m.group(0) + '\n  const supabase = await createClient();'
-
-        prev = None
-        while prev != content:
-            prev = content
-            content = re.sub(
-                r'(export\s+async\s+function\s+\w+[^{]*\{)(?!\s*\n\s*const supabase)',
-                inject_in_fn,
-                content,
-                count=0
-            )
+        # Client: add a module-level const after the imports (shared by all hooks)
+        at = parsed.imports_end
+        return content[:at] + '\nconst supabase = createClient();\n' + content[at:]
 
-    if content != original:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
-        return True
-    return False
+    # Server: inject inside each exported async function body (after the opening {).
+    # The body spans come from the outline, so a `{` in the parameters or in a
+    # `Promise<{ ... }>` return type is never mistaken for the body.
+    for fn in reversed(parsed.exported_functions(is_async=True, default=False)):
+        brace = fn.body[0]
+        if INJECTED_RE.match(content, brace + 1):
+            continue
+        content = content[:brace + 1] + '\n  const supabase = await createClient();' + content[brace + 1:]
 
+    return content
 
-changed = 0
-for d in ROOT_DIRS:
-    for root, dirs, files in os.walk(d):
-        dirs[:] = [x for x in dirs if x not in ('node_modules', '.next', 'generated')]
-        for fname in files:
-            if fname.endswith(('.ts', '.tsx')):
-                fp = os.path.join(root, fname)
-                if should_skip(fp):
-                    continue
-                if fix_file(fp):
-                    changed += 1
 
-print(f"Fixed {changed} files")
+if __name__ == '__main__':
+    main(['definitive_fix'])
@@ -2,17 +2,13 @@
 Final fix: Remove supabase declarations that were incorrectly placed 
 inside import braces {} or metadata objects.
 """
-import os
 import re
 
-ROOT_DIRS = ['app', 'components', 'lib']
+from codemod import main, rule
 
-def fix_file(filepath):
-    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-        content = f.read()
-
-    original = content
 
+@rule('fix_import_injection', needles=['supabase'])
+def fix_file(content, filepath):
     # Remove bad injections inside import { ... } blocks
     content = re.sub(
         r'(import\s+\{[^}]*?)\n\s*const supabase = (?:await )?createClient\(\);\s*\n',
@@ -55,21 +51,8 @@ def fix_file(filepath):
                 count=1
             )
 
-    if content != original:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
-        return True
-    return False
+    return content
 
-changed = 0
-for d in ROOT_DIRS:
-    for root, dirs, files in os.walk(d):
-        dirs[:] = [x for x in dirs if x not in ('node_modules', '.next', 'generated')]
-        for fname in files:
-            if fname.endswith(('.ts', '.tsx')):
-                fp = os.path.join(root, fname)
-                if fix_file(fp):
-                    changed += 1
-                    print(f"  Fixed: {fp}")
 
-print(f"\nTotal: {changed}")
+if __name__ == '__main__':
+    main(['fix_import_injection'])
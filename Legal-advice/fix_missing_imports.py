@@ -1,148 +1,102 @@
-import os
-import re
+from codemod import main, rule, symbols
+from codemod.imports import add_import, parse_imports
+from codemod.ruletable import RuleTable, Sub
 
-ROOT_DIRS = ['app', 'components', 'lib']
+# Imported by Fix 1 / Fix 3, which know the client/server split
+SPECIAL_NAMES = {'createClient', 'auth', 'useSession'}
 
-def fix_file(filepath):
-    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-        content = f.read()
+SESSION_FIXES = RuleTable([
+    # -------------------------------------------------------------------
+    # Fix 4: Remove broken `const { data: {...} } = { data: { user: (await auth())?.user }, error: null };`
+    # Replace with simple pattern
+    # -------------------------------------------------------------------
+    Sub(
+        r'const\s*\{[^}]+\}\s*=\s*\{\s*data:\s*\{\s*user:\s*\(await auth\(\)\)\?\.user\s*\},\s*error:\s*null\s*\};\s*\n',
+        'const session = await auth();\n  const user = session?.user;\n',
+        needles=['(await auth())?.user']
+    ),
+
+    # -------------------------------------------------------------------
+    # Fix 5: Clean up double user declarations when session already set
+    # Pattern: `const user = session?.user;\n      const user = userData?.user;`
+    # -------------------------------------------------------------------
+    Sub(
+        r'(const user = session\?\.user;\n)\s*const user = userData\?\.user;\n',
+        r'\1',
+        needles=['const user = userData?.user;\n']
+    ),
+])
+
+
+def import_missing_names(content, filepath):
+    """Import every name the file uses but doesn't bind, if the symbol index knows its module."""
+    index = symbols.get_index()
+    own_module = symbols.module_path(filepath)
+    imports = parse_imports(content)
+    for name in symbols.missing_names(content, imports, known=index.by_name):
+        if name in SPECIAL_NAMES:
+            continue
+        found = index.resolve(name)
+        if found is None or found[0] == own_module:
+            continue
+        module, kind = found
+        content = add_import(content, name, module, default=kind == 'default')
+    return content
 
-    original = content
+
+@rule('fix_missing_imports')
+def fix_file(content, filepath):
+    declared = symbols.declared_names(content)
+    is_client_file = "'use client'" in content or '"use client"' in content
 
     # -------------------------------------------------------------------
     # Fix 1: Files that still use `supabase.from(...)` but the variable
     # `supabase` was deleted by the previous cleanup script.
-    # If supabase.from appears but `createClient` import is missing, add it.
+    # If supabase.from appears but `createClient` isn't imported, add it
+    # (into the existing import from that module, if any).
     # -------------------------------------------------------------------
     has_supabase_usage = 'supabase.' in content or 'supabase\n' in content
-    has_createclient_import = 'createClient' in content
-    is_client_file = "'use client'" in content or '"use client"' in content
 
-    if has_supabase_usage and not has_createclient_import:
-        # Add the appropriate import at the top after 'use server' or 'use client'
+    if has_supabase_usage and 'createClient' not in declared:
         if is_client_file:
-            import_line = "import { createClient } from '@/lib/supabase/client';\n"
+            content = add_import(content, 'createClient', '@/lib/supabase/client')
         else:
-            import_line = "import { createClient } from '@/lib/supabase/server';\n"
-
-        # Insert after 'use server'/'use client' directive if present
-        content = re.sub(
-            r"(^'use (server|client)';\n)",
-            r"\1" + import_line,
-            content,
-            count=1,
-            flags=re.MULTILINE
-        )
-        # If no directive, add at top
-        if import_line not in content:
-            content = import_line + content
+            content = add_import(content, 'createClient', '@/lib/supabase/server')
 
     # -------------------------------------------------------------------
     # Fix 2: Add `const supabase = createClient();` at the beginning of
     # async functions that use `supabase.` but don't declare it
     # -------------------------------------------------------------------
-    if 'supabase.' in content and 'const supabase' not in content:
-        # Pattern: inside async function body, add supabase declaration
-        # Find all async function bodies that contain supabase usage
-        def add_supabase_to_fn(match):
-            fn_body = match.group(0)
-            if 'supabase.' in fn_body and 'const supabase' not in fn_body:
-                # Add after the opening brace
-                fn_body = fn_body.replace('{\n', '{\n  const supabase = await createClient();\n', 1)
-            return fn_body
-        
-        # Match async function bodies
-        content = re.sub(
-            r'(async\s+function\s+\w+[^{]*\{)',
-            lambda m: m.group(0),
-            content
-        )
-        
-        # Simpler approach: if file still has supabase. but no const supabase, 
-        # add it after the imports section
-        if 'supabase.' in content and 'const supabase' not in content:
-            # Add supabase declaration right after the last import line
-            lines = content.split('\n')
-            last_import_idx = 0
-            for i, line in enumerate(lines):
-                if line.startswith('import ') or line.startswith("'use ") or line.startswith('"use '):
-                    last_import_idx = i
-            
-            # Don't add at top level for server actions - they need it inside functions
-            # Instead, just ensure the import is there (already done above)
-            pass
+    # Handled by smart_inject, which knows where function bodies are.
 
     # -------------------------------------------------------------------
     # Fix 3: Fix `Cannot find name 'auth'` - files that have auth() calls
     # without importing it
     # -------------------------------------------------------------------
     has_auth_usage = 'await auth()' in content or "= await auth()" in content
-    has_auth_import = "from '@/auth'" in content or 'from "@/auth"' in content
 
-    if has_auth_usage and not has_auth_import:
+    if has_auth_usage and 'auth' not in declared:
         if is_client_file:
             # Client components should use useSession from next-auth/react
-            content = re.sub(
-                r"(^'use client';\n)",
-                r"\1import { useSession } from 'next-auth/react';\n",
-                content,
-                count=1,
-                flags=re.MULTILINE
-            )
+            content = add_import(content, 'useSession', 'next-auth/react')
         else:
             # Server component/action - import auth
-            import_auth = "import { auth } from '@/auth';\n"
-            if import_auth not in content:
-                content = re.sub(
-                    r"(^'use server';\n)",
-                    r"\1" + import_auth,
-                    content,
-                    count=1,
-                    flags=re.MULTILINE
-                )
-                if import_auth not in content:
-                    content = import_auth + content
+            content = add_import(content, 'auth', '@/auth')
 
     # -------------------------------------------------------------------
-    # Fix 4: Remove broken `const { data: {...} } = { data: { user: (await auth())?.user }, error: null };`
-    # Replace with simple pattern
+    # Fix 4 / Fix 5: see SESSION_FIXES
     # -------------------------------------------------------------------
-    content = re.sub(
-        r'const\s*\{[^}]+\}\s*=\s*\{\s*data:\s*\{\s*user:\s*\(await auth\(\)\)\?\.user\s*\},\s*error:\s*null\s*\};\s*\n',
-        'const session = await auth();\n  const user = session?.user;\n',
-        content
-    )
+    content = SESSION_FIXES.apply(content)
 
     # -------------------------------------------------------------------
-    # Fix 5: Clean up double user declarations when session already set
-    # Pattern: `const user = session?.user;\n      const user = userData?.user;`
+    # Fix 6: `Cannot find name 'Eye'` / `'useEffect'` / ... - any other
+    # name used but never imported, looked up in the symbol index
+    # (codemod.symbols) and merged into the matching import clause.
     # -------------------------------------------------------------------
-    content = re.sub(
-        r'(const user = session\?\.user;\n)\s*const user = userData\?\.user;\n',
-        r'\1',
-        content
-    )
-    content = re.sub(
-        r'(const user = _session\?\.user;\n)',
-        'const user = _session?.user;\n',
-        content
-    )
-
-    if content != original:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
-        return True
-    return False
-
-changed = 0
-for d in ROOT_DIRS:
-    for root, dirs, files in os.walk(d):
-        dirs[:] = [x for x in dirs if x not in ('node_modules', '.next', 'generated')]
-        for fname in files:
-            if fname.endswith(('.ts', '.tsx')):
-                fp = os.path.join(root, fname)
-                if fix_file(fp):
-                    changed += 1
-                    print(f"  Fixed: {fp}")
-
-print(f"\nTotal files modified: {changed}")
+    content = import_missing_names(content, filepath)
+
+    return content
+
+
+if __name__ == '__main__':
+    main(['fix_missing_imports'])
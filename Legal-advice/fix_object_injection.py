@@ -2,9 +2,11 @@
 Final targeted fix: Remove supabase declarations from inside object literals 
 (useState, interface bodies, etc.)
 """
-import os
+import io
 import re
 
+from codemod import main, rule
+
 PROBLEM_FILES = [
     'app/(dashboard)/bank/profile/BankProfileContent.tsx',
     'app/(dashboard)/case/[id]/CaseClarifications.tsx',
@@ -14,9 +16,9 @@ PROBLEM_FILES = [
 
 DECL_PATTERN = re.compile(r'\s*const supabase = (?:await )?createClient\(\);\s*\n')
 
-def fix_object_injections(filepath):
-    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-        lines = f.readlines()
+@rule('fix_object_injection', paths=PROBLEM_FILES, needles=['const supabase = '])
+def fix_object_injections(content, filepath):
+    lines = io.StringIO(content).readlines()
 
     new_lines = []
     in_object_literal = 0  # track depth of object literals
@@ -74,16 +76,9 @@ def fix_object_injections(filepath):
                 content,
                 count=1
             )
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
-        return True
-    return False
 
-changed = 0
-for fp in PROBLEM_FILES:
-    if fix_object_injections(fp):
-        changed += 1
-        print(f"  Fixed: {fp}")
+    return content
+
 
-print(f"\nTotal: {changed}")
+if __name__ == '__main__':
+    main(['fix_object_injection'])
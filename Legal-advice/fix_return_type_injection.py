@@ -1,14 +1,10 @@
-import os
 import re
 
-ROOT_DIRS = ['app', 'components', 'lib']
+from codemod import main, rule
 
-def fix_file(filepath):
-    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-        content = f.read()
-
-    original = content
 
+@rule('fix_return_type_injection', needles=['supabase'])
+def fix_file(content, filepath):
     # Pattern: `const supabase = await createClient(); success: boolean; ...}>` 
     # inside return type annotations. Remove the bad injection.
     content = re.sub(
@@ -38,21 +34,8 @@ def fix_file(filepath):
             count=1
         )
 
-    if content != original:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
-        return True
-    return False
-
-changed = 0
-for d in ROOT_DIRS:
-    for root, dirs, files in os.walk(d):
-        dirs[:] = [x for x in dirs if x not in ('node_modules', '.next', 'generated')]
-        for fname in files:
-            if fname.endswith(('.ts', '.tsx')):
-                fp = os.path.join(root, fname)
-                if fix_file(fp):
-                    changed += 1
-                    print(f"  Fixed: {fp}")
-
-print(f"\nTotal files modified: {changed}")
+    return content
+
+
+if __name__ == '__main__':
+    main(['fix_return_type_injection'])
@@ -1,17 +1,13 @@
-import os
 import re
 
-ROOT_DIRS = ['app', 'components', 'lib']
+from codemod import main, rule
 
-def fix_file(filepath):
-    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-        content = f.read()
-
-    original = content
 
+@rule('inject_supabase', needles=['supabase.'])
+def fix_file(content, filepath):
     # Only process files that a) use supabase. and b) DON'T have const supabase declared
     if 'supabase.' not in content:
-        return False
+        return content
     
     is_client_file = "'use client'" in content or '"use client"' in content
     
@@ -48,21 +44,8 @@ def fix_file(filepath):
             content
         )
 
-    if content != original:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
-        return True
-    return False
+    return content
 
-changed = 0
-for d in ROOT_DIRS:
-    for root, dirs, files in os.walk(d):
-        dirs[:] = [x for x in dirs if x not in ('node_modules', '.next', 'generated')]
-        for fname in files:
-            if fname.endswith(('.ts', '.tsx')):
-                fp = os.path.join(root, fname)
-                if fix_file(fp):
-                    changed += 1
-                    print(f"  Fixed: {fp}")
 
-print(f"\nTotal files modified: {changed}")
+if __name__ == '__main__':
+    main(['inject_supabase'])
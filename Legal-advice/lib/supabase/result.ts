@@ -0,0 +1,35 @@
+// Supabase-style `{ data, error }` results for direct Prisma calls.
+// supabase_to_prisma.py wraps the queries it rewrites in these, so the
+// destructuring and `if (error)` checks at the call sites keep working.
+
+export async function asResult<T>(query: Promise<T>): Promise<{ data: T; error: any }> {
+    try {
+        return { data: await query, error: null };
+    } catch (error) {
+        return { data: null as unknown as T, error };
+    }
+}
+
+export async function asCount(query: Promise<number>): Promise<{ data: null; count: number | null; error: any }> {
+    try {
+        return { data: null, count: await query, error: null };
+    } catch (error) {
+        return { data: null, count: null, error };
+    }
+}
+
+// One query's result as the supabase-proxy route returns it; codemod/fanout.py
+// types the server actions it generates with this.
+export type QueryResult = { data: any; error: any; count?: number | null };
+
+// A query that throws settles as the proxy route reported it, `{ data: null, error: message }`,
+// so one failing query of a generated server action doesn't reject the others. The shim's
+// then() rejects with `{ data: null, error: e }`; the route read e.message off execute().
+export async function settled(query: PromiseLike<QueryResult>): Promise<QueryResult> {
+    try {
+        return await query;
+    } catch (rejection: any) {
+        const error = rejection?.error ?? rejection;
+        return { data: null, error: error?.message || 'Server proxy error' };
+    }
+}
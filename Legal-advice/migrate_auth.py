@@ -1,55 +1,56 @@
-import os
-import re
+from codemod import main, rule
+from codemod.ruletable import RuleTable, Sub
 
-def migrate_file(filepath):
-    with open(filepath, 'r') as f:
-        content = f.read()
-        
-    orig_content = content
+# Never ran over lib/ (that is where the supabase clients live)
+ROOT_DIRS = ['app', 'components']
 
+
+def skip_outside_root_dirs(filepath):
+    return filepath.replace('\\', '/').split('/', 1)[0] not in ROOT_DIRS
+
+
+AUTH_MIGRATION = RuleTable([
     # 1. Replace server imports
-    content = re.sub(
+    Sub(
         r"import\s*\{\s*createClient\s*\}\s*from\s*['\"]@/lib/supabase/server['\"];?",
         "import { auth } from '@/auth';\nimport prisma from '@/lib/prisma';",
-        content
-    )
+        needles=['@/lib/supabase/server']
+    ),
 
     # 2. Replace standard getUser initialization
-    content = re.sub(
+    Sub(
         r"const\s+supabase\s*=\s*await\s+createClient\(\s*\);?\s*const\s*\{\s*data:\s*\{\s*user\s*\}\s*,?\s*\}\s*=\s*await\s+supabase\.auth\.getUser\(\s*\);?",
         "const session = await auth();\n  const user = session?.user;",
-        content
-    )
+        needles=['supabase.auth.getUser(']
+    ),
 
     # 3. Replace standalone getUser where supabase was initialized earlier
-    content = re.sub(
+    Sub(
         r"const\s*\{\s*data:\s*\{\s*user\s*\}\s*,?\s*\}\s*=\s*await\s+supabase\.auth\.getUser\(\s*\);?",
         "const session = await auth();\n  const user = session?.user;",
-        content
-    )
+        needles=['supabase.auth.getUser(']
+    ),
 
     # 4. Same for when they alias the user maybe? Let's fix remaining basic createClient() calls
-    content = re.sub(
+    Sub(
         r"const\s+supabase\s*=\s*await\s+createClient\(\s*\);?",
         "",
-        content
-    )
+        needles=['createClient(']
+    ),
     
     # Fix the case where the user relies heavily on `supabase.auth.getUser()`. 
-    content = re.sub(
+    Sub(
         r"\(await supabase\.auth\.getUser\(\)\)\.data\.user",
         "(await auth())?.user",
-        content
-    )
+        needles=['(await supabase.auth.getUser()).data.user']
+    ),
+])
+
 
-    if orig_content != content:
-        with open(filepath, 'w') as f:
-            f.write(content)
+@rule('migrate_auth', skip=skip_outside_root_dirs, needles=AUTH_MIGRATION.needles)
+def migrate_file(content, filepath):
+    return AUTH_MIGRATION.apply(content)
 
-for dir_to_scan in ['app', 'components']:
-    for root, _, files in os.walk(dir_to_scan):
-        for file in files:
-            if file.endswith('.ts') or file.endswith('.tsx'):
-                migrate_file(os.path.join(root, file))
 
-print("Auth migration script completed.")
+if __name__ == '__main__':
+    main(['migrate_auth'], default_dirs=ROOT_DIRS)
@@ -0,0 +1,80 @@
+"""
+Run adjacent independent reads concurrently with one Promise.all.
+
+    python parallelize_awaits.py             # rewrite
+    python parallelize_awaits.py --dry-run   # preview as a patch
+
+    const { data: rating } = await (await __getSupabaseClient()).from('ratings')...;
+    const { data: requests } = await (await __getSupabaseClient()).from('document_requests')...;
+->
+    const [{ data: rating }, { data: requests }] = await Promise.all([
+      (await __getSupabaseClient()).from('ratings')...,
+      (await __getSupabaseClient()).from('document_requests')...,
+    ]);
+
+Only the groups codemod.roundtrips marks fixable are touched: adjacent
+`const ... = await <query>;` statements in one block, all reads, none using
+a name another declares. Comments between them move into the array.
+Run `python -m codemod.roundtrips` for the full report, including the loops
+and write groups that need a human.
+"""
+import re
+
+from codemod import main, outline, roundtrips, rule
+from codemod.querychain import skip_quoted, skip_template
+
+COMMENT_RE = re.compile(r'//[^\n]*|/\*[\s\S]*?\*/')
+
+
+def indent_of(content, pos):
+    line_start = content.rfind('\n', 0, pos) + 1
+    return re.match(r'[ \t]*', content[line_start:]).group()
+
+
+def indent_expression(text, extra='  '):
+    """Indent the continuation lines of `text`, leaving the inside of template literals alone."""
+    out = []
+    i = last = 0
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c in '\'"':
+            i = skip_quoted(text, i)
+        elif c == '`':
+            i = skip_template(text, i)
+        elif c == '\n':
+            out.append(text[last:i + 1] + extra)
+            last = i = i + 1
+        else:
+            i += 1
+    out.append(text[last:])
+    return ''.join(out)
+
+
+def rewrite_group(content, group):
+    indent = indent_of(content, group[0].call.start)
+    patterns = ', '.join(s.pattern for s in group)
+    items = []
+    for prev, stmt in zip([None] + group[:-1], group):
+        if prev is not None:
+            for comment in COMMENT_RE.findall(content[prev.end:stmt.start]):
+                items.append(f"{indent}  {comment}")
+        items.append(f"{indent}  {indent_expression(content[stmt.call.start:stmt.call.end])},")
+    head = content[group[0].start:group[0].call.start]
+    lead = head[:len(head) - len(head.lstrip())]
+    return f"{lead}const [{patterns}] = await Promise.all([\n" + '\n'.join(items) + f"\n{indent}]);"
+
+
+@rule('parallelize_awaits', needles=['await'])
+def fix_file(content, filepath):
+    if 'await' not in content or '.from' not in content and 'prisma' not in content:
+        return content
+    tree = outline.tree_of(content, filepath)
+    groups = [g for g in roundtrips.sequential_groups(content, tree) if roundtrips.fixable(g)]
+    for group in reversed(groups):
+        content = content[:group[0].start] + rewrite_group(content, group) + content[group[-1].end:]
+    return content
+
+
+if __name__ == '__main__':
+    main(['parallelize_awaits'])
@@ -1,11 +1,12 @@
 """
-Smarter supabase injection: Uses AST-like line-by-line analysis to find function 
-bodies and inject supabase after the opening brace when supabase. is used inside.
-"""
-import os
-import re
+Smarter supabase injection: lexes the file once into a scope tree (codemod/tslex.py, shared via codemod.outline)
+and injects supabase at the top of the outermost function body that uses `supabase.`
+without having it in scope.
 
-ROOT_DIRS = ['app', 'components', 'lib']
+Only real function bodies are targeted, so the declaration can no longer end up in
+object literals, type literals, import braces or parameter lists.
+"""
+from codemod import main, outline, rule
 
 # Files that already have supabase declared (skip them)
 SKIP_PATTERNS = [
@@ -19,86 +20,53 @@ def should_skip(filepath):
             return True
     return False
 
-def inject_supabase_in_functions(filepath):
-    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-        lines = f.readlines()
 
-    is_client = any("'use client'" in l or '"use client"' in l for l in lines[:3])
-    decl = '  const supabase = createClient();\n' if is_client else '  const supabase = await createClient();\n'
-
-    # Check if file uses supabase at all
-    content = ''.join(lines)
-    if 'supabase.' not in content:
-        return False
-    if 'const supabase' in content:
-        # Already declared somewhere, check if enough declarations
-        decl_count = content.count('const supabase')
-        usage_funcs = len(re.findall(r'(export\s+(?:async\s+)?function|export\s+default\s+function|=\s*async\s*\()', content))
-        # if there are roughly as many declarations as async functions, skip
-        if decl_count >= max(1, usage_funcs // 2):
-            return False
+def injection_target(scope, is_client):
+    """Outermost enclosing function (async for server files, where the client is awaited)."""
+    functions = scope.functions()
+    if not is_client:
+        functions = [f for f in functions if f.is_async]
+    return functions[-1] if functions else None
 
-    # Parse line by line to find function opening braces and inject
-    new_lines = []
-    i = 0
-    brace_depth = 0
-    in_function = False
-    injected_at_depths = set()
 
-    while i < len(lines):
-        line = lines[i]
-        stripped = line.strip()
+def insert_after_brace(content, scope, statement):
+    brace = scope.start
+    line_start = content.rfind('\n', 0, brace) + 1
+    line_end = content.find('\n', brace)
+    if line_end == -1:
+        line_end = len(content)
+    if content[brace + 1:line_end].strip():
+        # One-line body: `{ return x; }`
+        return content[:brace + 1] + ' ' + statement + content[brace + 1:]
+    header = content[line_start:brace]
+    indent = header[:len(header) - len(header.lstrip())] + '  '
+    return content[:line_end + 1] + indent + statement + '\n' + content[line_end + 1:]
 
-        # Detect function start patterns
-        is_fn_start = bool(re.match(
-            r'(export\s+)?(default\s+)?(async\s+)?function\s+\w|'
-            r'=\s*async\s*\(',
-            stripped
-        ))
 
-        # Count braces
-        opens = line.count('{')
-        closes = line.count('}')
-        
-        new_lines.append(line)
+@rule('smart_inject', skip=should_skip, needles=['supabase.'])
+def inject_supabase_in_functions(content, filepath):
+    # Check if file uses supabase at all
+    if 'supabase.' not in content:
+        return content
 
-        if opens > closes:
-            brace_depth += opens - closes
-            # If this line opens a function body (has { at end or within it)
-            # and we haven't injected at this depth yet
-            if '{' in line and brace_depth not in injected_at_depths:
-                # Check if the upcoming function body contains supabase usage
-                # Look ahead up to 200 lines
-                future_block = ''.join(lines[i+1:min(i+200, len(lines))])
-                if 'supabase.' in future_block.split('\n')[0:100] or \
-                   any('supabase.' in fl for fl in future_block.split('\n')[:100]):
-                    new_lines.append(decl)
-                    injected_at_depths.add(brace_depth)
-        elif closes > opens:
-            brace_depth -= closes - opens
-            if brace_depth < 0:
-                brace_depth = 0
+    head = '\n'.join(content.split('\n', 3)[:3])
+    is_client = "'use client'" in head or '"use client"' in head
+    decl = 'const supabase = createClient();' if is_client else 'const supabase = await createClient();'
 
-        i += 1
+    tree = outline.tree_of(content, filepath)
+    targets = {}
+    for _, scope in tree.uses_of('supabase'):
+        if scope.is_declared('supabase'):
+            continue
+        target = injection_target(scope, is_client)
+        if target is not None:
+            targets[target.start] = target
 
-    new_content = ''.join(new_lines)
-    if new_content != content:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(new_content)
-        return True
-    return False
+    # Insert bottom-up so earlier offsets stay valid
+    for start in sorted(targets, reverse=True):
+        content = insert_after_brace(content, targets[start], decl)
+    return content
 
-changed = 0
-for d in ROOT_DIRS:
-    for root, dirs, files in os.walk(d):
-        dirs[:] = [x for x in dirs if x not in ('node_modules', '.next', 'generated')]
-        for fname in files:
-            if fname.endswith(('.ts', '.tsx')):
-                fp = os.path.join(root, fname)
-                if should_skip(fp):
-                    continue
-                if inject_supabase_in_functions(fp):
-                    changed += 1
-                    print(f"  Fixed: {fp}")
 
-print(f"\nTotal files modified: {changed}")
+if __name__ == '__main__':
+    main(['smart_inject'])
@@ -0,0 +1,568 @@
+"""
+Compile supabase query chains into direct Prisma calls.
+
+    python supabase_to_prisma.py             # rewrite, then list the chains left in place
+    python supabase_to_prisma.py --dry-run   # preview as a patch
+
+Every `.from('<table>').select().eq().order().limit().single()` style chain
+on a server file becomes the Prisma call the runtime shim
+(lib/supabase/shim.ts) would have made, but with a real `select`
+projection built from the select string:
+
+    (await __getSupabaseClient()).from('profiles').select('role, firm_id').eq('id', user.id).single()
+    ->  asResult(prisma.profiles.findFirst({ where: { id: user.id }, select: { role: true, firm_id: true } }))
+
+asResult() (lib/supabase/result.ts) keeps the `{ data, error }` shape, so call
+sites are untouched. Updates whose rows aren't read become a single
+updateMany instead of the shim's updateMany + findMany; deletes become
+deleteMany (Prisma's delete errors when no row matches, Supabase doesn't)
+unless the row is read back with .single().
+
+Models, columns and relations are checked against prisma/schema.prisma.
+Chains that can't be compiled exactly (client components, tables without a
+model, unknown columns, dynamic filters, aliased embeds, ...) are left as
+they are and listed with the reason after the run.
+"""
+import os
+import re
+import sys
+
+from codemod import main, rule
+from codemod.engine import PROJECT_ROOT, ROOT_DIRS, iter_source_files, read_source
+from codemod.querychain import STAR, ChainError, Column, find_chains, line_of, parse_select, string_value
+from dbmigrate import prisma as prisma_schema
+
+SCHEMA_PATH = os.path.join(PROJECT_ROOT, 'prisma', 'schema.prisma')
+
+SKIP_PATTERNS = ['lib/supabase/', 'lib/prisma.ts', 'lib/generated/']
+
+PRISMA_IMPORT = "import prisma from '@/lib/prisma';"
+RESULT_IMPORT_RE = re.compile(r"import\s*\{([^}]*)\}\s*from\s*['\"]@/lib/supabase/result['\"];?")
+PRISMA_IMPORT_RE = re.compile(r"^\s*import\s+prisma\s+from\s", re.M)
+IMPORT_RE = re.compile(r"^import\s[\s\S]*?(?:from\s*)?['\"][^'\"\n]+['\"];?[ \t]*$", re.M)
+DIRECTIVE_RE = re.compile(r"^\s*['\"]use (?:client|server)['\"];?[ \t]*$", re.M)
+# `const { data: x, error } = await` right before the chain
+DESTRUCTURE_RE = re.compile(r"(?:const|let|var)\s*\{([^{}]*)\}\s*=\s*await\s*$")
+STATEMENT_AWAIT_RE = re.compile(r"(?:^|[;{}])\s*await\s*$")
+# What may come right before a chain: awaited, returned or handed to Promise.all & co.
+CONSUMED_RE = re.compile(r"(?:\bawait|\breturn|=>|[(\[,])\s*$")
+SIMPLE_EXPR_RE = re.compile(r"^[\w$.'\"?!\[\]]+$")
+IDENT_RE = re.compile(r'^[A-Za-z_$][\w$]*$')
+
+FILTERS = ('eq', 'neq', 'in', 'not', 'ilike', 'or', 'contains')
+MODIFIERS = ('order', 'limit', 'range', 'single', 'maybeSingle')
+
+
+class Untranslatable(Exception):
+    pass
+
+
+def should_skip(filepath):
+    path = filepath.replace(os.sep, '/')
+    return any(p in path for p in SKIP_PATTERNS)
+
+
+def is_client_file(content):
+    head = '\n'.join(content.split('\n', 3)[:3])
+    return "'use client'" in head or '"use client"' in head
+
+
+# ---------------------------------------------------------------------------
+# Schema
+
+class Model:
+    def __init__(self, block, model_names):
+        self.name = block.name
+        self.columns = []
+        self.scalars = set()
+        self.unique = set()
+        self.relations = {}  # field name -> (target model, [fk columns])
+        for f in block.fields:
+            relation = f.attribute('relation')
+            # a 1:1 back relation (`ratings ratings?`) has neither @relation nor a list
+            if relation is not None or f.type in model_names:
+                fields = [prisma_schema.field_ref(i)[0]
+                          for i in prisma_schema.list_items(relation.arg('fields', ''))] if relation else []
+                self.relations[f.name] = (f.type, fields)
+                continue
+            self.columns.append(f.name)
+            self.scalars.add(f.name)
+            if f.attribute('id') or f.attribute('unique'):
+                self.unique.add(f.name)
+
+
+_models = None
+
+
+def models():
+    global _models
+    if _models is None:
+        schema = prisma_schema.load(SCHEMA_PATH)
+        names = {b.name for b in schema.models}
+        _models = {b.name: Model(b, names) for b in schema.models}
+    return _models
+
+
+def model_for(table):
+    model = models().get(table)
+    if model is None:
+        raise Untranslatable(f"no Prisma model for '{table}'")
+    return model
+
+
+def check_column(model, column):
+    if column not in model.scalars:
+        raise Untranslatable(f"'{column}' is not a column of {model.name}")
+    return column
+
+
+# ---------------------------------------------------------------------------
+# Building Prisma arguments
+
+def js_object(entries):
+    """[(key, value text)] -> `{ key: value, ... }`."""
+    if not entries:
+        return '{}'
+    return '{ ' + ', '.join(f"{k if IDENT_RE.match(k) else repr(k)}: {v}" for k, v in entries) + ' }'
+
+
+def js_string(value):
+    return "'" + value.replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+
+def literal_arg(call, i, what):
+    value = string_value(call.args[i]) if len(call.args) > i else None
+    if value is None:
+        raise Untranslatable(f"{what} of .{call.name}() is not a string literal")
+    return value
+
+
+def filter_value(raw):
+    """A value from an or() filter string, converted like the shim's parseValue()."""
+    if raw == 'null':
+        return 'null'
+    if raw in ('true', 'false'):
+        return raw
+    if re.match(r'^-?\d+(\.\d+)?$', raw):
+        return raw
+    return js_string(raw)
+
+
+def or_segment(model, segment):
+    """`col.op.value` (value may be a `${expr}` substitution) -> (column, condition text)."""
+    m = re.match(r'^(\w+)\.(eq|ilike|cs|in|is)\.(.*)$', segment.strip(), re.S)
+    if not m:
+        raise Untranslatable(f"or() segment '{segment.strip()}'")
+    column, op, raw = check_column(model, m.group(1)), m.group(2), m.group(3)
+    sub = re.match(r'^\$\{([\s\S]+)\}$', raw)
+    if '${' in raw and not sub:
+        raise Untranslatable(f"or() segment '{segment.strip()}'")
+    if op == 'eq':
+        return column, sub.group(1).strip() if sub else filter_value(raw)
+    if op == 'is' and raw == 'null':
+        return column, 'null'
+    if sub:
+        raise Untranslatable(f"or() '{op}' with a substitution")
+    if op == 'ilike':
+        return column, ilike_filter(raw, js_string(raw.strip('%')))
+    if op == 'cs':
+        items = raw[1:-1].split(',') if raw.startswith('{') and raw.endswith('}') else [raw]
+        return column, js_object([('array_contains', '[' + ', '.join(js_string(i.strip()) for i in items if i.strip()) + ']')])
+    if op == 'in':
+        items = raw[1:-1].split(',') if raw.startswith('(') and raw.endswith(')') else raw.split(',')
+        return column, js_object([('in', '[' + ', '.join(filter_value(i.strip()) for i in items) + ']')])
+    raise Untranslatable(f"or() segment '{segment.strip()}'")
+
+
+def or_clauses(model, arg):
+    text = arg.strip()
+    if text.startswith('`') and text.endswith('`'):
+        body = text[1:-1]
+    else:
+        body = string_value(text)
+        if body is None:
+            raise Untranslatable('or() filter is not a literal')
+    segments = split_filter(body)
+    return [js_object([or_segment(model, s)]) for s in segments if s.strip()]
+
+
+def split_filter(body):
+    """Split an or() filter on top-level commas, keeping `${...}` and `in.(...)` intact."""
+    parts, depth, start = [], 0, 0
+    for i, c in enumerate(body):
+        if c in '({':
+            depth += 1
+        elif c in ')}':
+            depth -= 1
+        elif c == ',' and depth == 0:
+            parts.append(body[start:i])
+            start = i + 1
+    parts.append(body[start:])
+    return parts
+
+
+ILIKE_FILTERS = {(True, True): 'contains', (False, True): 'startsWith',
+                 (True, False): 'endsWith', (False, False): 'equals'}
+
+
+def ilike_filter(pattern, value):
+    """`{ contains: value }` and so on, by where `pattern` has its `%` anchors."""
+    inner = pattern[pattern.startswith('%'):len(pattern) - pattern.endswith('%')]
+    if '%' in inner or '_' in inner:
+        raise Untranslatable(f"ilike pattern '{pattern}'")
+    return js_object([(ILIKE_FILTERS[pattern.startswith('%'), pattern.endswith('%')], value)])
+
+
+def ilike_condition(arg):
+    literal = string_value(arg)
+    if literal is not None:
+        return ilike_filter(literal, js_string(literal.strip('%')))
+    m = re.match(r'^`(%?)\$\{([^`]*)\}(%?)`$', arg.strip())
+    if m and '${' not in m.group(2):
+        return ilike_filter(m.group(1) + 'x' + m.group(3), m.group(2).strip())
+    # where a variable pattern has its wildcards isn't known until it runs
+    raise Untranslatable('ilike pattern is not a literal')
+
+
+def select_entries(model, items, path=''):
+    """Select items -> Prisma `select` entries, or None for a bare `*`."""
+    entries = []
+    star = False
+    for item in items:
+        if item is STAR:
+            star = True
+        elif isinstance(item, Column):
+            if item.alias:
+                raise Untranslatable(f"aliased column '{item.alias}:{item.name}' in select")
+            entries.append((check_column(model, item.name), 'true'))
+        else:
+            entries.append(embed_entry(model, item, path))
+    if star:
+        embeds = [e for e in entries if e[1] != 'true']
+        if not embeds:
+            return None
+        # `*, rel(...)`: Prisma's select has no "all scalars", so spell them out
+        return [(c, 'true') for c in model.columns] + embeds
+    return entries
+
+
+def embed_entry(model, embed, path):
+    if embed.hint == 'inner':
+        raise Untranslatable(f"inner join on '{embed.key}'")
+    field = resolve_relation(model, embed)
+    if embed.key != field:
+        raise Untranslatable(f"embed '{embed.key}' would come back as '{field}'")
+    target = model_for(model.relations[field][0])
+    inner = select_entries(target, embed.items, path + field + '.')
+    return field, 'true' if inner is None else js_object([('select', js_object(inner))])
+
+
+def resolve_relation(model, embed):
+    """Relation field of `model` an embed refers to: by target table, FK column or FK constraint name."""
+    target, hint = embed.target, embed.hint
+    if target in model.scalars:
+        # lawyer:assigned_lawyer_id(...) embeds through a FK column
+        matches = [f for f, (_, cols) in model.relations.items() if cols == [target]]
+    else:
+        matches = [f for f, (t, _) in model.relations.items() if t == target]
+        if hint and len(matches) > 1:
+            column = hint[len(model.name) + 1:-len('_fkey')] if hint.endswith('_fkey') else hint
+            matches = [f for f in matches if model.relations[f][1] == [column]]
+    if len(matches) != 1:
+        what = 'no' if not matches else 'an ambiguous'
+        raise Untranslatable(f"{what} relation for embed '{embed.key}' on {model.name}")
+    return matches[0]
+
+
+# ---------------------------------------------------------------------------
+# Chain -> Prisma call
+
+class Query:
+    def __init__(self, model):
+        self.model = model
+        self.op = 'select'
+        self.data = None
+        self.select = None      # Prisma select entries, None for all columns
+        self.returning = False  # insert/update followed by .select()
+        self.where = {}         # column -> condition text (later eq() wins, as in the shim)
+        self.ors = []
+        self.order = []
+        self.take = None
+        self.skip = None
+        self.single = False
+        self.count = None
+
+    def where_text(self):
+        entries = list(self.where.items())
+        if self.ors and entries:
+            return js_object([('AND', '[' + js_object(entries) + ']'), ('OR', '[' + ', '.join(self.ors) + ']')])
+        if self.ors:
+            return js_object([('OR', '[' + ', '.join(self.ors) + ']')])
+        return js_object(entries) if entries else None
+
+    def args(self, *extra, select=True):
+        entries = []
+        where = self.where_text()
+        if where:
+            entries.append(('where', where))
+        entries.extend(e for e in extra if e)
+        if select and self.select:
+            entries.append(('select', js_object(self.select)))
+        return js_object(entries) if entries else ''
+
+
+def build_query(chain):
+    if chain.table is None:
+        raise Untranslatable('table is not a string literal')
+    if not chain.calls:
+        raise Untranslatable('the chain continues in another statement')
+    model = model_for(chain.table)
+    query = Query(model)
+    for i, call in enumerate(chain.calls):
+        name = call.name
+        if name == 'select':
+            if i > 0 and query.op == 'select':
+                raise Untranslatable('.select() after a filter')
+            if query.op != 'select':
+                query.returning = True
+            fields = literal_arg(call, 0, 'the select string') if call.args else '*'
+            if len(call.args) > 1:
+                options = dict(re.findall(r'(\w+)\s*:\s*([\'"]?\w+[\'"]?)', call.args[1]))
+                if set(options) - {'count', 'head'}:
+                    raise Untranslatable(f"select options {call.args[1]}")
+                query.count = options.get('count')
+                if query.count and options.get('head') != 'true':
+                    raise Untranslatable('count together with rows')
+            try:
+                query.select = select_entries(model, parse_select(fields))
+            except ChainError as e:
+                raise Untranslatable(str(e))
+        elif name in ('insert', 'update'):
+            if i != 0 or len(call.args) != 1:
+                raise Untranslatable(f".{name}() with {len(call.args)} arguments")
+            query.op, query.data = name, call.args[0]
+        elif name == 'delete':
+            if i != 0 or call.args:
+                raise Untranslatable('.delete() with arguments')
+            query.op = 'delete'
+        elif name in FILTERS:
+            add_filter(query, call)
+        elif name in MODIFIERS:
+            add_modifier(query, call)
+        else:
+            raise Untranslatable(f".{name}() has no shim equivalent")
+    return query
+
+
+def add_filter(query, call):
+    model = query.model
+    name, args = call.name, call.args
+    if name == 'or':
+        if len(args) != 1:
+            raise Untranslatable('.or() with options')
+        query.ors.extend(or_clauses(model, args[0]))
+        return
+    if len(args) < 2:
+        raise Untranslatable(f".{name}() with {len(args)} arguments")
+    column = literal_arg(call, 0, 'the column')
+    if '.' in column:
+        raise Untranslatable(f"filter on embedded column '{column}'")
+    check_column(model, column)
+    if name == 'eq':
+        query.where[column] = args[1]
+    elif name == 'neq':
+        query.where[column] = js_object([('not', args[1])])
+    elif name == 'in':
+        query.where[column] = js_object([('in', args[1])])
+    elif name == 'contains':
+        query.where[column] = js_object([('array_contains', args[1])])
+    elif name == 'ilike':
+        query.where[column] = ilike_condition(args[1])
+    elif name == 'not':
+        operator = string_value(args[1])
+        if len(args) != 3 or operator not in ('is', 'eq') or (operator == 'is' and args[2] != 'null'):
+            raise Untranslatable(f".not() with operator {args[1]}")
+        query.where[column] = js_object([('not', args[2])])
+
+
+def add_modifier(query, call):
+    name, args = call.name, call.args
+    if name in ('single', 'maybeSingle'):
+        query.single = True
+    elif name == 'limit':
+        query.take = args[0]
+    elif name == 'range':
+        start, end = args
+        if start.isdigit() and end.isdigit():
+            query.skip, query.take = start, str(int(end) - int(start) + 1)
+        else:
+            query.skip, query.take = start, f"({end}) - ({start}) + 1"
+    elif name == 'order':
+        column = check_column(query.model, literal_arg(call, 0, 'the column'))
+        direction = "'asc'"
+        if len(args) > 1:
+            m = re.match(r'^\{\s*ascending\s*:\s*(true|false)\s*,?\s*\}$', args[1])
+            if not m:
+                raise Untranslatable(f"order options {args[1]}")
+            direction = "'desc'" if m.group(1) == 'false' else "'asc'"
+        query.order.append(js_object([(column, direction)]))
+
+
+def data_is_used(content, chain):
+    """False when the awaited result is destructured without `data` or discarded."""
+    line_start = content.rfind('\n', 0, max(chain.start - 300, 0)) + 1
+    before = content[line_start:chain.start]
+    m = DESTRUCTURE_RE.search(before)
+    if m:
+        names = [p.split(':')[0].strip() for p in m.group(1).split(',')]
+        return 'data' in names or any(n.startswith('...') for n in names)
+    return not STATEMENT_AWAIT_RE.search(before)
+
+
+def compile_chain(content, chain):
+    """The Prisma expression replacing `chain`, or raise Untranslatable."""
+    if not CONSUMED_RE.search(content[max(chain.start - 300, 0):chain.start]):
+        # A builder that isn't awaited never runs (or is extended later); a Promise
+        # would run eagerly, so leave these for a human
+        raise Untranslatable('chain is not awaited')
+    query = build_query(chain)
+    model = 'prisma.' + query.model.name
+    used = data_is_used(content, chain)
+
+    if query.op == 'select':
+        if query.count:
+            return f"asCount({model}.count({query.args(select=False)}))"
+        order = ('orderBy', query.order[0] if len(query.order) == 1 else '[' + ', '.join(query.order) + ']') \
+            if query.order else None
+        take = ('take', query.take) if query.take is not None else None
+        skip = ('skip', query.skip) if query.skip is not None else None
+        method = 'findFirst' if query.single else 'findMany'
+        return f"asResult({model}.{method}({query.args(order, take, skip)}))"
+
+    if query.order or query.take is not None or query.ors:
+        raise Untranslatable(f"order/limit/or() on .{query.op}()")
+
+    if query.op == 'insert':
+        if query.where:
+            raise Untranslatable('filter on .insert()')
+        data = query.data
+        if data.startswith('['):
+            if used:
+                raise Untranslatable('rows of a bulk insert are used')
+            return f"asResult({model}.createMany({js_object([('data', data)])}))"
+        if not data.startswith('{'):
+            raise Untranslatable('.insert() of a variable (object or array?)')
+        return f"asResult({model}.create({query.args(('data', data), select=query.returning)}))"
+
+    where = query.where_text()
+    if not where:
+        raise Untranslatable(f".{query.op}() without a filter")
+    keys = set(query.where)
+
+    if query.op == 'update':
+        data = ('data', query.data)
+        if query.single:
+            if len(keys) != 1 or not keys <= query.model.unique:
+                raise Untranslatable('.update().single() on a non-unique filter')
+            return f"asResult({model}.update({query.args(data, select=query.returning)}))"
+        if not used:
+            return f"asResult({model}.updateMany({query.args(data, select=False)}))"
+        if not all(SIMPLE_EXPR_RE.match(v) for v in query.where.values()):
+            raise Untranslatable('updated rows are read back with a complex filter')
+        find = js_object([('where', where)] + ([('select', js_object(query.select))] if query.select else []))
+        return (f"asResult({model}.updateMany({query.args(data, select=False)})"
+                f".then(() => {model}.findMany({find})))")
+
+    # delete: Prisma's delete throws (P2025) when no row matches, where Supabase
+    # returns no error; only .single(), which reads the row back, gets that
+    if query.single:
+        if keys != {'id'}:
+            raise Untranslatable('.delete().single() on a non-unique filter')
+        return f"asResult({model}.delete({query.args(select=query.returning)}))"
+    if used:
+        return f"asResult({model}.deleteMany({query.args(select=False)}).then(() => []))"
+    return f"asResult({model}.deleteMany({query.args(select=False)}))"
+
+
+def translate_chains(content, filepath):
+    """Yield (chain, replacement or None, reason or None) for every chain in the file."""
+    client = is_client_file(content)
+    for chain in find_chains(content):
+        if client:
+            yield chain, None, 'client component (Prisma is server-only)'
+            continue
+        try:
+            yield chain, compile_chain(content, chain), None
+        except Untranslatable as e:
+            yield chain, None, str(e)
+
+
+# ---------------------------------------------------------------------------
+# Imports
+
+def add_imports(content, helpers):
+    """Make sure `prisma` and the result helpers are imported."""
+    m = RESULT_IMPORT_RE.search(content)
+    if m:
+        have = {n.strip() for n in m.group(1).split(',') if n.strip()}
+        if not helpers <= have:
+            names = ', '.join(sorted(have | helpers))
+            content = content[:m.start()] + f"import {{ {names} }} from '@/lib/supabase/result';" + content[m.end():]
+        lines = []
+    else:
+        lines = [f"import {{ {', '.join(sorted(helpers))} }} from '@/lib/supabase/result';"]
+    if not PRISMA_IMPORT_RE.search(content):
+        lines.insert(0, PRISMA_IMPORT)
+    if not lines:
+        return content
+    anchor = 0
+    for m in IMPORT_RE.finditer(content):
+        anchor = m.end()
+    if not anchor:
+        d = DIRECTIVE_RE.search(content[:200])
+        anchor = d.end() if d else 0
+    block = '\n'.join(lines)
+    if anchor == 0:
+        return block + '\n' + content
+    return content[:anchor] + '\n' + block + content[anchor:]
+
+
+@rule('supabase_to_prisma', skip=should_skip, needles=['.from'])
+def fix_file(content, filepath):
+    if '.from' not in content or is_client_file(content):
+        return content
+    replacements = [(chain, new) for chain, new, _ in translate_chains(content, filepath) if new]
+    if not replacements:
+        return content
+    helpers = set()
+    for chain, new in reversed(replacements):
+        helpers.add('asCount' if new.startswith('asCount(') else 'asResult')
+        content = content[:chain.start] + new + content[chain.end:]
+    return add_imports(content, helpers)
+
+
+# ---------------------------------------------------------------------------
+# Untranslated listing
+
+def untranslated(root_dirs=ROOT_DIRS):
+    """(path, line, table, reason) for every chain the rule leaves in place."""
+    for fp in iter_source_files(root_dirs):
+        if should_skip(fp):
+            continue
+        content = read_source(fp)
+        for chain, new, reason in translate_chains(content, fp):
+            if new is None:
+                yield fp, line_of(content, chain.start), chain.table, reason
+
+
+def print_untranslated(items, out=sys.stderr):
+    items = list(items)
+    print(f"\n{len(items)} chains left in place:", file=out)
+    for path, line, table, reason in items:
+        print(f"  {path}:{line}  {table or '?'}  {reason}", file=out)
+
+
+if __name__ == '__main__':
+    status = main(['supabase_to_prisma'])
+    print_untranslated(untranslated())
+    sys.exit(status)